@@ -0,0 +1,81 @@
+# benchmarks/bench_large_cart.py
+"""
+Alta de ventas B2B con carritos grandes: create_sale línea por línea contra el
+camino por lotes (LARGE_CART_MIN_LINES), sobre SQLite en memoria.
+
+En PostgreSQL la diferencia es mayor: cada consulta por línea es además un
+viaje de ida y vuelta por la red.
+
+Uso (desde la raíz del repo):
+    python -m benchmarks.bench_large_cart
+    python -m benchmarks.bench_large_cart --lines 1000 5000 --repeat 3
+"""
+import argparse
+import time
+from decimal import Decimal
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from neos_core.crud import sales_crud
+from neos_core.database import config, models
+from neos_core.database.partitioning import create_schema
+from neos_core.schemas.sales_schema import SaleCreate
+
+
+def make_session(lines: int):
+    engine = create_engine("sqlite:///:memory:")
+    create_schema(engine)
+    db = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+
+    db.add_all([models.Role(id=1, name="admin"), models.Tenant(id=1, name="Mayorista", is_active=True)])
+    db.commit()
+    db.add_all([
+        models.User(id=1, email="bench@neos", hashed_password="-", role_id=1, tenant_id=1, is_active=True),
+        models.Currency(id=1, code="ARS", name="Peso", symbol="$"),
+        models.PointOfSale(id=1, tenant_id=1, name="Depósito", code="DEP"),
+    ])
+    db.add_all([
+        models.Product(tenant_id=1, sku=f"B-{i}", name=f"Artículo {i}", price=Decimal(i % 997 + 1) / 4,
+                       stock=Decimal("1000000"), tax_rate=Decimal("21"))
+        for i in range(lines)
+    ])
+    db.commit()
+    return db
+
+
+def bench(lines: int, repeat: int):
+    db = make_session(lines)
+    sale_data = SaleCreate(
+        point_of_sale_id=1, currency_id=1, payment_method="TRANSFER",
+        items=[{"product_id": i + 1, "quantity": "2.5"} for i in range(lines)]
+    )
+
+    def run(threshold: int) -> float:
+        config.LARGE_CART_MIN_LINES = threshold
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            sales_crud.create_sale(db, 1, 1, sale_data)
+            best = min(best, time.perf_counter() - start)
+        return best
+
+    per_line = run(0)
+    batched = run(1)
+    print(f"{lines:>7} líneas | por línea {per_line * 1000:9.1f} ms | por lotes {batched * 1000:9.1f} ms"
+          f" | {per_line / batched:5.1f}x")
+    db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lines", type=int, nargs="+", default=[200, 1000, 5000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    for lines in args.lines:
+        bench(lines, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
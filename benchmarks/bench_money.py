@@ -0,0 +1,94 @@
+# benchmarks/bench_money.py
+"""
+Microbenchmark del núcleo de punto fijo (services/money.py) contra Decimal.
+
+Mide el cálculo por línea (subtotal + impuesto redondeados) de dos formas:
+- "escalado": los valores ya están en enteros escalados (p. ej. arrays o
+  columnas enteras); solo aritmética entera.
+- "con conversión": entradas y salidas Decimal, como en create_sale; incluye
+  convertir cada importe a entero y volver.
+
+El segundo caso es el que justifica que compute_taxes siga cuantizando cada
+línea con Decimal (implementado en C) y use el núcleo entero solo donde no hay
+conversión por línea.
+
+Uso (desde la raíz del repo):
+    python -m benchmarks.bench_money
+    python -m benchmarks.bench_money --lines 1000 10000 50000 --repeat 5
+"""
+import argparse
+import timeit
+from decimal import Decimal, ROUND_HALF_UP
+
+from benchmarks.bench_tax import make_cart
+from neos_core.services import money
+
+CENTS = Decimal("0.01")
+HUNDRED = Decimal("100")
+
+
+def decimal_lines(items):
+    """Referencia: la cuantización por línea de tax.compute_taxes"""
+    subtotal_sum = tax_sum = Decimal("0")
+    for quantity, unit_price, tax_rate in items:
+        subtotal = (quantity * unit_price).quantize(CENTS, ROUND_HALF_UP)
+        tax_amount = (subtotal * tax_rate / HUNDRED).quantize(CENTS, ROUND_HALF_UP)
+        subtotal_sum += subtotal
+        tax_sum += tax_amount
+    return subtotal_sum, tax_sum
+
+
+def scaled_lines(items):
+    """Núcleo entero sobre valores ya escalados (cantidad x10^4, centavos, tasa x10^2)"""
+    div_round, qty_scale, percent_scale = money.div_round, money.QTY_SCALE, money.PERCENT_SCALE
+    subtotal_sum = tax_sum = 0
+    for qty, price_cents, rate in items:
+        subtotal = div_round(qty * price_cents, qty_scale)
+        subtotal_sum += subtotal
+        tax_sum += div_round(subtotal * rate, percent_scale)
+    return subtotal_sum, tax_sum
+
+
+def converted_lines(items):
+    """Núcleo entero con entrada y salida Decimal por línea"""
+    to_qty, to_cents, from_cents = money.to_qty, money.to_cents, money.from_cents
+    subtotal_sum = tax_sum = Decimal("0")
+    for quantity, unit_price, tax_rate in items:
+        subtotal = money.line_amount(to_qty(quantity), to_cents(unit_price))
+        tax_amount = money.percent_of(subtotal, money.to_rate(tax_rate))
+        subtotal_sum += from_cents(subtotal)
+        tax_sum += from_cents(tax_amount)
+    return subtotal_sum, tax_sum
+
+
+def bench(lines: int, repeat: int):
+    cart = make_cart(lines)
+    scaled_cart = [(money.to_qty(q), money.to_cents(p), money.to_rate(r)) for q, p, r in cart]
+
+    expected = decimal_lines(cart)
+    assert converted_lines(cart) == expected
+    assert tuple(money.from_cents(v) for v in scaled_lines(scaled_cart)) == expected
+
+    def timed(fn, data):
+        return min(timeit.repeat(lambda: fn(data), number=1, repeat=repeat))
+
+    reference = timed(decimal_lines, cart)
+    scaled = timed(scaled_lines, scaled_cart)
+    converted = timed(converted_lines, cart)
+    print(f"{lines:>7} líneas | Decimal {reference * 1000:8.2f} ms"
+          f" | escalado {scaled * 1000:8.2f} ms ({reference / scaled:4.2f}x)"
+          f" | con conversión {converted * 1000:8.2f} ms ({reference / converted:4.2f}x)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lines", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    for lines in args.lines:
+        bench(lines, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
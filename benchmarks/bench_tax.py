@@ -0,0 +1,77 @@
+# benchmarks/bench_tax.py
+"""
+Microbenchmark del motor de impuestos con carritos mayoristas.
+
+Compara compute_taxes (factor por tasa precalculado y grupos acumulados en
+una pasada) contra un cálculo ingenuo por línea que divide la tasa en cada
+línea y agrupa en una segunda pasada.
+
+Uso (desde la raíz del repo):
+    python -m benchmarks.bench_tax
+    python -m benchmarks.bench_tax --lines 1000 10000 50000 --repeat 5
+"""
+import argparse
+import random
+import timeit
+from collections import defaultdict
+from decimal import Decimal, ROUND_HALF_UP
+
+from neos_core.services.tax import compute_taxes
+
+CENTS = Decimal("0.01")
+RATES = [Decimal("0"), Decimal("10.5"), Decimal("21"), Decimal("27")]
+
+
+def make_cart(lines: int, seed: int = 42):
+    rng = random.Random(seed)
+    return [
+        (
+            Decimal(rng.randint(1, 5000)) / 100,   # cantidad con fracción (kg)
+            Decimal(rng.randint(1, 1_000_000)) / 100,
+            rng.choice(RATES),
+        )
+        for _ in range(lines)
+    ]
+
+
+def naive_taxes(items):
+    """Referencia: tasa / 100 por línea y agrupación en una segunda pasada"""
+    lines = []
+    for quantity, unit_price, tax_rate in items:
+        subtotal = (quantity * unit_price).quantize(CENTS, rounding=ROUND_HALF_UP)
+        tax_amount = (subtotal * (tax_rate / Decimal("100"))).quantize(CENTS, rounding=ROUND_HALF_UP)
+        lines.append((tax_rate, subtotal, tax_amount))
+
+    groups = defaultdict(lambda: [Decimal("0"), Decimal("0")])
+    for tax_rate, subtotal, tax_amount in lines:
+        groups[tax_rate][0] += subtotal
+        groups[tax_rate][1] += tax_amount
+    subtotal = sum(g[0] for g in groups.values())
+    tax = sum(g[1] for g in groups.values())
+    return subtotal, tax
+
+
+def bench(lines: int, repeat: int):
+    cart = make_cart(lines)
+
+    engine_result = compute_taxes(cart, rounding="line")
+    assert (engine_result.subtotal, engine_result.tax_amount) == naive_taxes(cart)
+
+    engine = min(timeit.repeat(lambda: compute_taxes(cart, rounding="line"), number=1, repeat=repeat))
+    naive = min(timeit.repeat(lambda: naive_taxes(cart), number=1, repeat=repeat))
+    print(f"{lines:>7} líneas | motor {engine * 1000:8.2f} ms | ingenuo {naive * 1000:8.2f} ms"
+          f" | {naive / engine:4.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lines", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    for lines in args.lines:
+        bench(lines, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
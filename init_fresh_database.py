@@ -9,6 +9,7 @@ from dotenv import load_dotenv
 from neos_core.database.config import Base, SessionLocal, engine
 from neos_core.database.models import *
 from neos_core.database.seed import run_full_seed
+from neos_core.database.partitioning import create_schema
 
 
 class Colors:
@@ -58,7 +59,8 @@ def create_all_tables():
     """Create all tables using SQLAlchemy metadata"""
     print_step("Creating all tables...")
     try:
-        Base.metadata.create_all(bind=engine)
+        # Respeta SALES_PARTITIONING_ENABLED (ventas particionadas por mes en PostgreSQL)
+        create_schema(engine)
 
         from sqlalchemy import inspect
         inspector = inspect(engine)
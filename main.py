@@ -3,15 +3,30 @@
 Punto de entrada principal de Neos Core API
 FastAPI application con configuración de CORS y lifespan
 """
-from fastapi import FastAPI
+from fastapi import FastAPI, Response, status
+from fastapi.responses import JSONResponse
+from sqlalchemy import text
 from fastapi.middleware.cors import CORSMiddleware
+import asyncio
 import logging
 from contextlib import asynccontextmanager
 
 # Importaciones de Neos Core
 from neos_core.api.v1.api_router import api_router
 from neos_core.security.auth_router import router as auth_router
-from neos_core.database.config import engine
+from neos_core.database.config import engine, replica_engine, get_pool_status
+from neos_core.database.routing import ReadAfterWriteMiddleware
+from neos_core.database.sharding import shard_router, shard_map_watch_loop
+from neos_core.database import config, partitioning
+from neos_core.services import metrics
+from neos_core.services.reservations import reservation_sweep_loop
+from neos_core.services.electronic_invoicing import electronic_invoicing_loop
+from neos_core.services.outbox import outbox_relay_loop
+from neos_core.services.webhooks import webhook_delivery_loop
+from neos_core.services.jobs import job_worker_loop
+from neos_core.services.audit import audit_flush_loop
+from neos_core.services.invalidation import invalidation_bus
+from neos_core.services.shutdown import drain, graceful_shutdown, install_signal_handlers
 
 # --- Configuración de Logging ---
 logging.basicConfig(
@@ -39,12 +54,35 @@ async def lifespan(app: FastAPI):
         log.error("   Ejecuta: python init_database.py")
         raise
 
+    # Tareas de fondo
+    background_tasks = []
+    if partitioning.is_enabled(engine):
+        background_tasks.append(asyncio.create_task(partitioning.partition_maintenance_loop(engine)))
+        log.info("✓ Mantenimiento de particiones de ventas activo")
+    background_tasks.append(asyncio.create_task(reservation_sweep_loop()))
+    background_tasks.append(asyncio.create_task(electronic_invoicing_loop()))
+    background_tasks.append(asyncio.create_task(outbox_relay_loop()))
+    background_tasks.append(asyncio.create_task(webhook_delivery_loop()))
+    for slot in range(config.JOBS_API_WORKERS):
+        background_tasks.append(asyncio.create_task(job_worker_loop(slot)))
+    background_tasks.append(asyncio.create_task(audit_flush_loop()))
+    # Foto de las métricas del worker para que /metrics sume todos (METRICS_MULTIPROC_DIR)
+    background_tasks.append(asyncio.create_task(metrics.metrics_snapshot_loop()))
+    # Relectura del mapa de shards (movimientos de tenants hechos por otro proceso)
+    background_tasks.append(asyncio.create_task(shard_map_watch_loop()))
+    # Avisos de invalidación de cachés de los demás workers (uno por shard)
+    invalidation_bus.start({name: shard_router.engine_for(name) for name in shard_router.shard_names})
+    # /ready pasa a 503 y corre el plazo de apagado desde la señal, no desde el lifespan
+    install_signal_handlers()
+
     log.info("✓ Neos Core API iniciada correctamente")
 
     yield  # Aplicación corriendo
 
     # Shutdown
     log.info("🔴 Cerrando Neos Core API...")
+    await graceful_shutdown(background_tasks)
+    log.info("✓ Neos Core API detenida")
 
 
 # --- Crear aplicación FastAPI ---
@@ -72,6 +110,16 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# --- Métricas (latencia por ruta y requests en curso) ---
+app.add_middleware(metrics.MetricsMiddleware)
+# --- Leer lo escrito: marca de escritura en la respuesta (ver database/routing.py) ---
+app.add_middleware(ReadAfterWriteMiddleware)
+metrics.register_pool_metrics(engine)
+if replica_engine is not None:
+    metrics.register_pool_metrics(replica_engine, name="replica")
+for shard_name in shard_router.shard_names[1:]:
+    metrics.register_pool_metrics(shard_router.engine_for(shard_name), name=f"shard_{shard_name}")
+
 # --- REGISTRO DE RUTAS ---
 
 # 1. Autenticación
@@ -92,6 +140,41 @@ async def health_check():
     }
 
 
+@app.get("/ready", tags=["Health"])
+def readiness_check():
+    """
+    Verificación de disponibilidad (readiness).
+    Comprueba la base de datos y expone estadísticas en vivo del pool.
+    Durante el apagado responde 503 para que el balanceador deje de enviar tráfico.
+    """
+    pool = get_pool_status(engine)
+    if drain.draining:
+        return JSONResponse(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            content={"status": "draining", "pool": pool}
+        )
+    try:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+    except Exception as e:
+        log.warning(f"Readiness: base de datos no disponible: {e}")
+        return JSONResponse(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            content={"status": "unavailable", "database": "down", "pool": pool}
+        )
+
+    response = {"status": "ready", "database": "up", "pool": pool}
+    if replica_engine is not None:
+        response["replica_pool"] = get_pool_status(replica_engine)
+    return response
+
+
+@app.get("/metrics", tags=["Health"], include_in_schema=False)
+def metrics_endpoint():
+    """Métricas en formato de exposición de texto de Prometheus (sumando todos los workers)"""
+    return Response(content=metrics.REGISTRY.render(), media_type=metrics.CONTENT_TYPE_LATEST)
+
+
 @app.get("/", tags=["Root"])
 async def root():
     """Endpoint raíz"""
@@ -99,11 +182,13 @@ async def root():
         "message": "Bienvenido a Neos Core API",
         "version": "1.0.0",
         "docs": "/docs",
-        "health": "/health"
+        "health": "/health",
+        "ready": "/ready"
     }
 
 
 if __name__ == "__main__":
+    # Desarrollo (un worker, recarga automática); en producción: python -m neos_core.server
     import uvicorn
 
     uvicorn.run(
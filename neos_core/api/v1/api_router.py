@@ -11,7 +11,14 @@ from neos_core.api.v1.endpoints import (
     product_routes,  # Renombrado de inventory_routes
     config_routes,
     client_routes,
-    sales_routes  # ⭐ NUEVO
+    sales_routes,  # ⭐ NUEVO
+    stock_routes,
+    reservation_routes,
+    pricing_routes,
+    event_routes,
+    webhook_routes,
+    job_routes,
+    audit_routes
 )
 
 # Crear router principal
@@ -40,6 +47,55 @@ api_router.include_router(
     tags=["Products"]
 )
 
+# Stock por ubicación y transferencias
+api_router.include_router(
+    stock_routes.router,
+    prefix="/stock",
+    tags=["Stock"]
+)
+
+# Reservas de stock (carritos)
+api_router.include_router(
+    reservation_routes.router,
+    prefix="/reservations",
+    tags=["Reservations"]
+)
+
+# Listas de precios, promociones y cotización
+api_router.include_router(
+    pricing_routes.router,
+    prefix="/pricing",
+    tags=["Pricing"]
+)
+
+# Eventos de negocio (outbox) para integraciones
+api_router.include_router(
+    event_routes.router,
+    prefix="/events",
+    tags=["Events"]
+)
+
+# Webhooks
+api_router.include_router(
+    webhook_routes.router,
+    prefix="/webhooks",
+    tags=["Webhooks"]
+)
+
+# Tareas en segundo plano
+api_router.include_router(
+    job_routes.router,
+    prefix="/jobs",
+    tags=["Jobs"]
+)
+
+# Auditoría
+api_router.include_router(
+    audit_routes.router,
+    prefix="/audit",
+    tags=["Audit"]
+)
+
 # Configuration (Currencies & PointOfSale)
 api_router.include_router(
     config_routes.router,
@@ -8,7 +8,14 @@ from . import (
     product_routes,
     config_routes,
     client_routes,
-    sales_routes
+    sales_routes,
+    stock_routes,
+    reservation_routes,
+    pricing_routes,
+    event_routes,
+    webhook_routes,
+    job_routes,
+    audit_routes
 )
 
 __all__ = [
@@ -18,4 +25,11 @@ __all__ = [
     "config_routes",
     "client_routes",
     "sales_routes",
+    "stock_routes",
+    "reservation_routes",
+    "pricing_routes",
+    "event_routes",
+    "webhook_routes",
+    "job_routes",
+    "audit_routes",
 ]
\ No newline at end of file
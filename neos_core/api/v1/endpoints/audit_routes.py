@@ -0,0 +1,71 @@
+# neos_core/api/v1/endpoints/audit_routes.py
+"""
+Consulta del registro de auditoría: cambios de precio y stock, altas de
+usuarios y cancelaciones de ventas
+"""
+from datetime import datetime
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session
+
+from neos_core.database.routing import get_read_db
+from neos_core.database.models import User
+from neos_core.security.security_deps import get_current_user
+from neos_core.schemas.audit_schema import AuditEntry
+from neos_core.crud import audit_crud as crud
+
+router = APIRouter()
+
+
+# ===== DEPENDENCIA DE PERMISOS =====
+
+def check_audit_permission(current_user: User = Depends(get_current_user)):
+    """
+    Verifica permisos para leer la auditoría
+    Roles permitidos: admin, superadmin
+    """
+    allowed_roles = ["admin", "superadmin"]
+
+    if current_user.role.name not in allowed_roles:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail=f"Permiso denegado. Roles permitidos: {', '.join(allowed_roles)}"
+        )
+
+    return current_user
+
+
+@router.get("/", response_model=List[AuditEntry])
+def list_audit_log(
+        entity_type: Optional[str] = Query(None, description="product, product_variant, location_stock, user, sale"),
+        entity_id: Optional[int] = None,
+        action: Optional[str] = Query(None, description="product.updated, sale.cancelled, ..."),
+        actor_user_id: Optional[int] = None,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None,
+        before_id: Optional[int] = Query(None, ge=1, description="Id del último registro recibido (página siguiente)"),
+        limit: int = Query(100, ge=1, le=500),
+        db: Session = Depends(get_read_db),
+        current_user: User = Depends(check_audit_permission)
+):
+    """
+    Registro de auditoría del tenant, del más nuevo al más viejo.
+
+    **Permisos requeridos:** admin, superadmin
+
+    Se escribe en diferido: un cambio recién hecho puede tardar unos
+    segundos en aparecer.
+    """
+    return crud.get_audit_log(
+        db=db,
+        tenant_id=current_user.tenant_id,
+        entity_type=entity_type,
+        entity_id=entity_id,
+        action=action,
+        actor_user_id=actor_user_id,
+        date_from=date_from,
+        date_to=date_to,
+        before_id=before_id,
+        limit=limit
+    )
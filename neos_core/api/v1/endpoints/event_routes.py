@@ -0,0 +1,115 @@
+# neos_core/api/v1/endpoints/event_routes.py
+"""
+Stream de eventos de negocio (outbox) para integraciones: ERP, fidelización
+"""
+import asyncio
+import json
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+
+from neos_core.database.routing import get_read_db
+from neos_core.database.models import User
+from neos_core.security.security_deps import get_current_user
+from neos_core.crud import outbox_crud as crud
+from neos_core.services.events import outbox_broker
+from neos_core.services.outbox import event_to_record
+
+router = APIRouter()
+
+# Eventos leídos por consulta
+STREAM_PAGE_SIZE = 500
+# Con follow=true, cada cuánto se vuelve a consultar si no llegó ningún aviso
+# (llegan de todos los workers, salvo que el listener esté desconectado) y se
+# envía una línea vacía para que proxies no corten la conexión
+STREAM_POLL_SECONDS = 15
+
+
+# ===== DEPENDENCIA DE PERMISOS =====
+def check_integration_permission(current_user: User = Depends(get_current_user)):
+    """
+    Verifica permisos para integraciones (eventos, webhooks)
+    Roles permitidos: admin, superadmin
+    """
+    allowed_roles = ["admin", "superadmin"]
+
+    if current_user.role.name not in allowed_roles:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail=f"Permiso denegado. Roles permitidos: {', '.join(allowed_roles)}"
+        )
+
+    return current_user
+
+
+def _ndjson(events) -> str:
+    return "".join(json.dumps(event_to_record(e), separators=(",", ":")) + "\n" for e in events)
+
+
+async def outbox_event_stream(
+        request: Request,
+        db: Session,
+        tenant_id: int,
+        after: int,
+        follow: bool,
+        poll_seconds: float = STREAM_POLL_SECONDS
+):
+    """
+    Emite los eventos con sequence > after por páginas. Con `follow` queda
+    esperando eventos nuevos (avisos de outbox_broker o consulta periódica).
+    """
+    queue = outbox_broker.subscribe(tenant_id) if follow else None
+
+    def load_page(offset: int):
+        try:
+            return crud.get_events(db, tenant_id, after=offset, limit=STREAM_PAGE_SIZE)
+        finally:
+            # No retener la conexión entre páginas: el stream puede durar horas
+            db.close()
+
+    try:
+        while True:
+            events = await run_in_threadpool(load_page, after)
+            if events:
+                after = events[-1].sequence
+                yield _ndjson(events)
+            if len(events) == STREAM_PAGE_SIZE:
+                continue
+            if not follow or await request.is_disconnected():
+                break
+            try:
+                await asyncio.wait_for(queue.get(), timeout=poll_seconds)
+            except asyncio.TimeoutError:
+                yield "\n"
+    finally:
+        if queue is not None:
+            outbox_broker.unsubscribe(tenant_id, queue)
+
+
+@router.get("/stream")
+async def stream_events(
+        request: Request,
+        after: int = Query(0, ge=0, description="Último sequence recibido (reanudar desde ahí)"),
+        follow: bool = Query(False, description="Mantener abierta la conexión y enviar eventos nuevos"),
+        db: Session = Depends(get_read_db),
+        current_user: User = Depends(check_integration_permission)
+):
+    """
+    Eventos del tenant en NDJSON, una línea por evento, en orden de `sequence`:
+
+    `{"sequence", "id", "type", "entity_id", "occurred_at", "payload"}`
+
+    Tipos: `sale.created`, `sale.cancelled`, `product.created`,
+    `product.updated`, `product.deleted`, `stock.low`, `stock.restored`. Para reanudar, pedir de nuevo con
+    `after` = último sequence procesado. Con `follow=true` las líneas vacías
+    son keep-alive.
+
+    **Permisos requeridos:** admin, superadmin
+    """
+    return StreamingResponse(
+        outbox_event_stream(request, db, current_user.tenant_id, after, follow),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -0,0 +1,83 @@
+# neos_core/api/v1/endpoints/job_routes.py
+"""
+Endpoints de tareas en segundo plano: encolar, consultar estado y progreso,
+cancelar y descargar el resultado
+"""
+import os
+from typing import List, Optional
+from fastapi import APIRouter, Depends, Query, status
+from fastapi.responses import FileResponse
+from sqlalchemy.orm import Session
+
+from neos_core.database.config import get_db
+from neos_core.database.models import User
+from neos_core.security.security_deps import get_current_user
+from neos_core.schemas.job_schema import Job, JobCreate, JobStatus
+from neos_core.crud import job_crud as crud
+
+router = APIRouter()
+
+
+@router.post("/", response_model=Job, status_code=status.HTTP_202_ACCEPTED)
+def create_job(
+        data: JobCreate,
+        db: Session = Depends(get_db),
+        current_user: User = Depends(get_current_user)
+):
+    """
+    Encola una tarea y responde enseguida; el progreso se consulta en
+    `GET /jobs/{id}`.
+
+    Tipos:
+    - `sales_export` (`date_from`, `date_to`): ventas en NDJSON, descarga en `/jobs/{id}/result`
+    - `product_import` (`products`, `update_existing`): alta masiva de productos
+      (**roles:** inventory, admin, superadmin)
+    """
+    return crud.create_job(db=db, user=current_user, data=data)
+
+
+@router.get("/", response_model=List[Job])
+def list_jobs(
+        status_filter: Optional[JobStatus] = Query(None, alias="status"),
+        kind: Optional[str] = None,
+        skip: int = Query(0, ge=0),
+        limit: int = Query(50, ge=1, le=200),
+        db: Session = Depends(get_db),
+        current_user: User = Depends(get_current_user)
+):
+    """
+    Lista las tareas, de la más nueva a la más vieja.
+    Admin y superadmin ven todas las del tenant; el resto, las propias.
+    """
+    return crud.get_jobs(db=db, user=current_user, status_filter=status_filter, kind=kind, skip=skip, limit=limit)
+
+
+@router.get("/{job_id}", response_model=Job)
+def get_job(
+        job_id: int,
+        db: Session = Depends(get_db),
+        current_user: User = Depends(get_current_user)
+):
+    """Estado, progreso y resultado de una tarea"""
+    return crud.get_job(db=db, job_id=job_id, user=current_user)
+
+
+@router.post("/{job_id}/cancel", response_model=Job)
+def cancel_job(
+        job_id: int,
+        db: Session = Depends(get_db),
+        current_user: User = Depends(get_current_user)
+):
+    """Cancela una tarea en cola o en curso (lo que llevaba hecho se descarta)"""
+    return crud.cancel_job(db=db, job_id=job_id, user=current_user)
+
+
+@router.get("/{job_id}/result")
+def download_result(
+        job_id: int,
+        db: Session = Depends(get_db),
+        current_user: User = Depends(get_current_user)
+):
+    """Descarga el archivo generado por la tarea (exportaciones)"""
+    path = crud.get_result_file(db=db, job_id=job_id, user=current_user)
+    return FileResponse(path, media_type="application/x-ndjson", filename=os.path.basename(path))
@@ -0,0 +1,130 @@
+# neos_core/api/v1/endpoints/pricing_routes.py
+"""
+Endpoints de listas de precios, promociones y cotización de carritos
+"""
+from typing import List
+from fastapi import APIRouter, Depends, Query, status
+from sqlalchemy.orm import Session
+
+from neos_core.database.config import get_db
+from neos_core.database.routing import get_read_db
+from neos_core.database.models import User
+from neos_core.security.security_deps import get_current_user
+from neos_core.schemas.pricing_schema import (
+    PriceList,
+    PriceListCreate,
+    PriceListUpdate,
+    Promotion,
+    PromotionCreate,
+    PromotionUpdate,
+    QuoteRequest,
+    QuoteResponse
+)
+from neos_core.crud import pricing_crud as crud
+from neos_core.api.v1.endpoints.product_routes import check_product_write_permission
+from neos_core.api.v1.endpoints.sales_routes import check_sale_permission
+
+router = APIRouter()
+
+
+# ===== LISTAS DE PRECIOS =====
+
+@router.post("/price-lists", response_model=PriceList, status_code=status.HTTP_201_CREATED)
+def create_price_list(
+        data: PriceListCreate,
+        db: Session = Depends(get_db),
+        current_user: User = Depends(check_product_write_permission)
+):
+    """
+    Crea una lista de precios (general, por cliente y/o por punto de venta).
+
+    **Permisos requeridos:** inventory, admin, superadmin
+    """
+    return crud.create_price_list(db=db, tenant_id=current_user.tenant_id, data=data)
+
+
+@router.get("/price-lists", response_model=List[PriceList])
+def list_price_lists(
+        db: Session = Depends(get_read_db),
+        current_user: User = Depends(get_current_user)
+):
+    """Lista las listas de precios de su tenant"""
+    return crud.get_price_lists(db=db, tenant_id=current_user.tenant_id)
+
+
+@router.put("/price-lists/{price_list_id}", response_model=PriceList)
+def update_price_list(
+        price_list_id: int,
+        data: PriceListUpdate,
+        db: Session = Depends(get_db),
+        current_user: User = Depends(check_product_write_permission)
+):
+    """
+    Modifica una lista de precios. `items` agrega o cambia precios sin borrar
+    los demás; `is_active=false` la deja de aplicar.
+
+    **Permisos requeridos:** inventory, admin, superadmin
+    """
+    return crud.update_price_list(
+        db=db, price_list_id=price_list_id, tenant_id=current_user.tenant_id, data=data
+    )
+
+
+# ===== PROMOCIONES =====
+
+@router.post("/promotions", response_model=Promotion, status_code=status.HTTP_201_CREATED)
+def create_promotion(
+        data: PromotionCreate,
+        db: Session = Depends(get_db),
+        current_user: User = Depends(check_product_write_permission)
+):
+    """
+    Crea una promoción: porcentaje, NxM (por producto o categoría) o combo.
+
+    **Permisos requeridos:** inventory, admin, superadmin
+    """
+    return crud.create_promotion(db=db, tenant_id=current_user.tenant_id, data=data)
+
+
+@router.get("/promotions", response_model=List[Promotion])
+def list_promotions(
+        active_only: bool = Query(False, description="Solo promociones activas"),
+        db: Session = Depends(get_read_db),
+        current_user: User = Depends(get_current_user)
+):
+    """Lista las promociones de su tenant por prioridad"""
+    return crud.get_promotions(db=db, tenant_id=current_user.tenant_id, active_only=active_only)
+
+
+@router.put("/promotions/{promotion_id}", response_model=Promotion)
+def update_promotion(
+        promotion_id: int,
+        data: PromotionUpdate,
+        db: Session = Depends(get_db),
+        current_user: User = Depends(check_product_write_permission)
+):
+    """
+    Modifica vigencia, prioridad o estado de una promoción.
+
+    **Permisos requeridos:** inventory, admin, superadmin
+    """
+    return crud.update_promotion(
+        db=db, promotion_id=promotion_id, tenant_id=current_user.tenant_id, data=data
+    )
+
+
+# ===== COTIZACIÓN =====
+
+@router.post("/quote", response_model=QuoteResponse)
+def quote_cart(
+        data: QuoteRequest,
+        db: Session = Depends(get_read_db),
+        current_user: User = Depends(check_sale_permission)
+):
+    """
+    Cotiza un carrito con la lista de precios y las promociones vigentes,
+    sin registrar la venta ni reservar stock.
+
+    **Permisos requeridos:** seller, admin, superadmin
+    """
+    return crud.quote_cart(db=db, tenant_id=current_user.tenant_id, data=data)
@@ -3,23 +3,40 @@
 Endpoints para gestión de productos (inventario)
 Incluye: CREATE, READ, UPDATE, DELETE y búsquedas especiales
 """
+import asyncio
+import json
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
 from neos_core.database.config import get_db
+from neos_core.database.routing import get_read_db
 from neos_core.database.models import User, Product
 from neos_core.security.security_deps import get_current_user
 from neos_core.schemas.product_schema import (
     Product as ProductSchema,
     ProductCreate,
     ProductUpdate,
-    ProductListResponse
+    ProductListResponse,
+    ProductVariant as ProductVariantSchema,
+    ProductVariantCreate,
+    ProductVariantUpdate,
+    ProductBarcodeResponse,
+    CatalogItemResponse
 )
 from neos_core.crud import product_crud as crud
+from neos_core.services.events import low_stock_broker
 
 router = APIRouter()
 
+# Prefijo de query params para filtrar por atributos: ?attributes.color=Rojo
+ATTRIBUTE_FILTER_PREFIX = "attributes."
+
+# Comentario SSE periódico para que proxies no corten la conexión inactiva
+SSE_HEARTBEAT_SECONDS = 15
+
 
 # ===== DEPENDENCIA DE PERMISOS =====
 def check_product_write_permission(current_user: User = Depends(get_current_user)):
@@ -67,10 +84,11 @@ def create_product(
 # ===== READ (LIST) =====
 @router.get("/", response_model=List[ProductListResponse])
 def list_products(
+        request: Request,
         skip: int = Query(0, ge=0),
         limit: int = Query(100, ge=1, le=500),
         is_active: Optional[bool] = Query(None, description="Filtrar por estado activo/inactivo"),
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         current_user: User = Depends(get_current_user)
 ):
     """
@@ -78,11 +96,18 @@ def list_products(
 
     **Filtros:**
     - is_active: true/false para filtrar por estado
+    - attributes.<clave>=<valor>: filtra por atributos (ej: `attributes.color=Rojo&attributes.talle=M`)
 
     **Aislamiento:**
     - SuperAdmin ve todos los productos
     - Otros usuarios solo ven productos de su tenant
     """
+    attributes = {
+        key[len(ATTRIBUTE_FILTER_PREFIX):]: value
+        for key, value in request.query_params.items()
+        if key.startswith(ATTRIBUTE_FILTER_PREFIX)
+    }
+
     # SuperAdmin puede ver todos los productos
     if current_user.role.name == "superadmin":
         query = db.query(Product)
@@ -90,10 +115,37 @@ def list_products(
         if is_active is not None:
             query = query.filter(Product.is_active == is_active)
 
-        return query.offset(skip).limit(limit).all()
+        query = crud.filter_by_attributes(db, query, attributes)
+
+        return query.order_by(Product.id).offset(skip).limit(limit).all()
 
     # Usuarios normales solo ven productos de su tenant
     return crud.get_products_by_tenant(
+        db=db,
+        tenant_id=current_user.tenant_id,
+        skip=skip,
+        limit=limit,
+        is_active=is_active,
+        attributes=attributes
+    )
+
+
+# ===== CATÁLOGO (PADRES + STOCK DE VARIANTES) =====
+@router.get("/catalog", response_model=List[CatalogItemResponse])
+def get_catalog(
+        skip: int = Query(0, ge=0),
+        limit: int = Query(100, ge=1, le=500),
+        is_active: Optional[bool] = Query(None, description="Filtrar por estado activo/inactivo"),
+        db: Session = Depends(get_read_db),
+        current_user: User = Depends(get_current_user)
+):
+    """
+    Lista productos padre con cantidad de variantes y stock total agregado.
+    Resuelto en una sola consulta, apto para catálogos con muchas variantes.
+
+    **Solo muestra productos de su tenant.**
+    """
+    return crud.get_catalog(
         db=db,
         tenant_id=current_user.tenant_id,
         skip=skip,
@@ -102,6 +154,23 @@ def list_products(
     )
 
 
+# ===== SEARCH =====
+@router.get("/search", response_model=List[ProductListResponse])
+def search_products(
+        q: str = Query(..., min_length=1, max_length=100, description="Texto a buscar (admite palabras parciales)"),
+        limit: int = Query(20, ge=1, le=100),
+        db: Session = Depends(get_read_db),
+        current_user: User = Depends(get_current_user)
+):
+    """
+    Búsqueda de productos por nombre, descripción, SKU y atributos.
+    Ordena por relevancia. Pensado para el buscador del POS.
+
+    **Solo busca productos activos de su tenant.**
+    """
+    return crud.search_products(db=db, tenant_id=current_user.tenant_id, query=q, limit=limit)
+
+
 # ===== READ (BY ID) =====
 @router.get("/{product_id}", response_model=ProductSchema)
 def get_product(
@@ -152,7 +221,7 @@ def get_product_by_sku(
 
 
 # ===== READ (BY BARCODE) =====
-@router.get("/barcode/{barcode}", response_model=ProductSchema)
+@router.get("/barcode/{barcode}", response_model=ProductBarcodeResponse)
 def get_product_by_barcode(
         barcode: str,
         db: Session = Depends(get_db),
@@ -161,8 +230,11 @@ def get_product_by_barcode(
     """
     Busca un producto por código de barras.
     Esencial para escaneo en el POS.
+
+    Si el código corresponde a una variante, devuelve el producto padre
+    con la variante escaneada en `variant`.
     """
-    product = crud.get_product_by_barcode(db, barcode, current_user.tenant_id)
+    product, variant = crud.find_by_barcode(db, barcode, current_user.tenant_id)
 
     if not product:
         raise HTTPException(
@@ -170,7 +242,75 @@ def get_product_by_barcode(
             detail=f"Producto con código de barras '{barcode}' no encontrado"
         )
 
-    return product
+    response = ProductBarcodeResponse.model_validate(product)
+    if variant:
+        response.variant = ProductVariantSchema.model_validate(variant)
+    return response
+
+
+# ===== VARIANTES =====
+@router.post(
+    "/{product_id}/variants",
+    response_model=ProductVariantSchema,
+    status_code=status.HTTP_201_CREATED
+)
+def create_variant(
+        product_id: int,
+        variant: ProductVariantCreate,
+        db: Session = Depends(get_db),
+        current_user: User = Depends(check_product_write_permission)
+):
+    """
+    Crea una variante (talle, color, etc.) de un producto.
+
+    **Permisos requeridos:** inventory, admin, superadmin
+
+    **Validaciones:**
+    - SKU único dentro del tenant (entre productos y variantes)
+    """
+    return crud.create_variant(
+        db=db,
+        product_id=product_id,
+        tenant_id=current_user.tenant_id,
+        variant=variant
+    )
+
+
+@router.get("/{product_id}/variants", response_model=List[ProductVariantSchema])
+def list_variants(
+        product_id: int,
+        db: Session = Depends(get_read_db),
+        current_user: User = Depends(get_current_user)
+):
+    """Lista las variantes de un producto de su tenant"""
+    if not crud.get_product_by_id(db, product_id, current_user.tenant_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Producto no encontrado"
+        )
+
+    return crud.get_variants(db, product_id, current_user.tenant_id)
+
+
+@router.put("/variants/{variant_id}", response_model=ProductVariantSchema)
+def update_variant(
+        variant_id: int,
+        variant_update: ProductVariantUpdate,
+        db: Session = Depends(get_db),
+        current_user: User = Depends(check_product_write_permission)
+):
+    """
+    Actualiza una variante (precio, stock, código de barras...).
+
+    **Permisos requeridos:** inventory, admin, superadmin
+    """
+    return crud.update_variant(
+        db=db,
+        variant_id=variant_id,
+        tenant_id=current_user.tenant_id,
+        variant_update=variant_update,
+        actor_id=current_user.id
+    )
 
 
 # ===== UPDATE =====
@@ -195,7 +335,8 @@ def update_product(
         db=db,
         product_id=product_id,
         tenant_id=tenant_id,
-        product_update=product_update
+        product_update=product_update,
+        actor_id=current_user.id
     )
 
 
@@ -223,7 +364,7 @@ def delete_product(
 # ===== UTILIDADES =====
 @router.get("/utils/low-stock", response_model=List[ProductListResponse])
 def get_low_stock_products(
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         current_user: User = Depends(get_current_user)
 ):
     """
@@ -232,4 +373,72 @@ def get_low_stock_products(
 
     **Solo muestra productos de su tenant.**
     """
-    return crud.get_low_stock_products(db=db, tenant_id=current_user.tenant_id)
\ No newline at end of file
+    return crud.get_low_stock_products(db=db, tenant_id=current_user.tenant_id)
+
+
+def _sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def low_stock_event_stream(
+        request: Request,
+        tenant_id: int,
+        queue: asyncio.Queue,
+        snapshot: list,
+        heartbeat_seconds: float = SSE_HEARTBEAT_SECONDS
+):
+    """
+    Primero envía el estado actual (snapshot) y luego cada transición
+    low_stock / stock_restored publicada por low_stock_broker.
+    """
+    try:
+        yield _sse("snapshot", snapshot)
+        while not await request.is_disconnected():
+            try:
+                event = await asyncio.wait_for(queue.get(), timeout=heartbeat_seconds)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            yield _sse(event["event"], event)
+    finally:
+        low_stock_broker.unsubscribe(tenant_id, queue)
+
+
+@router.get("/utils/low-stock/stream")
+async def stream_low_stock(
+        request: Request,
+        db: Session = Depends(get_db),
+        current_user: User = Depends(check_product_write_permission)
+):
+    """
+    Alertas de stock bajo en vivo (Server-Sent Events) para encargados.
+
+    **Permisos requeridos:** inventory, admin, superadmin
+
+    Eventos: `snapshot` (alertas vigentes, con la misma forma que `low_stock`),
+    `low_stock` y `stock_restored`. Cubren productos, variantes y stock por
+    sucursal (`point_of_sale_id`), confirmados por cualquier worker.
+    Reemplaza el polling de /utils/low-stock.
+    """
+    tenant_id = current_user.tenant_id
+    # Suscribirse antes del snapshot: ninguna transición queda entre ambos
+    queue = low_stock_broker.subscribe(tenant_id)
+
+    def load_snapshot():
+        try:
+            return crud.get_low_stock_alerts(db=db, tenant_id=tenant_id)
+        finally:
+            # Liberar la conexión: el stream puede durar horas
+            db.close()
+
+    try:
+        snapshot = await run_in_threadpool(load_snapshot)
+    except Exception:
+        low_stock_broker.unsubscribe(tenant_id, queue)
+        raise
+
+    return StreamingResponse(
+        low_stock_event_stream(request, tenant_id, queue, snapshot),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
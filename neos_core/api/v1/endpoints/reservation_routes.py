@@ -0,0 +1,88 @@
+# neos_core/api/v1/endpoints/reservation_routes.py
+"""
+Endpoints de reservas de stock (carritos con vencimiento)
+"""
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.orm import Session
+
+from neos_core.database.config import get_db
+from neos_core.database.models import User
+from neos_core.security.security_deps import get_current_user
+from neos_core.schemas.reservation_schema import (
+    ReservationCreate,
+    ReservationResponse,
+    ReservationCheckout
+)
+from neos_core.schemas.sales_schema import SaleResponse
+from neos_core.crud import reservation_crud as crud
+from neos_core.api.v1.endpoints.sales_routes import check_sale_permission
+
+router = APIRouter()
+
+
+@router.post("/", response_model=ReservationResponse, status_code=status.HTTP_201_CREATED)
+def create_reservation(
+        data: ReservationCreate,
+        db: Session = Depends(get_db),
+        current_user: User = Depends(check_sale_permission)
+):
+    """
+    Reserva stock para un carrito durante `ttl_seconds`.
+
+    **Permisos requeridos:** seller, admin, superadmin
+
+    Falla con 400 si algún item no tiene stock disponible
+    (stock menos reservas activas de otros carritos).
+    """
+    return crud.create_reservation(
+        db=db,
+        tenant_id=current_user.tenant_id,
+        user_id=current_user.id,
+        data=data
+    )
+
+
+@router.get("/{reservation_id}", response_model=ReservationResponse)
+def get_reservation(
+        reservation_id: int,
+        db: Session = Depends(get_db),
+        current_user: User = Depends(get_current_user)
+):
+    """Obtiene una reserva de su tenant"""
+    reservation = crud.get_reservation(db, reservation_id, current_user.tenant_id)
+    if not reservation:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Reserva no encontrada")
+    return reservation
+
+
+@router.delete("/{reservation_id}", response_model=ReservationResponse)
+def release_reservation(
+        reservation_id: int,
+        db: Session = Depends(get_db),
+        current_user: User = Depends(check_sale_permission)
+):
+    """Libera el stock de un carrito abandonado"""
+    return crud.release_reservation(db, reservation_id, current_user.tenant_id)
+
+
+@router.post("/{reservation_id}/checkout", response_model=SaleResponse, status_code=status.HTTP_201_CREATED)
+def checkout_reservation(
+        reservation_id: int,
+        data: ReservationCheckout,
+        db: Session = Depends(get_db),
+        current_user: User = Depends(check_sale_permission)
+):
+    """
+    Convierte la reserva en venta (los items salen de la reserva).
+
+    **Permisos requeridos:** seller, admin, superadmin
+
+    Devuelve 409 si la reserva venció, se liberó o ya se vendió.
+    """
+    return crud.checkout_reservation(
+        db=db,
+        reservation_id=reservation_id,
+        tenant_id=current_user.tenant_id,
+        user_id=current_user.id,
+        data=data
+    )
@@ -1,20 +1,26 @@
 """
 Endpoints de ventas con validación de permisos por rol
 """
-from typing import List
+from datetime import datetime
+from typing import List, Optional
+import json
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
 from neos_core.database.config import get_db
+from neos_core.database.routing import get_read_db
 from neos_core.database.models import User
 from neos_core.security.security_deps import get_current_user
 from neos_core.schemas.sales_schema import (
     SaleCreate,
     SaleResponse,
     SaleListResponse,
-    SaleFilters
+    SaleFilters,
+    SalesSummaryResponse
 )
 from neos_core.crud import sales_crud
+from neos_core.services import archive
 
 router = APIRouter(prefix="/sales", tags=["Sales"])
 
@@ -47,7 +53,7 @@ def create_sale(
 @router.get("/{sale_id}", response_model=SaleResponse)
 def get_sale(
     sale_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     sale = sales_crud.get_sale_by_id(db, sale_id, current_user.tenant_id)
@@ -62,9 +68,11 @@ def list_sales(
     point_of_sale_id: int = None,
     payment_method: str = None,
     status: str = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
     skip: int = 0,
     limit: int = 50,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     filters = SaleFilters(
@@ -72,12 +80,47 @@ def list_sales(
         point_of_sale_id=point_of_sale_id,
         payment_method=payment_method,
         status=status,
+        date_from=date_from,
+        date_to=date_to,
         skip=skip,
         limit=limit
     )
     return sales_crud.get_sales(db, current_user.tenant_id, filters)
 
 
+@router.get("/reports/summary", response_model=SalesSummaryResponse)
+def sales_summary(
+    date_from: datetime,
+    date_to: datetime,
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user)
+):
+    if date_to <= date_from:
+        raise HTTPException(400, "date_to debe ser posterior a date_from")
+    return sales_crud.get_sales_summary(db, current_user.tenant_id, date_from, date_to)
+
+
+@router.get("/reports/export")
+def export_sales(
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Exporta las ventas del tenant en NDJSON (una venta con sus items por línea).
+    Incluye de forma transparente las ventas movidas al archivo frío.
+    """
+    def generate():
+        try:
+            for sale in sales_crud.iter_sales_for_export(db, current_user.tenant_id, date_from, date_to):
+                yield json.dumps(archive.sale_to_record(sale)) + "\n"
+        finally:
+            db.close()
+
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+
 @router.post("/{sale_id}/cancel", response_model=SaleResponse)
 def cancel_sale(
     sale_id: int,
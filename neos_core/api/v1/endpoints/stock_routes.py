@@ -0,0 +1,90 @@
+# neos_core/api/v1/endpoints/stock_routes.py
+"""
+Endpoints de stock por ubicación (punto de venta) y transferencias
+"""
+from typing import List, Optional
+from fastapi import APIRouter, Depends, Query, status
+from sqlalchemy.orm import Session
+
+from neos_core.database.config import get_db
+from neos_core.database.routing import get_read_db
+from neos_core.database.models import User
+from neos_core.security.security_deps import get_current_user
+from neos_core.schemas.stock_schema import (
+    LocationStock,
+    LocationStockSet,
+    StockTransfer,
+    StockTransferCreate
+)
+from neos_core.crud import stock_crud as crud
+from neos_core.api.v1.endpoints.product_routes import check_product_write_permission
+
+router = APIRouter()
+
+
+@router.put("/locations", response_model=LocationStock)
+def set_location_stock(
+        data: LocationStockSet,
+        db: Session = Depends(get_db),
+        current_user: User = Depends(check_product_write_permission)
+):
+    """
+    Fija el stock de un producto en un punto de venta (recepción o conteo).
+
+    **Permisos requeridos:** inventory, admin, superadmin
+
+    La diferencia se aplica también al stock total del producto.
+    """
+    return crud.set_location_stock(db=db, tenant_id=current_user.tenant_id, data=data, actor_id=current_user.id)
+
+
+@router.get("/locations", response_model=List[LocationStock])
+def list_location_stock(
+        point_of_sale_id: Optional[int] = Query(None, description="Filtrar por punto de venta"),
+        product_id: Optional[int] = Query(None, description="Filtrar por producto"),
+        db: Session = Depends(get_read_db),
+        current_user: User = Depends(get_current_user)
+):
+    """Lista el stock por ubicación de su tenant"""
+    return crud.get_location_stock(
+        db=db,
+        tenant_id=current_user.tenant_id,
+        point_of_sale_id=point_of_sale_id,
+        product_id=product_id
+    )
+
+
+@router.get("/low-stock", response_model=List[LocationStock])
+def get_low_stock_locations(
+        point_of_sale_id: Optional[int] = Query(None, description="Solo este punto de venta"),
+        db: Session = Depends(get_read_db),
+        current_user: User = Depends(get_current_user)
+):
+    """
+    Ubicaciones con stock por debajo de su mínimo.
+    Permite a cada sucursal ver solo su propia reposición.
+    """
+    return crud.get_low_stock_locations(
+        db=db,
+        tenant_id=current_user.tenant_id,
+        point_of_sale_id=point_of_sale_id
+    )
+
+
+@router.post("/transfers", response_model=StockTransfer, status_code=status.HTTP_201_CREATED)
+def transfer_stock(
+        data: StockTransferCreate,
+        db: Session = Depends(get_db),
+        current_user: User = Depends(check_product_write_permission)
+):
+    """
+    Transfiere stock entre dos puntos de venta en una sola transacción.
+
+    **Permisos requeridos:** inventory, admin, superadmin
+    """
+    return crud.transfer_stock(
+        db=db,
+        tenant_id=current_user.tenant_id,
+        user_id=current_user.id,
+        data=data
+    )
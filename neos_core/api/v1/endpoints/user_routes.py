@@ -22,7 +22,7 @@ def create_new_user(
     db_user = crud.get_user_by_email(db, email=user.email)
     if db_user:
         raise HTTPException(status_code=400, detail="El correo electrónico ya está registrado.")
-    return crud.create_user(db=db, user=user)
+    return crud.create_user(db=db, user=user, actor_id=current_user.id)
 
 
 @router.get("/", response_model=list[schemas.User])
@@ -0,0 +1,123 @@
+# neos_core/api/v1/endpoints/webhook_routes.py
+"""
+Endpoints de webhooks por tenant: alta, baja, entregas y reenvío de muertas
+"""
+from typing import List, Optional
+from fastapi import APIRouter, Depends, Query, status
+from sqlalchemy.orm import Session
+
+from neos_core.database.config import get_db
+from neos_core.database.routing import get_read_db
+from neos_core.database.models import User
+from neos_core.schemas.webhook_schema import (
+    DeliveryStatus,
+    WebhookDelivery,
+    WebhookEndpoint,
+    WebhookEndpointCreate,
+    WebhookEndpointCreated,
+    WebhookEndpointUpdate,
+    WebhookRedeliverResponse
+)
+from neos_core.crud import webhook_crud as crud
+from neos_core.api.v1.endpoints.event_routes import check_integration_permission
+
+router = APIRouter()
+
+
+@router.post("/", response_model=WebhookEndpointCreated, status_code=status.HTTP_201_CREATED)
+def create_webhook(
+        data: WebhookEndpointCreate,
+        db: Session = Depends(get_db),
+        current_user: User = Depends(check_integration_permission)
+):
+    """
+    Registra una URL que recibe por POST los eventos elegidos, en lotes
+    `{"events": [...]}` con la forma de `/events/stream`. Solo recibe lo
+    publicado desde el alta.
+
+    Cada POST se firma: `X-Neos-Signature: sha256=<hex>` es el
+    HMAC-SHA256 con `secret` de `"<X-Neos-Timestamp>.<body>"`. El secreto
+    solo se devuelve en esta respuesta.
+
+    **Permisos requeridos:** admin, superadmin
+    """
+    return crud.create_endpoint(db=db, tenant_id=current_user.tenant_id, data=data)
+
+
+@router.get("/", response_model=List[WebhookEndpoint])
+def list_webhooks(
+        db: Session = Depends(get_read_db),
+        current_user: User = Depends(check_integration_permission)
+):
+    """
+    Lista los webhooks de su tenant
+
+    **Permisos requeridos:** admin, superadmin
+    """
+    return crud.get_endpoints(db=db, tenant_id=current_user.tenant_id)
+
+
+@router.put("/{webhook_id}", response_model=WebhookEndpoint)
+def update_webhook(
+        webhook_id: int,
+        data: WebhookEndpointUpdate,
+        db: Session = Depends(get_db),
+        current_user: User = Depends(check_integration_permission)
+):
+    """
+    Modifica un webhook. `is_active=false` deja de repartirle eventos; al
+    reactivarlo recibe solo lo publicado desde ese momento.
+
+    **Permisos requeridos:** admin, superadmin
+    """
+    return crud.update_endpoint(db=db, endpoint_id=webhook_id, tenant_id=current_user.tenant_id, data=data)
+
+
+@router.delete("/{webhook_id}", status_code=status.HTTP_204_NO_CONTENT)
+def delete_webhook(
+        webhook_id: int,
+        db: Session = Depends(get_db),
+        current_user: User = Depends(check_integration_permission)
+):
+    """
+    Elimina un webhook y su historial de entregas
+
+    **Permisos requeridos:** admin, superadmin
+    """
+    crud.delete_endpoint(db=db, endpoint_id=webhook_id, tenant_id=current_user.tenant_id)
+
+
+@router.get("/{webhook_id}/deliveries", response_model=List[WebhookDelivery])
+def list_deliveries(
+        webhook_id: int,
+        status_filter: Optional[DeliveryStatus] = Query(None, alias="status", description="dead: cola de entregas muertas"),
+        before_id: Optional[int] = Query(None, gt=0, description="Paginar: entregas con id menor"),
+        limit: int = Query(100, ge=1, le=500),
+        db: Session = Depends(get_read_db),
+        current_user: User = Depends(check_integration_permission)
+):
+    """
+    Entregas del webhook, de la más nueva a la más vieja, con el último
+    código HTTP y error de cada una.
+
+    **Permisos requeridos:** admin, superadmin
+    """
+    return crud.get_deliveries(
+        db=db, endpoint_id=webhook_id, tenant_id=current_user.tenant_id,
+        status_filter=status_filter, before_id=before_id, limit=limit
+    )
+
+
+@router.post("/{webhook_id}/redeliver", response_model=WebhookRedeliverResponse)
+def redeliver_webhook(
+        webhook_id: int,
+        db: Session = Depends(get_db),
+        current_user: User = Depends(check_integration_permission)
+):
+    """
+    Vuelve a encolar las entregas muertas (`dead`) del webhook
+
+    **Permisos requeridos:** admin, superadmin
+    """
+    requeued = crud.redeliver_dead(db=db, endpoint_id=webhook_id, tenant_id=current_user.tenant_id)
+    return {"requeued": requeued}
@@ -30,9 +30,37 @@ from .product_crud import (
     get_product_by_id,
     get_product_by_sku,
     get_product_by_barcode,
+    find_by_barcode,
     update_product,
+    import_products,
     delete_product,
-    get_low_stock_products
+    get_low_stock_products,
+    get_low_stock_alerts,
+    search_products,
+    create_variant,
+    get_variants,
+    get_variant_by_id,
+    update_variant,
+    get_catalog
+)
+
+# Stock por ubicación
+from .stock_crud import (
+    set_location_stock,
+    get_location_stock,
+    get_low_stock_locations,
+    transfer_stock
+)
+
+# Listas de precios y promociones
+from .pricing_crud import (
+    create_price_list,
+    get_price_lists,
+    update_price_list,
+    create_promotion,
+    get_promotions,
+    update_promotion,
+    quote_cart
 )
 
 # Config CRUD (Currency y PointOfSale)
@@ -63,9 +91,43 @@ from .sales_crud import (
     create_sale,
     get_sale_by_id,
     get_sales,
+    get_sales_summary,
+    iter_sales_for_export,
     cancel_sale
 )
 
+# Outbox de eventos
+from .outbox_crud import get_events
+
+# Webhooks
+from .webhook_crud import (
+    create_endpoint,
+    get_endpoints,
+    update_endpoint,
+    delete_endpoint,
+    get_deliveries,
+    redeliver_dead
+)
+
+# Tareas en segundo plano
+from .audit_crud import get_audit_log
+from .job_crud import (
+    create_job,
+    get_jobs,
+    get_job,
+    cancel_job,
+    get_result_file
+)
+
+# Reservas de stock (carritos)
+from .reservation_crud import (
+    create_reservation,
+    get_reservation,
+    release_reservation,
+    checkout_reservation,
+    expire_reservations
+)
+
 __all__ = [
     # Tenant
     "get_tenant_by_name",
@@ -87,9 +149,31 @@ __all__ = [
     "get_product_by_id",
     "get_product_by_sku",
     "get_product_by_barcode",
+    "find_by_barcode",
     "update_product",
+    "import_products",
     "delete_product",
     "get_low_stock_products",
+    "get_low_stock_alerts",
+    "search_products",
+    "create_variant",
+    "get_variants",
+    "get_variant_by_id",
+    "update_variant",
+    "get_catalog",
+    # Stock
+    "set_location_stock",
+    "get_location_stock",
+    "get_low_stock_locations",
+    "transfer_stock",
+    # Precios
+    "create_price_list",
+    "get_price_lists",
+    "update_price_list",
+    "create_promotion",
+    "get_promotions",
+    "update_promotion",
+    "quote_cart",
     # Config
     "get_currencies",
     "get_currency_by_id",
@@ -109,5 +193,30 @@ __all__ = [
     "create_sale",
     "get_sale_by_id",
     "get_sales",
+    "get_sales_summary",
+    "iter_sales_for_export",
     "cancel_sale",
+    # Outbox
+    "get_events",
+    # Webhooks
+    "create_endpoint",
+    "get_endpoints",
+    "update_endpoint",
+    "delete_endpoint",
+    "get_deliveries",
+    "redeliver_dead",
+    # Tareas
+    "create_job",
+    "get_jobs",
+    "get_job",
+    "cancel_job",
+    "get_result_file",
+    # Auditoría
+    "get_audit_log",
+    # Reservas
+    "create_reservation",
+    "get_reservation",
+    "release_reservation",
+    "checkout_reservation",
+    "expire_reservations",
 ]
\ No newline at end of file
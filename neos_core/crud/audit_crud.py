@@ -0,0 +1,45 @@
+# neos_core/crud/audit_crud.py
+"""
+Consulta del registro de auditoría. La escritura es en diferido (services/audit.py):
+un cambio recién hecho puede tardar AUDIT_FLUSH_INTERVAL_SECONDS en aparecer.
+"""
+from datetime import datetime
+from typing import List, Optional
+
+from sqlalchemy.orm import Session
+
+from neos_core.database.models import AuditLog
+
+
+def get_audit_log(
+        db: Session,
+        tenant_id: int,
+        entity_type: Optional[str] = None,
+        entity_id: Optional[int] = None,
+        action: Optional[str] = None,
+        actor_user_id: Optional[int] = None,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None,
+        before_id: Optional[int] = None,
+        limit: int = 100
+) -> List[AuditLog]:
+    """
+    Registros del tenant del más nuevo al más viejo. Paginación por cursor:
+    la página siguiente se pide con before_id = id del último recibido.
+    """
+    query = db.query(AuditLog).filter(AuditLog.tenant_id == tenant_id)
+    if entity_type:
+        query = query.filter(AuditLog.entity_type == entity_type)
+    if entity_id is not None:
+        query = query.filter(AuditLog.entity_id == entity_id)
+    if action:
+        query = query.filter(AuditLog.action == action)
+    if actor_user_id is not None:
+        query = query.filter(AuditLog.actor_user_id == actor_user_id)
+    if date_from:
+        query = query.filter(AuditLog.occurred_at >= date_from)
+    if date_to:
+        query = query.filter(AuditLog.occurred_at < date_to)
+    if before_id is not None:
+        query = query.filter(AuditLog.id < before_id)
+    return query.order_by(AuditLog.id.desc()).limit(limit).all()
@@ -0,0 +1,114 @@
+# neos_core/crud/job_crud.py
+"""
+CRUD de tareas en segundo plano: encolado, consulta y cancelación.
+La ejecución la hacen los workers de services/jobs.py.
+"""
+import os
+from datetime import datetime
+from typing import List, Optional
+
+from fastapi import HTTPException, status
+from pydantic import ValidationError
+from sqlalchemy.orm import Session
+
+from neos_core.database.models import Job, User
+from neos_core.schemas.job_schema import JobCreate
+from neos_core.services import jobs
+
+# Ven todas las tareas del tenant; el resto solo las propias
+_ALL_JOBS_ROLES = ("admin", "superadmin")
+
+
+def create_job(db: Session, user: User, data: JobCreate) -> Job:
+    """Valida tipo, permisos y parámetros y deja la tarea en cola"""
+    handler = jobs.get_handler(data.kind)
+    if handler is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Tipo de tarea desconocido: '{data.kind}'"
+        )
+    if handler.roles and user.role.name not in handler.roles:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail=f"Permiso denegado. Roles permitidos: {', '.join(handler.roles)}"
+        )
+    try:
+        params = jobs.parse_params(handler, data.params)
+    except ValidationError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=e.errors(include_url=False, include_context=False)
+        )
+
+    job = Job(
+        tenant_id=user.tenant_id,
+        user_id=user.id,
+        kind=data.kind,
+        params=params.model_dump(mode="json") if handler.params_model else params,
+        status=jobs.STATUS_QUEUED,
+        run_after=datetime.utcnow(),
+    )
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    return job
+
+
+def _visible(query, user: User):
+    query = query.filter(Job.tenant_id == user.tenant_id)
+    if user.role.name not in _ALL_JOBS_ROLES:
+        query = query.filter(Job.user_id == user.id)
+    return query
+
+
+def get_jobs(
+        db: Session,
+        user: User,
+        status_filter: Optional[str] = None,
+        kind: Optional[str] = None,
+        skip: int = 0,
+        limit: int = 50
+) -> List[Job]:
+    query = _visible(db.query(Job), user)
+    if status_filter:
+        query = query.filter(Job.status == status_filter)
+    if kind:
+        query = query.filter(Job.kind == kind)
+    return query.order_by(Job.id.desc()).offset(skip).limit(limit).all()
+
+
+def get_job(db: Session, job_id: int, user: User) -> Job:
+    job = _visible(db.query(Job), user).filter(Job.id == job_id).first()
+    if not job:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Tarea no encontrada")
+    return job
+
+
+def cancel_job(db: Session, job_id: int, user: User) -> Job:
+    """
+    Cancela una tarea en cola o en curso. La que está corriendo se corta en
+    su próximo aviso de progreso y su trabajo se descarta.
+    """
+    job = get_job(db, job_id, user)
+    if job.status in jobs.FINISHED:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"La tarea ya terminó ({job.status})"
+        )
+    job.status = jobs.STATUS_CANCELLED
+    job.finished_at = datetime.utcnow()
+    db.commit()
+    db.refresh(job)
+    return job
+
+
+def get_result_file(db: Session, job_id: int, user: User) -> str:
+    """Ruta del archivo generado por la tarea (exportaciones)"""
+    job = get_job(db, job_id, user)
+    relative = (job.result or {}).get("file") if job.status == jobs.STATUS_SUCCEEDED else None
+    if not relative:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="La tarea no generó un archivo")
+    path = jobs.output_path(relative)
+    if not os.path.isfile(path):
+        raise HTTPException(status_code=status.HTTP_410_GONE, detail="El archivo de la tarea ya no está disponible")
+    return path
@@ -0,0 +1,24 @@
+# neos_core/crud/outbox_crud.py
+"""
+Lectura de eventos publicados del outbox (stream de /events)
+"""
+from typing import List
+
+from sqlalchemy.orm import Session
+
+from neos_core.database.models import OutboxEvent
+
+
+def get_events(db: Session, tenant_id: int, after: int = 0, limit: int = 500) -> List[OutboxEvent]:
+    """Eventos publicados del tenant con sequence > after, en orden"""
+    return (
+        db.query(OutboxEvent)
+        .filter(
+            OutboxEvent.tenant_id == tenant_id,
+            OutboxEvent.sequence.isnot(None),
+            OutboxEvent.sequence > after
+        )
+        .order_by(OutboxEvent.sequence)
+        .limit(limit)
+        .all()
+    )
@@ -0,0 +1,247 @@
+# neos_core/crud/pricing_crud.py
+"""
+CRUD de listas de precios y promociones, y cotización de carritos.
+
+Después de cada cambio confirmado se recompila solo la regla afectada en el
+índice en memoria del tenant (ver services/pricing.py).
+"""
+from typing import Iterable, List, Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy.orm import Session, selectinload
+
+from neos_core.database.models import (
+    Client, PointOfSale, PriceList, PriceListItem, Product, ProductVariant, Promotion
+)
+from neos_core.database.routing import mark_tenant_write
+from neos_core.schemas.pricing_schema import (
+    PriceListCreate, PriceListItemSet, PriceListUpdate, PromotionCreate, PromotionUpdate, QuoteRequest
+)
+from neos_core.services import pricing, tax
+
+
+def _validate_refs(
+        db: Session,
+        tenant_id: int,
+        product_ids: Iterable[int] = (),
+        client_id: Optional[int] = None,
+        point_of_sale_id: Optional[int] = None
+):
+    """Las reglas solo pueden apuntar a productos, clientes y POS del tenant"""
+    product_ids = set(product_ids)
+    if product_ids:
+        found = {
+            product_id for (product_id,) in
+            db.query(Product.id).filter(Product.tenant_id == tenant_id, Product.id.in_(product_ids))
+        }
+        missing = sorted(product_ids - found)
+        if missing:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Productos inexistentes: {missing}"
+            )
+
+    if client_id is not None and not db.query(Client.id).filter_by(id=client_id, tenant_id=tenant_id).first():
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cliente inválido")
+
+    if point_of_sale_id is not None and not db.query(PointOfSale.id).filter_by(
+            id=point_of_sale_id, tenant_id=tenant_id).first():
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Punto de venta inválido")
+
+
+# ===== LISTAS DE PRECIOS =====
+
+def _set_items(price_list: PriceList, items: List[PriceListItemSet]):
+    """Agrega o modifica precios de la lista (upsert por producto/variante)"""
+    current = {(item.product_id, item.variant_id): item for item in price_list.items}
+    for data in items:
+        item = current.get((data.product_id, data.variant_id))
+        if item is None:
+            item = PriceListItem(product_id=data.product_id, variant_id=data.variant_id)
+            price_list.items.append(item)
+            current[(data.product_id, data.variant_id)] = item
+        item.price = data.price
+
+
+def create_price_list(db: Session, tenant_id: int, data: PriceListCreate) -> PriceList:
+    _validate_refs(db, tenant_id, (i.product_id for i in data.items), data.client_id, data.point_of_sale_id)
+
+    price_list = PriceList(
+        tenant_id=tenant_id,
+        **data.model_dump(exclude={"items"})
+    )
+    _set_items(price_list, data.items)
+    db.add(price_list)
+    pricing.notify_change(db, tenant_id)
+    db.commit()
+    mark_tenant_write(tenant_id)
+    db.refresh(price_list)
+
+    pricing.pricing_index.refresh_price_list(db, tenant_id, price_list.id)
+    return price_list
+
+
+def get_price_lists(db: Session, tenant_id: int) -> List[PriceList]:
+    return (
+        db.query(PriceList)
+        .options(selectinload(PriceList.items))
+        .filter(PriceList.tenant_id == tenant_id)
+        .order_by(PriceList.id)
+        .all()
+    )
+
+
+def update_price_list(db: Session, price_list_id: int, tenant_id: int, data: PriceListUpdate) -> PriceList:
+    price_list = db.query(PriceList).filter_by(id=price_list_id, tenant_id=tenant_id).first()
+    if not price_list:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Lista de precios no encontrada")
+
+    if data.items:
+        _validate_refs(db, tenant_id, (i.product_id for i in data.items))
+        _set_items(price_list, data.items)
+
+    for field, value in data.model_dump(exclude_unset=True, exclude={"items"}).items():
+        setattr(price_list, field, value)
+
+    pricing.notify_change(db, tenant_id)
+    db.commit()
+    mark_tenant_write(tenant_id)
+    db.refresh(price_list)
+
+    pricing.pricing_index.refresh_price_list(db, tenant_id, price_list.id)
+    return price_list
+
+
+# ===== PROMOCIONES =====
+
+def create_promotion(db: Session, tenant_id: int, data: PromotionCreate) -> Promotion:
+    product_ids = [c.product_id for c in data.bundle_items or []]
+    if data.product_id is not None:
+        product_ids.append(data.product_id)
+    _validate_refs(db, tenant_id, product_ids, point_of_sale_id=data.point_of_sale_id)
+
+    promotion = Promotion(tenant_id=tenant_id, **data.model_dump(exclude={"bundle_items"}))
+    if data.bundle_items:
+        # Columna JSON: cantidades como texto para no perder precisión
+        promotion.bundle_items = [c.model_dump(mode="json") for c in data.bundle_items]
+
+    db.add(promotion)
+    pricing.notify_change(db, tenant_id)
+    db.commit()
+    mark_tenant_write(tenant_id)
+    db.refresh(promotion)
+
+    pricing.pricing_index.refresh_promotion(db, tenant_id, promotion.id)
+    return promotion
+
+
+def get_promotions(db: Session, tenant_id: int, active_only: bool = False) -> List[Promotion]:
+    query = db.query(Promotion).filter(Promotion.tenant_id == tenant_id)
+    if active_only:
+        query = query.filter(Promotion.is_active.is_(True))
+    return query.order_by(Promotion.priority.desc(), Promotion.id).all()
+
+
+def update_promotion(db: Session, promotion_id: int, tenant_id: int, data: PromotionUpdate) -> Promotion:
+    promotion = db.query(Promotion).filter_by(id=promotion_id, tenant_id=tenant_id).first()
+    if not promotion:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Promoción no encontrada")
+
+    values = data.model_dump(exclude_unset=True)
+    starts_at = values.get("starts_at", promotion.starts_at)
+    ends_at = values.get("ends_at", promotion.ends_at)
+    if starts_at and ends_at and ends_at <= starts_at:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="ends_at debe ser posterior a starts_at"
+        )
+
+    for field, value in values.items():
+        setattr(promotion, field, value)
+
+    pricing.notify_change(db, tenant_id)
+    db.commit()
+    mark_tenant_write(tenant_id)
+    db.refresh(promotion)
+
+    pricing.pricing_index.refresh_promotion(db, tenant_id, promotion.id)
+    return promotion
+
+
+# ===== COTIZACIÓN =====
+
+def price_lines(
+        db: Session,
+        tenant_id: int,
+        lines: List[tuple],
+        client_id: Optional[int],
+        point_of_sale_id: int
+) -> pricing.PricingResult:
+    """
+    Aplica listas y promociones a [(item, product, precio_base)], las líneas
+    que arma create_sale después de validar stock.
+    """
+    return pricing.price_cart(
+        db, tenant_id,
+        (
+            pricing.CartLine(product.id, item.variant_id, item.quantity, base_price, product.attributes)
+            for item, product, base_price in lines
+        ),
+        client_id=client_id,
+        point_of_sale_id=point_of_sale_id
+    )
+
+
+def quote_cart(db: Session, tenant_id: int, data: QuoteRequest) -> dict:
+    """Cotiza un carrito sin vender ni tocar stock (precios, descuentos e impuestos)"""
+    _validate_refs(db, tenant_id, client_id=data.client_id, point_of_sale_id=data.point_of_sale_id)
+
+    product_ids = {item.product_id for item in data.items}
+    products = {
+        product.id: product for product in
+        db.query(Product).filter(Product.tenant_id == tenant_id, Product.id.in_(product_ids))
+    }
+    variant_ids = {item.variant_id for item in data.items if item.variant_id is not None}
+    variants = {
+        variant.id: variant for variant in
+        db.query(ProductVariant).filter(ProductVariant.tenant_id == tenant_id, ProductVariant.id.in_(variant_ids))
+    } if variant_ids else {}
+
+    lines = []
+    for item in data.items:
+        product = products.get(item.product_id)
+        if product is None:
+            raise HTTPException(404, f"Producto {item.product_id} no existe")
+        variant = variants.get(item.variant_id) if item.variant_id is not None else None
+        if item.variant_id is not None and (variant is None or variant.product_id != product.id):
+            raise HTTPException(404, f"Variante {item.variant_id} no existe para {product.name}")
+        base_price = variant.price if variant is not None and variant.price is not None else product.price
+        lines.append((item, product, base_price))
+
+    priced = price_lines(db, tenant_id, lines, data.client_id, data.point_of_sale_id)
+    taxes = tax.compute_taxes(
+        [(item.quantity, p.unit_price, product.tax_rate) for (item, product, _), p in zip(lines, priced.lines)],
+        discounts=[p.discount for p in priced.lines]
+    )
+
+    return {
+        "price_list_id": priced.price_list_id,
+        "lines": [
+            {
+                "product_id": product.id,
+                "variant_id": item.variant_id,
+                "quantity": item.quantity,
+                "unit_price": line.unit_price,
+                "discount_amount": line.discount,
+                "promotion_id": p.promotion_id,
+                "subtotal": line.subtotal,
+                "tax_amount": line.tax_amount,
+                "total": line.total,
+            }
+            for (item, product, _), p, line in zip(lines, priced.lines, taxes.lines)
+        ],
+        "discount_amount": priced.discount_amount,
+        "subtotal": taxes.subtotal,
+        "tax_amount": taxes.tax_amount,
+        "total": taxes.total,
+    }
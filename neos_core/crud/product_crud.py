@@ -2,12 +2,21 @@
 """
 CRUD operations para productos (inventario)
 """
-from sqlalchemy.orm import Session
-from typing import List, Optional
+import re
+from sqlalchemy import and_, case, func, or_
+from sqlalchemy.orm import Session, Query
+from typing import Dict, List, Optional, Tuple
 from fastapi import HTTPException, status
 
-from neos_core.database.models import Product
-from neos_core.schemas.product_schema import ProductCreate, ProductUpdate
+from neos_core.crud import stock_crud
+from neos_core.database.models import Product, ProductVariant
+from neos_core.database.models.product_model import low_stock_payload
+from neos_core.database.routing import mark_tenant_write
+from neos_core.database.search import search_product_ids
+from neos_core.services import audit, outbox
+from neos_core.schemas.product_schema import (
+    ProductBase, ProductCreate, ProductUpdate, ProductVariantCreate, ProductVariantUpdate
+)
 
 
 def create_product(db: Session, product: ProductCreate) -> Product:
@@ -26,28 +35,62 @@ def create_product(db: Session, product: ProductCreate) -> Product:
 
     db_product = Product(**product.model_dump())
     db.add(db_product)
+    db.flush()
+    outbox.record(db, db_product.tenant_id, outbox.PRODUCT_CREATED, db_product.id, outbox.product_payload(db_product))
     db.commit()
+    mark_tenant_write(db_product.tenant_id)
     db.refresh(db_product)
     return db_product
 
 
+# Claves de atributos admitidas en filtros (evita inyectar rutas JSON)
+_ATTRIBUTE_KEY_RE = re.compile(r"^[\w\-]{1,50}$", re.UNICODE)
+
+
+def filter_by_attributes(db: Session, query: Query, attributes: Optional[Dict[str, str]]) -> Query:
+    """
+    Aplica filtros de igualdad sobre Product.attributes.
+    En PostgreSQL usa contención JSONB (attributes @> {...}), resuelta con el
+    índice GIN; en SQLite compara con json_extract.
+    """
+    if not attributes:
+        return query
+
+    for key in attributes:
+        if not _ATTRIBUTE_KEY_RE.match(key):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Atributo inválido: '{key}'"
+            )
+
+    if db.get_bind().dialect.name == "postgresql":
+        return query.filter(Product.attributes.contains(dict(attributes)))
+
+    for key, value in attributes.items():
+        query = query.filter(func.json_extract(Product.attributes, f'$."{key}"') == value)
+    return query
+
+
 def get_products_by_tenant(
         db: Session,
         tenant_id: int,
         skip: int = 0,
         limit: int = 100,
-        is_active: Optional[bool] = None
+        is_active: Optional[bool] = None,
+        attributes: Optional[Dict[str, str]] = None
 ) -> List[Product]:
     """
     Lista productos de un tenant con paginación
-    Opcionalmente filtra por estado activo/inactivo
+    Opcionalmente filtra por estado activo/inactivo y por atributos
     """
     query = db.query(Product).filter(Product.tenant_id == tenant_id)
 
     if is_active is not None:
         query = query.filter(Product.is_active == is_active)
 
-    return query.offset(skip).limit(limit).all()
+    query = filter_by_attributes(db, query, attributes)
+
+    return query.order_by(Product.id).offset(skip).limit(limit).all()
 
 
 def get_product_by_id(db: Session, product_id: int, tenant_id: int) -> Optional[Product]:
@@ -77,15 +120,50 @@ def get_product_by_barcode(db: Session, barcode: str, tenant_id: int) -> Optiona
     ).first()
 
 
+def find_by_barcode(
+        db: Session,
+        barcode: str,
+        tenant_id: int
+) -> Tuple[Optional[Product], Optional[ProductVariant]]:
+    """
+    Resuelve un código de barras escaneado en el POS.
+    Busca primero en productos y luego en variantes; si coincide una variante
+    devuelve (producto padre, variante).
+    """
+    product = get_product_by_barcode(db, barcode, tenant_id)
+    if product:
+        return product, None
+
+    variant = db.query(ProductVariant).filter(
+        ProductVariant.barcode == barcode,
+        ProductVariant.tenant_id == tenant_id
+    ).first()
+    if variant:
+        return variant.product, variant
+
+    return None, None
+
+
+def _reject_tracked_stock_edit(db: Session, tenant_id: int, product_id: int, variant_id: Optional[int] = None):
+    if stock_crud.is_location_tracked(db, tenant_id, product_id, variant_id):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="El stock de este producto se controla por punto de venta: usar PUT /stock/locations"
+        )
+
+
 def update_product(
         db: Session,
         product_id: int,
         tenant_id: int,
-        product_update: ProductUpdate
+        product_update: ProductUpdate,
+        actor_id: Optional[int] = None
 ) -> Product:
     """
     Actualiza un producto existente
-    Solo actualiza los campos que vienen en el request (no-None)
+    Solo actualiza los campos que vienen en el request (no-None).
+    El stock de un producto controlado por ubicación no se edita acá.
+    Los cambios de precio, costo y stock quedan en la auditoría.
     """
     db_product = get_product_by_id(db, product_id, tenant_id)
 
@@ -97,15 +175,82 @@ def update_product(
 
     # Actualizar solo los campos que vinieron en el request
     update_data = product_update.model_dump(exclude_unset=True)
+    if "stock" in update_data and update_data["stock"] != db_product.stock:
+        _reject_tracked_stock_edit(db, db_product.tenant_id, db_product.id)
+    before = audit.snapshot(db_product)
 
     for field, value in update_data.items():
         setattr(db_product, field, value)
 
+    changes = audit.diff(before, audit.snapshot(db_product))
+    outbox.record(db, tenant_id, outbox.PRODUCT_UPDATED, db_product.id, outbox.product_payload(db_product))
     db.commit()
+    mark_tenant_write(db_product.tenant_id)
+    if changes:
+        audit.audit_log.record(db_product.tenant_id, audit.PRODUCT_UPDATED, "product", db_product.id, changes, actor_id)
     db.refresh(db_product)
     return db_product
 
 
+def import_products(
+        db: Session,
+        tenant_id: int,
+        products: List[ProductBase],
+        update_existing: bool = False,
+        audit_changes: Optional[List[Tuple[int, dict]]] = None
+) -> Tuple[int, int, int]:
+    """
+    Alta masiva de productos del tenant (tarea product_import).
+    Busca los SKU existentes en una sola consulta; los existentes se
+    actualizan o se omiten según `update_existing`; el stock de los que se
+    controlan por ubicación no se pisa (se carga por /stock/locations). Sin
+    commit: la transacción la confirma quien llama, y también audita después
+    del commit los cambios de precio, costo y stock que se agregan a
+    `audit_changes` como (product_id, cambios). Devuelve (creados, actualizados, omitidos).
+    """
+    existing = {
+        p.sku: p for p in db.query(Product).filter(
+            Product.tenant_id == tenant_id,
+            Product.sku.in_({p.sku for p in products})
+        )
+    }
+
+    tracked = (
+        stock_crud.location_tracked_products(db, tenant_id, [p.id for p in existing.values()])
+        if update_existing else set()
+    )
+
+    created, updated, skipped = [], 0, 0
+    for data in products:
+        db_product = existing.get(data.sku)
+        if db_product is None:
+            db_product = Product(tenant_id=tenant_id, **data.model_dump())
+            db.add(db_product)
+            existing[data.sku] = db_product
+            created.append(db_product)
+        elif update_existing:
+            update_data = data.model_dump(exclude_unset=True)
+            if db_product.id in tracked:
+                update_data.pop("stock", None)
+            before = audit.snapshot(db_product)
+            for field, value in update_data.items():
+                setattr(db_product, field, value)
+            changes = audit.diff(before, audit.snapshot(db_product))
+            if changes and audit_changes is not None:
+                audit_changes.append((db_product.id, changes))
+            outbox.record(db, tenant_id, outbox.PRODUCT_UPDATED, db_product.id, outbox.product_payload(db_product))
+            updated += 1
+        else:
+            skipped += 1
+
+    # Los ids de los nuevos se conocen recién después del flush
+    db.flush()
+    for db_product in created:
+        outbox.record(db, tenant_id, outbox.PRODUCT_CREATED, db_product.id, outbox.product_payload(db_product))
+    db.flush()
+    return len(created), updated, skipped
+
+
 def delete_product(db: Session, product_id: int, tenant_id: int) -> bool:
     """
     Elimina (soft delete) un producto marcándolo como inactivo
@@ -121,19 +266,199 @@ def delete_product(db: Session, product_id: int, tenant_id: int) -> bool:
 
     # Soft delete
     db_product.is_active = False
+    outbox.record(db, tenant_id, outbox.PRODUCT_DELETED, db_product.id, outbox.product_payload(db_product))
     db.commit()
+    mark_tenant_write(db_product.tenant_id)
 
     return True
 
 
 def get_low_stock_products(db: Session, tenant_id: int) -> List[Product]:
     """
-    Retorna productos con stock por debajo del mínimo
+    Retorna productos con stock por debajo del mínimo: el propio, el de
+    alguna variante activa o el de alguna ubicación (min_stock por sucursal).
     Útil para alertas de reposición
+
+    Usa el flag is_low_stock (mantenido al guardar, ver product_model) y sus
+    índices parciales: solo se leen los productos en alerta, no todo el catálogo.
     """
+    low_variants = db.query(ProductVariant.product_id).filter(
+        ProductVariant.tenant_id == tenant_id,
+        ProductVariant.is_low_stock == True,
+        ProductVariant.is_active == True
+    )
+    low_location_ids = {location.product_id for location in stock_crud.get_low_stock_locations(db, tenant_id)}
     return db.query(Product).filter(
         Product.tenant_id == tenant_id,
         Product.is_active == True,
-        Product.is_service == False,  # Los servicios no tienen stock
-        Product.stock <= Product.min_stock
-    ).all()
\ No newline at end of file
+        or_(
+            Product.is_low_stock == True,
+            Product.id.in_(low_variants),
+            Product.id.in_(low_location_ids)
+        )
+    ).order_by(Product.id).all()
+
+
+def get_low_stock_alerts(db: Session, tenant_id: int) -> List[dict]:
+    """
+    Alertas de stock bajo vigentes (productos, variantes y ubicaciones) con la
+    misma forma que los eventos low_stock del stream: es su snapshot inicial.
+    """
+    products = db.query(Product).filter(
+        Product.tenant_id == tenant_id,
+        Product.is_low_stock == True,
+        Product.is_active == True
+    ).order_by(Product.id).all()
+    variants = db.query(ProductVariant).filter(
+        ProductVariant.tenant_id == tenant_id,
+        ProductVariant.is_low_stock == True,
+        ProductVariant.is_active == True
+    ).order_by(ProductVariant.id).all()
+    locations = stock_crud.get_low_stock_locations(db, tenant_id)
+    return [low_stock_payload(item, True) for item in (*products, *variants, *locations)]
+
+
+def search_products(db: Session, tenant_id: int, query: str, limit: int = 20) -> List[Product]:
+    """
+    Búsqueda por texto parcial en nombre, descripción, SKU y atributos.
+    Resultados ordenados por relevancia (ver neos_core/database/search.py)
+    """
+    ranked = search_product_ids(db, tenant_id, query, limit)
+    if not ranked:
+        return []
+
+    products = {
+        p.id: p
+        for p in db.query(Product).filter(Product.id.in_([pid for pid, _ in ranked])).all()
+    }
+    return [products[pid] for pid, _ in ranked if pid in products]
+
+
+# ===== VARIANTES =====
+
+def create_variant(
+        db: Session,
+        product_id: int,
+        tenant_id: int,
+        variant: ProductVariantCreate
+) -> ProductVariant:
+    """Crea una variante de un producto del tenant"""
+    product = get_product_by_id(db, product_id, tenant_id)
+    if not product:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Producto no encontrado"
+        )
+
+    # El SKU de la variante no puede chocar con otra variante ni con un producto
+    sku_taken = db.query(ProductVariant.id).filter(
+        ProductVariant.sku == variant.sku,
+        ProductVariant.tenant_id == product.tenant_id
+    ).first() or get_product_by_sku(db, variant.sku, product.tenant_id)
+
+    if sku_taken:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Ya existe un producto o variante con el SKU '{variant.sku}' en tu empresa"
+        )
+
+    db_variant = ProductVariant(
+        **variant.model_dump(),
+        product_id=product.id,
+        tenant_id=product.tenant_id
+    )
+    db.add(db_variant)
+    db.commit()
+    mark_tenant_write(db_variant.tenant_id)
+    db.refresh(db_variant)
+    return db_variant
+
+
+def get_variants(db: Session, product_id: int, tenant_id: int) -> List[ProductVariant]:
+    """Lista las variantes de un producto con aislamiento de tenant"""
+    return db.query(ProductVariant).filter(
+        ProductVariant.product_id == product_id,
+        ProductVariant.tenant_id == tenant_id
+    ).order_by(ProductVariant.id).all()
+
+
+def get_variant_by_id(db: Session, variant_id: int, tenant_id: int) -> Optional[ProductVariant]:
+    """Obtiene una variante por ID con aislamiento de tenant"""
+    return db.query(ProductVariant).filter(
+        ProductVariant.id == variant_id,
+        ProductVariant.tenant_id == tenant_id
+    ).first()
+
+
+def update_variant(
+        db: Session,
+        variant_id: int,
+        tenant_id: int,
+        variant_update: ProductVariantUpdate,
+        actor_id: Optional[int] = None
+) -> ProductVariant:
+    """Actualiza solo los campos enviados de una variante (precio, costo y stock se auditan)"""
+    db_variant = get_variant_by_id(db, variant_id, tenant_id)
+
+    if not db_variant:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Variante no encontrada"
+        )
+
+    update_data = variant_update.model_dump(exclude_unset=True)
+    if "stock" in update_data and update_data["stock"] != db_variant.stock:
+        _reject_tracked_stock_edit(db, db_variant.tenant_id, db_variant.product_id, db_variant.id)
+    before = audit.snapshot(db_variant, audit.AUDITED_VARIANT_FIELDS)
+    for field, value in update_data.items():
+        setattr(db_variant, field, value)
+
+    changes = audit.diff(before, audit.snapshot(db_variant, audit.AUDITED_VARIANT_FIELDS))
+    db.commit()
+    mark_tenant_write(db_variant.tenant_id)
+    if changes:
+        audit.audit_log.record(db_variant.tenant_id, audit.VARIANT_UPDATED, "product_variant", db_variant.id, changes, actor_id)
+    db.refresh(db_variant)
+    return db_variant
+
+
+def get_catalog(
+        db: Session,
+        tenant_id: int,
+        skip: int = 0,
+        limit: int = 100,
+        is_active: Optional[bool] = None
+) -> List[dict]:
+    """
+    Lista productos padre con la cantidad de variantes activas y el stock
+    agregado, en una sola consulta (LEFT JOIN + GROUP BY).
+    Sin variantes, total_stock es el stock propio del producto.
+    """
+    variant_count = func.count(ProductVariant.id)
+    total_stock = case(
+        (variant_count > 0, func.sum(ProductVariant.stock)),
+        else_=Product.stock
+    )
+
+    query = (
+        db.query(
+            Product.id,
+            Product.sku,
+            Product.name,
+            Product.price,
+            Product.is_active,
+            variant_count.label("variant_count"),
+            total_stock.label("total_stock"),
+        )
+        .outerjoin(
+            ProductVariant,
+            and_(ProductVariant.product_id == Product.id, ProductVariant.is_active == True)
+        )
+        .filter(Product.tenant_id == tenant_id)
+    )
+
+    if is_active is not None:
+        query = query.filter(Product.is_active == is_active)
+
+    rows = query.group_by(Product.id).order_by(Product.id).offset(skip).limit(limit).all()
+    return [row._asdict() for row in rows]
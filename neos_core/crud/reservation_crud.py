@@ -0,0 +1,185 @@
+# neos_core/crud/reservation_crud.py
+"""
+CRUD de reservas de stock para carritos.
+
+Una reserva retiene cantidades durante un TTL: create_sale y otras reservas
+solo ven el stock disponible (stock - reservas activas). El checkout convierte
+la reserva en venta sin competir por ese stock.
+"""
+from datetime import datetime, timedelta
+from typing import Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy.orm import Session, selectinload
+
+from neos_core.database import config
+from neos_core.database.models import PointOfSale, Product, Sale, StockReservation, StockReservationItem
+from neos_core.database.routing import mark_tenant_write
+from neos_core.crud import sales_crud, stock_crud
+from neos_core.schemas.reservation_schema import ReservationCreate, ReservationCheckout
+from neos_core.schemas.sales_schema import SaleCreate, SaleItemCreate
+
+
+def create_reservation(db: Session, tenant_id: int, user_id: int, data: ReservationCreate) -> StockReservation:
+    """
+    Reserva las cantidades del carrito si hay stock disponible para todas.
+    Cada producto se bloquea mientras se calcula lo disponible, así dos
+    carritos no pueden reservar la misma unidad.
+    """
+    try:
+        pos = db.query(PointOfSale).filter_by(id=data.point_of_sale_id, tenant_id=tenant_id).first()
+        if not pos:
+            raise HTTPException(400, "Punto de venta inválido")
+
+        ttl = min(data.ttl_seconds or config.RESERVATION_TTL_SECONDS, config.RESERVATION_MAX_TTL_SECONDS)
+        now = datetime.utcnow()
+
+        reservation = StockReservation(
+            tenant_id=tenant_id,
+            user_id=user_id,
+            point_of_sale_id=pos.id,
+            status="active",
+            expires_at=now + timedelta(seconds=ttl)
+        )
+        db.add(reservation)
+
+        for item in data.items:
+            product = (
+                db.query(Product)
+                .filter_by(id=item.product_id, tenant_id=tenant_id)
+                .with_for_update()
+                .first()
+            )
+            if not product:
+                raise HTTPException(404, f"Producto {item.product_id} no existe")
+
+            stock_item = stock_crud.lock_stock_item(db, product, item.variant_id, tenant_id)
+            available = stock_item.stock - stock_crud.reserved_quantity(db, product.id, item.variant_id, now)
+            if available < item.quantity:
+                raise HTTPException(400, f"Stock insuficiente para {product.name}")
+
+            # Autoflush: la próxima línea del mismo producto ya cuenta esta
+            reservation.items.append(StockReservationItem(
+                product_id=product.id,
+                variant_id=item.variant_id,
+                quantity=item.quantity,
+                status="active",
+                expires_at=reservation.expires_at
+            ))
+
+        db.commit()
+        mark_tenant_write(tenant_id)
+        db.refresh(reservation)
+        return reservation
+
+    except Exception:
+        db.rollback()
+        raise
+
+
+def get_reservation(db: Session, reservation_id: int, tenant_id: int) -> Optional[StockReservation]:
+    """Obtiene una reserva con sus items (aislamiento por tenant)"""
+    return (
+        db.query(StockReservation)
+        .options(selectinload(StockReservation.items))
+        .filter(StockReservation.id == reservation_id, StockReservation.tenant_id == tenant_id)
+        .first()
+    )
+
+
+def _lock_active_reservation(db: Session, reservation_id: int, tenant_id: int) -> StockReservation:
+    reservation = (
+        db.query(StockReservation)
+        .filter(StockReservation.id == reservation_id, StockReservation.tenant_id == tenant_id)
+        .with_for_update()
+        .first()
+    )
+    if not reservation:
+        raise HTTPException(status.HTTP_404_NOT_FOUND, "Reserva no encontrada")
+    if reservation.status != "active" or reservation.expires_at <= datetime.utcnow():
+        raise HTTPException(status.HTTP_409_CONFLICT, "La reserva no está activa o ya venció")
+    return reservation
+
+
+def release_reservation(db: Session, reservation_id: int, tenant_id: int) -> StockReservation:
+    """Libera el stock retenido por un carrito abandonado"""
+    try:
+        reservation = _lock_active_reservation(db, reservation_id, tenant_id)
+        reservation.close("released")
+        db.commit()
+        mark_tenant_write(tenant_id)
+        db.refresh(reservation)
+        return reservation
+
+    except Exception:
+        db.rollback()
+        raise
+
+
+def checkout_reservation(
+        db: Session,
+        reservation_id: int,
+        tenant_id: int,
+        user_id: int,
+        data: ReservationCheckout
+) -> Sale:
+    """
+    Convierte la reserva en venta. El stock ya estaba retenido, así que el
+    chequeo de disponibilidad no compite con otros carritos.
+    """
+    try:
+        reservation = _lock_active_reservation(db, reservation_id, tenant_id)
+        sale_data = SaleCreate(
+            client_id=data.client_id,
+            point_of_sale_id=reservation.point_of_sale_id,
+            currency_id=data.currency_id,
+            payment_method=data.payment_method,
+            items=[
+                SaleItemCreate(product_id=i.product_id, variant_id=i.variant_id, quantity=i.quantity)
+                for i in reservation.items
+            ]
+        )
+    except Exception:
+        db.rollback()
+        raise
+
+    return sales_crud.create_sale(db, tenant_id, user_id, sale_data, reservation=reservation)
+
+
+def expire_reservations(db: Session, now: Optional[datetime] = None, batch_size: Optional[int] = None) -> int:
+    """
+    Marca como expired las reservas activas vencidas, por lotes cortos para no
+    retener locks. En PostgreSQL usa SKIP LOCKED: las reservas que un checkout
+    tiene bloqueadas se saltean y se procesan en la próxima pasada.
+    Devuelve la cantidad de reservas vencidas.
+    """
+    now = now or datetime.utcnow()
+    batch_size = batch_size or config.RESERVATION_SWEEP_BATCH_SIZE
+    expired = 0
+
+    while True:
+        ids = [
+            row.id for row in
+            db.query(StockReservation.id)
+            .filter(StockReservation.status == "active", StockReservation.expires_at <= now)
+            .order_by(StockReservation.expires_at)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+            .all()
+        ]
+        if not ids:
+            break
+
+        db.query(StockReservation).filter(StockReservation.id.in_(ids)).update(
+            {StockReservation.status: "expired"}, synchronize_session=False
+        )
+        db.query(StockReservationItem).filter(StockReservationItem.reservation_id.in_(ids)).update(
+            {StockReservationItem.status: "expired"}, synchronize_session=False
+        )
+        db.commit()
+        expired += len(ids)
+
+        if len(ids) < batch_size:
+            break
+
+    return expired
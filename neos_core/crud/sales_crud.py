@@ -1,115 +1,234 @@
-from decimal import Decimal
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy.exc import SQLAlchemyError
+from datetime import datetime
+from sqlalchemy import func, insert
+from sqlalchemy.orm import Session, joinedload, selectinload
 from fastapi import HTTPException, status
 
 from neos_core.database.models import (
-    Sale, SaleDetail, Product, Tenant, Client, PointOfSale, Currency
+    Sale, SaleDetail, Product, ProductVariant, Tenant, Client, PointOfSale, Currency,
+    StockReservation
 )
 from neos_core.schemas.sales_schema import SaleCreate, SaleFilters
+from neos_core.database import config
+from neos_core.database.routing import mark_tenant_write
+from neos_core.crud import pricing_crud, stock_crud
+from neos_core.services import archive, audit, electronic_invoicing, invoicing, metrics, money, outbox, tax
+from neos_core.services.shutdown import drain
 
 
-def create_sale(db: Session, tenant_id: int, user_id: int, sale_data: SaleCreate) -> Sale:
-    try:
-        with db.begin():
+def is_large_cart(line_count: int) -> bool:
+    """True si la venta supera LARGE_CART_MIN_LINES (0 desactiva el camino por lotes)"""
+    threshold = config.LARGE_CART_MIN_LINES
+    return threshold > 0 and line_count >= threshold
 
-            tenant = db.query(Tenant).filter_by(id=tenant_id, is_active=True).first()
-            if not tenant:
-                raise HTTPException(403, "Tenant inválido o inactivo")
 
-            pos = db.query(PointOfSale).filter_by(
-                id=sale_data.point_of_sale_id,
-                tenant_id=tenant_id
-            ).first()
-            if not pos:
-                raise HTTPException(400, "Punto de venta inválido")
-
-            if sale_data.client_id:
-                client = db.query(Client).filter_by(
-                    id=sale_data.client_id,
-                    tenant_id=tenant_id
-                ).first()
-                if not client:
-                    raise HTTPException(400, "Cliente inválido")
-
-            currency = db.query(Currency).filter_by(id=sale_data.currency_id).first()
-            if not currency:
-                raise HTTPException(400, "Moneda inválida")
-
-            sale = Sale(
-                tenant_id=tenant_id,
-                user_id=user_id,
-                client_id=sale_data.client_id,
-                point_of_sale_id=sale_data.point_of_sale_id,
-                currency_id=sale_data.currency_id,
-                payment_method=sale_data.payment_method,
-                status="completed"
-            )
-            db.add(sale)
-            db.flush()
+def _take_stock_per_line(db: Session, tenant_id: int, sale_data: SaleCreate, reservation):
+    """Bloquea, valida y descuenta stock item por item. Devuelve [(item, product, unit_price)]"""
+    lines = []
+    for item in sale_data.items:
 
-            subtotal = Decimal("0")
-            tax_total = Decimal("0")
+        product = (
+            db.query(Product)
+            .filter_by(id=item.product_id, tenant_id=tenant_id)
+            .with_for_update()
+            .first()
+        )
 
-            for item in sale_data.items:
+        if not product:
+            raise HTTPException(404, f"Producto {item.product_id} no existe")
 
-                product = (
-                    db.query(Product)
-                    .filter_by(id=item.product_id, tenant_id=tenant_id)
-                    .with_for_update()
-                    .first()
-                )
+        # Con variante, el stock y el precio salen de la variante
+        stock_item = stock_crud.lock_stock_item(db, product, item.variant_id, tenant_id)
 
-                if not product:
-                    raise HTTPException(404, f"Producto {item.product_id} no existe")
+        # Lo retenido por carritos de otros no está disponible (la reserva propia sí)
+        reserved = stock_crud.reserved_quantity(
+            db, product.id, item.variant_id,
+            exclude_reservation_id=reservation.id if reservation else None
+        )
+        if stock_item.stock - reserved < item.quantity:
+            raise HTTPException(400, f"Stock insuficiente para {product.name}")
 
-                if product.stock < item.quantity:
-                    raise HTTPException(400, f"Stock insuficiente para {product.name}")
+        stock_item.stock -= item.quantity
+        # Si el producto se controla por sucursal, descuenta del POS que vende
+        stock_crud.take_location_stock(
+            db, tenant_id, sale_data.point_of_sale_id, product.id, item.variant_id, item.quantity
+        )
 
-                unit_price = product.price
-                line_subtotal = unit_price * item.quantity
-                tax_rate = Decimal("0")
-                tax_amount = Decimal("0")
-                line_total = line_subtotal + tax_amount
+        unit_price = stock_item.price if stock_item.price is not None else product.price
+        lines.append((item, product, unit_price))
+    return lines
 
-                product.stock -= item.quantity
 
-                detail = SaleDetail(
-                    sale_id=sale.id,
-                    product_id=product.id,
-                    quantity=item.quantity,
-                    unit_price=unit_price,
-                    tax_rate=tax_rate,
-                    subtotal=line_subtotal,
-                    tax_amount=tax_amount,
-                    total=line_total
-                )
+def _take_stock_in_batches(db: Session, tenant_id: int, sale_data: SaleCreate, reservation):
+    """
+    Igual que _take_stock_per_line pero con un número de consultas que no
+    depende de las líneas del carrito (IN por lotes). Un mismo item repetido
+    en el carrito se valida por la cantidad total.
+    """
+    locked = stock_crud.lock_cart_items(db, tenant_id, sale_data.items)
 
-                db.add(detail)
+    needed = {}
+    for item in sale_data.items:
+        key = (item.product_id, item.variant_id)
+        needed[key] = needed.get(key, 0) + item.quantity
 
-                subtotal += line_subtotal
-                tax_total += tax_amount
+    reserved = stock_crud.reserved_quantities(
+        db, needed, exclude_reservation_id=reservation.id if reservation else None
+    )
+    for key, quantity in needed.items():
+        product, stock_item = locked[key]
+        if stock_item.stock - reserved.get(key, 0) < quantity:
+            raise HTTPException(400, f"Stock insuficiente para {product.name}")
+        stock_item.stock -= quantity
+
+    stock_crud.take_location_stock_many(db, tenant_id, sale_data.point_of_sale_id, needed)
+
+    lines = []
+    for item in sale_data.items:
+        product, stock_item = locked[(item.product_id, item.variant_id)]
+        unit_price = stock_item.price if stock_item.price is not None else product.price
+        lines.append((item, product, unit_price))
+    return lines
+
+
+@drain.tracked
+def create_sale(
+        db: Session,
+        tenant_id: int,
+        user_id: int,
+        sale_data: SaleCreate,
+        reservation: StockReservation | None = None
+) -> Sale:
+    """
+    Registra una venta y descuenta stock en una sola transacción.
+    Con `reservation` (checkout de un carrito) la reserva queda convertida
+    en la misma transacción.
+    """
+    invoice_number = None
+    try:
+        tenant = db.query(Tenant).filter_by(id=tenant_id, is_active=True).first()
+        if not tenant:
+            raise HTTPException(403, "Tenant inválido o inactivo")
+
+        pos = db.query(PointOfSale).filter_by(
+            id=sale_data.point_of_sale_id,
+            tenant_id=tenant_id
+        ).first()
+        if not pos:
+            raise HTTPException(400, "Punto de venta inválido")
+
+        if sale_data.client_id:
+            client = db.query(Client).filter_by(
+                id=sale_data.client_id,
+                tenant_id=tenant_id
+            ).first()
+            if not client:
+                raise HTTPException(400, "Cliente inválido")
+
+        currency = db.query(Currency).filter_by(id=sale_data.currency_id).first()
+        if not currency:
+            raise HTTPException(400, "Moneda inválida")
+
+        sale = Sale(
+            tenant_id=tenant_id,
+            user_id=user_id,
+            client_id=sale_data.client_id,
+            point_of_sale_id=sale_data.point_of_sale_id,
+            currency_id=sale_data.currency_id,
+            payment_method=sale_data.payment_method,
+            status="completed",
+            invoice_type=sale_data.invoice_type,
+            cae=sale_data.cae,
+            cae_expiration=sale_data.cae_expiration
+        )
+        db.add(sale)
+        db.flush()
 
-            sale.subtotal = subtotal
-            sale.tax_amount = tax_total
-            sale.total = subtotal + tax_total
+        # 1) Bloqueos y validación de stock; 2) impuestos de todo el carrito de una vez.
+        # Los carritos grandes (B2B) bloquean por lotes e insertan los items en bloque.
+        large_cart = is_large_cart(len(sale_data.items))
+        take_stock = _take_stock_in_batches if large_cart else _take_stock_per_line
+        lines = take_stock(db, tenant_id, sale_data, reservation)
 
-            db.flush()
-            db.refresh(sale)
-            return sale
+        # Lista de precios y promociones (índice compilado en memoria, sin consultas por regla)
+        priced = pricing_crud.price_lines(
+            db, tenant_id, lines, sale_data.client_id, sale_data.point_of_sale_id
+        )
+        taxes = tax.compute_taxes(
+            [(item.quantity, p.unit_price, product.tax_rate) for (item, product, _), p in zip(lines, priced.lines)],
+            discounts=[p.discount for p in priced.lines]
+        )
 
-    except SQLAlchemyError:
+        details = [
+            dict(
+                sale_id=sale.id,
+                sale_created_at=sale.created_at,
+                product_id=product.id,
+                variant_id=item.variant_id,
+                quantity=line.quantity,
+                unit_price=line.unit_price,
+                tax_rate=line.tax_rate,
+                discount_amount=line.discount,
+                promotion_id=p.promotion_id,
+                subtotal=line.subtotal,
+                tax_amount=line.tax_amount,
+                total=line.total
+            )
+            for (item, product, _), p, line in zip(lines, priced.lines, taxes.lines)
+        ]
+        if large_cart:
+            db.execute(insert(SaleDetail), details)
+        else:
+            db.add_all(SaleDetail(**detail) for detail in details)
+
+        sale.price_list_id = priced.price_list_id
+        sale.discount_amount = priced.discount_amount
+        sale.subtotal = taxes.subtotal
+        sale.tax_amount = taxes.tax_amount
+        sale.total = taxes.total
+        sale.tax_rounding = taxes.rounding
+
+        if reservation is not None:
+            reservation.close("converted")
+            reservation.sale_id = sale.id
+
+        # Número del bloque en memoria del worker (sin bloquear un contador por venta)
+        invoice_number = invoicing.invoice_numbers.next_number(db, tenant_id, pos.id)
+        sale.invoice_number = invoicing.format_invoice_number(invoice_number)
+
+        # El CAE se pide en segundo plano: la venta no espera al fisco
+        if sale.cae is not None:
+            sale.invoice_status = electronic_invoicing.STATUS_AUTHORIZED
+        elif tenant.electronic_invoicing_enabled:
+            sale.invoice_type = sale.invoice_type or electronic_invoicing.DEFAULT_INVOICE_TYPE
+            electronic_invoicing.enqueue(db, tenant, sale)
+
+        outbox.record(db, tenant_id, outbox.SALE_CREATED, sale.id, outbox.sale_payload(sale, details))
+
+        db.commit()
+        invoice_number = None
+        mark_tenant_write(tenant_id)
+        db.refresh(sale)
+        metrics.SALES_CREATED.inc(tenant_id=tenant_id)
+        return sale
+
+    except Exception:
         db.rollback()
+        if invoice_number is not None:
+            invoicing.invoice_numbers.release(tenant_id, pos.id, invoice_number)
         raise
 
 
 def get_sale_by_id(db: Session, sale_id: int, tenant_id: int) -> Sale | None:
-    return (
+    sale = (
         db.query(Sale)
         .options(joinedload(Sale.items))
         .filter(Sale.id == sale_id, Sale.tenant_id == tenant_id)
         .first()
     )
+    if sale is None:
+        # Las ventas antiguas pueden estar en el archivo frío
+        sale = archive.get_archived_sale(db, sale_id, tenant_id)
+    return sale
 
 
 def get_sales(db: Session, tenant_id: int, filters: SaleFilters):
@@ -123,12 +242,91 @@ def get_sales(db: Session, tenant_id: int, filters: SaleFilters):
         q = q.filter(Sale.payment_method == filters.payment_method)
     if filters.status:
         q = q.filter(Sale.status == filters.status)
+    # Con ventas particionadas por mes, el rango de fechas limita las particiones leídas
+    if filters.date_from:
+        q = q.filter(Sale.created_at >= filters.date_from)
+    if filters.date_to:
+        q = q.filter(Sale.created_at < filters.date_to)
 
     return q.order_by(Sale.created_at.desc()).offset(filters.skip).limit(filters.limit).all()
 
 
+def iter_sales_for_export(
+        db: Session,
+        tenant_id: int,
+        date_from: datetime | None = None,
+        date_to: datetime | None = None,
+        batch_size: int = 500
+):
+    """
+    Recorre las ventas del tenant (calientes y archivadas) para exportar,
+    sin cargarlas todas en memoria.
+    """
+    q = (
+        db.query(Sale)
+        .options(selectinload(Sale.items))
+        .filter(Sale.tenant_id == tenant_id)
+    )
+    if date_from:
+        q = q.filter(Sale.created_at >= date_from)
+    if date_to:
+        q = q.filter(Sale.created_at < date_to)
+
+    yield from q.order_by(Sale.id).yield_per(batch_size)
+    yield from archive.iter_archived_sales(db, tenant_id, date_from, date_to)
+
+
+def get_sales_summary(db: Session, tenant_id: int, date_from: datetime, date_to: datetime) -> dict:
+    """
+    Totales de ventas completadas agrupados por medio de pago.
+    El rango [date_from, date_to) es obligatorio para acotar el escaneo
+    (poda de particiones en PostgreSQL, índice tenant_id + created_at).
+    """
+    rows = (
+        db.query(
+            Sale.payment_method,
+            func.count(Sale.id),
+            func.coalesce(func.sum(Sale.subtotal), 0),
+            func.coalesce(func.sum(Sale.tax_amount), 0),
+            func.coalesce(func.sum(Sale.total), 0),
+        )
+        .filter(
+            Sale.tenant_id == tenant_id,
+            Sale.status == "completed",
+            Sale.created_at >= date_from,
+            Sale.created_at < date_to,
+        )
+        .group_by(Sale.payment_method)
+        .order_by(Sale.payment_method)
+        .all()
+    )
+
+    # Las sumas se normalizan a centavos enteros: según el motor SUM puede
+    # devolver float (SQLite) o Decimal con más escala (PostgreSQL)
+    by_method = []
+    total_cents = 0
+    for method, count, subtotal, tax, total in rows:
+        cents = money.to_cents(total)
+        total_cents += cents
+        by_method.append({
+            "payment_method": method,
+            "sales_count": count,
+            "subtotal": money.from_cents(money.to_cents(subtotal)),
+            "tax_amount": money.from_cents(money.to_cents(tax)),
+            "total": money.from_cents(cents),
+        })
+    return {
+        "date_from": date_from,
+        "date_to": date_to,
+        "sales_count": sum(r["sales_count"] for r in by_method),
+        "total": money.from_cents(total_cents),
+        "by_payment_method": by_method,
+    }
+
+
+@drain.tracked
 def cancel_sale(db: Session, sale_id: int, tenant_id: int, user_id: int) -> Sale:
-    with db.begin():
+    try:
         sale = (
             db.query(Sale)
             .options(joinedload(Sale.items))
@@ -144,10 +342,23 @@ def cancel_sale(db: Session, sale_id: int, tenant_id: int, user_id: int) -> Sale
             raise HTTPException(400, "Solo se pueden cancelar ventas completadas")
 
         for item in sale.items:
-            product = db.query(Product).filter_by(id=item.product_id).with_for_update().first()
-            product.stock += item.quantity
+            if item.variant_id:
+                stock_item = db.query(ProductVariant).filter_by(id=item.variant_id).with_for_update().first()
+            else:
+                stock_item = db.query(Product).filter_by(id=item.product_id).with_for_update().first()
+            stock_item.stock += item.quantity
+            stock_crud.restore_location_stock(
+                db, sale.point_of_sale_id, item.product_id, item.variant_id, item.quantity
+            )
 
         sale.status = "cancelled"
-        db.flush()
+        outbox.record(db, tenant_id, outbox.SALE_CANCELLED, sale.id, outbox.sale_payload(sale, sale.items))
+        db.commit()
+        mark_tenant_write(tenant_id)
+        audit.audit_log.record(tenant_id, audit.SALE_CANCELLED, "sale", sale.id, {"status": ["completed", "cancelled"]}, user_id)
         db.refresh(sale)
         return sale
+
+    except Exception:
+        db.rollback()
+        raise
@@ -0,0 +1,468 @@
+# neos_core/crud/stock_crud.py
+"""
+CRUD de stock por ubicación (punto de venta) y transferencias.
+
+Product.stock / ProductVariant.stock es el total del tenant. Un producto pasa a
+controlarse por ubicación cuando tiene al menos una fila en location_stock;
+desde entonces su total es la suma de sus ubicaciones y solo cambia por acá
+(ajustes, transferencias y ventas, que descuentan de la ubicación que vende).
+La edición directa del stock de esos productos se rechaza (ver product_crud).
+El stock disponible para vender descuenta lo retenido por reservas activas.
+"""
+from datetime import datetime
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from neos_core.database.models import (
+    LocationStock, StockTransfer, PointOfSale, Product, ProductVariant,
+    StockReservationItem
+)
+from neos_core.database.routing import mark_tenant_write
+from neos_core.schemas.stock_schema import LocationStockSet, StockTransferCreate
+from neos_core.services import audit
+
+# (product_id, variant_id)
+StockKey = Tuple[int, Optional[int]]
+
+# Tamaño de las listas IN al procesar carritos grandes por lotes
+IN_BATCH_SIZE = 1000
+
+
+def _item_filter(product_id: int, variant_id: Optional[int]):
+    if variant_id is None:
+        return (LocationStock.product_id == product_id, LocationStock.variant_id.is_(None))
+    return (LocationStock.product_id == product_id, LocationStock.variant_id == variant_id)
+
+
+def _lock_location(db: Session, point_of_sale_id: int, product_id: int, variant_id: Optional[int]):
+    return (
+        db.query(LocationStock)
+        .filter(LocationStock.point_of_sale_id == point_of_sale_id, *_item_filter(product_id, variant_id))
+        .with_for_update()
+        .first()
+    )
+
+
+def _chunks(values: list, size: int = IN_BATCH_SIZE):
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+def _validate_pos(db: Session, point_of_sale_id: int, tenant_id: int) -> PointOfSale:
+    pos = db.query(PointOfSale).filter_by(id=point_of_sale_id, tenant_id=tenant_id).first()
+    if not pos:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Punto de venta {point_of_sale_id} inválido"
+        )
+    return pos
+
+
+def _lock_total_item(db: Session, tenant_id: int, product_id: int, variant_id: Optional[int]):
+    """Bloquea el producto (o la variante) que lleva el stock total del tenant"""
+    if variant_id is None:
+        item = db.query(Product).filter_by(id=product_id, tenant_id=tenant_id).with_for_update().first()
+    else:
+        item = (
+            db.query(ProductVariant)
+            .filter_by(id=variant_id, product_id=product_id, tenant_id=tenant_id)
+            .with_for_update()
+            .first()
+        )
+    if not item:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Producto o variante no encontrado"
+        )
+    return item
+
+
+def is_location_tracked(db: Session, tenant_id: int, product_id: int, variant_id: Optional[int] = None) -> bool:
+    """True si el producto (o la variante) se controla por ubicación"""
+    return db.query(LocationStock.id).filter(
+        LocationStock.tenant_id == tenant_id, *_item_filter(product_id, variant_id)
+    ).first() is not None
+
+
+def location_tracked_products(db: Session, tenant_id: int, product_ids: Iterable[int]) -> set:
+    """Ids de productos (sin variante) que se controlan por ubicación"""
+    product_ids = list(product_ids)
+    tracked = set()
+    for chunk in _chunks(product_ids):
+        tracked.update(
+            product_id for (product_id,) in db.query(LocationStock.product_id).filter(
+                LocationStock.tenant_id == tenant_id,
+                LocationStock.product_id.in_(chunk),
+                LocationStock.variant_id.is_(None)
+            ).distinct()
+        )
+    return tracked
+
+
+# ===== AJUSTES =====
+
+def set_location_stock(
+        db: Session,
+        tenant_id: int,
+        data: LocationStockSet,
+        actor_id: Optional[int] = None
+) -> LocationStock:
+    """
+    Fija el stock de un producto en una ubicación (recepción o conteo de inventario).
+    El total del tenant pasa a ser la suma de las ubicaciones: en el primer
+    ajuste, el stock sin ubicación que tenía el producto se reemplaza por lo
+    contado (cargar cada sucursal con su conteo). El cambio queda en la auditoría.
+    """
+    try:
+        _validate_pos(db, data.point_of_sale_id, tenant_id)
+        total_item = _lock_total_item(db, tenant_id, data.product_id, data.variant_id)
+
+        location = _lock_location(db, data.point_of_sale_id, data.product_id, data.variant_id)
+        if location is None:
+            location = LocationStock(
+                tenant_id=tenant_id,
+                point_of_sale_id=data.point_of_sale_id,
+                product_id=data.product_id,
+                variant_id=data.variant_id,
+                stock=Decimal("0")
+            )
+            db.add(location)
+
+        changes = audit.diff({"stock": location.stock}, {"stock": data.stock})
+        other_locations = db.query(func.coalesce(func.sum(LocationStock.stock), 0)).filter(
+            LocationStock.tenant_id == tenant_id,
+            LocationStock.point_of_sale_id != data.point_of_sale_id,
+            *_item_filter(data.product_id, data.variant_id)
+        ).scalar()
+        total_item.stock = Decimal(str(other_locations)) + data.stock
+        location.stock = data.stock
+        if data.min_stock is not None:
+            location.min_stock = data.min_stock
+
+        db.commit()
+        mark_tenant_write(tenant_id)
+        if changes:
+            audit.audit_log.record(tenant_id, audit.LOCATION_STOCK_SET, "location_stock", location.id, changes, actor_id)
+        db.refresh(location)
+        return location
+
+    except Exception:
+        db.rollback()
+        raise
+
+
+def get_location_stock(
+        db: Session,
+        tenant_id: int,
+        point_of_sale_id: Optional[int] = None,
+        product_id: Optional[int] = None
+) -> List[LocationStock]:
+    """Lista el stock por ubicación, opcionalmente filtrado por POS o producto"""
+    query = db.query(LocationStock).filter(LocationStock.tenant_id == tenant_id)
+
+    if point_of_sale_id is not None:
+        query = query.filter(LocationStock.point_of_sale_id == point_of_sale_id)
+    if product_id is not None:
+        query = query.filter(LocationStock.product_id == product_id)
+
+    return query.order_by(LocationStock.point_of_sale_id, LocationStock.product_id).all()
+
+
+def get_low_stock_locations(
+        db: Session,
+        tenant_id: int,
+        point_of_sale_id: Optional[int] = None
+) -> List[LocationStock]:
+    """
+    Ubicaciones con stock por debajo de su mínimo.
+    Recorre solo las filas del tenant (o de un POS) vía ix_location_stock_tenant_pos.
+    """
+    query = db.query(LocationStock).filter(
+        LocationStock.tenant_id == tenant_id,
+        LocationStock.min_stock.isnot(None),
+        LocationStock.stock <= LocationStock.min_stock
+    )
+    if point_of_sale_id is not None:
+        query = query.filter(LocationStock.point_of_sale_id == point_of_sale_id)
+
+    return query.order_by(LocationStock.point_of_sale_id, LocationStock.product_id).all()
+
+
+# ===== TRANSFERENCIAS =====
+
+def transfer_stock(db: Session, tenant_id: int, user_id: int, data: StockTransferCreate) -> StockTransfer:
+    """
+    Mueve stock entre dos ubicaciones en una sola transacción.
+    El total del tenant no cambia.
+    """
+    try:
+        _validate_pos(db, data.from_point_of_sale_id, tenant_id)
+        _validate_pos(db, data.to_point_of_sale_id, tenant_id)
+        _lock_total_item(db, tenant_id, data.product_id, data.variant_id)
+
+        # Bloquear siempre en el mismo orden (por POS) evita deadlocks entre transferencias cruzadas
+        locations = {}
+        for pos_id in sorted((data.from_point_of_sale_id, data.to_point_of_sale_id)):
+            locations[pos_id] = _lock_location(db, pos_id, data.product_id, data.variant_id)
+
+        source = locations[data.from_point_of_sale_id]
+        if source is None or source.stock < data.quantity:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Stock insuficiente en la ubicación de origen"
+            )
+
+        target = locations[data.to_point_of_sale_id]
+        if target is None:
+            target = LocationStock(
+                tenant_id=tenant_id,
+                point_of_sale_id=data.to_point_of_sale_id,
+                product_id=data.product_id,
+                variant_id=data.variant_id,
+                stock=Decimal("0")
+            )
+            db.add(target)
+
+        source.stock -= data.quantity
+        target.stock += data.quantity
+
+        transfer = StockTransfer(tenant_id=tenant_id, user_id=user_id, **data.model_dump())
+        db.add(transfer)
+
+        db.commit()
+        mark_tenant_write(tenant_id)
+        db.refresh(transfer)
+        return transfer
+
+    except Exception:
+        db.rollback()
+        raise
+
+
+# ===== VENTAS =====
+
+def lock_stock_item(db: Session, product: Product, variant_id: Optional[int], tenant_id: int):
+    """
+    Devuelve (bloqueada) la variante indicada del producto, o el producto mismo
+    si se vende sin variante. Un producto con variantes exige elegir una.
+    """
+    if variant_id is None:
+        has_variants = db.query(ProductVariant.id).filter_by(product_id=product.id).first()
+        if has_variants:
+            raise HTTPException(400, f"Debe indicar la variante de {product.name}")
+        return product
+
+    variant = (
+        db.query(ProductVariant)
+        .filter_by(id=variant_id, product_id=product.id, tenant_id=tenant_id, is_active=True)
+        .with_for_update()
+        .first()
+    )
+    if not variant:
+        raise HTTPException(404, f"Variante {variant_id} no existe para {product.name}")
+    return variant
+
+
+def reserved_quantity(
+        db: Session,
+        product_id: int,
+        variant_id: Optional[int],
+        now: Optional[datetime] = None,
+        exclude_reservation_id: Optional[int] = None
+) -> Decimal:
+    """
+    Cantidad retenida por reservas activas y no vencidas.
+    Stock disponible = stock - reserved_quantity().
+    Suma solo items (sin join a la reserva) por su índice parcial de activos.
+    """
+    now = now or datetime.utcnow()
+    query = (
+        db.query(func.coalesce(func.sum(StockReservationItem.quantity), 0))
+        .filter(
+            StockReservationItem.product_id == product_id,
+            StockReservationItem.status == "active",
+            StockReservationItem.expires_at > now
+        )
+    )
+    if variant_id is None:
+        query = query.filter(StockReservationItem.variant_id.is_(None))
+    else:
+        query = query.filter(StockReservationItem.variant_id == variant_id)
+    if exclude_reservation_id is not None:
+        query = query.filter(StockReservationItem.reservation_id != exclude_reservation_id)
+
+    return Decimal(str(query.scalar()))
+
+
+def take_location_stock(
+        db: Session,
+        tenant_id: int,
+        point_of_sale_id: int,
+        product_id: int,
+        variant_id: Optional[int],
+        quantity: Decimal
+) -> Optional[LocationStock]:
+    """
+    Descuenta stock de la ubicación que vende (sin commit: lo hace create_sale).
+    Si el producto no se controla por ubicación no hace nada.
+    """
+    location = _lock_location(db, point_of_sale_id, product_id, variant_id)
+
+    if location is None:
+        tracked = db.query(LocationStock.id).filter(
+            LocationStock.tenant_id == tenant_id, *_item_filter(product_id, variant_id)
+        ).first()
+        if tracked:
+            raise HTTPException(400, "El producto no tiene stock en este punto de venta")
+        return None
+
+    if location.stock < quantity:
+        raise HTTPException(400, "Stock insuficiente en este punto de venta")
+
+    location.stock -= quantity
+    return location
+
+
+def restore_location_stock(
+        db: Session,
+        point_of_sale_id: int,
+        product_id: int,
+        variant_id: Optional[int],
+        quantity: Decimal
+):
+    """Devuelve stock a la ubicación al cancelar una venta (sin commit)"""
+    location = _lock_location(db, point_of_sale_id, product_id, variant_id)
+    if location is not None:
+        location.stock += quantity
+
+
+# ===== VENTAS (carritos grandes, por lotes) =====
+
+def lock_cart_items(db: Session, tenant_id: int, items: Iterable) -> Dict[StockKey, tuple]:
+    """
+    lock_stock_item para todo un carrito con pocas consultas. Bloquea productos
+    y variantes en orden de id, así dos carritos grandes concurrentes no se
+    bloquean mutuamente. Devuelve {(product_id, variant_id): (product, stock_item)}.
+    """
+    items = list(items)
+    products = {}
+    for chunk in _chunks(sorted({item.product_id for item in items})):
+        query = (
+            db.query(Product)
+            .filter(Product.tenant_id == tenant_id, Product.id.in_(chunk))
+            .order_by(Product.id)
+            .with_for_update()
+        )
+        products.update((product.id, product) for product in query)
+
+    variants = {}
+    for chunk in _chunks(sorted({item.variant_id for item in items if item.variant_id is not None})):
+        query = (
+            db.query(ProductVariant)
+            .filter_by(tenant_id=tenant_id, is_active=True)
+            .filter(ProductVariant.id.in_(chunk))
+            .order_by(ProductVariant.id)
+            .with_for_update()
+        )
+        variants.update((variant.id, variant) for variant in query)
+
+    # Un producto con variantes exige elegir una
+    with_variants = set()
+    for chunk in _chunks(sorted({item.product_id for item in items if item.variant_id is None})):
+        query = db.query(ProductVariant.product_id).filter(ProductVariant.product_id.in_(chunk)).distinct()
+        with_variants.update(product_id for (product_id,) in query)
+
+    locked = {}
+    for item in items:
+        product = products.get(item.product_id)
+        if not product:
+            raise HTTPException(404, f"Producto {item.product_id} no existe")
+
+        if item.variant_id is None:
+            if product.id in with_variants:
+                raise HTTPException(400, f"Debe indicar la variante de {product.name}")
+            stock_item = product
+        else:
+            stock_item = variants.get(item.variant_id)
+            if stock_item is None or stock_item.product_id != product.id:
+                raise HTTPException(404, f"Variante {item.variant_id} no existe para {product.name}")
+
+        locked[(product.id, item.variant_id)] = (product, stock_item)
+    return locked
+
+
+def reserved_quantities(
+        db: Session,
+        keys: Iterable[StockKey],
+        now: Optional[datetime] = None,
+        exclude_reservation_id: Optional[int] = None
+) -> Dict[StockKey, Decimal]:
+    """reserved_quantity de muchos items con una consulta agrupada por lote"""
+    now = now or datetime.utcnow()
+    keys = set(keys)
+    reserved = {}
+
+    for chunk in _chunks(sorted({product_id for product_id, _ in keys})):
+        query = (
+            db.query(
+                StockReservationItem.product_id,
+                StockReservationItem.variant_id,
+                func.sum(StockReservationItem.quantity)
+            )
+            .filter(
+                StockReservationItem.product_id.in_(chunk),
+                StockReservationItem.status == "active",
+                StockReservationItem.expires_at > now
+            )
+        )
+        if exclude_reservation_id is not None:
+            query = query.filter(StockReservationItem.reservation_id != exclude_reservation_id)
+
+        query = query.group_by(StockReservationItem.product_id, StockReservationItem.variant_id)
+        for product_id, variant_id, quantity in query:
+            if (product_id, variant_id) in keys:
+                reserved[(product_id, variant_id)] = Decimal(str(quantity))
+
+    return reserved
+
+
+def take_location_stock_many(
+        db: Session,
+        tenant_id: int,
+        point_of_sale_id: int,
+        quantities: Dict[StockKey, Decimal]
+):
+    """take_location_stock para todo un carrito (sin commit: lo hace create_sale)"""
+    locations = {}
+    tracked = set()
+
+    for chunk in _chunks(sorted({product_id for product_id, _ in quantities})):
+        query = (
+            db.query(LocationStock)
+            .filter(LocationStock.point_of_sale_id == point_of_sale_id, LocationStock.product_id.in_(chunk))
+            .order_by(LocationStock.id)
+            .with_for_update()
+        )
+        locations.update(((location.product_id, location.variant_id), location) for location in query)
+
+        query = (
+            db.query(LocationStock.product_id, LocationStock.variant_id)
+            .filter(LocationStock.tenant_id == tenant_id, LocationStock.product_id.in_(chunk))
+            .distinct()
+        )
+        tracked.update((product_id, variant_id) for product_id, variant_id in query)
+
+    for key, quantity in quantities.items():
+        location = locations.get(key)
+        if location is None:
+            if key in tracked:
+                raise HTTPException(400, "El producto no tiene stock en este punto de venta")
+            continue
+
+        if location.stock < quantity:
+            raise HTTPException(400, "Stock insuficiente en este punto de venta")
+        location.stock -= quantity
@@ -1,9 +1,10 @@
 # neos_core/crud/user_crud.py
-
+from typing import Optional
 from sqlalchemy.orm import Session
 from passlib.context import CryptContext
 from neos_core.database import models
 from neos_core import schemas
+from neos_core.services import audit
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
@@ -30,9 +31,10 @@ def get_user_by_id(db: Session, user_id: int):
     return db.query(models.User).filter(models.User.id == user_id).first()
 
 
-def create_user(db: Session, user: schemas.UserCreate):
+def create_user(db: Session, user: schemas.UserCreate, actor_id: Optional[int] = None):
     """
     Crea un nuevo usuario, hasheando la contraseña antes de guardarla.
+    El alta queda en la auditoría (sin la contraseña).
     """
     # 1. Hashing de Contraseña
     hashed_password = get_password_hash(user.password)
@@ -50,6 +52,10 @@ def create_user(db: Session, user: schemas.UserCreate):
     db.add(db_user)
     db.commit()
     db.refresh(db_user)
+    audit.audit_log.record(
+        db_user.tenant_id, audit.USER_CREATED, "user", db_user.id,
+        {"email": [None, db_user.email], "role_id": [None, db_user.role_id]}, actor_id
+    )
     return db_user
 
 def get_users(db: Session, skip: int = 0, limit: int = 100):
@@ -0,0 +1,112 @@
+# neos_core/crud/webhook_crud.py
+"""
+CRUD de webhooks por tenant y consulta/reenvío de sus entregas.
+El reparto y el envío los hace el worker de services/webhooks.py.
+"""
+from datetime import datetime
+from typing import List, Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy.orm import Session
+
+from neos_core.database.models import WebhookDelivery, WebhookEndpoint
+from neos_core.schemas.webhook_schema import WebhookEndpointCreate, WebhookEndpointUpdate
+from neos_core.services import webhooks
+
+
+def _get_endpoint(db: Session, endpoint_id: int, tenant_id: int) -> WebhookEndpoint:
+    endpoint = db.query(WebhookEndpoint).filter_by(id=endpoint_id, tenant_id=tenant_id).first()
+    if not endpoint:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Webhook no encontrado")
+    return endpoint
+
+
+def create_endpoint(db: Session, tenant_id: int, data: WebhookEndpointCreate) -> WebhookEndpoint:
+    endpoint = WebhookEndpoint(
+        tenant_id=tenant_id,
+        url=str(data.url),
+        secret=webhooks.generate_secret(),
+        event_types=data.event_types,
+        batch_size=data.batch_size,
+        max_concurrency=data.max_concurrency,
+        # Solo eventos publicados desde ahora
+        start_sequence=webhooks.current_sequence(db, tenant_id),
+    )
+    db.add(endpoint)
+    db.commit()
+    db.refresh(endpoint)
+    return endpoint
+
+
+def get_endpoints(db: Session, tenant_id: int) -> List[WebhookEndpoint]:
+    return (
+        db.query(WebhookEndpoint)
+        .filter(WebhookEndpoint.tenant_id == tenant_id)
+        .order_by(WebhookEndpoint.id)
+        .all()
+    )
+
+
+def update_endpoint(db: Session, endpoint_id: int, tenant_id: int, data: WebhookEndpointUpdate) -> WebhookEndpoint:
+    endpoint = _get_endpoint(db, endpoint_id, tenant_id)
+    changes = data.model_dump(exclude_unset=True)
+    if changes.get("url") is not None:
+        changes["url"] = str(changes["url"])
+    if changes.get("is_active") and not endpoint.is_active:
+        # Reactivado: no recibe lo publicado mientras estuvo inactivo
+        endpoint.start_sequence = webhooks.current_sequence(db, tenant_id)
+
+    for field, value in changes.items():
+        if value is not None:
+            setattr(endpoint, field, value)
+
+    db.commit()
+    db.refresh(endpoint)
+    return endpoint
+
+
+def delete_endpoint(db: Session, endpoint_id: int, tenant_id: int):
+    endpoint = _get_endpoint(db, endpoint_id, tenant_id)
+    db.query(WebhookDelivery).filter(WebhookDelivery.endpoint_id == endpoint.id).delete(synchronize_session=False)
+    db.delete(endpoint)
+    db.commit()
+
+
+def get_deliveries(
+        db: Session,
+        endpoint_id: int,
+        tenant_id: int,
+        status_filter: Optional[str] = None,
+        before_id: Optional[int] = None,
+        limit: int = 100
+) -> List[WebhookDelivery]:
+    """Entregas del endpoint, de la más nueva a la más vieja (paginar con before_id)"""
+    endpoint = _get_endpoint(db, endpoint_id, tenant_id)
+    query = db.query(WebhookDelivery).filter(WebhookDelivery.endpoint_id == endpoint.id)
+    if status_filter:
+        query = query.filter(WebhookDelivery.status == status_filter)
+    if before_id:
+        query = query.filter(WebhookDelivery.id < before_id)
+    return query.order_by(WebhookDelivery.id.desc()).limit(limit).all()
+
+
+def redeliver_dead(db: Session, endpoint_id: int, tenant_id: int) -> int:
+    """Vuelve a encolar las entregas muertas del endpoint con los intentos en cero"""
+    endpoint = _get_endpoint(db, endpoint_id, tenant_id)
+    if not endpoint.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="El webhook está desactivado; actívelo antes de reenviar"
+        )
+
+    requeued = (
+        db.query(WebhookDelivery)
+        .filter(WebhookDelivery.endpoint_id == endpoint.id, WebhookDelivery.status == webhooks.STATUS_DEAD)
+        .update({
+            WebhookDelivery.status: webhooks.STATUS_PENDING,
+            WebhookDelivery.attempts: 0,
+            WebhookDelivery.next_attempt_at: datetime.utcnow(),
+        }, synchronize_session=False)
+    )
+    db.commit()
+    return requeued
@@ -0,0 +1,449 @@
+# neos_core/database/migrations.py
+"""
+Migraciones idempotentes para bases existentes (PostgreSQL).
+
+Las bases nuevas ya se crean con el esquema actual (create_schema); estas
+funciones actualizan bases creadas con versiones anteriores del modelo.
+Se pueden ejecutar tantas veces como se quiera.
+
+Uso por línea de comandos:
+    python -m neos_core.database.migrations
+"""
+from sqlalchemy import inspect, text
+
+from neos_core.database import config
+
+
+def add_sale_created_at(bind) -> bool:
+    """
+    Agrega sale_details.sale_created_at (copia de sales.created_at, clave de
+    partición de sale_details) y la completa para los items existentes.
+    Devuelve True si hubo que agregar la columna.
+    """
+    if bind.dialect.name != "postgresql":
+        return False
+
+    with bind.begin() as conn:
+        exists = conn.execute(text(
+            "SELECT 1 FROM information_schema.columns "
+            "WHERE table_name = 'sale_details' AND column_name = 'sale_created_at'"
+        )).scalar()
+        if not exists:
+            conn.execute(text("ALTER TABLE sale_details ADD COLUMN sale_created_at TIMESTAMP"))
+        # Solo los que faltan: una corrida interrumpida se retoma donde quedó
+        conn.execute(text(
+            "UPDATE sale_details d SET sale_created_at = s.created_at "
+            "FROM sales s WHERE s.id = d.sale_id AND d.sale_created_at IS NULL"
+        ))
+    return not exists
+
+
+def add_sales_archive(bind) -> bool:
+    """
+    Agrega tenants.sales_retention_days y crea la tabla archived_sales.
+    Devuelve True si hubo que agregar la columna.
+    """
+    if bind.dialect.name != "postgresql":
+        return False
+
+    from neos_core.database.models import ArchivedSale
+
+    ArchivedSale.__table__.create(bind, checkfirst=True)
+
+    with bind.begin() as conn:
+        exists = conn.execute(text(
+            "SELECT 1 FROM information_schema.columns "
+            "WHERE table_name = 'tenants' AND column_name = 'sales_retention_days'"
+        )).scalar()
+        if not exists:
+            conn.execute(text("ALTER TABLE tenants ADD COLUMN sales_retention_days INTEGER"))
+    return not exists
+
+
+def add_product_search(bind) -> bool:
+    """
+    Crea la columna search_vector y los índices GIN y trigram de la búsqueda
+    de productos (el DDL de setup_product_search ya es idempotente).
+    Devuelve True si hubo que agregar la columna.
+    """
+    if bind.dialect.name != "postgresql":
+        return False
+
+    from neos_core.database.search import setup_product_search
+
+    with bind.connect() as conn:
+        exists = conn.execute(text(
+            "SELECT 1 FROM information_schema.columns "
+            "WHERE table_name = 'products' AND column_name = 'search_vector'"
+        )).scalar()
+    setup_product_search(bind)
+    return not exists
+
+
+def migrate_product_attributes_to_jsonb(bind) -> bool:
+    """
+    Convierte products.attributes de JSON a JSONB y crea su índice GIN.
+    La columna generada de búsqueda depende de attributes, así que se
+    elimina antes del cambio de tipo y se recrea después.
+    Devuelve True si hubo que convertir la columna.
+    """
+    if bind.dialect.name != "postgresql":
+        return False
+
+    from neos_core.database.search import setup_product_search
+
+    with bind.begin() as conn:
+        data_type = conn.execute(text(
+            "SELECT data_type FROM information_schema.columns "
+            "WHERE table_name = 'products' AND column_name = 'attributes'"
+        )).scalar()
+
+        converted = data_type == "json"
+        if converted:
+            conn.execute(text("ALTER TABLE products DROP COLUMN IF EXISTS search_vector"))
+            conn.execute(text(
+                "ALTER TABLE products ALTER COLUMN attributes TYPE jsonb USING attributes::jsonb"
+            ))
+
+        conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_products_attributes_gin "
+            "ON products USING gin (attributes jsonb_path_ops)"
+        ))
+
+    setup_product_search(bind)
+    return converted
+
+
+def add_product_variants(bind) -> bool:
+    """
+    Crea la tabla product_variants y la columna sale_details.variant_id.
+    Devuelve True si hubo que agregar la columna.
+    """
+    if bind.dialect.name != "postgresql":
+        return False
+
+    from neos_core.database.models import ProductVariant
+
+    ProductVariant.__table__.create(bind, checkfirst=True)
+
+    with bind.begin() as conn:
+        exists = conn.execute(text(
+            "SELECT 1 FROM information_schema.columns "
+            "WHERE table_name = 'sale_details' AND column_name = 'variant_id'"
+        )).scalar()
+        if not exists:
+            # En sale_details particionada, el ALTER del padre se propaga a las particiones
+            conn.execute(text(
+                "ALTER TABLE sale_details ADD COLUMN variant_id INTEGER REFERENCES product_variants (id)"
+            ))
+    return not exists
+
+
+def add_location_stock(bind) -> bool:
+    """
+    Crea location_stock (stock por punto de venta) y stock_transfers.
+    Devuelve True si hubo que crear la tabla de stock por ubicación.
+    """
+    if bind.dialect.name != "postgresql":
+        return False
+
+    from neos_core.database.models import LocationStock, StockTransfer
+
+    exists = inspect(bind).has_table(LocationStock.__tablename__)
+    LocationStock.__table__.create(bind, checkfirst=True)
+    StockTransfer.__table__.create(bind, checkfirst=True)
+    return not exists
+
+
+def add_stock_reservations(bind) -> bool:
+    """
+    Crea stock_reservations y stock_reservation_items (reservas de carritos).
+    Devuelve True si hubo que crear la tabla de reservas.
+    """
+    if bind.dialect.name != "postgresql":
+        return False
+
+    from neos_core.database.models import StockReservation, StockReservationItem
+
+    exists = inspect(bind).has_table(StockReservation.__tablename__)
+    StockReservation.__table__.create(bind, checkfirst=True)
+    StockReservationItem.__table__.create(bind, checkfirst=True)
+    return not exists
+
+
+def add_low_stock_flags(bind) -> bool:
+    """
+    Agrega is_low_stock a products y product_variants, lo calcula para las
+    filas existentes y crea los índices parciales.
+    Devuelve True si hubo que agregar alguna columna.
+    """
+    if bind.dialect.name != "postgresql":
+        return False
+
+    added = False
+    with bind.begin() as conn:
+        for table, service_filter in (("products", "NOT is_service AND "), ("product_variants", "")):
+            exists = conn.execute(text(
+                "SELECT 1 FROM information_schema.columns "
+                "WHERE table_name = :table AND column_name = 'is_low_stock'"
+            ), {"table": table}).scalar()
+            if exists:
+                continue
+            added = True
+            conn.execute(text(
+                f"ALTER TABLE {table} ADD COLUMN is_low_stock BOOLEAN NOT NULL DEFAULT false"
+            ))
+            conn.execute(text(
+                f"UPDATE {table} SET is_low_stock = true "
+                f"WHERE {service_filter}min_stock IS NOT NULL AND stock <= min_stock"
+            ))
+            conn.execute(text(
+                f"CREATE INDEX IF NOT EXISTS ix_{table}_low_stock ON {table} (tenant_id) WHERE is_low_stock"
+            ))
+    return added
+
+
+def add_sale_tax_rounding(bind) -> bool:
+    """
+    Agrega sales.tax_rounding (modo de redondeo con que se calculó la venta).
+    Las ventas existentes toman el TAX_ROUNDING_MODE vigente al migrar, que
+    es con el que se calcularon si no cambió desde entonces.
+    Devuelve True si hubo que agregar la columna.
+    """
+    if bind.dialect.name != "postgresql":
+        return False
+
+    with bind.begin() as conn:
+        exists = conn.execute(text(
+            "SELECT 1 FROM information_schema.columns "
+            "WHERE table_name = 'sales' AND column_name = 'tax_rounding'"
+        )).scalar()
+        if not exists:
+            conn.execute(text("ALTER TABLE sales ADD COLUMN tax_rounding VARCHAR(10)"))
+            conn.execute(
+                text("UPDATE sales SET tax_rounding = :mode WHERE tax_rounding IS NULL"),
+                {"mode": config.TAX_ROUNDING_MODE}
+            )
+    return not exists
+
+
+def add_pricing(bind) -> bool:
+    """
+    Crea price_lists, price_list_items y promotions, y las columnas de
+    descuento de sales y sale_details.
+    Devuelve True si hubo que agregar alguna columna.
+    """
+    if bind.dialect.name != "postgresql":
+        return False
+
+    from neos_core.database.models import PriceList, PriceListItem, Promotion
+
+    for model in (PriceList, PriceListItem, Promotion):
+        model.__table__.create(bind, checkfirst=True)
+
+    columns = (
+        ("sales", "discount_amount", "NUMERIC(10, 2) NOT NULL DEFAULT 0"),
+        ("sales", "price_list_id", "INTEGER REFERENCES price_lists (id)"),
+        ("sale_details", "discount_amount", "NUMERIC(10, 2) NOT NULL DEFAULT 0"),
+        ("sale_details", "promotion_id", "INTEGER REFERENCES promotions (id)"),
+    )
+    added = False
+    with bind.begin() as conn:
+        for table, column, definition in columns:
+            exists = conn.execute(text(
+                "SELECT 1 FROM information_schema.columns "
+                "WHERE table_name = :table AND column_name = :column"
+            ), {"table": table, "column": column}).scalar()
+            if not exists:
+                added = True
+                conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {definition}"))
+    return added
+
+
+def add_invoice_numbering(bind) -> bool:
+    """
+    Crea invoice_sequences e invoice_number_blocks, y la columna
+    sales.invoice_number con su índice por punto de venta.
+    Devuelve True si hubo que agregar la columna.
+    """
+    if bind.dialect.name != "postgresql":
+        return False
+
+    from neos_core.database.models import InvoiceNumberBlock, InvoiceSequence
+
+    InvoiceSequence.__table__.create(bind, checkfirst=True)
+    InvoiceNumberBlock.__table__.create(bind, checkfirst=True)
+
+    with bind.begin() as conn:
+        exists = conn.execute(text(
+            "SELECT 1 FROM information_schema.columns "
+            "WHERE table_name = 'sales' AND column_name = 'invoice_number'"
+        )).scalar()
+        if not exists:
+            conn.execute(text("ALTER TABLE sales ADD COLUMN invoice_number VARCHAR(20)"))
+        conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_sales_pos_invoice_number "
+            "ON sales (point_of_sale_id, invoice_number)"
+        ))
+    return not exists
+
+
+def add_electronic_invoicing(bind) -> bool:
+    """
+    Crea la cola invoice_authorizations y las columnas de facturación
+    electrónica de sales.
+    Devuelve True si hubo que agregar alguna columna.
+    """
+    if bind.dialect.name != "postgresql":
+        return False
+
+    from neos_core.database.models import InvoiceAuthorization
+
+    InvoiceAuthorization.__table__.create(bind, checkfirst=True)
+
+    columns = (
+        ("invoice_type", "VARCHAR(2)"),
+        ("invoice_status", "VARCHAR(20)"),
+        ("cae", "VARCHAR(20)"),
+        ("cae_expiration", "TIMESTAMP WITHOUT TIME ZONE"),
+    )
+    added = False
+    with bind.begin() as conn:
+        for column, definition in columns:
+            exists = conn.execute(text(
+                "SELECT 1 FROM information_schema.columns "
+                "WHERE table_name = 'sales' AND column_name = :column"
+            ), {"column": column}).scalar()
+            if not exists:
+                added = True
+                conn.execute(text(f"ALTER TABLE sales ADD COLUMN {column} {definition}"))
+    return added
+
+
+def add_outbox(bind) -> bool:
+    """
+    Crea outbox_events y outbox_cursors.
+    Devuelve True si hubo que crear la tabla de eventos.
+    """
+    if bind.dialect.name != "postgresql":
+        return False
+
+    from neos_core.database.models import OutboxCursor, OutboxEvent
+
+    exists = inspect(bind).has_table(OutboxEvent.__tablename__)
+    OutboxEvent.__table__.create(bind, checkfirst=True)
+    OutboxCursor.__table__.create(bind, checkfirst=True)
+    return not exists
+
+
+def add_webhooks(bind) -> bool:
+    """
+    Crea webhook_endpoints, webhook_deliveries y webhook_cursors.
+    Devuelve True si hubo que crear la tabla de endpoints.
+    """
+    if bind.dialect.name != "postgresql":
+        return False
+
+    from neos_core.database.models import WebhookCursor, WebhookDelivery, WebhookEndpoint
+
+    exists = inspect(bind).has_table(WebhookEndpoint.__tablename__)
+    WebhookEndpoint.__table__.create(bind, checkfirst=True)
+    WebhookDelivery.__table__.create(bind, checkfirst=True)
+    WebhookCursor.__table__.create(bind, checkfirst=True)
+    return not exists
+
+
+def add_jobs(bind) -> bool:
+    """
+    Crea la tabla jobs (tareas en segundo plano).
+    Devuelve True si hubo que crearla.
+    """
+    if bind.dialect.name != "postgresql":
+        return False
+
+    from neos_core.database.models import Job
+
+    exists = inspect(bind).has_table(Job.__tablename__)
+    Job.__table__.create(bind, checkfirst=True)
+    return not exists
+
+
+def add_audit_log(bind) -> bool:
+    """
+    Crea la tabla audit_log.
+    Devuelve True si hubo que crearla.
+    """
+    if bind.dialect.name != "postgresql":
+        return False
+
+    from neos_core.database.models import AuditLog
+
+    exists = inspect(bind).has_table(AuditLog.__tablename__)
+    AuditLog.__table__.create(bind, checkfirst=True)
+    return not exists
+
+
+def denormalize_reservation_items(bind) -> bool:
+    """
+    Copia status y expires_at de la reserva en stock_reservation_items y crea
+    el índice parcial de items activos (lo reservado se suma sin join).
+    Devuelve True si hubo que agregar las columnas.
+    """
+    if bind.dialect.name != "postgresql":
+        return False
+
+    with bind.begin() as conn:
+        exists = conn.execute(text(
+            "SELECT 1 FROM information_schema.columns "
+            "WHERE table_name = 'stock_reservation_items' AND column_name = 'status'"
+        )).scalar()
+        if not exists:
+            conn.execute(text(
+                "ALTER TABLE stock_reservation_items "
+                "ADD COLUMN status VARCHAR(20), ADD COLUMN expires_at TIMESTAMP"
+            ))
+            conn.execute(text(
+                "UPDATE stock_reservation_items i SET status = r.status, expires_at = r.expires_at "
+                "FROM stock_reservations r WHERE r.id = i.reservation_id"
+            ))
+            conn.execute(text(
+                "ALTER TABLE stock_reservation_items "
+                "ALTER COLUMN status SET NOT NULL, ALTER COLUMN expires_at SET NOT NULL"
+            ))
+        conn.execute(text("DROP INDEX IF EXISTS ix_stock_reservation_items_product"))
+        conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_stock_reservation_items_active "
+            "ON stock_reservation_items (product_id, variant_id, expires_at) WHERE status = 'active'"
+        ))
+    return not exists
+
+
+MIGRATIONS = [
+    add_sale_created_at,
+    add_sales_archive,
+    add_product_search,
+    migrate_product_attributes_to_jsonb,
+    add_product_variants,
+    add_location_stock,
+    add_stock_reservations,
+    add_low_stock_flags,
+    add_sale_tax_rounding,
+    add_pricing,
+    add_invoice_numbering,
+    add_electronic_invoicing,
+    add_outbox,
+    add_webhooks,
+    add_jobs,
+    add_audit_log,
+    denormalize_reservation_items,
+]
+
+
+def run_migrations(bind):
+    for migration in MIGRATIONS:
+        applied = migration(bind)
+        print(f"{'✅' if applied else '·'} {migration.__name__}")
+
+
+if __name__ == "__main__":
+    run_migrations(config.engine)
@@ -13,7 +13,12 @@ from neos_core.database.models.role_model import Role
 from neos_core.database.models.tax_models import TaxIdType, TaxResponsibility
 
 # Modelos de inventario
-from neos_core.database.models.product_model import Product
+from neos_core.database.models.product_model import Product, ProductVariant
+from neos_core.database.models.stock_model import LocationStock, StockTransfer
+from neos_core.database.models.reservation_model import StockReservation, StockReservationItem
+
+# Precios y promociones
+from neos_core.database.models.pricing_model import PriceList, PriceListItem, Promotion
 
 # Modelos de clientes
 from neos_core.database.models.client_model import Client
@@ -24,6 +29,20 @@ from neos_core.database.models.point_of_sale import PointOfSale
 
 # Modelos de ventas
 from neos_core.database.models.sales_model import Sale, SaleDetail
+from neos_core.database.models.invoice_model import (
+    InvoiceSequence, InvoiceNumberBlock, InvoiceAuthorization
+)
+from neos_core.database.models.archive_model import ArchivedSale
+
+# Outbox de eventos
+from neos_core.database.models.outbox_model import OutboxEvent, OutboxCursor
+from neos_core.database.models.webhook_model import WebhookEndpoint, WebhookDelivery, WebhookCursor
+
+# Tareas en segundo plano
+from neos_core.database.models.job_model import Job
+
+# Auditoría
+from neos_core.database.models.audit_model import AuditLog
 
 # Exportar todos
 __all__ = [
@@ -36,6 +55,15 @@ __all__ = [
     "TaxResponsibility",
     # Inventario
     "Product",
+    "ProductVariant",
+    "LocationStock",
+    "StockTransfer",
+    "StockReservation",
+    "StockReservationItem",
+    # Precios
+    "PriceList",
+    "PriceListItem",
+    "Promotion",
     # Clientes
     "Client",
     # Configuración
@@ -44,4 +72,19 @@ __all__ = [
     # Ventas
     "Sale",
     "SaleDetail",
+    "InvoiceSequence",
+    "InvoiceNumberBlock",
+    "InvoiceAuthorization",
+    "ArchivedSale",
+    # Outbox
+    "OutboxEvent",
+    "OutboxCursor",
+    # Webhooks
+    "WebhookEndpoint",
+    "WebhookDelivery",
+    "WebhookCursor",
+    # Tareas
+    "Job",
+    # Auditoría
+    "AuditLog",
 ]
\ No newline at end of file
@@ -0,0 +1,34 @@
+# neos_core/database/models/archive_model.py
+"""
+Índice de ventas archivadas en almacenamiento frío
+"""
+from sqlalchemy import Column, Integer, String, DateTime, BigInteger, ForeignKey, Index
+from sqlalchemy.sql import func
+from neos_core.database.config import Base
+
+
+class ArchivedSale(Base):
+    """
+    Ubicación de una venta movida fuera de las tablas calientes.
+    El contenido (venta + items) vive en un archivo JSON-lines comprimido;
+    aquí solo se guarda dónde encontrarlo para lecturas puntuales.
+    """
+    __tablename__ = "archived_sales"
+
+    # Mismo id que tenía la venta en `sales` (sin FK: la fila ya no existe)
+    sale_id = Column(Integer, primary_key=True, autoincrement=False)
+    tenant_id = Column(Integer, ForeignKey("tenants.id"), nullable=False)
+    created_at = Column(DateTime, nullable=False)
+
+    # Archivo .jsonl.gz relativo a ARCHIVE_DIR y offset del miembro gzip del lote
+    archive_path = Column(String(255), nullable=False)
+    archive_offset = Column(BigInteger, nullable=False, default=0)
+
+    archived_at = Column(DateTime, server_default=func.now(), nullable=False)
+
+    __table_args__ = (
+        Index("ix_archived_sales_tenant_created_at", "tenant_id", "created_at"),
+    )
+
+    def __repr__(self):
+        return f"<ArchivedSale(sale_id={self.sale_id}, path={self.archive_path})>"
@@ -0,0 +1,36 @@
+# neos_core/database/models/audit_model.py
+"""
+Registro de auditoría de cambios sensibles (ver services/audit.py)
+"""
+from sqlalchemy import BigInteger, Column, DateTime, ForeignKey, Index, Integer, JSON, String
+from sqlalchemy.sql import func
+from neos_core.database.config import Base
+
+
+class AuditLog(Base):
+    """
+    Cambio sensible (precio, stock, alta de usuario, cancelación de venta).
+    Se escribe en diferido y en lotes; `occurred_at` es el momento del cambio
+    y `event_id` evita duplicados al reprocesar el respaldo en disco.
+    """
+    __tablename__ = "audit_log"
+
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True)
+    event_id = Column(String(32), nullable=False, unique=True)
+    tenant_id = Column(Integer, ForeignKey("tenants.id"), nullable=False)
+    # Sin FK: el registro sobrevive al usuario
+    actor_user_id = Column(Integer, nullable=True)
+    action = Column(String(50), nullable=False)  # product.updated, sale.cancelled, ...
+    entity_type = Column(String(30), nullable=False)
+    entity_id = Column(Integer, nullable=False)
+    changes = Column(JSON, nullable=True)  # {"campo": [antes, después]}
+
+    occurred_at = Column(DateTime, nullable=False)
+    recorded_at = Column(DateTime, server_default=func.now(), nullable=False)
+
+    __table_args__ = (
+        # Listado del tenant (paginado por id descendente)
+        Index("ix_audit_log_tenant_id", "tenant_id", "id"),
+        # Historial de una entidad
+        Index("ix_audit_log_entity", "tenant_id", "entity_type", "entity_id", "id"),
+    )
@@ -0,0 +1,86 @@
+# neos_core/database/models/invoice_model.py
+"""
+Numeración de comprobantes por punto de venta (ver services/invoicing.py) y
+cola de autorización electrónica (ver services/electronic_invoicing.py)
+"""
+from sqlalchemy import BigInteger, Column, DateTime, ForeignKey, Index, Integer, String, Text, text
+from sqlalchemy.sql import func
+from neos_core.database.config import Base
+
+
+class InvoiceSequence(Base):
+    """
+    Contador de numeración de un punto de venta. No se toca en cada venta:
+    los workers reservan bloques de números (next_number += tamaño del bloque)
+    y los entregan desde memoria.
+    """
+    __tablename__ = "invoice_sequences"
+
+    point_of_sale_id = Column(Integer, ForeignKey("points_of_sale.id"), primary_key=True)
+    tenant_id = Column(Integer, ForeignKey("tenants.id"), nullable=False)
+    next_number = Column(BigInteger, nullable=False, default=1)
+
+
+class InvoiceNumberBlock(Base):
+    """
+    Rango [start_number, end_number) de números de un punto de venta.
+    Estados:
+    - open:       en uso por `owner` hasta `leased_until`.
+    - closed:     entregado por completo (leased_until = momento del cierre),
+                  pendiente de reconciliar.
+    - reconciled: revisado por la reconciliación.
+    - void:       números que no quedaron en ninguna venta (anulados); no se
+                  vuelven a entregar. `free` en bases anteriores.
+    """
+    __tablename__ = "invoice_number_blocks"
+
+    id = Column(Integer, primary_key=True)
+    tenant_id = Column(Integer, ForeignKey("tenants.id"), nullable=False)
+    point_of_sale_id = Column(Integer, ForeignKey("points_of_sale.id"), nullable=False)
+
+    start_number = Column(BigInteger, nullable=False)
+    end_number = Column(BigInteger, nullable=False)
+
+    status = Column(String(10), nullable=False, default="open")
+    owner = Column(String(100), nullable=True)  # host:pid del worker
+    leased_until = Column(DateTime, nullable=True)
+
+    created_at = Column(DateTime, server_default=func.now(), nullable=False)
+
+    __table_args__ = (
+        Index("ix_invoice_number_blocks_pos_status", "point_of_sale_id", "status", "start_number"),
+    )
+
+
+class InvoiceAuthorization(Base):
+    """
+    Cola de autorización (CAE) de ventas de tenants con facturación
+    electrónica. La venta se registra sin esperar al fisco; el worker de
+    services/electronic_invoicing.py procesa la cola por lotes.
+    Estados: pending -> processing -> authorized | rejected | failed
+    (processing con next_attempt_at vencido vuelve a tomarse: el worker que
+    la tenía se cayó).
+    """
+    __tablename__ = "invoice_authorizations"
+
+    id = Column(Integer, primary_key=True)
+    tenant_id = Column(Integer, ForeignKey("tenants.id"), nullable=False)
+    # Sin FK: sales puede estar particionada
+    sale_id = Column(Integer, nullable=False, index=True)
+    provider = Column(String(50), nullable=False)
+
+    status = Column(String(20), nullable=False, default="pending")
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime, nullable=False)
+    last_error = Column(Text, nullable=True)
+
+    created_at = Column(DateTime, server_default=func.now(), nullable=False)
+    updated_at = Column(DateTime, onupdate=func.now())
+
+    __table_args__ = (
+        # Solo las que el worker todavía puede tomar
+        Index(
+            "ix_invoice_authorizations_due", "next_attempt_at",
+            postgresql_where=text("status IN ('pending', 'processing')")
+        ),
+    )
@@ -0,0 +1,47 @@
+# neos_core/database/models/job_model.py
+"""
+Cola de tareas pesadas en segundo plano (ver services/jobs.py)
+"""
+from sqlalchemy import BigInteger, Column, DateTime, ForeignKey, Index, Integer, JSON, String, Text, text
+from sqlalchemy.sql import func
+from neos_core.database.config import Base
+
+
+class Job(Base):
+    """
+    Tarea encolada por un request (exportación, importación, reporte) y
+    ejecutada por un worker.
+    Estados: queued -> running -> succeeded | failed | cancelled
+    (running con run_after vencido vuelve a tomarse: el worker que la tenía
+    se cayó; cada avance de progreso extiende el plazo).
+    """
+    __tablename__ = "jobs"
+
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True)
+    tenant_id = Column(Integer, ForeignKey("tenants.id"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+    kind = Column(String(50), nullable=False)  # sales_export, product_import, ...
+    params = Column(JSON, nullable=False)
+
+    status = Column(String(20), nullable=False, default="queued")
+    attempts = Column(Integer, nullable=False, default=0)
+    run_after = Column(DateTime, nullable=False)
+    locked_by = Column(String(100), nullable=True)
+    heartbeat_at = Column(DateTime, nullable=True)
+
+    progress_current = Column(Integer, nullable=False, default=0)
+    progress_total = Column(Integer, nullable=True)
+    progress_message = Column(String(200), nullable=True)
+    result = Column(JSON, nullable=True)
+    error = Column(Text, nullable=True)
+
+    created_at = Column(DateTime, server_default=func.now(), nullable=False)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        # Solo las que un worker todavía puede tomar
+        Index("ix_jobs_due", "run_after", postgresql_where=text("status IN ('queued', 'running')")),
+        # Listado del tenant
+        Index("ix_jobs_tenant_id", "tenant_id", "id"),
+    )
@@ -0,0 +1,43 @@
+# neos_core/database/models/outbox_model.py
+"""
+Outbox transaccional de eventos de negocio (ver services/outbox.py)
+"""
+from sqlalchemy import BigInteger, Column, DateTime, ForeignKey, Index, Integer, String, JSON, text
+from sqlalchemy.sql import func
+from neos_core.database.config import Base
+
+
+class OutboxEvent(Base):
+    """
+    Evento escrito en la misma transacción que el cambio que lo origina
+    (venta, cancelación, producto). El relay le asigna `sequence`, el offset
+    correlativo por tenant, al publicarlo: los consumidores leen por
+    sequence y nunca ven un hueco que después se llene.
+    """
+    __tablename__ = "outbox_events"
+
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True)
+    tenant_id = Column(Integer, ForeignKey("tenants.id"), nullable=False)
+    event_type = Column(String(50), nullable=False)  # sale.created, product.updated, ...
+    entity_id = Column(Integer, nullable=False)
+    payload = Column(JSON, nullable=False)
+
+    sequence = Column(BigInteger, nullable=True)  # NULL = pendiente de publicar
+    created_at = Column(DateTime, server_default=func.now(), nullable=False)
+    published_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        # Pendientes del relay
+        Index("ix_outbox_events_pending", "tenant_id", "id", postgresql_where=text("sequence IS NULL")),
+        # Lectura del stream por offset
+        Index("ix_outbox_events_tenant_sequence", "tenant_id", "sequence", unique=True),
+    )
+
+
+class OutboxCursor(Base):
+    """Último sequence publicado por tenant. Su fila serializa el relay de cada tenant"""
+    __tablename__ = "outbox_cursors"
+
+    tenant_id = Column(Integer, ForeignKey("tenants.id"), primary_key=True)
+    last_sequence = Column(BigInteger, nullable=False, default=0)
+    updated_at = Column(DateTime, onupdate=func.now())
@@ -0,0 +1,107 @@
+# neos_core/database/models/pricing_model.py
+"""
+Listas de precios y promociones (ver services/pricing.py)
+"""
+from sqlalchemy import (
+    Column, Integer, String, Numeric, Boolean, ForeignKey, DateTime, JSON, Index, text
+)
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+from neos_core.database.config import Base
+
+
+class PriceList(Base):
+    """
+    Precios especiales por cliente y/o punto de venta.
+    Para una venta se usa la lista activa más específica (cliente + POS,
+    cliente, POS, general) y, a igual especificidad, la de mayor prioridad.
+    """
+    __tablename__ = "price_lists"
+
+    id = Column(Integer, primary_key=True, index=True)
+    tenant_id = Column(Integer, ForeignKey("tenants.id"), nullable=False)
+    name = Column(String(100), nullable=False)
+
+    client_id = Column(Integer, ForeignKey("clients.id"), nullable=True)
+    point_of_sale_id = Column(Integer, ForeignKey("points_of_sale.id"), nullable=True)
+    priority = Column(Integer, nullable=False, default=0)
+    is_active = Column(Boolean, nullable=False, default=True)
+
+    created_at = Column(DateTime, server_default=func.now(), nullable=False)
+    updated_at = Column(DateTime, onupdate=func.now())
+
+    items = relationship(
+        "PriceListItem",
+        back_populates="price_list",
+        cascade="all, delete-orphan"
+    )
+
+    __table_args__ = (
+        Index("ix_price_lists_tenant_active", "tenant_id", "is_active"),
+    )
+
+
+class PriceListItem(Base):
+    """Precio de un producto (o de una variante puntual) dentro de una lista"""
+    __tablename__ = "price_list_items"
+
+    id = Column(Integer, primary_key=True)
+    price_list_id = Column(Integer, ForeignKey("price_lists.id"), nullable=False)
+    product_id = Column(Integer, ForeignKey("products.id"), nullable=False)
+    variant_id = Column(Integer, ForeignKey("product_variants.id"), nullable=True)
+    price = Column(Numeric(10, 2), nullable=False)
+
+    price_list = relationship("PriceList", back_populates="items")
+
+    __table_args__ = (
+        # Un precio por item y lista (variant_id NULL = producto sin variante)
+        Index(
+            "uq_price_list_items_item",
+            "price_list_id", "product_id", text("coalesce(variant_id, 0)"),
+            unique=True,
+        ),
+    )
+
+
+class Promotion(Base):
+    """
+    Regla de descuento. Tipos (kind):
+    - "percentage": `percent` % sobre cada línea alcanzada.
+    - "nxm":        lleva `buy_quantity`, paga `pay_quantity` (las unidades
+                    gratis son las más baratas del grupo alcanzado).
+    - "bundle":     `bundle_items` ([{"product_id", "quantity"}]) juntos por
+                    `bundle_price`.
+
+    Alcance de percentage/nxm: un producto (`product_id`) o una categoría,
+    es decir los productos con attributes[attribute_key] == attribute_value.
+    """
+    __tablename__ = "promotions"
+
+    id = Column(Integer, primary_key=True, index=True)
+    tenant_id = Column(Integer, ForeignKey("tenants.id"), nullable=False)
+    name = Column(String(100), nullable=False)
+    kind = Column(String(20), nullable=False)
+
+    product_id = Column(Integer, ForeignKey("products.id"), nullable=True)
+    attribute_key = Column(String(50), nullable=True)
+    attribute_value = Column(String(100), nullable=True)
+    point_of_sale_id = Column(Integer, ForeignKey("points_of_sale.id"), nullable=True)
+
+    percent = Column(Numeric(5, 2), nullable=True)
+    buy_quantity = Column(Integer, nullable=True)
+    pay_quantity = Column(Integer, nullable=True)
+    bundle_items = Column(JSON, nullable=True)
+    bundle_price = Column(Numeric(10, 2), nullable=True)
+
+    # Entre reglas que compiten por una línea gana la de mayor prioridad
+    priority = Column(Integer, nullable=False, default=0)
+    starts_at = Column(DateTime, nullable=True)
+    ends_at = Column(DateTime, nullable=True)
+    is_active = Column(Boolean, nullable=False, default=True)
+
+    created_at = Column(DateTime, server_default=func.now(), nullable=False)
+    updated_at = Column(DateTime, onupdate=func.now())
+
+    __table_args__ = (
+        Index("ix_promotions_tenant_active", "tenant_id", "is_active"),
+    )
@@ -1,5 +1,9 @@
-from sqlalchemy import Column, Integer, String, Numeric, Boolean, ForeignKey, Text, DateTime, JSON
-from sqlalchemy.orm import relationship
+from sqlalchemy import (
+    Column, Integer, String, Numeric, Boolean, ForeignKey, Text, DateTime, JSON, Index, UniqueConstraint,
+    event, text
+)
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Session, object_session, relationship
 from sqlalchemy.sql import func
 from neos_core.database.config import Base
 
@@ -23,15 +27,198 @@ class Product(Base):
 
     tax_rate = Column(Numeric(5, 2), nullable=False, default=0)
 
-    # IMPORTANTE: Solo JSON, sin JSONB
-    attributes = Column(JSON, nullable=True)
+    # JSONB en PostgreSQL (indexable con GIN), JSON en SQLite (tests)
+    attributes = Column(JSON().with_variant(JSONB(), "postgresql"), nullable=True)
 
     is_active = Column(Boolean, default=True, nullable=False)
     is_service = Column(Boolean, default=False, nullable=False)
 
+    # stock <= min_stock, mantenido al guardar (ver _refresh_low_stock)
+    is_low_stock = Column(Boolean, default=False, server_default="0", nullable=False)
+
     created_at = Column(DateTime, server_default=func.now(), nullable=False)
     updated_at = Column(DateTime, onupdate=func.now())
 
     tenant = relationship("Tenant")
 
-    __table_args__ = ({'schema': None},)
\ No newline at end of file
+    variants = relationship(
+        "ProductVariant",
+        back_populates="product",
+        cascade="all, delete-orphan",
+        order_by="ProductVariant.id"
+    )
+
+    __table_args__ = (
+        # Filtros por contención (attributes @> '{"color": "Rojo"}') en catálogos grandes
+        Index(
+            "ix_products_attributes_gin",
+            "attributes",
+            postgresql_using="gin",
+            postgresql_ops={"attributes": "jsonb_path_ops"},
+        ).ddl_if(dialect="postgresql"),
+        # Índice parcial: solo contiene los productos con stock bajo
+        Index(
+            "ix_products_low_stock",
+            "tenant_id",
+            postgresql_where=text("is_low_stock"),
+            sqlite_where=text("is_low_stock = 1"),
+        ),
+        {'schema': None},
+    )
+
+
+class ProductVariant(Base):
+    """
+    Variante de un producto padre (ej: talle/color en indumentaria).
+    Cada variante tiene su propio SKU, código de barras y stock; el precio
+    es opcional y, si falta, se usa el del producto padre.
+    """
+    __tablename__ = "product_variants"
+
+    id = Column(Integer, primary_key=True, index=True)
+    tenant_id = Column(Integer, ForeignKey("tenants.id"), nullable=False)
+    product_id = Column(Integer, ForeignKey("products.id"), nullable=False, index=True)
+
+    sku = Column(String(100), nullable=False)
+    barcode = Column(String(100), nullable=True)
+    name = Column(String(200), nullable=True)
+
+    price = Column(Numeric(10, 2), nullable=True)
+    stock = Column(Numeric(10, 4), nullable=False, default=0)
+    min_stock = Column(Numeric(10, 4), nullable=True)
+
+    # Ej: {"talle": "M", "color": "Rojo"}
+    attributes = Column(JSON().with_variant(JSONB(), "postgresql"), nullable=True)
+
+    is_active = Column(Boolean, default=True, nullable=False)
+    is_low_stock = Column(Boolean, default=False, server_default="0", nullable=False)
+
+    created_at = Column(DateTime, server_default=func.now(), nullable=False)
+    updated_at = Column(DateTime, onupdate=func.now())
+
+    product = relationship("Product", back_populates="variants")
+
+    __table_args__ = (
+        UniqueConstraint("tenant_id", "sku", name="uq_product_variants_tenant_sku"),
+        # Escaneo en el POS
+        Index("ix_product_variants_tenant_barcode", "tenant_id", "barcode"),
+        Index(
+            "ix_product_variants_low_stock",
+            "tenant_id",
+            postgresql_where=text("is_low_stock"),
+            sqlite_where=text("is_low_stock = 1"),
+        ),
+    )
+
+    @property
+    def effective_price(self):
+        return self.price if self.price is not None else self.product.price
+
+
+# ===== STOCK BAJO =====
+
+def _compute_low_stock(target) -> bool:
+    if getattr(target, "is_service", False):
+        return False
+    return (
+        target.min_stock is not None
+        and target.stock is not None
+        and target.stock <= target.min_stock
+    )
+
+
+def queue_low_stock_transition(target, low: bool):
+    """Acumula una transición de stock bajo en la sesión del objeto (se publica tras el commit)"""
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault("low_stock_pending", []).append((target, low))
+
+
+def low_stock_payload(target, low: bool) -> dict:
+    """
+    Evento de stock bajo de un producto, una variante o una ubicación
+    (LocationStock). El snapshot de alertas usa la misma forma.
+    """
+    if isinstance(target, Product):
+        product_id, variant_id, point_of_sale_id, sku = target.id, None, None, target.sku
+    elif isinstance(target, ProductVariant):
+        product_id, variant_id, point_of_sale_id, sku = target.product_id, target.id, None, target.sku
+    else:
+        # La relación puede no estar cargada en un objeto recién insertado
+        session = object_session(target)
+        item = (
+            session.get(ProductVariant, target.variant_id) if target.variant_id is not None
+            else session.get(Product, target.product_id)
+        )
+        product_id, variant_id, point_of_sale_id, sku = (
+            target.product_id, target.variant_id, target.point_of_sale_id, item.sku
+        )
+    return {
+        "event": "low_stock" if low else "stock_restored",
+        "product_id": product_id,
+        "variant_id": variant_id,
+        "point_of_sale_id": point_of_sale_id,
+        "sku": sku,
+        "stock": str(target.stock),
+        "min_stock": str(target.min_stock) if target.min_stock is not None else None,
+    }
+
+
+def _refresh_low_stock(mapper, connection, target):
+    """
+    Recalcula is_low_stock en cada INSERT/UPDATE, sea cual sea el camino que
+    movió el stock (ventas, ajustes, transferencias). Las transiciones se
+    acumulan en la sesión y se publican recién después del commit, así un
+    rollback nunca genera alertas.
+    """
+    low = _compute_low_stock(target)
+    if bool(target.is_low_stock) == low:
+        return
+    target.is_low_stock = low
+    queue_low_stock_transition(target, low)
+
+
+for _model in (Product, ProductVariant):
+    event.listen(_model, "before_insert", _refresh_low_stock)
+    event.listen(_model, "before_update", _refresh_low_stock)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_low_stock_transitions(session, flush_context):
+    """
+    Arma los eventos con los ids ya asignados por el flush. Además de los
+    avisos en vivo (después del commit) quedan en el outbox, en la misma
+    transacción, para integraciones y webhooks, y se avisan a los demás
+    workers (ver services/events.py).
+    """
+    pending = session.info.pop("low_stock_pending", None)
+    if not pending:
+        return
+    from neos_core.services import events, outbox
+    transitions = session.info.setdefault("low_stock_transitions", [])
+    for target, low in pending:
+        payload = low_stock_payload(target, low)
+        transitions.append((target.tenant_id, payload))
+        # Se inserta en el siguiente flush (commit vuelve a hacer flush hasta dejar la sesión limpia)
+        outbox.record(
+            session, target.tenant_id,
+            outbox.STOCK_LOW if low else outbox.STOCK_RESTORED,
+            payload["product_id"], payload
+        )
+        events.notify_low_stock(session, target.tenant_id, payload)
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_low_stock_transitions(session):
+    transitions = session.info.pop("low_stock_transitions", None)
+    if not transitions:
+        return
+    from neos_core.services.events import low_stock_broker
+    for tenant_id, payload in transitions:
+        low_stock_broker.publish(tenant_id, payload)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_low_stock_transitions(session, previous_transaction):
+    session.info.pop("low_stock_pending", None)
+    session.info.pop("low_stock_transitions", None)
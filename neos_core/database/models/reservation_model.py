@@ -0,0 +1,75 @@
+# neos_core/database/models/reservation_model.py
+"""
+Reservas de stock para carritos con vencimiento (TTL)
+"""
+from sqlalchemy import Column, Integer, Numeric, String, ForeignKey, DateTime, Index, text
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+from neos_core.database.config import Base
+
+
+class StockReservation(Base):
+    """
+    Carrito que retiene stock hasta `expires_at`.
+    Estados: active -> converted (se vendió) | released (se liberó) | expired.
+    Una reserva activa con expires_at vencido ya no cuenta, aunque el barrido
+    todavía no la haya marcado como expired.
+    """
+    __tablename__ = "stock_reservations"
+
+    id = Column(Integer, primary_key=True, index=True)
+    tenant_id = Column(Integer, ForeignKey("tenants.id"), nullable=False, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    point_of_sale_id = Column(Integer, ForeignKey("points_of_sale.id"), nullable=False)
+
+    status = Column(String(20), nullable=False, default="active")
+    expires_at = Column(DateTime, nullable=False)
+
+    # Venta generada al confirmar (sin FK: sales puede estar particionada)
+    sale_id = Column(Integer, nullable=True)
+
+    created_at = Column(DateTime, server_default=func.now(), nullable=False)
+
+    items = relationship(
+        "StockReservationItem",
+        back_populates="reservation",
+        cascade="all, delete-orphan"
+    )
+
+    __table_args__ = (
+        # Barrido de vencidas
+        Index("ix_stock_reservations_status_expires", "status", "expires_at"),
+    )
+
+    def close(self, new_status: str):
+        """Cambia el estado de la reserva y el copiado en sus items"""
+        self.status = new_status
+        for item in self.items:
+            item.status = new_status
+
+
+class StockReservationItem(Base):
+    __tablename__ = "stock_reservation_items"
+
+    id = Column(Integer, primary_key=True)
+    reservation_id = Column(Integer, ForeignKey("stock_reservations.id"), nullable=False, index=True)
+    product_id = Column(Integer, ForeignKey("products.id"), nullable=False)
+    variant_id = Column(Integer, ForeignKey("product_variants.id"), nullable=True)
+
+    quantity = Column(Numeric(10, 4), nullable=False)
+
+    # Copia de status/expires_at de la reserva: lo reservado se suma sin join
+    # y el índice parcial solo contiene los items activos
+    status = Column(String(20), nullable=False, default="active")
+    expires_at = Column(DateTime, nullable=False)
+
+    reservation = relationship("StockReservation", back_populates="items")
+
+    __table_args__ = (
+        # Suma de lo reservado por producto al calcular stock disponible
+        Index(
+            "ix_stock_reservation_items_active", "product_id", "variant_id", "expires_at",
+            postgresql_where=text("status = 'active'"),
+            sqlite_where=text("status = 'active'"),
+        ),
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, ForeignKey, Numeric, DateTime, String
+from sqlalchemy import Column, Integer, ForeignKey, Numeric, DateTime, String, Index, event, select
 from sqlalchemy.orm import relationship
 from neos_core.database.config import Base
 from datetime import datetime
@@ -17,11 +17,29 @@ class Sale(Base):
     subtotal = Column(Numeric(10, 2), nullable=False, default=0)
     tax_amount = Column(Numeric(10, 2), nullable=False, default=0)
     total = Column(Numeric(10, 2), nullable=False, default=0)
+    # Descuento total de promociones (ya restado del subtotal)
+    discount_amount = Column(Numeric(10, 2), nullable=False, default=0, server_default="0")
+    price_list_id = Column(Integer, ForeignKey("price_lists.id"), nullable=True)
 
     payment_method = Column(String(50), nullable=False)
     status = Column(String(20), nullable=False, default="completed")
 
-    created_at = Column(DateTime, default=datetime.utcnow)
+    # Modo de redondeo de impuestos con que se calculó (line | invoice, ver services/tax.py)
+    tax_rounding = Column(String(10), nullable=True)
+
+    # Número de comprobante correlativo por punto de venta (services/invoicing.py)
+    invoice_number = Column(String(20), nullable=True)
+
+    # Facturación electrónica: el CAE lo completa el worker de la cola
+    # (services/electronic_invoicing.py) o viene informado en la venta
+    invoice_type = Column(String(2), nullable=True)
+    invoice_status = Column(String(20), nullable=True)  # pending | authorized | rejected | failed
+    cae = Column(String(20), nullable=True)
+    cae_expiration = Column(DateTime, nullable=True)
+
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    client = relationship("Client", back_populates="sales")
 
     items = relationship(
         "SaleDetail",
@@ -29,21 +47,50 @@ class Sale(Base):
         cascade="all, delete-orphan"
     )
 
+    __table_args__ = (
+        # Listados y reportes por tenant en un rango de fechas (y poda de particiones)
+        Index("ix_sales_tenant_created_at", "tenant_id", "created_at"),
+        # Reconciliación de bloques de numeración
+        Index("ix_sales_pos_invoice_number", "point_of_sale_id", "invoice_number"),
+    )
+
 
 class SaleDetail(Base):
     __tablename__ = "sale_details"
 
     id = Column(Integer, primary_key=True)
-    sale_id = Column(Integer, ForeignKey("sales.id"), nullable=False)
+    sale_id = Column(Integer, ForeignKey("sales.id"), nullable=False, index=True)
+    # Copia de Sale.created_at: clave de partición de sale_details en PostgreSQL
+    sale_created_at = Column(DateTime, nullable=True)
     product_id = Column(Integer, ForeignKey("products.id"), nullable=False)
+    variant_id = Column(Integer, ForeignKey("product_variants.id"), nullable=True)
 
     quantity = Column(Numeric(10, 4), nullable=False)
     unit_price = Column(Numeric(10, 2), nullable=False)
     tax_rate = Column(Numeric(5, 2), nullable=False, default=0)
 
+    # subtotal = round(quantity * unit_price) - discount_amount
+    discount_amount = Column(Numeric(10, 2), nullable=False, default=0, server_default="0")
+    promotion_id = Column(Integer, ForeignKey("promotions.id"), nullable=True)
+
     subtotal = Column(Numeric(10, 2), nullable=False)
     tax_amount = Column(Numeric(10, 2), nullable=False)
     total = Column(Numeric(10, 2), nullable=False)
 
     sale = relationship("Sale", back_populates="items")
     product = relationship("Product")
+    variant = relationship("ProductVariant")
+
+
+@event.listens_for(SaleDetail, "before_insert")
+def _fill_sale_created_at(mapper, connection, target):
+    """Completa la clave de partición desde la venta si no vino informada"""
+    if target.sale_created_at is None:
+        # Solo se usa la relación si ya está cargada (no disparar lazy loads en el flush)
+        sale = target.__dict__.get("sale")
+        if sale is not None and sale.created_at is not None:
+            target.sale_created_at = sale.created_at
+        else:
+            target.sale_created_at = connection.scalar(
+                select(Sale.created_at).where(Sale.id == target.sale_id)
+            )
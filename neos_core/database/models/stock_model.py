@@ -0,0 +1,89 @@
+# neos_core/database/models/stock_model.py
+"""
+Stock por ubicación (punto de venta / sucursal) y transferencias entre ubicaciones
+"""
+from sqlalchemy import Column, Integer, Numeric, ForeignKey, DateTime, Index, event, inspect
+from sqlalchemy.orm import column_property, relationship
+from sqlalchemy.sql import func
+from neos_core.database.config import Base
+from neos_core.database.models.product_model import queue_low_stock_transition
+
+
+class LocationStock(Base):
+    """
+    Stock de un producto (o variante) en un punto de venta.
+    Product.stock / ProductVariant.stock siguen siendo el total del tenant;
+    las ventas y transferencias mantienen ambos valores consistentes.
+    """
+    __tablename__ = "location_stock"
+
+    id = Column(Integer, primary_key=True, index=True)
+    tenant_id = Column(Integer, ForeignKey("tenants.id"), nullable=False)
+    point_of_sale_id = Column(Integer, ForeignKey("points_of_sale.id"), nullable=False)
+    product_id = Column(Integer, ForeignKey("products.id"), nullable=False, index=True)
+    variant_id = Column(Integer, ForeignKey("product_variants.id"), nullable=True)
+
+    # active_history: el valor anterior hace falta para detectar el cruce del mínimo
+    stock = column_property(Column(Numeric(10, 4), nullable=False, default=0), active_history=True)
+    min_stock = column_property(Column(Numeric(10, 4), nullable=True), active_history=True)
+
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now(), nullable=False)
+
+    point_of_sale = relationship("PointOfSale")
+    product = relationship("Product")
+    variant = relationship("ProductVariant")
+
+    __table_args__ = (
+        # Una fila por (ubicación, producto, variante); variant_id NULL cuenta como 0
+        Index(
+            "uq_location_stock_item",
+            "point_of_sale_id", "product_id", func.coalesce(variant_id, 0),
+            unique=True
+        ),
+        # Reposición por sucursal
+        Index("ix_location_stock_tenant_pos", "tenant_id", "point_of_sale_id"),
+    )
+
+    def __repr__(self):
+        return f"<LocationStock(pos={self.point_of_sale_id}, product={self.product_id}, stock={self.stock})>"
+
+
+def _is_low(stock, min_stock) -> bool:
+    return min_stock is not None and stock is not None and stock <= min_stock
+
+
+def _previous(state, attribute: str, current):
+    history = state.attrs[attribute].history
+    return history.deleted[0] if history.deleted else current
+
+
+def _location_low_stock_transition(mapper, connection, target):
+    """Como is_low_stock de productos: publica cuando la ubicación cruza su mínimo"""
+    low = _is_low(target.stock, target.min_stock)
+    state = inspect(target)
+    was_low = state.has_identity and _is_low(
+        _previous(state, "stock", target.stock), _previous(state, "min_stock", target.min_stock)
+    )
+    if low != bool(was_low):
+        queue_low_stock_transition(target, low)
+
+
+event.listen(LocationStock, "before_insert", _location_low_stock_transition)
+event.listen(LocationStock, "before_update", _location_low_stock_transition)
+
+
+class StockTransfer(Base):
+    """Registro de un movimiento de stock entre dos puntos de venta"""
+    __tablename__ = "stock_transfers"
+
+    id = Column(Integer, primary_key=True, index=True)
+    tenant_id = Column(Integer, ForeignKey("tenants.id"), nullable=False, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    product_id = Column(Integer, ForeignKey("products.id"), nullable=False)
+    variant_id = Column(Integer, ForeignKey("product_variants.id"), nullable=True)
+    from_point_of_sale_id = Column(Integer, ForeignKey("points_of_sale.id"), nullable=False)
+    to_point_of_sale_id = Column(Integer, ForeignKey("points_of_sale.id"), nullable=False)
+
+    quantity = Column(Numeric(10, 4), nullable=False)
+
+    created_at = Column(DateTime, server_default=func.now(), nullable=False)
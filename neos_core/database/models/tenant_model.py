@@ -37,6 +37,14 @@ class Tenant(Base):
         doc="Proveedor de facturación: AFIP (Argentina), SAT (México), SII (Chile), etc."
     )
 
+    # --- Archivado de ventas ---
+    sales_retention_days = Column(
+        Integer,
+        nullable=True,
+        doc="Días que las ventas completadas permanecen en las tablas calientes. "
+            "NULL usa ARCHIVE_RETENTION_DAYS; 0 desactiva el archivado."
+    )
+
     # Campos de Seguimiento
     created_at = Column(DateTime(timezone=True), server_default=func.now(),
                         doc="Fecha y hora de creación del registro.")
@@ -0,0 +1,84 @@
+# neos_core/database/models/webhook_model.py
+"""
+Webhooks por tenant y su cola de entregas (ver services/webhooks.py)
+"""
+from sqlalchemy import (
+    BigInteger, Boolean, Column, DateTime, ForeignKey, Index, Integer, JSON, String, Text, UniqueConstraint, text
+)
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+from neos_core.database.config import Base
+
+
+class WebhookEndpoint(Base):
+    """
+    URL del tenant que recibe eventos del outbox. Solo recibe los eventos
+    publicados después de registrarse (sequence > start_sequence).
+    """
+    __tablename__ = "webhook_endpoints"
+
+    id = Column(Integer, primary_key=True)
+    tenant_id = Column(Integer, ForeignKey("tenants.id"), nullable=False, index=True)
+    url = Column(String(500), nullable=False)
+    secret = Column(String(64), nullable=False)  # firma HMAC-SHA256 de cada POST
+    event_types = Column(JSON, nullable=False)  # ["sale.created", "stock.low", ...]
+    is_active = Column(Boolean, nullable=False, default=True)
+
+    # NULL: valores por defecto del worker (WEBHOOK_BATCH_SIZE, WEBHOOK_ENDPOINT_CONCURRENCY)
+    batch_size = Column(Integer, nullable=True)
+    max_concurrency = Column(Integer, nullable=True)
+
+    start_sequence = Column(BigInteger, nullable=False, default=0)
+    created_at = Column(DateTime, server_default=func.now(), nullable=False)
+    updated_at = Column(DateTime, onupdate=func.now())
+
+    deliveries = relationship("WebhookDelivery", back_populates="endpoint", passive_deletes=True)
+
+
+class WebhookDelivery(Base):
+    """
+    Entrega de un evento a un endpoint.
+    Estados: pending -> delivering -> delivered | dead
+    (delivering con next_attempt_at vencido vuelve a tomarse: el worker que
+    la tenía se cayó; dead se reenvía desde la API).
+    """
+    __tablename__ = "webhook_deliveries"
+
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True)
+    tenant_id = Column(Integer, ForeignKey("tenants.id"), nullable=False)
+    endpoint_id = Column(Integer, ForeignKey("webhook_endpoints.id", ondelete="CASCADE"), nullable=False)
+    event_id = Column(BigInteger, nullable=False)  # OutboxEvent.id
+    event_type = Column(String(50), nullable=False)
+    sequence = Column(BigInteger, nullable=False)
+
+    status = Column(String(20), nullable=False, default="pending")
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime, nullable=False)
+    last_status_code = Column(Integer, nullable=True)
+    last_error = Column(Text, nullable=True)
+
+    created_at = Column(DateTime, server_default=func.now(), nullable=False)
+    delivered_at = Column(DateTime, nullable=True)
+
+    endpoint = relationship("WebhookEndpoint", back_populates="deliveries")
+
+    __table_args__ = (
+        # Un evento se reparte una sola vez a cada endpoint
+        UniqueConstraint("endpoint_id", "event_id", name="uq_webhook_deliveries_endpoint_event"),
+        # Solo las que el worker todavía puede tomar
+        Index(
+            "ix_webhook_deliveries_due", "next_attempt_at",
+            postgresql_where=text("status IN ('pending', 'delivering')")
+        ),
+        # Consulta de la API (cola de muertas, historial)
+        Index("ix_webhook_deliveries_endpoint_status", "endpoint_id", "status", "id"),
+    )
+
+
+class WebhookCursor(Base):
+    """Último sequence del outbox repartido a los webhooks del tenant"""
+    __tablename__ = "webhook_cursors"
+
+    tenant_id = Column(Integer, ForeignKey("tenants.id"), primary_key=True)
+    last_sequence = Column(BigInteger, nullable=False, default=0)
+    updated_at = Column(DateTime, onupdate=func.now())
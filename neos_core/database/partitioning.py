@@ -0,0 +1,178 @@
+# neos_core/database/partitioning.py
+"""
+Particionado declarativo mensual de `sales` y `sale_details` (PostgreSQL).
+
+Con SALES_PARTITIONING_ENABLED=true:
+- `sales` se particiona por RANGE (created_at) con PK (id, created_at).
+- `sale_details` se particiona por RANGE (sale_created_at) con PK
+  (id, sale_created_at) y FK compuesta hacia sales (id, created_at).
+- Los índices se crean en la tabla padre (PostgreSQL los propaga a cada
+  partición), incluido (tenant_id, created_at) para consultas por tenant.
+- Se pre-crean SALES_PARTITIONS_AHEAD meses futuros y una partición DEFAULT.
+
+Las consultas que filtran por Sale.created_at (get_sales, reportes) se
+benefician de la poda de particiones. En SQLite todo esto se ignora y
+create_schema() equivale a Base.metadata.create_all().
+
+Uso por línea de comandos (crear particiones futuras manualmente o por cron):
+    python -m neos_core.database.partitioning
+"""
+import asyncio
+import logging
+from datetime import date, datetime
+from typing import List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.schema import CreateColumn, CreateIndex
+
+from neos_core.database import config
+
+log = logging.getLogger(__name__)
+
+# tabla -> columna de partición
+PARTITIONED_TABLES = {
+    "sales": "created_at",
+    "sale_details": "sale_created_at",
+}
+
+
+# ===== FECHAS =====
+
+def month_start(value) -> date:
+    return date(value.year, value.month, 1)
+
+
+def add_months(value: date, months: int) -> date:
+    index = value.year * 12 + (value.month - 1) + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table_name: str, month: date) -> str:
+    return f"{table_name}_y{month.year}m{month.month:02d}"
+
+
+# ===== DDL =====
+
+def is_enabled(bind) -> bool:
+    return config.SALES_PARTITIONING_ENABLED and bind.dialect.name == "postgresql"
+
+
+def partitioned_table_ddl(table) -> List[str]:
+    """
+    Genera el DDL de la tabla padre particionada a partir del modelo,
+    para que columnas agregadas al modelo no diverjan del esquema real.
+    """
+    dialect = postgresql.dialect()
+    partition_column = PARTITIONED_TABLES[table.name]
+
+    definitions = []
+    for column in table.columns:
+        spec = str(CreateColumn(column).compile(dialect=dialect)).strip()
+        if column.name == partition_column and column.nullable:
+            spec += " NOT NULL"
+        definitions.append(spec)
+
+    definitions.append(f"PRIMARY KEY (id, {partition_column})")
+
+    for fk in table.foreign_key_constraints:
+        referred = fk.referred_table.name
+        local = [c.name for c in fk.columns]
+        remote = [e.column.name for e in fk.elements]
+        if referred in PARTITIONED_TABLES:
+            # Una FK hacia una tabla particionada debe incluir su clave de partición
+            local.append(partition_column)
+            remote.append(PARTITIONED_TABLES[referred])
+        definitions.append(
+            f"FOREIGN KEY ({', '.join(local)}) REFERENCES {referred} ({', '.join(remote)})"
+        )
+
+    body = ",\n    ".join(definitions)
+    statements = [
+        f"CREATE TABLE IF NOT EXISTS {table.name} (\n    {body}\n) "
+        f"PARTITION BY RANGE ({partition_column})"
+    ]
+    for index in table.indexes:
+        statements.append(str(CreateIndex(index, if_not_exists=True).compile(dialect=dialect)))
+    return statements
+
+
+def partition_ddl(table_name: str, month: date) -> str:
+    return (
+        f"CREATE TABLE IF NOT EXISTS {partition_name(table_name, month)} "
+        f"PARTITION OF {table_name} "
+        f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+    )
+
+
+def ensure_partitions(bind, months_ahead: Optional[int] = None, start: Optional[date] = None) -> List[str]:
+    """
+    Crea (si no existen) las particiones desde `start` (mes actual por defecto)
+    hasta `months_ahead` meses en el futuro, más la partición DEFAULT.
+    Devuelve los nombres de las particiones mensuales verificadas.
+    """
+    if not is_enabled(bind):
+        return []
+
+    months_ahead = config.SALES_PARTITIONS_AHEAD if months_ahead is None else months_ahead
+    first = month_start(start or datetime.utcnow())
+    names = []
+
+    with bind.begin() as conn:
+        for table_name in PARTITIONED_TABLES:
+            for offset in range(months_ahead + 1):
+                month = add_months(first, offset)
+                conn.execute(text(partition_ddl(table_name, month)))
+                names.append(partition_name(table_name, month))
+            conn.execute(text(
+                f"CREATE TABLE IF NOT EXISTS {table_name}_default PARTITION OF {table_name} DEFAULT"
+            ))
+    return names
+
+
+def create_schema(bind, start: Optional[date] = None):
+    """
+    Crea todas las tablas. Si el particionado está activo en PostgreSQL,
+    las tablas de ventas se crean particionadas con sus particiones iniciales.
+    También crea los índices de búsqueda de productos (ver search.py).
+    """
+    import neos_core.database.models  # noqa: F401  (registrar modelos)
+    from neos_core.database.search import setup_product_search
+
+    metadata = config.Base.metadata
+    if not is_enabled(bind):
+        metadata.create_all(bind=bind)
+        setup_product_search(bind)
+        return
+
+    regular = [t for t in metadata.sorted_tables if t.name not in PARTITIONED_TABLES]
+    metadata.create_all(bind=bind, tables=regular)
+
+    with bind.begin() as conn:
+        for table in metadata.sorted_tables:
+            if table.name in PARTITIONED_TABLES:
+                for statement in partitioned_table_ddl(table):
+                    conn.execute(text(statement))
+
+    ensure_partitions(bind, start=start)
+    setup_product_search(bind)
+
+
+async def partition_maintenance_loop(bind, interval_seconds: int = 24 * 3600):
+    """Tarea de fondo: mantiene creadas las particiones de los próximos meses"""
+    while True:
+        try:
+            created = await asyncio.to_thread(ensure_partitions, bind)
+            if created:
+                log.info(f"Particiones de ventas verificadas: {len(created)}")
+        except Exception as e:
+            log.error(f"Error creando particiones de ventas: {e}")
+        await asyncio.sleep(interval_seconds)
+
+
+if __name__ == "__main__":
+    names = ensure_partitions(config.engine)
+    if not names:
+        print("⚠️ Particionado deshabilitado (SALES_PARTITIONING_ENABLED) o base no PostgreSQL")
+    for name in names:
+        print(f"✅ {name}")
@@ -0,0 +1,164 @@
+# neos_core/database/routing.py
+"""
+Enrutamiento de sesiones de base de datos.
+
+Las rutas de solo lectura pesadas (listados y reportes) pueden usar una
+réplica. Para mantener la consistencia "leer lo que escribí", después de
+una escritura sus lecturas vuelven al primario durante una ventana
+configurable (REPLICA_READ_AFTER_WRITE_SECONDS).
+
+La marca de escritura viaja con el cliente: la respuesta de un request que
+escribió lleva el momento de la escritura en la cookie `neos_last_write` y
+en el header X-Last-Write-At (para clientes sin cookies, que lo reenvían
+como header). Así la ventana vale en cualquier worker o host. Además cada
+proceso recuerda las escrituras de cada tenant; eso solo cubre a los
+clientes que no devuelven la marca y atiende el mismo worker (best-effort).
+"""
+import threading
+import time
+from contextvars import ContextVar
+from http.cookies import SimpleCookie
+from typing import Dict, Optional
+
+from fastapi import Request
+from jose import JWTError, jwt
+
+from neos_core.database import config
+from neos_core.database.sharding import DEFAULT_SHARD, shard_router
+from neos_core.security.auth_config import SECRET_KEY, ALGORITHM
+
+# Header para forzar lectura en el primario (p. ej. justo después de un POST)
+CONSISTENCY_HEADER = "X-Read-Consistency"
+
+# Marca de escritura que devuelve y reenvía el cliente (epoch en segundos)
+LAST_WRITE_COOKIE = "neos_last_write"
+LAST_WRITE_HEADER = "X-Last-Write-At"
+
+# tenant_id -> timestamp (monotónico) de la última escritura
+_last_write: Dict[int, float] = {}
+_last_write_lock = threading.Lock()
+
+# Escrituras del request en curso (ver ReadAfterWriteMiddleware). Es un dict
+# mutable para que lo vean también los hilos del threadpool (copian el contexto)
+_request_write: ContextVar[Optional[dict]] = ContextVar("request_write", default=None)
+
+
+def mark_tenant_write(tenant_id: Optional[int]):
+    """
+    Registra que el tenant acaba de escribir en el primario.
+    Llamar después de cada commit que modifique datos leídos desde la réplica.
+    """
+    if tenant_id is None:
+        return
+    with _last_write_lock:
+        _last_write[tenant_id] = time.monotonic()
+    request_write = _request_write.get()
+    if request_write is not None:
+        request_write["at"] = time.time()
+
+
+def in_read_after_write_window(tenant_id: Optional[int]) -> bool:
+    """True si el tenant escribió hace menos de REPLICA_READ_AFTER_WRITE_SECONDS"""
+    if tenant_id is None:
+        return False
+    last = _last_write.get(tenant_id)
+    if last is None:
+        return False
+    return time.monotonic() - last < config.REPLICA_READ_AFTER_WRITE_SECONDS
+
+
+def client_wrote_recently(request: Request) -> bool:
+    """True si el cliente reenvía una marca de escritura dentro de la ventana"""
+    value = request.headers.get(LAST_WRITE_HEADER) or request.cookies.get(LAST_WRITE_COOKIE)
+    try:
+        written_at = float(value)
+    except (TypeError, ValueError):
+        return False
+    # abs: tolera relojes algo adelantados entre hosts
+    return abs(time.time() - written_at) < config.REPLICA_READ_AFTER_WRITE_SECONDS
+
+
+class ReadAfterWriteMiddleware:
+    """
+    Middleware ASGI: si el request escribió (mark_tenant_write), la respuesta
+    lleva la marca de escritura en cookie y header.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_write = {}
+        token = _request_write.set(request_write)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and "at" in request_write:
+                value = f"{request_write['at']:.3f}"
+                cookie = SimpleCookie()
+                cookie[LAST_WRITE_COOKIE] = value
+                cookie[LAST_WRITE_COOKIE]["path"] = "/"
+                cookie[LAST_WRITE_COOKIE]["max-age"] = config.REPLICA_READ_AFTER_WRITE_SECONDS
+                cookie[LAST_WRITE_COOKIE]["httponly"] = True
+                cookie[LAST_WRITE_COOKIE]["samesite"] = "Lax"
+                headers = list(message.get("headers", []))
+                headers.append((b"set-cookie", cookie.output(header="").strip().encode("latin-1")))
+                headers.append((LAST_WRITE_HEADER.lower().encode(), value.encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _request_write.reset(token)
+
+
+def tenant_id_from_request(request: Request) -> Optional[int]:
+    """
+    Extrae el tenant_id del JWT sin consultar la base de datos.
+    La validación real del usuario la sigue haciendo get_current_user.
+    """
+    authorization = request.headers.get("Authorization", "")
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        return None
+    tenant_id = payload.get("tenant_id")
+    return int(tenant_id) if tenant_id is not None else None
+
+
+def choose_read_sessionmaker(tenant_id: Optional[int], force_primary: bool = False):
+    """Decide si una lectura va a la réplica o al primario"""
+    # Los tenants en otros shards leen de su shard (la réplica es del shard default)
+    if shard_router.shard_for_tenant(tenant_id) != DEFAULT_SHARD:
+        return shard_router.sessionmaker_for_tenant(tenant_id)
+    if config.ReplicaSessionLocal is None or force_primary:
+        return config.SessionLocal
+    if in_read_after_write_window(tenant_id):
+        return config.SessionLocal
+    return config.ReplicaSessionLocal
+
+
+def get_read_db(request: Request):
+    """
+    Dependencia para rutas de solo lectura.
+    Usa la réplica si está configurada y ni el cliente ni el tenant (en este
+    proceso) escribieron recientemente.
+    """
+    force_primary = (
+        request.headers.get(CONSISTENCY_HEADER, "").lower() == "strong"
+        or client_wrote_recently(request)
+    )
+    session_factory = choose_read_sessionmaker(tenant_id_from_request(request), force_primary)
+
+    db = session_factory()
+    try:
+        yield db
+    finally:
+        db.close()
@@ -0,0 +1,145 @@
+# neos_core/database/search.py
+"""
+Búsqueda de productos por texto (nombre, descripción, SKU y atributos).
+
+- PostgreSQL: columna generada `search_vector` (tsvector) con índice GIN e
+  índices trigram (pg_trgm) sobre nombre y SKU para coincidencias parciales
+  y con errores de tipeo. Ranking: ts_rank + similarity.
+- SQLite (tests): tabla virtual FTS5 `products_fts` sincronizada por triggers.
+  Ranking: bm25.
+
+setup_product_search() se ejecuta al crear el esquema (create_schema) y, en
+bases existentes, con las migraciones (add_product_search).
+"""
+import re
+from typing import List, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+# Palabras de la consulta (letras/números unicode); el resto se descarta
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+_POSTGRES_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    """
+    ALTER TABLE products ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', coalesce(name, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(sku, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(attributes::text, '')), 'B') ||
+        setweight(to_tsvector('simple', coalesce(description, '')), 'C')
+    ) STORED
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_products_search_vector ON products USING gin (search_vector)",
+    "CREATE INDEX IF NOT EXISTS ix_products_name_trgm ON products USING gin (name gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_products_sku_trgm ON products USING gin (sku gin_trgm_ops)",
+]
+
+_SQLITE_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5(
+        name, description, sku, attributes,
+        content='products', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS products_fts_ai AFTER INSERT ON products BEGIN
+        INSERT INTO products_fts(rowid, name, description, sku, attributes)
+        VALUES (new.id, new.name, new.description, new.sku, new.attributes);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS products_fts_ad AFTER DELETE ON products BEGIN
+        INSERT INTO products_fts(products_fts, rowid, name, description, sku, attributes)
+        VALUES ('delete', old.id, old.name, old.description, old.sku, old.attributes);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS products_fts_au AFTER UPDATE ON products BEGIN
+        INSERT INTO products_fts(products_fts, rowid, name, description, sku, attributes)
+        VALUES ('delete', old.id, old.name, old.description, old.sku, old.attributes);
+        INSERT INTO products_fts(rowid, name, description, sku, attributes)
+        VALUES (new.id, new.name, new.description, new.sku, new.attributes);
+    END
+    """,
+]
+
+
+def setup_product_search(bind):
+    """Crea los índices/tablas de búsqueda según el motor de base de datos"""
+    statements = {
+        "postgresql": _POSTGRES_DDL,
+        "sqlite": _SQLITE_DDL,
+    }.get(bind.dialect.name, [])
+
+    with bind.begin() as conn:
+        for statement in statements:
+            conn.execute(text(statement))
+
+
+def tokenize(query: str) -> List[str]:
+    return _TOKEN_RE.findall(query.lower())
+
+
+def like_prefix(value: str) -> str:
+    """Patrón LIKE de prefijo con %, _ y \\ escapados (usar con ESCAPE '\\')"""
+    escaped = value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"{escaped}%"
+
+
+def search_product_ids(db: Session, tenant_id: int, query: str, limit: int = 20) -> List[Tuple[int, float]]:
+    """
+    Devuelve [(product_id, rank)] ordenados por relevancia (mayor primero).
+    Cada palabra se busca como prefijo, así "rem azu" encuentra "Remera Azul".
+    """
+    tokens = tokenize(query)
+    if not tokens:
+        return []
+
+    dialect = db.get_bind().dialect.name
+    params = {"tenant_id": tenant_id, "limit": limit}
+
+    if dialect == "postgresql":
+        params.update(
+            tsquery=" & ".join(f"{t}:*" for t in tokens),
+            raw=" ".join(tokens),
+            sku_prefix=like_prefix(query.strip()),
+        )
+        sql = """
+            SELECT p.id,
+                   ts_rank(p.search_vector, q) + similarity(p.name, :raw) AS rank
+            FROM products p, to_tsquery('simple', :tsquery) q
+            WHERE p.tenant_id = :tenant_id
+              AND p.is_active
+              AND (p.search_vector @@ q OR p.name % :raw OR p.sku ILIKE :sku_prefix ESCAPE '\\')
+            ORDER BY rank DESC, p.id
+            LIMIT :limit
+        """
+    elif dialect == "sqlite":
+        params["match"] = " ".join(f'"{t}"*' for t in tokens)
+        # bm25 devuelve valores negativos (más negativo = más relevante)
+        sql = """
+            SELECT p.id, -bm25(products_fts, 10.0, 1.0, 10.0, 5.0) AS rank
+            FROM products_fts
+            JOIN products p ON p.id = products_fts.rowid
+            WHERE products_fts MATCH :match
+              AND p.tenant_id = :tenant_id
+              AND p.is_active = 1
+            ORDER BY rank DESC, p.id
+            LIMIT :limit
+        """
+    else:
+        params["pattern"] = f"%{query.strip()}%"
+        sql = """
+            SELECT p.id, 0 AS rank
+            FROM products p
+            WHERE p.tenant_id = :tenant_id
+              AND p.is_active
+              AND (p.name LIKE :pattern OR p.sku LIKE :pattern OR p.description LIKE :pattern)
+            ORDER BY p.name
+            LIMIT :limit
+        """
+
+    return [(row[0], float(row[1])) for row in db.execute(text(sql), params)]
@@ -0,0 +1,609 @@
+# neos_core/database/sharding.py
+"""
+Enrutamiento de tenants a shards (bases de datos independientes).
+
+Todas las tablas de negocio están aisladas por tenant_id, así que cada
+tenant vive completo en un único shard. El shard "default" es la base
+principal (DATABASE_URL); los demás se declaran en DATABASE_SHARDS.
+
+Variables de entorno:
+    DATABASE_SHARDS  JSON {"nombre": "url"} con los shards adicionales
+    SHARD_MAP_FILE   JSON {"version": n, "tenants": {"tenant_id": "nombre"},
+                     "moving": {"tenant_id": "destino"}}; los tenants ausentes
+                     viven en "default". Se reescribe al mover un tenant.
+                     También se acepta el formato plano {"tenant_id": "nombre"}.
+
+Cada proceso que escribe relee el mapa cada SHARD_MAP_RELOAD_SECONDS y deja
+constancia de la versión que usa en SHARD_MAP_FILE.acks/<host>-<pid>: los
+workers de la API con shard_map_watch_loop y los procesos de línea de
+comandos (tareas, relay del outbox, webhooks, CAE, ...) con
+shard_map_watch(). Con varios hosts, el mapa tiene que estar en
+almacenamiento compartido.
+
+Mover un tenant (move_tenant):
+1. Se marca "moving" en el mapa y se espera a que todos los workers lo
+   confirmen: desde ahí sus escrituras se rechazan con 503 (Retry-After).
+2. Se copia desde un snapshot REPEATABLE READ del origen y se verifica la
+   cantidad de filas por tabla antes de confirmar el destino.
+3. El mapa apunta al destino; el origen se borra recién cuando todos los
+   workers confirmaron la versión nueva.
+
+Las tablas globales (monedas, roles, datos fiscales) se replican en todos
+los shards con replicate_global_tables().
+
+Uso por línea de comandos:
+    python -m neos_core.database.sharding replicate-globals
+    python -m neos_core.database.sharding move-tenant <tenant_id> <shard>
+    python -m neos_core.database.sharding purge-tenant <tenant_id> <shard>
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy import event, func, select, text
+from sqlalchemy.orm import Session, sessionmaker
+
+from neos_core.database import config
+
+log = logging.getLogger(__name__)
+
+DEFAULT_SHARD = "default"
+
+# Tablas sin tenant_id que deben existir en todos los shards
+GLOBAL_TABLES = ("currencies", "roles", "tax_id_types", "tax_responsibilities")
+
+# Clave de Session.info con el tenant de las sesiones abiertas por el router
+_SESSION_TENANT_KEY = "shard_tenant_id"
+
+
+def _read_map_file(path: str):
+    """(versión, tenants, moving) del archivo de mapa; acepta el formato plano"""
+    with open(path) as f:
+        data = json.load(f)
+    if "tenants" not in data:
+        return 0, {int(k): v for k, v in data.items()}, {}
+    return (
+        int(data.get("version", 0)),
+        {int(k): v for k, v in data["tenants"].items()},
+        {int(k): v for k, v in data.get("moving", {}).items()},
+    )
+
+
+class ShardRouter:
+    """Mapa tenant -> shard y sesiones por shard"""
+
+    def __init__(
+            self,
+            shard_urls: Optional[Dict[str, str]] = None,
+            tenant_map: Optional[Dict[int, str]] = None,
+            map_file: Optional[str] = None
+    ):
+        self._engines = {}
+        self._sessionmakers = {}
+        self._tenant_map: Dict[int, str] = dict(tenant_map or {})
+        self._moving: Dict[int, str] = {}
+        self._map_file = map_file
+        self._version = 0
+        self._map_mtime = None
+        self._lock = threading.Lock()
+
+        for name, url in (shard_urls or {}).items():
+            self.add_shard(name, config.build_engine(url, application_name=f"{config.DB_APPLICATION_NAME}_{name}"))
+        if tenant_map is None:
+            self.reload()
+
+    # ===== SHARDS =====
+
+    def add_shard(self, name: str, shard_engine):
+        if name == DEFAULT_SHARD:
+            raise ValueError("El shard 'default' es siempre DATABASE_URL")
+        self._engines[name] = shard_engine
+        self._sessionmakers[name] = sessionmaker(autocommit=False, autoflush=False, bind=shard_engine)
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self._engines)
+
+    @property
+    def shard_names(self) -> List[str]:
+        return [DEFAULT_SHARD] + list(self._engines)
+
+    def engine_for(self, shard: str):
+        if shard == DEFAULT_SHARD:
+            return config.SessionLocal.kw["bind"]
+        return self._engines[shard]
+
+    def sessionmaker_for(self, shard: str):
+        # El default se resuelve en cada llamada para respetar overrides (tests)
+        if shard == DEFAULT_SHARD:
+            return config.SessionLocal
+        return self._sessionmakers[shard]
+
+    # ===== MAPA DE TENANTS =====
+
+    def shard_for_tenant(self, tenant_id: Optional[int]) -> str:
+        if tenant_id is None:
+            return DEFAULT_SHARD
+        return self._tenant_map.get(tenant_id, DEFAULT_SHARD)
+
+    def sessionmaker_for_tenant(self, tenant_id: Optional[int]):
+        factory = self.sessionmaker_for(self.shard_for_tenant(tenant_id))
+        if tenant_id is None:
+            return factory
+
+        def open_session() -> Session:
+            db = factory()
+            db.info[_SESSION_TENANT_KEY] = tenant_id
+            return db
+        return open_session
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    @property
+    def moving(self) -> Dict[int, str]:
+        """Tenants en movimiento (tenant_id -> shard destino); sus escrituras se rechazan"""
+        return self._moving
+
+    def is_moving(self, tenant_id: Optional[int]) -> bool:
+        return tenant_id is not None and tenant_id in self._moving
+
+    def reload(self) -> bool:
+        """Relee el archivo de mapa si cambió desde la última lectura. True si lo releyó"""
+        if not self._map_file:
+            return False
+        try:
+            mtime = os.stat(self._map_file).st_mtime_ns
+        except FileNotFoundError:
+            return False
+        if mtime == self._map_mtime:
+            return False
+        version, tenant_map, moving = _read_map_file(self._map_file)
+        with self._lock:
+            self._version, self._tenant_map, self._moving = version, tenant_map, moving
+            self._map_mtime = mtime
+        return True
+
+    def _save(self) -> int:
+        """Persiste el mapa con una versión nueva (llamar con self._lock tomado)"""
+        self._version += 1
+        if self._map_file:
+            tmp_path = f"{self._map_file}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump({
+                    "version": self._version,
+                    "tenants": {str(k): v for k, v in self._tenant_map.items()},
+                    "moving": {str(k): v for k, v in self._moving.items()},
+                }, f, indent=2)
+            os.replace(tmp_path, self._map_file)
+            self._map_mtime = os.stat(self._map_file).st_mtime_ns
+        return self._version
+
+    def assign(self, tenant_id: int, shard: str) -> int:
+        """Asigna un tenant a un shard y persiste el mapa si hay archivo. Devuelve la versión"""
+        if shard not in self.shard_names:
+            raise ValueError(f"Shard desconocido: {shard}")
+        with self._lock:
+            if shard == DEFAULT_SHARD:
+                self._tenant_map.pop(tenant_id, None)
+            else:
+                self._tenant_map[tenant_id] = shard
+            self._moving.pop(tenant_id, None)
+            return self._save()
+
+    def begin_move(self, tenant_id: int, target: str) -> int:
+        """Marca el tenant en movimiento: los workers rechazan sus escrituras"""
+        if target not in self.shard_names:
+            raise ValueError(f"Shard desconocido: {target}")
+        with self._lock:
+            if tenant_id in self._moving:
+                raise ValueError(f"El tenant {tenant_id} ya se está moviendo a '{self._moving[tenant_id]}'")
+            self._moving[tenant_id] = target
+            return self._save()
+
+    def cancel_move(self, tenant_id: int) -> int:
+        with self._lock:
+            self._moving.pop(tenant_id, None)
+            return self._save()
+
+    # ===== CONFIRMACIÓN DE LOS WORKERS =====
+
+    @property
+    def _acks_dir(self) -> str:
+        return f"{self._map_file}.acks"
+
+    @staticmethod
+    def worker_id() -> str:
+        # Se calcula en cada llamada: el pid cambia en los workers forkeados
+        return f"{socket.gethostname()}-{os.getpid()}"
+
+    def acknowledge(self):
+        """Deja constancia de la versión del mapa que usa este worker (también es su latido)"""
+        if not self._map_file:
+            return
+        os.makedirs(self._acks_dir, exist_ok=True)
+        path = os.path.join(self._acks_dir, self.worker_id())
+        with open(f"{path}.tmp", "w") as f:
+            f.write(str(self._version))
+        os.replace(f"{path}.tmp", path)
+
+    def release(self):
+        """Borra la constancia de este worker (al apagarse)"""
+        if not self._map_file:
+            return
+        try:
+            os.remove(os.path.join(self._acks_dir, self.worker_id()))
+        except FileNotFoundError:
+            pass
+
+    def lagging_workers(self, version: int) -> List[str]:
+        """
+        Workers vivos que todavía no confirmaron `version`. Una constancia sin
+        latido en 5 recargas es de un worker que ya no existe y se ignora.
+        """
+        if not self._map_file or not os.path.isdir(self._acks_dir):
+            return []
+        stale_before = time.time() - 5 * max(config.SHARD_MAP_RELOAD_SECONDS, 1)
+        me = self.worker_id()
+        lagging = []
+        for name in os.listdir(self._acks_dir):
+            path = os.path.join(self._acks_dir, name)
+            if name == me or name.endswith(".tmp"):
+                continue
+            try:
+                if os.stat(path).st_mtime < stale_before:
+                    continue
+                with open(path) as f:
+                    acked = int(f.read().strip() or 0)
+            except (FileNotFoundError, ValueError):
+                continue
+            if acked < version:
+                lagging.append(name)
+        return lagging
+
+    def wait_for_workers(self, version: int, timeout: Optional[float] = None) -> List[str]:
+        """Espera a que todos los workers confirmen `version`. Devuelve los que no llegaron"""
+        timeout = config.SHARD_MOVE_ACK_TIMEOUT_SECONDS if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        while True:
+            lagging = self.lagging_workers(version)
+            if not lagging or time.monotonic() >= deadline:
+                return lagging
+            time.sleep(min(0.2, max(deadline - time.monotonic(), 0)))
+
+    # ===== BÚSQUEDAS GLOBALES =====
+
+    def find_user_by_email(self, email: str):
+        """
+        Busca un usuario en todos los shards (login sin token).
+        Devuelve la instancia desacoplada de su sesión o None.
+        """
+        from neos_core.database.models import User
+
+        for shard in self.shard_names:
+            db = self.sessionmaker_for(shard)()
+            try:
+                user = db.query(User).filter(User.email == email).first()
+                if user is not None:
+                    db.expunge(user)
+                    return user
+            finally:
+                db.close()
+        return None
+
+
+def _load_router_from_env() -> ShardRouter:
+    shard_urls = json.loads(os.getenv("DATABASE_SHARDS") or "{}")
+    map_file = os.getenv("SHARD_MAP_FILE") or None
+    return ShardRouter(shard_urls=shard_urls, map_file=map_file)
+
+
+# Router global del proceso
+shard_router = _load_router_from_env()
+
+
+@event.listens_for(Session, "before_flush")
+def _reject_moving_tenant_objects(session: Session, flush_context, instances):
+    """Rechaza cambios ORM de tenants en movimiento (también los de tareas de fondo)"""
+    if not shard_router.moving:
+        return
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if shard_router.is_moving(getattr(obj, "tenant_id", None)):
+            _raise_tenant_moving(obj.tenant_id)
+
+
+@event.listens_for(Session, "before_commit")
+def _reject_moving_tenant_session(session: Session):
+    """Rechaza el commit de una sesión abierta para un tenant en movimiento (incluye SQL directo)"""
+    if shard_router.is_moving(session.info.get(_SESSION_TENANT_KEY)) and session.in_transaction():
+        _raise_tenant_moving(session.info[_SESSION_TENANT_KEY])
+
+
+def _raise_tenant_moving(tenant_id: int):
+    raise HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail=f"El tenant {tenant_id} se está moviendo de shard, reintentar en unos segundos",
+        headers={"Retry-After": str(max(config.SHARD_MAP_RELOAD_SECONDS, 1))}
+    )
+
+
+def refresh_shard_map(router: ShardRouter = None):
+    """Una pasada del watcher: relee el mapa si cambió y confirma la versión en uso"""
+    router = router or shard_router
+    try:
+        if router.reload():
+            log.info(f"Mapa de shards recargado (versión {router.version})")
+        router.acknowledge()
+    except Exception as e:
+        log.error(f"Error recargando el mapa de shards: {e}")
+
+
+async def shard_map_watch_loop(interval_seconds: int = None):
+    """Tarea de fondo de la API: refresh_shard_map cada SHARD_MAP_RELOAD_SECONDS"""
+    interval_seconds = interval_seconds or config.SHARD_MAP_RELOAD_SECONDS
+    try:
+        while True:
+            await asyncio.to_thread(refresh_shard_map)
+            await asyncio.sleep(interval_seconds)
+    finally:
+        shard_router.release()
+
+
+@contextmanager
+def shard_map_watch(router: ShardRouter = None, interval_seconds: int = None):
+    """
+    Lo mismo para procesos de línea de comandos: un hilo relee el mapa y
+    confirma la versión mientras dure el bloque, así move_tenant los espera
+    y sus escrituras de un tenant en movimiento se rechazan.
+    """
+    router = router or shard_router
+    interval_seconds = interval_seconds or config.SHARD_MAP_RELOAD_SECONDS
+    stop = threading.Event()
+
+    def watch():
+        while not stop.wait(interval_seconds):
+            refresh_shard_map(router)
+
+    # La primera pasada antes de escribir nada: el proceso arranca con el mapa vigente
+    refresh_shard_map(router)
+    thread = threading.Thread(target=watch, name="shard-map-watch", daemon=True)
+    thread.start()
+    try:
+        yield router
+    finally:
+        stop.set()
+        thread.join()
+        router.release()
+
+
+# ===== REPLICACIÓN DE TABLAS GLOBALES =====
+
+def _global_tables():
+    return [t for t in config.Base.metadata.sorted_tables if t.name in GLOBAL_TABLES]
+
+
+def replicate_global_tables(router: ShardRouter = None, source: str = DEFAULT_SHARD,
+                            targets: Optional[List[str]] = None) -> Dict[str, int]:
+    """
+    Copia las tablas globales del shard origen a los demás (insert/update por id).
+    Devuelve la cantidad de filas escritas por shard destino.
+    """
+    router = router or shard_router
+    targets = targets or [s for s in router.shard_names if s != source]
+    written = {}
+
+    with router.engine_for(source).connect() as src:
+        snapshot = {
+            table.name: [dict(row) for row in src.execute(select(table)).mappings()]
+            for table in _global_tables()
+        }
+
+    for target in targets:
+        count = 0
+        with router.engine_for(target).begin() as dst:
+            for table in _global_tables():
+                rows = snapshot[table.name]
+                if not rows:
+                    continue
+                existing = set(dst.execute(select(table.c.id)).scalars())
+                new_rows = [r for r in rows if r["id"] not in existing]
+                if new_rows:
+                    dst.execute(table.insert(), new_rows)
+                for row in rows:
+                    if row["id"] in existing:
+                        dst.execute(table.update().where(table.c.id == row["id"]).values(**row))
+                count += len(rows)
+                _sync_sequence(dst, table)
+        written[target] = count
+    return written
+
+
+def _sync_sequence(conn, table):
+    """En PostgreSQL, ajusta la secuencia del id tras insertar ids explícitos"""
+    if conn.dialect.name != "postgresql" or "id" not in table.c:
+        return
+    conn.execute(text(
+        f"SELECT setval(pg_get_serial_sequence('{table.name}', 'id'), "
+        f"COALESCE((SELECT MAX(id) FROM {table.name}), 1))"
+    ))
+
+
+# ===== MOVIMIENTO DE TENANTS =====
+
+def _tenant_filter(table, tenant_id: int):
+    """
+    Condición que selecciona las filas del tenant en una tabla.
+    Las tablas hijas sin tenant_id (p. ej. sale_details) se resuelven por su FK.
+    """
+    if table.name in GLOBAL_TABLES:
+        return None
+    if table.name == "tenants":
+        return table.c.id == tenant_id
+    if "tenant_id" in table.c:
+        return table.c.tenant_id == tenant_id
+
+    # FKs obligatorias primero (una FK nullable, p. ej. variant_id, no alcanza para ubicar la fila)
+    for fk in sorted(table.foreign_keys, key=lambda fk: (fk.parent.nullable, fk.parent.name)):
+        parent = fk.column.table
+        if parent is table:
+            continue
+        parent_filter = _tenant_filter(parent, tenant_id)
+        if parent_filter is not None:
+            return fk.parent.in_(select(fk.column).where(parent_filter))
+    return None
+
+
+def _count(conn, table, where) -> int:
+    return conn.execute(select(func.count()).select_from(table).where(where)).scalar()
+
+
+def _tenant_tables(tenant_id: int):
+    tables = [
+        (table, _tenant_filter(table, tenant_id))
+        for table in config.Base.metadata.sorted_tables
+    ]
+    return [(table, where) for table, where in tables if where is not None]
+
+
+def _copy_tenant(router: ShardRouter, tenant_id: int, source: str, target: str, batch_size: int) -> Dict[str, int]:
+    """
+    Copia las filas del tenant desde un snapshot del origen en una sola
+    transacción del destino, y la confirma solo si las cantidades coinciden.
+    """
+    tables = _tenant_tables(tenant_id)
+    copied = {}
+
+    with router.engine_for(source).connect() as src_conn, router.engine_for(target).begin() as dst:
+        # Snapshot: todas las tablas se leen en el mismo instante (en SQLite alcanza
+        # con el bloqueo de escrituras del paso 1)
+        src = src_conn
+        if src_conn.dialect.name == "postgresql":
+            src = src_conn.execution_options(isolation_level="REPEATABLE READ")
+        with src.begin():
+            for table, where in tables:
+                result = src.execution_options(stream_results=True).execute(select(table).where(where))
+                total = 0
+                for batch in result.mappings().partitions(batch_size):
+                    dst.execute(table.insert(), [dict(row) for row in batch])
+                    total += len(batch)
+                if total:
+                    _sync_sequence(dst, table)
+                copied[table.name] = total
+
+            for table, where in tables:
+                expected, written = _count(src, table, where), _count(dst, table, where)
+                if not expected == written == copied[table.name]:
+                    raise RuntimeError(
+                        f"{table.name}: el origen tiene {expected} filas del tenant {tenant_id} "
+                        f"y el destino {written}; se descarta la copia"
+                    )
+    return copied
+
+
+def delete_tenant_rows(tenant_id: int, shard: str, router: ShardRouter = None, ack_timeout: float = None):
+    """
+    Borra las filas de un tenant de un shard donde ya no vive (origen de un
+    movimiento). Antes espera a que todos los workers usen el mapa actual.
+    """
+    router = router or shard_router
+    router.reload()
+    if router.shard_for_tenant(tenant_id) == shard or router.is_moving(tenant_id):
+        raise ValueError(f"El tenant {tenant_id} todavía usa el shard '{shard}'")
+    lagging = router.wait_for_workers(router.version, ack_timeout)
+    if lagging:
+        raise RuntimeError(
+            f"Workers sin confirmar la versión {router.version} del mapa: {', '.join(lagging)}. "
+            f"Las filas del tenant {tenant_id} en '{shard}' no se borraron; reintentar con purge-tenant"
+        )
+    with router.engine_for(shard).begin() as conn:
+        for table, where in reversed(_tenant_tables(tenant_id)):
+            conn.execute(table.delete().where(where))
+
+
+def move_tenant(tenant_id: int, target: str, router: ShardRouter = None,
+                batch_size: int = 1000, delete_source: bool = True,
+                ack_timeout: float = None) -> Dict[str, int]:
+    """
+    Mueve todas las filas de un tenant al shard destino y actualiza el mapa
+    (secuencia en el docstring del módulo).
+
+    Si la copia falla (p. ej. colisión de ids porque los shards no usan rangos
+    de secuencia disjuntos) o algún worker no confirma el bloqueo de
+    escrituras, el destino queda sin cambios y el tenant sigue en el origen.
+    """
+    router = router or shard_router
+    router.reload()
+    source = router.shard_for_tenant(tenant_id)
+    if source == target:
+        raise ValueError(f"El tenant {tenant_id} ya está en el shard '{target}'")
+
+    replicate_global_tables(router, source=source, targets=[target])
+
+    version = router.begin_move(tenant_id, target)
+    try:
+        lagging = router.wait_for_workers(version, ack_timeout)
+        if lagging:
+            raise RuntimeError(
+                f"Workers sin confirmar el bloqueo de escrituras del tenant {tenant_id}: {', '.join(lagging)}"
+            )
+        copied = _copy_tenant(router, tenant_id, source, target, batch_size)
+    except BaseException:
+        router.cancel_move(tenant_id)
+        raise
+
+    router.assign(tenant_id, target)
+
+    if delete_source:
+        delete_tenant_rows(tenant_id, source, router=router, ack_timeout=ack_timeout)
+
+    return copied
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Herramientas de sharding de Neos Core")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    sub.add_parser("replicate-globals", help="Replica monedas, roles y datos fiscales en todos los shards")
+
+    move = sub.add_parser("move-tenant", help="Mueve un tenant a otro shard")
+    move.add_argument("tenant_id", type=int)
+    move.add_argument("target")
+    move.add_argument("--batch-size", type=int, default=1000)
+    move.add_argument("--keep-source", action="store_true", help="No borrar las filas del shard origen")
+
+    purge = sub.add_parser("purge-tenant", help="Borra las filas de un tenant de un shard donde ya no vive")
+    purge.add_argument("tenant_id", type=int)
+    purge.add_argument("shard")
+
+    args = parser.parse_args(argv)
+
+    # Registrar todos los modelos en la metadata
+    import neos_core.database.models  # noqa: F401
+
+    if args.command == "replicate-globals":
+        for shard, count in replicate_global_tables().items():
+            print(f"✅ {shard}: {count} filas globales replicadas")
+    elif args.command == "purge-tenant":
+        delete_tenant_rows(args.tenant_id, args.shard)
+        print(f"✅ Filas del tenant {args.tenant_id} borradas del shard '{args.shard}'")
+    else:
+        copied = move_tenant(
+            args.tenant_id, args.target,
+            batch_size=args.batch_size, delete_source=not args.keep_source
+        )
+        for table, count in copied.items():
+            print(f"✅ {table}: {count} filas copiadas")
+        print(f"✨ Tenant {args.tenant_id} ahora vive en el shard '{args.target}'")
+
+
+if __name__ == "__main__":
+    main()
@@ -20,9 +20,65 @@ from .product_schema import (
     Product, 
     ProductCreate, 
     ProductUpdate, 
-    ProductListResponse
+    ProductListResponse,
+    ProductVariant,
+    ProductVariantCreate,
+    ProductVariantUpdate,
+    ProductBarcodeResponse,
+    CatalogItemResponse
 )
 
+# Stock por ubicación
+from .stock_schema import (
+    LocationStock,
+    LocationStockSet,
+    StockTransfer,
+    StockTransferCreate
+)
+
+# Reservas de stock
+from .reservation_schema import (
+    ReservationCreate,
+    ReservationResponse,
+    ReservationItemResponse,
+    ReservationCheckout
+)
+
+# Listas de precios y promociones
+from .pricing_schema import (
+    PriceList,
+    PriceListCreate,
+    PriceListUpdate,
+    PriceListItem,
+    PriceListItemSet,
+    Promotion,
+    PromotionCreate,
+    PromotionUpdate,
+    QuoteRequest,
+    QuoteResponse
+)
+
+# Webhooks
+from .webhook_schema import (
+    WebhookEndpoint,
+    WebhookEndpointCreate,
+    WebhookEndpointCreated,
+    WebhookEndpointUpdate,
+    WebhookDelivery,
+    WebhookRedeliverResponse
+)
+
+# Tareas en segundo plano
+from .job_schema import (
+    Job,
+    JobCreate,
+    SalesExportParams,
+    ProductImportParams
+)
+
+# Auditoría
+from .audit_schema import AuditEntry
+
 # Config (Currency, POS)
 from .config_schema import (
     Currency, 
@@ -42,7 +98,9 @@ from .sales_schema import (
     SaleItemResponse, 
     SaleResponse,
     SaleListResponse,
-    SaleFilters
+    SaleFilters,
+    SalesSummaryRow,
+    SalesSummaryResponse
 )
 
 __all__ = [
@@ -62,6 +120,46 @@ __all__ = [
     "ProductCreate",
     "ProductUpdate",
     "ProductListResponse",
+    "ProductVariant",
+    "ProductVariantCreate",
+    "ProductVariantUpdate",
+    "ProductBarcodeResponse",
+    "CatalogItemResponse",
+    # Stock
+    "LocationStock",
+    "LocationStockSet",
+    "StockTransfer",
+    "StockTransferCreate",
+    # Reservas
+    "ReservationCreate",
+    "ReservationResponse",
+    "ReservationItemResponse",
+    "ReservationCheckout",
+    # Precios
+    "PriceList",
+    "PriceListCreate",
+    "PriceListUpdate",
+    "PriceListItem",
+    "PriceListItemSet",
+    "Promotion",
+    "PromotionCreate",
+    "PromotionUpdate",
+    "QuoteRequest",
+    "QuoteResponse",
+    # Webhooks
+    "WebhookEndpoint",
+    "WebhookEndpointCreate",
+    "WebhookEndpointCreated",
+    "WebhookEndpointUpdate",
+    "WebhookDelivery",
+    "WebhookRedeliverResponse",
+    # Tareas
+    "Job",
+    "JobCreate",
+    "SalesExportParams",
+    "ProductImportParams",
+    # Auditoría
+    "AuditEntry",
     # Config
     "Currency",
     "CurrencyCreate",
@@ -78,4 +176,6 @@ __all__ = [
     "SaleResponse",
     "SaleListResponse",
     "SaleFilters",
+    "SalesSummaryRow",
+    "SalesSummaryResponse",
 ]
\ No newline at end of file
@@ -0,0 +1,23 @@
+# neos_core/schemas/audit_schema.py
+"""
+Schemas del registro de auditoría
+"""
+from pydantic import BaseModel
+from typing import Any, Dict, Optional
+from datetime import datetime
+
+
+class AuditEntry(BaseModel):
+    """Un cambio auditado; `changes` es {"campo": [antes, después]}"""
+    id: int
+    tenant_id: int
+    actor_user_id: Optional[int] = None
+    action: str
+    entity_type: str
+    entity_id: int
+    changes: Optional[Dict[str, Any]] = None
+    occurred_at: datetime
+    recorded_at: datetime
+
+    class Config:
+        from_attributes = True
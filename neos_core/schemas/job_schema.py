@@ -0,0 +1,56 @@
+# neos_core/schemas/job_schema.py
+"""
+Schemas para tareas en segundo plano y los parámetros de cada tipo
+"""
+from pydantic import BaseModel, Field, model_validator
+from typing import Any, Dict, List, Literal, Optional
+from datetime import datetime
+
+JobStatus = Literal["queued", "running", "succeeded", "failed", "cancelled"]
+
+
+class JobCreate(BaseModel):
+    kind: str = Field(..., min_length=1, max_length=50, description="sales_export, product_import, ...")
+    params: Dict[str, Any] = Field(default_factory=dict)
+
+
+class Job(BaseModel):
+    """Schema de respuesta de tarea (estado y progreso)"""
+    id: int
+    tenant_id: int
+    user_id: Optional[int] = None
+    kind: str
+    status: JobStatus
+    attempts: int
+    progress_current: int
+    progress_total: Optional[int] = None
+    progress_message: Optional[str] = None
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+# ============ PARÁMETROS POR TIPO ============
+
+class SalesExportParams(BaseModel):
+    date_from: Optional[datetime] = None
+    date_to: Optional[datetime] = None
+
+    @model_validator(mode="after")
+    def check_range(self):
+        if self.date_from and self.date_to and self.date_to <= self.date_from:
+            raise ValueError("date_to debe ser posterior a date_from")
+        return self
+
+
+class ProductImportParams(BaseModel):
+    products: List[Dict[str, Any]] = Field(
+        ..., min_length=1, max_length=50000,
+        description="Filas con los campos de alta de producto; las inválidas se informan en el resultado"
+    )
+    update_existing: bool = Field(default=False, description="Actualizar los SKU existentes en vez de omitirlos")
@@ -0,0 +1,178 @@
+# neos_core/schemas/pricing_schema.py
+"""
+Schemas para listas de precios, promociones y cotización de carritos
+"""
+from pydantic import BaseModel, Field, field_validator, model_validator
+from typing import List, Literal, Optional
+from decimal import Decimal
+from datetime import datetime
+
+from neos_core.schemas.sales_schema import SaleItemCreate
+
+
+# ============ LISTAS DE PRECIOS ============
+
+class PriceListItemSet(BaseModel):
+    product_id: int = Field(..., gt=0)
+    variant_id: Optional[int] = Field(None, gt=0, description="Solo esta variante (sin valor: todo el producto)")
+    price: Decimal = Field(..., ge=0)
+
+
+class PriceListCreate(BaseModel):
+    name: str = Field(..., min_length=2, max_length=100)
+    client_id: Optional[int] = Field(None, gt=0, description="Solo para este cliente")
+    point_of_sale_id: Optional[int] = Field(None, gt=0, description="Solo en este punto de venta")
+    priority: int = Field(default=0, description="Desempate entre listas igual de específicas")
+    items: List[PriceListItemSet] = Field(default_factory=list)
+
+
+class PriceListUpdate(BaseModel):
+    name: Optional[str] = Field(None, min_length=2, max_length=100)
+    priority: Optional[int] = None
+    is_active: Optional[bool] = None
+    items: Optional[List[PriceListItemSet]] = Field(
+        None, description="Precios a agregar o modificar (los demás se conservan)"
+    )
+
+
+class PriceListItem(BaseModel):
+    product_id: int
+    variant_id: Optional[int] = None
+    price: Decimal
+
+    class Config:
+        from_attributes = True
+
+
+class PriceList(BaseModel):
+    """Schema de respuesta de lista de precios"""
+    id: int
+    tenant_id: int
+    name: str
+    client_id: Optional[int] = None
+    point_of_sale_id: Optional[int] = None
+    priority: int
+    is_active: bool
+    items: List[PriceListItem] = []
+
+    class Config:
+        from_attributes = True
+
+
+# ============ PROMOCIONES ============
+
+PromotionKind = Literal["percentage", "nxm", "bundle"]
+
+
+class BundleComponent(BaseModel):
+    product_id: int = Field(..., gt=0)
+    quantity: Decimal = Field(..., gt=0)
+
+
+class PromotionCreate(BaseModel):
+    name: str = Field(..., min_length=2, max_length=100)
+    kind: PromotionKind
+    product_id: Optional[int] = Field(None, gt=0)
+    attribute_key: Optional[str] = Field(None, pattern=r"^[\w\-]{1,50}$", description="Categoría: clave de attributes")
+    attribute_value: Optional[str] = Field(None, max_length=100)
+    point_of_sale_id: Optional[int] = Field(None, gt=0)
+    percent: Optional[Decimal] = Field(None, gt=0, le=100)
+    buy_quantity: Optional[int] = Field(None, ge=2, description="NxM: lleva N")
+    pay_quantity: Optional[int] = Field(None, ge=1, description="NxM: paga M")
+    bundle_items: Optional[List[BundleComponent]] = None
+    bundle_price: Optional[Decimal] = Field(None, ge=0)
+    priority: int = 0
+    starts_at: Optional[datetime] = None
+    ends_at: Optional[datetime] = None
+
+    @model_validator(mode="after")
+    def validate_rule(self):
+        if self.kind == "bundle":
+            if not self.bundle_items or len(self.bundle_items) < 2 or self.bundle_price is None:
+                raise ValueError("Un combo requiere al menos 2 productos y bundle_price")
+            if len({c.product_id for c in self.bundle_items}) != len(self.bundle_items):
+                raise ValueError("Un combo no puede repetir productos")
+            return self
+
+        if (self.product_id is None) == (self.attribute_key is None):
+            raise ValueError("Indique product_id o attribute_key (categoría), uno solo")
+        if self.attribute_key is not None and self.attribute_value is None:
+            raise ValueError("attribute_value es obligatorio con attribute_key")
+        if self.kind == "percentage" and self.percent is None:
+            raise ValueError("percent es obligatorio en promociones de porcentaje")
+        if self.kind == "nxm":
+            if self.buy_quantity is None or self.pay_quantity is None:
+                raise ValueError("buy_quantity y pay_quantity son obligatorios en NxM")
+            if self.pay_quantity >= self.buy_quantity:
+                raise ValueError("En NxM se paga menos de lo que se lleva")
+        if self.starts_at and self.ends_at and self.ends_at <= self.starts_at:
+            raise ValueError("ends_at debe ser posterior a starts_at")
+        return self
+
+
+class PromotionUpdate(BaseModel):
+    name: Optional[str] = Field(None, min_length=2, max_length=100)
+    priority: Optional[int] = None
+    starts_at: Optional[datetime] = None
+    ends_at: Optional[datetime] = None
+    is_active: Optional[bool] = None
+
+
+class Promotion(BaseModel):
+    """Schema de respuesta de promoción"""
+    id: int
+    tenant_id: int
+    name: str
+    kind: PromotionKind
+    product_id: Optional[int] = None
+    attribute_key: Optional[str] = None
+    attribute_value: Optional[str] = None
+    point_of_sale_id: Optional[int] = None
+    percent: Optional[Decimal] = None
+    buy_quantity: Optional[int] = None
+    pay_quantity: Optional[int] = None
+    bundle_items: Optional[List[BundleComponent]] = None
+    bundle_price: Optional[Decimal] = None
+    priority: int
+    starts_at: Optional[datetime] = None
+    ends_at: Optional[datetime] = None
+    is_active: bool
+
+    class Config:
+        from_attributes = True
+
+
+# ============ COTIZACIÓN ============
+
+class QuoteRequest(BaseModel):
+    point_of_sale_id: int = Field(..., gt=0)
+    client_id: Optional[int] = Field(None, gt=0)
+    items: List[SaleItemCreate]
+
+    @field_validator("items")
+    @classmethod
+    def validate_items_not_empty(cls, v):
+        if not v:
+            raise ValueError("El carrito debe tener al menos un item")
+        return v
+
+
+class QuoteLine(BaseModel):
+    product_id: int
+    variant_id: Optional[int] = None
+    quantity: Decimal
+    unit_price: Decimal
+    discount_amount: Decimal
+    promotion_id: Optional[int] = None
+    subtotal: Decimal
+    tax_amount: Decimal
+    total: Decimal
+
+
+class QuoteResponse(BaseModel):
+    price_list_id: Optional[int] = None
+    lines: List[QuoteLine]
+    discount_amount: Decimal
+    subtotal: Decimal
+    tax_amount: Decimal
+    total: Decimal
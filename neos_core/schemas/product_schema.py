@@ -74,4 +74,67 @@ class ProductListResponse(BaseModel):
     is_active: bool
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+# ============ VARIANTES ============
+
+class ProductVariantBase(BaseModel):
+    """Campos base de una variante (talle, color, etc.)"""
+    sku: str = Field(..., min_length=1, max_length=100)
+    barcode: Optional[str] = Field(None, max_length=100)
+    name: Optional[str] = Field(None, max_length=200, description="Etiqueta, ej: 'Rojo / M'")
+
+    # Si es None se usa el precio del producto padre
+    price: Optional[Decimal] = Field(None, ge=0, description="Precio propio de la variante")
+
+    stock: Decimal = Field(default=Decimal("0"), ge=0)
+    min_stock: Optional[Decimal] = Field(None, ge=0)
+
+    attributes: Optional[dict] = Field(None, description="Ej: {'talle': 'M', 'color': 'Rojo'}")
+    is_active: bool = Field(default=True)
+
+
+class ProductVariantCreate(ProductVariantBase):
+    """Schema para crear una variante (el producto padre viene en la URL)"""
+    pass
+
+
+class ProductVariantUpdate(BaseModel):
+    """Schema para actualizar una variante (todos los campos opcionales)"""
+    barcode: Optional[str] = Field(None, max_length=100)
+    name: Optional[str] = Field(None, max_length=200)
+    price: Optional[Decimal] = Field(None, ge=0)
+    stock: Optional[Decimal] = Field(None, ge=0)
+    min_stock: Optional[Decimal] = Field(None, ge=0)
+    attributes: Optional[dict] = None
+    is_active: Optional[bool] = None
+
+
+class ProductVariant(ProductVariantBase):
+    """Schema de respuesta de variante"""
+    id: int
+    tenant_id: int
+    product_id: int
+    effective_price: Decimal
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class ProductBarcodeResponse(Product):
+    """Producto encontrado por código de barras; `variant` indica la variante escaneada"""
+    variant: Optional[ProductVariant] = None
+
+
+class CatalogItemResponse(BaseModel):
+    """Producto padre con el stock agregado de sus variantes"""
+    id: int
+    sku: str
+    name: str
+    price: Decimal
+    is_active: bool
+    variant_count: int
+    # Suma del stock de las variantes activas, o el stock propio si no tiene variantes
+    total_stock: Decimal
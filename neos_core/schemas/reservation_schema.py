@@ -0,0 +1,60 @@
+# neos_core/schemas/reservation_schema.py
+"""
+Schemas para reservas de stock (carritos con vencimiento)
+"""
+from pydantic import BaseModel, Field, field_validator
+from typing import Optional, List, Literal
+from decimal import Decimal
+from datetime import datetime
+
+from neos_core.schemas.sales_schema import SaleItemCreate
+
+
+ReservationStatus = Literal["active", "converted", "released", "expired"]
+
+
+class ReservationCreate(BaseModel):
+    point_of_sale_id: int = Field(..., gt=0)
+    items: List[SaleItemCreate]
+    ttl_seconds: Optional[int] = Field(
+        None, ge=30, description="Duración de la reserva; por defecto RESERVATION_TTL_SECONDS"
+    )
+
+    @field_validator("items")
+    @classmethod
+    def validate_items_not_empty(cls, v):
+        if not v:
+            raise ValueError("La reserva debe tener al menos un item")
+        return v
+
+
+class ReservationItemResponse(BaseModel):
+    id: int
+    product_id: int
+    variant_id: Optional[int] = None
+    quantity: Decimal
+
+    class Config:
+        from_attributes = True
+
+
+class ReservationResponse(BaseModel):
+    id: int
+    tenant_id: int
+    user_id: int
+    point_of_sale_id: int
+    status: ReservationStatus
+    expires_at: datetime
+    sale_id: Optional[int] = None
+    created_at: datetime
+    items: List[ReservationItemResponse]
+
+    class Config:
+        from_attributes = True
+
+
+class ReservationCheckout(BaseModel):
+    """Datos de la venta al confirmar una reserva (los items salen de la reserva)"""
+    client_id: Optional[int] = Field(None, description="Cliente opcional")
+    currency_id: int = Field(..., gt=0)
+    payment_method: str = Field(..., min_length=2, max_length=50)
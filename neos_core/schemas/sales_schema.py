@@ -2,16 +2,19 @@
 Schemas para el módulo de ventas
 Validación con Pydantic para entrada/salida de datos
 """
-from pydantic import BaseModel, Field, field_validator
+from pydantic import BaseModel, Field, computed_field, field_validator, model_validator
 from datetime import datetime
 from decimal import Decimal
 from typing import Optional, List, Literal
 
+from neos_core.services.tax import tax_breakdown
+
 
 # ============ SALE ITEM ============
 
 class SaleItemCreate(BaseModel):
     product_id: int = Field(..., gt=0, description="ID del producto")
+    variant_id: Optional[int] = Field(None, gt=0, description="Variante vendida (obligatoria si el producto tiene variantes)")
     quantity: Decimal = Field(..., gt=0, description="Cantidad vendida")
 
     @field_validator("quantity")
@@ -25,9 +28,12 @@ class SaleItemCreate(BaseModel):
 class SaleItemResponse(BaseModel):
     id: int
     product_id: int
+    variant_id: Optional[int] = None
     quantity: Decimal
     unit_price: Decimal
     tax_rate: Decimal
+    discount_amount: Decimal = Decimal("0")
+    promotion_id: Optional[int] = None
     subtotal: Decimal
     tax_amount: Decimal
     total: Decimal
@@ -37,6 +43,13 @@ class SaleItemResponse(BaseModel):
         from_attributes = True
 
 
+class TaxBreakdownRow(BaseModel):
+    """Base imponible e impuesto por alícuota (para comprobantes fiscales)"""
+    tax_rate: Decimal
+    taxable_base: Decimal
+    tax_amount: Decimal
+
+
 # ============ SALE ============
 
 SaleStatus = Literal["completed", "cancelled"]
@@ -46,6 +59,10 @@ class SaleCreate(BaseModel):
     point_of_sale_id: int = Field(..., gt=0)
     currency_id: int = Field(..., gt=0)
     payment_method: str = Field(..., min_length=2, max_length=50)
+    invoice_type: Optional[str] = Field(None, pattern=r"^[A-Z]$", description="Tipo de comprobante (A, B, C...)")
+    # CAE ya obtenido (ej: contingencia); sin él, los tenants con facturación electrónica lo piden a la cola
+    cae: Optional[str] = Field(None, pattern=r"^\d{14}$")
+    cae_expiration: Optional[datetime] = None
     items: List[SaleItemCreate]
 
     @field_validator("items")
@@ -55,6 +72,12 @@ class SaleCreate(BaseModel):
             raise ValueError("La venta debe tener al menos un item")
         return v
 
+    @model_validator(mode="after")
+    def validate_cae(self):
+        if (self.cae is None) != (self.cae_expiration is None):
+            raise ValueError("cae y cae_expiration van juntos")
+        return self
+
 
 class SaleResponse(BaseModel):
     id: int
@@ -63,20 +86,37 @@ class SaleResponse(BaseModel):
     client_id: Optional[int]
     point_of_sale_id: int
     currency_id: int
+    price_list_id: Optional[int] = None
+    discount_amount: Decimal = Decimal("0")
     subtotal: Decimal
     tax_amount: Decimal
     total: Decimal
     payment_method: str
     status: SaleStatus
+    tax_rounding: Optional[str] = None
+    invoice_number: Optional[str] = None
+    invoice_type: Optional[str] = None
+    invoice_status: Optional[str] = None
+    cae: Optional[str] = None
+    cae_expiration: Optional[datetime] = None
     created_at: datetime
     items: List[SaleItemResponse]
 
+    @computed_field
+    @property
+    def tax_breakdown(self) -> List[TaxBreakdownRow]:
+        return [
+            TaxBreakdownRow(tax_rate=g.tax_rate, taxable_base=g.taxable_base, tax_amount=g.tax_amount)
+            for g in tax_breakdown(self.items, self.tax_rounding)
+        ]
+
     class Config:
         from_attributes = True
 
 
 class SaleListResponse(BaseModel):
     id: int
+    invoice_number: Optional[str] = None
     total: Decimal
     status: SaleStatus
     created_at: datetime
@@ -90,5 +130,26 @@ class SaleFilters(BaseModel):
     point_of_sale_id: Optional[int] = None
     payment_method: Optional[str] = None
     status: Optional[str] = None
+    # Rango de fechas [date_from, date_to): permite la poda de particiones mensuales
+    date_from: Optional[datetime] = None
+    date_to: Optional[datetime] = None
     skip: int = 0
     limit: int = Field(default=50, ge=1, le=100)
+
+
+# ============ REPORTES ============
+
+class SalesSummaryRow(BaseModel):
+    payment_method: str
+    sales_count: int
+    subtotal: Decimal
+    tax_amount: Decimal
+    total: Decimal
+
+
+class SalesSummaryResponse(BaseModel):
+    date_from: datetime
+    date_to: datetime
+    sales_count: int
+    total: Decimal
+    by_payment_method: List[SalesSummaryRow]
@@ -0,0 +1,66 @@
+# neos_core/schemas/stock_schema.py
+"""
+Schemas para stock por ubicación y transferencias entre puntos de venta
+"""
+from pydantic import BaseModel, Field, model_validator
+from typing import Optional
+from decimal import Decimal
+from datetime import datetime
+
+
+# ============ STOCK POR UBICACIÓN ============
+
+class LocationStockSet(BaseModel):
+    """Fija el stock de un producto/variante en un punto de venta (ajuste o inventario)"""
+    product_id: int = Field(..., gt=0)
+    variant_id: Optional[int] = Field(None, gt=0)
+    point_of_sale_id: int = Field(..., gt=0)
+    stock: Decimal = Field(..., ge=0)
+    min_stock: Optional[Decimal] = Field(None, ge=0, description="Stock mínimo de alerta en la ubicación")
+
+
+class LocationStock(BaseModel):
+    """Schema de respuesta de stock por ubicación"""
+    id: int
+    tenant_id: int
+    point_of_sale_id: int
+    product_id: int
+    variant_id: Optional[int] = None
+    stock: Decimal
+    min_stock: Optional[Decimal] = None
+    updated_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+# ============ TRANSFERENCIAS ============
+
+class StockTransferCreate(BaseModel):
+    product_id: int = Field(..., gt=0)
+    variant_id: Optional[int] = Field(None, gt=0)
+    from_point_of_sale_id: int = Field(..., gt=0)
+    to_point_of_sale_id: int = Field(..., gt=0)
+    quantity: Decimal = Field(..., gt=0)
+
+    @model_validator(mode="after")
+    def validate_locations(self):
+        if self.from_point_of_sale_id == self.to_point_of_sale_id:
+            raise ValueError("El origen y el destino deben ser distintos")
+        return self
+
+
+class StockTransfer(BaseModel):
+    """Schema de respuesta de transferencia"""
+    id: int
+    tenant_id: int
+    user_id: int
+    product_id: int
+    variant_id: Optional[int] = None
+    from_point_of_sale_id: int
+    to_point_of_sale_id: int
+    quantity: Decimal
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
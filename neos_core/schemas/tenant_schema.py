@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional
 
 class TenantBase(BaseModel):
@@ -7,6 +7,7 @@ class TenantBase(BaseModel):
     tax_id: Optional[str] = None
     tax_id_type_id: Optional[int] = None
     tax_responsibility_id: Optional[int] = None
+    sales_retention_days: Optional[int] = Field(None, ge=0)
 
 class TenantCreate(TenantBase):
     pass
@@ -0,0 +1,81 @@
+# neos_core/schemas/webhook_schema.py
+"""
+Schemas para webhooks por tenant y sus entregas
+"""
+from pydantic import AnyHttpUrl, BaseModel, Field, field_validator
+from typing import List, Literal, Optional
+from datetime import datetime
+
+from neos_core.services.webhooks import EVENT_TYPES
+
+DeliveryStatus = Literal["pending", "delivering", "delivered", "dead"]
+
+
+def _check_event_types(value: Optional[List[str]]) -> Optional[List[str]]:
+    if value is None:
+        return value
+    unknown = sorted(set(value) - set(EVENT_TYPES))
+    if unknown:
+        raise ValueError(f"Tipos de evento desconocidos: {', '.join(unknown)}. Válidos: {', '.join(EVENT_TYPES)}")
+    return sorted(set(value))
+
+
+class WebhookEndpointCreate(BaseModel):
+    url: AnyHttpUrl
+    event_types: List[str] = Field(..., min_length=1, description="sale.created, sale.cancelled, stock.low, ...")
+    batch_size: Optional[int] = Field(None, ge=1, le=500, description="Eventos por POST")
+    max_concurrency: Optional[int] = Field(None, ge=1, le=20, description="POSTs simultáneos a esta URL")
+
+    _event_types = field_validator("event_types")(_check_event_types)
+
+
+class WebhookEndpointUpdate(BaseModel):
+    url: Optional[AnyHttpUrl] = None
+    event_types: Optional[List[str]] = Field(None, min_length=1)
+    batch_size: Optional[int] = Field(None, ge=1, le=500)
+    max_concurrency: Optional[int] = Field(None, ge=1, le=20)
+    is_active: Optional[bool] = None
+
+    _event_types = field_validator("event_types")(_check_event_types)
+
+
+class WebhookEndpoint(BaseModel):
+    """Schema de respuesta de webhook (sin el secreto)"""
+    id: int
+    tenant_id: int
+    url: str
+    event_types: List[str]
+    batch_size: Optional[int] = None
+    max_concurrency: Optional[int] = None
+    is_active: bool
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class WebhookEndpointCreated(WebhookEndpoint):
+    """Respuesta del alta: única vez que se muestra el secreto de la firma"""
+    secret: str
+
+
+class WebhookDelivery(BaseModel):
+    id: int
+    endpoint_id: int
+    event_id: int
+    event_type: str
+    sequence: int
+    status: DeliveryStatus
+    attempts: int
+    next_attempt_at: datetime
+    last_status_code: Optional[int] = None
+    last_error: Optional[str] = None
+    created_at: datetime
+    delivered_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class WebhookRedeliverResponse(BaseModel):
+    requeued: int
@@ -5,6 +5,7 @@ from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 
 from neos_core.database.config import get_db
+from neos_core.database.sharding import shard_router
 from neos_core import crud, schemas
 from neos_core.security import auth_service
 
@@ -25,6 +26,10 @@ async def login_for_access_token(
     # Nota: OAuth2 usa el campo 'username', nosotros lo mapeamos a nuestro 'email'
     user = crud.get_user_by_email(db, email=form_data.username)
 
+    # Con sharding, el usuario puede vivir en el shard de su tenant
+    if not user and shard_router.enabled:
+        user = shard_router.find_user_by_email(form_data.username)
+
     # 2. Verificar credenciales
     if not user or not crud.verify_password(form_data.password, user.hashed_password):
         raise HTTPException(
@@ -0,0 +1,138 @@
+# neos_core/server.py
+"""
+Arranque de producción: varios workers de uvicorn, con uvloop y httptools
+si están instalados (`pip install "uvicorn[standard]"`), y reciclado de
+workers.
+
+    python -m neos_core.server                  # WEB_CONCURRENCY workers (0 = uno por núcleo)
+    python -m neos_core.server --workers 8 --port 8080
+
+Cada worker es un proceso (spawn) con su propio event loop, pool de
+conexiones y tareas de fondo (lifespan de main.py): con N workers la base
+recibe hasta N * (DB_POOL_SIZE + DB_MAX_OVERFLOW) conexiones.
+
+Un worker que atendió SERVER_MAX_REQUESTS requests termina ordenadamente y
+el supervisor de uvicorn (>= 0.30) levanta otro en su lugar: acota el
+crecimiento de memoria de procesos de larga vida. Cada worker suma a ese
+límite un jitter al azar de hasta SERVER_MAX_REQUESTS_JITTER: con el tráfico
+repartido parejo, sin jitter todos llegarían al límite a la vez y se
+reciclarían juntos, dejando la API sin workers por unos segundos.
+
+Cada worker tiene su propio registro de métricas: con varios workers se usa
+METRICS_MULTIPROC_DIR (un directorio temporal si no se configura, vaciado al
+arrancar) para que /metrics, atienda el worker que atienda, sume todos.
+
+Para desarrollo sigue `python main.py` (un worker con recarga automática).
+"""
+import argparse
+import functools
+import importlib.util
+import logging
+import os
+import random
+import tempfile
+from typing import Optional
+
+from neos_core.database import config
+
+log = logging.getLogger(__name__)
+
+APP = "main:app"
+
+
+def _available(module: str) -> bool:
+    return importlib.util.find_spec(module) is not None
+
+
+def server_options(
+        workers: Optional[int] = None,
+        host: Optional[str] = None,
+        port: Optional[int] = None,
+        max_requests: Optional[int] = None
+) -> dict:
+    """Argumentos de uvicorn.run para producción (sin recarga)"""
+    workers = workers or config.WEB_CONCURRENCY or os.cpu_count() or 1
+    max_requests = config.SERVER_MAX_REQUESTS if max_requests is None else max_requests
+    return {
+        "host": host or config.SERVER_HOST,
+        "port": port or config.SERVER_PORT,
+        "workers": workers,
+        "loop": "uvloop" if _available("uvloop") else "asyncio",
+        "http": "httptools" if _available("httptools") else "h11",
+        "limit_max_requests": max_requests or None,
+        "timeout_graceful_shutdown": config.SERVER_GRACEFUL_TIMEOUT_SECONDS,
+        "proxy_headers": True,
+        "log_level": "info",
+    }
+
+
+def jittered_limit(max_requests: Optional[int], jitter: int) -> Optional[int]:
+    """Límite de requests de un worker: el configurado más un jitter al azar"""
+    if not max_requests or jitter <= 0:
+        return max_requests
+    return max_requests + random.randint(0, jitter)
+
+
+def prepare_metrics_dir(workers: int) -> Optional[str]:
+    """
+    Directorio compartido de métricas de los workers (ver services/metrics.py).
+    Se vacía al arrancar: las fotos de una corrida anterior no deben sumarse.
+    Los workers (spawn) lo heredan por la variable de entorno.
+    """
+    directory = config.METRICS_MULTIPROC_DIR
+    if not directory:
+        if workers <= 1:
+            return None
+        directory = tempfile.mkdtemp(prefix="neos_metrics_")
+    os.makedirs(directory, exist_ok=True)
+    for name in os.listdir(directory):
+        if name.startswith("metrics_"):
+            os.remove(os.path.join(directory, name))
+    os.environ["METRICS_MULTIPROC_DIR"] = directory
+    config.METRICS_MULTIPROC_DIR = directory
+    return directory
+
+
+def _serve(uvicorn_config, jitter: int, sockets=None):
+    """Proceso worker: su propio límite de reciclado y el servidor de uvicorn"""
+    import uvicorn
+
+    # Cada worker (también los que levanta el supervisor al reciclar) recibe su copia de la config
+    uvicorn_config.limit_max_requests = jittered_limit(uvicorn_config.limit_max_requests, jitter)
+    uvicorn.Server(config=uvicorn_config).run(sockets=sockets)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Servidor de producción de Neos Core API")
+    parser.add_argument("--workers", type=int, default=None, help="Procesos worker (default: WEB_CONCURRENCY o núcleos)")
+    parser.add_argument("--host", default=None)
+    parser.add_argument("--port", type=int, default=None)
+    parser.add_argument("--max-requests", type=int, default=None, help="Requests antes de reciclar un worker; 0 = nunca")
+    parser.add_argument("--max-requests-jitter", type=int, default=None, help="Jitter al azar del límite de cada worker")
+    args = parser.parse_args(argv)
+
+    import uvicorn
+    from uvicorn.supervisors import Multiprocess
+
+    options = server_options(args.workers, args.host, args.port, args.max_requests)
+    jitter = config.SERVER_MAX_REQUESTS_JITTER if args.max_requests_jitter is None else args.max_requests_jitter
+    metrics_dir = prepare_metrics_dir(options["workers"])
+    log.info(
+        f"Neos Core API: {options['workers']} workers en {options['host']}:{options['port']} "
+        f"(loop={options['loop']}, http={options['http']}, "
+        f"reciclado={options['limit_max_requests'] or 'no'} + jitter {jitter}, "
+        f"métricas={metrics_dir or 'por proceso'})"
+    )
+
+    # Como uvicorn.run, pero cada worker arranca por _serve para aplicar su jitter
+    uvicorn_config = uvicorn.Config(APP, **options)
+    if uvicorn_config.workers > 1:
+        sock = uvicorn_config.bind_socket()
+        Multiprocess(uvicorn_config, target=functools.partial(_serve, uvicorn_config, jitter), sockets=[sock]).run()
+    else:
+        _serve(uvicorn_config, jitter)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    main()
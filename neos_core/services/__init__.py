@@ -0,0 +1,4 @@
+# neos_core/services/__init__.py
+"""
+Servicios transversales de Neos Core (métricas, motores de cálculo, workers)
+"""
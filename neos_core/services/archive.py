@@ -0,0 +1,252 @@
+# neos_core/services/archive.py
+"""
+Archivado de ventas antiguas en almacenamiento frío.
+
+Las ventas completadas más antiguas que la retención del tenant
+(Tenant.sales_retention_days o ARCHIVE_RETENTION_DAYS) se mueven por lotes a
+archivos JSON-lines comprimidos en ARCHIVE_DIR:
+
+    <ARCHIVE_DIR>/tenant_<id>/sales_<YYYY>_<MM>.jsonl.gz
+
+Cada lote se agrega como un miembro gzip independiente y su offset se guarda
+en `archived_sales`, de modo que leer una venta archivada solo descomprime su
+lote. Las tablas calientes (y sus índices) quedan acotadas a la retención.
+
+Uso por línea de comandos (cron):
+    python -m neos_core.services.archive
+"""
+import gzip
+import json
+import os
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Dict, Iterator, List, Optional
+
+from sqlalchemy.orm import Session, joinedload
+
+from neos_core.database import config
+from neos_core.database.models import ArchivedSale, Sale, SaleDetail, Tenant
+from neos_core.database.sharding import shard_map_watch
+
+# Columnas serializadas (se toman del modelo para no divergir)
+_SALE_COLUMNS = [c.name for c in Sale.__table__.columns]
+_DETAIL_COLUMNS = [c.name for c in SaleDetail.__table__.columns]
+
+
+# ===== SERIALIZACIÓN =====
+
+def _encode(value):
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def sale_to_record(sale: Sale) -> dict:
+    record = {name: _encode(getattr(sale, name)) for name in _SALE_COLUMNS}
+    record["items"] = [
+        {name: _encode(getattr(item, name)) for name in _DETAIL_COLUMNS}
+        for item in sale.items
+    ]
+    return record
+
+
+def _decode_columns(table, data: dict) -> dict:
+    decoded = {}
+    for column in table.columns:
+        value = data.get(column.name)
+        if value is not None:
+            python_type = column.type.python_type
+            if python_type is Decimal:
+                value = Decimal(value)
+            elif python_type is datetime:
+                value = datetime.fromisoformat(value)
+        decoded[column.name] = value
+    return decoded
+
+
+def record_to_sale(record: dict) -> Sale:
+    """
+    Reconstruye una venta archivada como instancia transitoria (no ligada a
+    ninguna sesión), compatible con los schemas de respuesta.
+    """
+    sale = Sale(**_decode_columns(Sale.__table__, record))
+    sale.items = [SaleDetail(**_decode_columns(SaleDetail.__table__, item)) for item in record["items"]]
+    sale.is_archived = True
+    return sale
+
+
+# ===== ESCRITURA =====
+
+def archive_relative_path(tenant_id: int, created_at: datetime) -> str:
+    return os.path.join(f"tenant_{tenant_id}", f"sales_{created_at.year}_{created_at.month:02d}.jsonl.gz")
+
+
+def _append_batch(relative_path: str, records: List[dict]) -> int:
+    """Agrega un miembro gzip al archivo y devuelve su offset inicial"""
+    path = os.path.join(config.ARCHIVE_DIR, relative_path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    payload = "".join(json.dumps(r, separators=(",", ":")) + "\n" for r in records).encode()
+    with open(path, "ab") as f:
+        offset = f.tell()
+        f.write(gzip.compress(payload))
+        f.flush()
+        # El archivo debe ser durable antes de borrar las filas calientes
+        os.fsync(f.fileno())
+    return offset
+
+
+def retention_days_for(tenant: Tenant) -> int:
+    if tenant.sales_retention_days is not None:
+        return tenant.sales_retention_days
+    return config.ARCHIVE_RETENTION_DAYS
+
+
+def archive_tenant_sales(
+        db: Session,
+        tenant_id: int,
+        cutoff: datetime,
+        batch_size: Optional[int] = None
+) -> int:
+    """
+    Archiva por lotes las ventas completadas del tenant anteriores a `cutoff`.
+    Cada lote: escribe el archivo, registra el índice y borra las filas
+    calientes en una misma transacción. Devuelve la cantidad archivada.
+    """
+    batch_size = batch_size or config.ARCHIVE_BATCH_SIZE
+    archived = 0
+
+    while True:
+        sales = (
+            db.query(Sale)
+            .options(joinedload(Sale.items))
+            .filter(
+                Sale.tenant_id == tenant_id,
+                Sale.status == "completed",
+                Sale.created_at < cutoff,
+            )
+            .order_by(Sale.id)
+            .limit(batch_size)
+            .all()
+        )
+        if not sales:
+            break
+
+        try:
+            by_file: Dict[str, List[Sale]] = {}
+            for sale in sales:
+                by_file.setdefault(archive_relative_path(tenant_id, sale.created_at), []).append(sale)
+
+            for relative_path, group in by_file.items():
+                offset = _append_batch(relative_path, [sale_to_record(s) for s in group])
+                db.add_all([
+                    ArchivedSale(
+                        sale_id=s.id,
+                        tenant_id=tenant_id,
+                        created_at=s.created_at,
+                        archive_path=relative_path,
+                        archive_offset=offset,
+                    )
+                    for s in group
+                ])
+
+            ids = [s.id for s in sales]
+            db.query(SaleDetail).filter(SaleDetail.sale_id.in_(ids)).delete(synchronize_session=False)
+            db.query(Sale).filter(Sale.id.in_(ids)).delete(synchronize_session=False)
+            db.commit()
+        except Exception:
+            # Si el commit falla, el lote queda en el archivo pero no en el índice:
+            # se vuelve a archivar en la próxima corrida (las lecturas usan el índice)
+            db.rollback()
+            raise
+
+        # Las filas ya no existen: liberar las instancias del identity map
+        for sale in sales:
+            db.expunge(sale)
+        archived += len(sales)
+        if len(sales) < batch_size:
+            break
+
+    return archived
+
+
+def run_archival(db: Session, now: Optional[datetime] = None, batch_size: Optional[int] = None) -> Dict[int, int]:
+    """Archiva las ventas de todos los tenants con retención activa"""
+    now = now or datetime.utcnow()
+    # Se resuelven las retenciones antes de archivar (cada lote hace commit)
+    retentions = [
+        (tenant.id, retention_days_for(tenant))
+        for tenant in db.query(Tenant).filter(Tenant.is_active == True).all()
+    ]
+
+    results = {}
+    for tenant_id, days in retentions:
+        if days <= 0:
+            continue
+        results[tenant_id] = archive_tenant_sales(db, tenant_id, now - timedelta(days=days), batch_size)
+    return results
+
+
+# ===== LECTURA =====
+
+def _iter_records(relative_path: str, offset: int = 0) -> Iterator[dict]:
+    path = os.path.join(config.ARCHIVE_DIR, relative_path)
+    with open(path, "rb") as f:
+        f.seek(offset)
+        with gzip.GzipFile(fileobj=f) as gz:
+            for line in gz:
+                yield json.loads(line)
+
+
+def get_archived_sale(db: Session, sale_id: int, tenant_id: int) -> Optional[Sale]:
+    """Busca una venta en el archivo frío (solo descomprime su lote)"""
+    entry = db.query(ArchivedSale).filter(
+        ArchivedSale.sale_id == sale_id,
+        ArchivedSale.tenant_id == tenant_id
+    ).first()
+    if entry is None:
+        return None
+
+    for record in _iter_records(entry.archive_path, entry.archive_offset):
+        if record["id"] == sale_id:
+            return record_to_sale(record)
+    return None
+
+
+def iter_archived_sales(
+        db: Session,
+        tenant_id: int,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None
+) -> Iterator[Sale]:
+    """Recorre las ventas archivadas del tenant en un rango (para exportaciones)"""
+    q = db.query(ArchivedSale.sale_id, ArchivedSale.archive_path).filter(ArchivedSale.tenant_id == tenant_id)
+    if date_from:
+        q = q.filter(ArchivedSale.created_at >= date_from)
+    if date_to:
+        q = q.filter(ArchivedSale.created_at < date_to)
+
+    pending: Dict[str, set] = {}
+    for sale_id, path in q.all():
+        pending.setdefault(path, set()).add(sale_id)
+
+    for relative_path in sorted(pending):
+        ids = pending[relative_path]
+        for record in _iter_records(relative_path):
+            # Solo registros indexados y una vez cada uno: un lote reintentado
+            # tras un fallo puede haber quedado escrito dos veces en el archivo
+            if record["id"] in ids:
+                ids.discard(record["id"])
+                yield record_to_sale(record)
+
+
+if __name__ == "__main__":
+    session = config.SessionLocal()
+    try:
+        with shard_map_watch():
+            for tenant_id, count in run_archival(session).items():
+                print(f"✅ Tenant {tenant_id}: {count} ventas archivadas")
+    finally:
+        session.close()
@@ -0,0 +1,337 @@
+# neos_core/services/audit.py
+"""
+Auditoría en diferido (write-behind) de cambios sensibles.
+
+Los CRUD llaman a audit_log.record() después de su commit: solo se audita
+lo que quedó confirmado y el request no paga el INSERT (es un append a una
+cola en memoria). Una tarea de fondo escribe la cola en lotes de
+AUDIT_FLUSH_BATCH_SIZE con un INSERT por lote, en el shard de cada tenant.
+
+Respaldo durable: si la base no está disponible, el lote se agrega al
+archivo del proceso, AUDIT_FALLBACK_PATH.<host>-<pid> (NDJSON, con fsync),
+y se reprocesa en las pasadas siguientes; lo mismo si la cola supera
+AUDIT_BUFFER_MAX. Cada proceso escribe y reprocesa su propio archivo; los
+de procesos que ya no existen (sin cambios en 5 pasadas) los toma
+cualquier otro. El traspaso se hace con un lock fcntl sobre el archivo, así
+no se pierde un registro que su dueño esté agregando. Cada registro lleva
+un event_id único, así reprocesar no duplica.
+
+Lo que queda en memoria se escribe al apagar la API (services/shutdown.py). Lotes y
+fallos se ven en /metrics (neos_audit_*).
+"""
+import asyncio
+import json
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import datetime
+from decimal import Decimal
+from typing import Deque, Dict, List, Optional
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from neos_core.database import config
+from neos_core.database.models import AuditLog
+from neos_core.database.sharding import shard_router
+from neos_core.services import metrics
+
+try:
+    import fcntl
+except ImportError:  # Windows: sin lock entre procesos
+    fcntl = None
+
+log = logging.getLogger(__name__)
+
+PRODUCT_UPDATED = "product.updated"
+VARIANT_UPDATED = "variant.updated"
+LOCATION_STOCK_SET = "location_stock.set"
+USER_CREATED = "user.created"
+SALE_CANCELLED = "sale.cancelled"
+
+# Campos cuyos cambios se auditan
+AUDITED_PRODUCT_FIELDS = ("price", "cost", "stock")
+AUDITED_VARIANT_FIELDS = ("price", "stock")
+
+
+def _encode(value):
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def diff(before: dict, after: dict) -> Dict[str, list]:
+    """{"campo": [antes, después]} de los campos que cambiaron"""
+    return {
+        field: [_encode(before.get(field)), _encode(value)]
+        for field, value in after.items()
+        if before.get(field) != value
+    }
+
+
+def snapshot(obj, fields=AUDITED_PRODUCT_FIELDS) -> dict:
+    return {field: getattr(obj, field) for field in fields}
+
+
+def _write_records(db: Session, records: List[dict]) -> int:
+    """Inserta los registros que todavía no estén (por event_id) y confirma"""
+    existing = {
+        event_id for (event_id,) in
+        db.query(AuditLog.event_id).filter(AuditLog.event_id.in_([r["event_id"] for r in records]))
+    }
+    rows = [r for r in records if r["event_id"] not in existing]
+    if rows:
+        db.execute(insert(AuditLog), rows)
+    db.commit()
+    return len(rows)
+
+
+def _lock_file(f):
+    """Lock exclusivo entre procesos; se libera al cerrar el archivo"""
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+
+
+def _is_current(f, path: str) -> bool:
+    """El archivo abierto sigue siendo `path` (nadie lo tomó para reprocesar)"""
+    try:
+        return os.stat(path).st_ino == os.fstat(f.fileno()).st_ino
+    except FileNotFoundError:
+        return False
+
+
+def _to_row(record: dict) -> dict:
+    row = dict(record)
+    if isinstance(row["occurred_at"], str):
+        row["occurred_at"] = datetime.fromisoformat(row["occurred_at"])
+    return row
+
+
+class AuditBuffer:
+    """Cola en memoria de registros de auditoría, con respaldo en disco"""
+
+    def __init__(self, fallback_path: Optional[str] = None, max_size: Optional[int] = None):
+        self._fallback_path = fallback_path
+        self._max_size = max_size
+        self._records: Deque[dict] = deque()
+        self._lock = threading.Lock()
+        # Serializa las escrituras y el reproceso del respaldo
+        self._fallback_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+
+    @property
+    def fallback_path(self) -> str:
+        """Ruta base del respaldo: cada proceso escribe en su propio archivo"""
+        return self._fallback_path or config.AUDIT_FALLBACK_PATH
+
+    @property
+    def process_fallback_path(self) -> str:
+        # Se calcula en cada llamada: el pid cambia en los workers forkeados
+        return f"{self.fallback_path}.{socket.gethostname()}-{os.getpid()}"
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def record(
+            self,
+            tenant_id: int,
+            action: str,
+            entity_type: str,
+            entity_id: int,
+            changes: Optional[dict] = None,
+            actor_id: Optional[int] = None
+    ):
+        """Encola un registro (llamar después del commit del cambio)"""
+        entry = {
+            "event_id": uuid.uuid4().hex,
+            "tenant_id": tenant_id,
+            "actor_user_id": actor_id,
+            "action": action,
+            "entity_type": entity_type,
+            "entity_id": entity_id,
+            "changes": changes,
+            "occurred_at": datetime.utcnow(),
+        }
+        with self._lock:
+            if len(self._records) < (self._max_size or config.AUDIT_BUFFER_MAX):
+                self._records.append(entry)
+                return
+        # Cola llena (base caída por mucho tiempo): directo al respaldo
+        self._write_fallback([entry])
+
+    def _drain(self, limit: int) -> List[dict]:
+        with self._lock:
+            return [self._records.popleft() for _ in range(min(limit, len(self._records)))]
+
+    def clear(self):
+        with self._lock:
+            self._records.clear()
+
+    # ===== RESPALDO =====
+
+    def _write_fallback(self, records: List[dict]):
+        path = self.process_fallback_path
+        directory = os.path.dirname(path)
+        body = "".join(json.dumps(r, default=_encode, separators=(",", ":")) + "\n" for r in records)
+        with self._fallback_lock:
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            while True:
+                with open(path, "a", encoding="utf-8") as f:
+                    _lock_file(f)
+                    # Otro proceso lo tomó mientras esperábamos el lock: se abre uno nuevo
+                    if not _is_current(f, path):
+                        continue
+                    f.write(body)
+                    f.flush()
+                    os.fsync(f.fileno())
+                    break
+        metrics.AUDIT_RECORDS.inc(len(records), destination="fallback")
+
+    def _claim_fallback(self) -> List[str]:
+        """
+        Pasa a `.replaying` los respaldos a reprocesar: el de este proceso y
+        los de procesos sin actividad en 5 pasadas (también los `.replaying`
+        que dejó un reproceso fallido). Devuelve los archivos tomados.
+        """
+        base = self.fallback_path
+        directory = os.path.dirname(base) or "."
+        prefix = os.path.basename(base)
+        own = self.process_fallback_path
+        if not os.path.isdir(directory):
+            return []
+
+        stale_before = time.time() - 5 * max(config.AUDIT_FLUSH_INTERVAL_SECONDS, 1)
+        claimed = []
+        for name in sorted(os.listdir(directory)):
+            if name != prefix and not name.startswith(f"{prefix}."):
+                continue
+            path = os.path.join(directory, name)
+            if path.startswith(f"{own}.") and name.endswith(".replaying"):
+                claimed.append(path)
+                continue
+            if path != own:
+                try:
+                    if os.stat(path).st_mtime >= stale_before:
+                        continue
+                except FileNotFoundError:
+                    continue
+
+            target = f"{own}.{uuid.uuid4().hex[:8]}.replaying"
+            try:
+                if name.endswith(".replaying"):
+                    os.replace(path, target)
+                else:
+                    with open(path, encoding="utf-8") as f:
+                        _lock_file(f)
+                        if not _is_current(f, path):
+                            continue
+                        os.replace(path, target)
+                # El rename no cambia el mtime: sin esto otro proceso lo vería abandonado
+                os.utime(target)
+            except FileNotFoundError:
+                # Otro proceso lo tomó primero
+                continue
+            claimed.append(target)
+        return claimed
+
+    def replay_fallback(self, db: Optional[Session] = None) -> int:
+        """Escribe en la base lo que haya quedado en los respaldos. Devuelve cuántos insertó"""
+        with self._fallback_lock:
+            claimed = self._claim_fallback()
+
+        inserted = 0
+        for path in claimed:
+            # Si falla, el archivo queda `.replaying` de este proceso y se retoma en la próxima pasada
+            with open(path, encoding="utf-8") as f:
+                records = [_to_row(json.loads(line)) for line in f if line.strip()]
+            inserted += self._write_by_shard(records, db)
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        if inserted:
+            log.info(f"Auditoría: {inserted} registros recuperados del respaldo")
+        return inserted
+
+    # ===== ESCRITURA =====
+
+    def _write_by_shard(self, records: List[dict], db: Optional[Session] = None) -> int:
+        if db is not None:
+            return _write_records(db, records)
+        by_shard: Dict[str, List[dict]] = {}
+        moving = []
+        for r in records:
+            if shard_router.is_moving(r["tenant_id"]):
+                moving.append(r)
+            else:
+                by_shard.setdefault(shard_router.shard_for_tenant(r["tenant_id"]), []).append(r)
+        if moving:
+            # El tenant se está moviendo de shard: se escribe en el destino al reprocesar
+            self._write_fallback(moving)
+        inserted = 0
+        for shard_name, rows in by_shard.items():
+            with shard_router.sessionmaker_for(shard_name)() as session:
+                inserted += _write_records(session, rows)
+        return inserted
+
+    def flush(self, db: Optional[Session] = None, batch_size: Optional[int] = None) -> int:
+        """
+        Escribe la cola en lotes hasta vaciarla. Un lote que falla va al
+        respaldo y la pasada termina ahí. Devuelve cuántos registros escribió en la base.
+        `db`: sesión a usar para todos los tenants (tests, un solo shard).
+        """
+        batch_size = batch_size or config.AUDIT_FLUSH_BATCH_SIZE
+        written = 0
+        with self._flush_lock:
+            while True:
+                batch = self._drain(batch_size)
+                if not batch:
+                    break
+                start = time.perf_counter()
+                try:
+                    self._write_by_shard(batch, db)
+                except Exception as e:
+                    log.error(f"Auditoría: no se pudo escribir un lote de {len(batch)}, va al respaldo: {e}")
+                    metrics.AUDIT_FLUSH_FAILURES.inc()
+                    self._write_fallback(batch)
+                    break
+                metrics.AUDIT_FLUSH_DURATION.observe(time.perf_counter() - start)
+                metrics.AUDIT_RECORDS.inc(len(batch), destination="db")
+                written += len(batch)
+        return written
+
+    def flush_all(self, db: Optional[Session] = None) -> int:
+        """Pasada completa: primero el respaldo pendiente, después la cola"""
+        try:
+            self.replay_fallback(db)
+        except Exception as e:
+            log.warning(f"Auditoría: el respaldo sigue pendiente: {e}")
+        return self.flush(db)
+
+
+# Cola del proceso
+audit_log = AuditBuffer()
+
+AUDIT_BUFFERED = metrics.REGISTRY.gauge(
+    "neos_audit_buffered",
+    "Registros de auditoría en memoria pendientes de escribir",
+    callback=lambda: [((), len(audit_log))],
+)
+
+
+async def audit_flush_loop(interval_seconds: int = None):
+    """Tarea de fondo: escribe la auditoría cada AUDIT_FLUSH_INTERVAL_SECONDS"""
+    interval_seconds = interval_seconds or config.AUDIT_FLUSH_INTERVAL_SECONDS
+    while True:
+        try:
+            await asyncio.to_thread(audit_log.flush_all)
+        except Exception as e:
+            log.error(f"Error escribiendo la auditoría: {e}")
+        await asyncio.sleep(interval_seconds)
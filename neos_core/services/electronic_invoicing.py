@@ -0,0 +1,361 @@
+# neos_core/services/electronic_invoicing.py
+"""
+Facturación electrónica asíncrona (CAE).
+
+create_sale no espera al fisco: si el tenant tiene facturación electrónica
+habilitada, la venta queda con invoice_status="pending" y una fila en
+`invoice_authorizations`, en la misma transacción. Este worker:
+
+1. Toma las autorizaciones vencidas (FOR UPDATE SKIP LOCKED, varios workers
+   pueden correr a la vez) y las marca `processing` con un plazo; si el
+   worker se cae, al vencer ese plazo otro las vuelve a tomar.
+2. Las agrupa por proveedor y las envía en lotes de `max_batch_size`.
+3. Escribe el CAE en la venta, o reprograma con backoff exponencial los
+   errores transitorios hasta EINVOICING_MAX_ATTEMPTS.
+
+Los proveedores (AFIP, SAT, SII...) implementan InvoicingProvider y se
+registran con register_provider(). FakeProvider autoriza en el proceso, sin
+red, para desarrollo y tests (EINVOICING_FAKE_PROVIDER=true lo usa para
+cualquier proveedor sin registrar).
+
+Corre en segundo plano dentro de la API (ver main.py) o por línea de comandos:
+    python -m neos_core.services.electronic_invoicing
+"""
+import asyncio
+import logging
+import random
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from neos_core.database import config
+from neos_core.database.models import InvoiceAuthorization, PointOfSale, Sale, Tenant
+from neos_core.database.sharding import shard_map_watch, shard_router
+
+log = logging.getLogger(__name__)
+
+STATUS_PENDING = "pending"
+STATUS_PROCESSING = "processing"
+STATUS_AUTHORIZED = "authorized"
+STATUS_REJECTED = "rejected"
+STATUS_FAILED = "failed"
+
+# Comprobante por defecto si la venta no lo indica (consumidor final)
+DEFAULT_INVOICE_TYPE = "B"
+# Plazo de una autorización tomada por un worker antes de que otro la retome
+CLAIM_TIMEOUT = timedelta(minutes=2)
+
+
+# ===== PROVEEDORES =====
+
+@dataclass(slots=True)
+class AuthorizationRequest:
+    authorization_id: int
+    sale_id: int
+    tenant_tax_id: Optional[str]
+    point_of_sale_code: str
+    invoice_type: str
+    invoice_number: str
+    issued_at: datetime
+    subtotal: Decimal
+    tax_amount: Decimal
+    total: Decimal
+
+
+@dataclass(slots=True)
+class AuthorizationResult:
+    authorization_id: int
+    cae: Optional[str] = None
+    cae_expiration: Optional[datetime] = None
+    error: Optional[str] = None
+    retryable: bool = True  # False: el fisco rechazó el comprobante
+
+
+class ProviderUnavailable(Exception):
+    """El lote entero no pudo enviarse (caída, timeout): se reintenta"""
+
+
+class InvoicingProvider:
+    """Interfaz de un proveedor de autorización fiscal"""
+    name: str = ""
+    max_batch_size: int = 50
+
+    def authorize(self, requests: List[AuthorizationRequest]) -> List[AuthorizationResult]:
+        """Un resultado por request (en cualquier orden)"""
+        raise NotImplementedError
+
+
+class FakeProvider(InvoicingProvider):
+    """
+    Proveedor en proceso: autoriza todo con un CAE derivado del comprobante.
+    `reject` decide qué requests se rechazan y `failures` cuántas llamadas
+    fallan antes de responder (simula caídas del servicio).
+    """
+
+    def __init__(
+            self,
+            name: str = "FAKE",
+            max_batch_size: int = 50,
+            reject: Optional[Callable[[AuthorizationRequest], Optional[str]]] = None,
+            failures: int = 0,
+            cae_days: int = 10
+    ):
+        self.name = name
+        self.max_batch_size = max_batch_size
+        self.reject = reject
+        self.failures = failures
+        self.cae_days = cae_days
+        self.batches: List[List[AuthorizationRequest]] = []
+
+    def authorize(self, requests: List[AuthorizationRequest]) -> List[AuthorizationResult]:
+        if self.failures > 0:
+            self.failures -= 1
+            raise ProviderUnavailable(f"{self.name} no disponible")
+        self.batches.append(list(requests))
+
+        results = []
+        for request in requests:
+            error = self.reject(request) if self.reject else None
+            if error:
+                results.append(AuthorizationResult(request.authorization_id, error=error, retryable=False))
+                continue
+            results.append(AuthorizationResult(
+                request.authorization_id,
+                cae=f"7{request.sale_id:013d}"[-14:],
+                cae_expiration=request.issued_at + timedelta(days=self.cae_days),
+            ))
+        return results
+
+
+_providers: Dict[str, InvoicingProvider] = {}
+
+
+def register_provider(provider: InvoicingProvider, name: Optional[str] = None):
+    _providers[(name or provider.name).upper()] = provider
+
+
+def unregister_provider(name: str):
+    _providers.pop(name.upper(), None)
+
+
+def get_provider(name: str) -> Optional[InvoicingProvider]:
+    provider = _providers.get(name.upper())
+    if provider is None and config.EINVOICING_FAKE_PROVIDER:
+        provider = _providers.setdefault(name.upper(), FakeProvider(name=name.upper()))
+    return provider
+
+
+# ===== ENCOLADO =====
+
+def enqueue(db: Session, tenant: Tenant, sale: Sale):
+    """Encola la autorización de la venta (sin commit: va en la transacción de la venta)"""
+    sale.invoice_status = STATUS_PENDING
+    db.add(InvoiceAuthorization(
+        tenant_id=tenant.id,
+        sale_id=sale.id,
+        provider=(tenant.electronic_invoicing_provider or "").upper(),
+        status=STATUS_PENDING,
+        next_attempt_at=datetime.utcnow(),
+    ))
+
+
+# ===== WORKER =====
+
+def backoff(attempts: int) -> timedelta:
+    """Espera exponencial con jitter: base * 2^(intentos-1), tope BACKOFF_MAX"""
+    delay = min(
+        config.EINVOICING_BACKOFF_SECONDS * 2 ** (attempts - 1),
+        config.EINVOICING_BACKOFF_MAX_SECONDS
+    )
+    return timedelta(seconds=delay * random.uniform(0.5, 1.0))
+
+
+@dataclass(slots=True)
+class _Claimed:
+    id: int
+    tenant_id: int
+    sale_id: int
+    provider: str
+
+
+def _claim(db: Session, now: datetime, limit: int) -> List[_Claimed]:
+    rows = (
+        db.query(InvoiceAuthorization)
+        .filter(
+            InvoiceAuthorization.status.in_((STATUS_PENDING, STATUS_PROCESSING)),
+            InvoiceAuthorization.next_attempt_at <= now
+        )
+        .order_by(InvoiceAuthorization.next_attempt_at, InvoiceAuthorization.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+    claimed = []
+    for row in rows:
+        row.status = STATUS_PROCESSING
+        row.next_attempt_at = now + CLAIM_TIMEOUT
+        claimed.append(_Claimed(row.id, row.tenant_id, row.sale_id, row.provider))
+    db.commit()
+    return claimed
+
+
+def _build_requests(db: Session, claimed: List[_Claimed]) -> Dict[int, AuthorizationRequest]:
+    sales = {s.id: s for s in db.query(Sale).filter(Sale.id.in_([c.sale_id for c in claimed]))}
+    pos_codes = dict(db.query(PointOfSale.id, PointOfSale.code).filter(
+        PointOfSale.id.in_({s.point_of_sale_id for s in sales.values()})
+    ))
+    tax_ids = dict(db.query(Tenant.id, Tenant.tax_id).filter(
+        Tenant.id.in_({c.tenant_id for c in claimed})
+    ))
+
+    requests = {}
+    for claim in claimed:
+        sale = sales.get(claim.sale_id)
+        if sale is None:
+            continue
+        requests[claim.id] = AuthorizationRequest(
+            authorization_id=claim.id,
+            sale_id=sale.id,
+            tenant_tax_id=tax_ids.get(claim.tenant_id),
+            point_of_sale_code=pos_codes.get(sale.point_of_sale_id, ""),
+            invoice_type=sale.invoice_type or DEFAULT_INVOICE_TYPE,
+            invoice_number=sale.invoice_number,
+            issued_at=sale.created_at,
+            subtotal=sale.subtotal,
+            tax_amount=sale.tax_amount,
+            total=sale.total,
+        )
+    return requests
+
+
+def _authorize(claimed: List[_Claimed], requests: Dict[int, AuthorizationRequest]) -> Dict[int, AuthorizationResult]:
+    """Envía los requests agrupados por proveedor, en lotes. Un resultado por autorización"""
+    by_provider: Dict[str, List[_Claimed]] = {}
+    for claim in claimed:
+        by_provider.setdefault(claim.provider, []).append(claim)
+
+    results: Dict[int, AuthorizationResult] = {}
+    for provider_name, claims in by_provider.items():
+        for claim in claims:
+            if claim.id not in requests:
+                results[claim.id] = AuthorizationResult(claim.id, error="Venta inexistente", retryable=False)
+        ids = [claim.id for claim in claims if claim.id in requests]
+
+        provider = get_provider(provider_name)
+        if provider is None:
+            for authorization_id in ids:
+                results[authorization_id] = AuthorizationResult(
+                    authorization_id, error=f"Proveedor {provider_name!r} no configurado"
+                )
+            continue
+
+        for start in range(0, len(ids), provider.max_batch_size):
+            batch = ids[start:start + provider.max_batch_size]
+            try:
+                for result in provider.authorize([requests[i] for i in batch]):
+                    results[result.authorization_id] = result
+            except Exception as e:
+                log.warning(f"Proveedor {provider_name} falló con un lote de {len(batch)}: {e}")
+                for authorization_id in batch:
+                    results[authorization_id] = AuthorizationResult(
+                        authorization_id, error=str(e) or type(e).__name__
+                    )
+            for authorization_id in batch:
+                results.setdefault(
+                    authorization_id, AuthorizationResult(authorization_id, error="Sin respuesta del proveedor")
+                )
+    return results
+
+
+def _retry_or_fail(authorization: InvoiceAuthorization, sale: Optional[Sale], error: str, now: datetime):
+    authorization.attempts += 1
+    authorization.last_error = error
+    if authorization.attempts >= config.EINVOICING_MAX_ATTEMPTS:
+        authorization.status = STATUS_FAILED
+        if sale is not None:
+            sale.invoice_status = STATUS_FAILED
+    else:
+        authorization.status = STATUS_PENDING
+        authorization.next_attempt_at = now + backoff(authorization.attempts)
+
+
+def process_pending(db: Session, now: Optional[datetime] = None, limit: Optional[int] = None) -> int:
+    """
+    Procesa una tanda de autorizaciones vencidas.
+    Devuelve cuántas quedaron resueltas (autorizadas, rechazadas o fallidas).
+    """
+    now = now or datetime.utcnow()
+    claimed = _claim(db, now, limit or config.EINVOICING_BATCH_SIZE)
+    if not claimed:
+        return 0
+
+    requests = _build_requests(db, claimed)
+    # Las llamadas al proveedor se hacen sin transacción abierta
+    db.commit()
+    results = _authorize(claimed, requests)
+
+    # Resultados de toda la tanda en una transacción
+    authorizations = (
+        db.query(InvoiceAuthorization)
+        .filter(InvoiceAuthorization.id.in_([c.id for c in claimed]))
+        .with_for_update()
+        .all()
+    )
+    sales = {s.id: s for s in db.query(Sale).filter(Sale.id.in_([c.sale_id for c in claimed]))}
+    resolved = 0
+    for authorization in authorizations:
+        result = results[authorization.id]
+        sale = sales.get(authorization.sale_id)
+        if result.cae:
+            authorization.status = STATUS_AUTHORIZED
+            authorization.last_error = None
+            if sale is not None:
+                sale.cae = result.cae
+                sale.cae_expiration = result.cae_expiration
+                sale.invoice_status = STATUS_AUTHORIZED
+        elif not result.retryable:
+            authorization.status = STATUS_REJECTED
+            authorization.last_error = result.error
+            if sale is not None:
+                sale.invoice_status = STATUS_REJECTED
+        else:
+            _retry_or_fail(authorization, sale, result.error, now)
+            if authorization.status == STATUS_PENDING:
+                continue
+        resolved += 1
+
+    db.commit()
+    return resolved
+
+
+def process_all_shards() -> int:
+    total = 0
+    for shard_name in shard_router.shard_names:
+        with shard_router.sessionmaker_for(shard_name)() as db:
+            while True:
+                resolved = process_pending(db)
+                total += resolved
+                if resolved < config.EINVOICING_BATCH_SIZE:
+                    break
+    return total
+
+
+async def electronic_invoicing_loop(interval_seconds: int = None):
+    """Tarea de fondo: procesa la cola cada EINVOICING_INTERVAL_SECONDS"""
+    interval_seconds = interval_seconds or config.EINVOICING_INTERVAL_SECONDS
+    while True:
+        try:
+            resolved = await asyncio.to_thread(process_all_shards)
+            if resolved:
+                log.info(f"Autorizaciones electrónicas resueltas: {resolved}")
+        except Exception as e:
+            log.error(f"Error procesando la cola de facturación electrónica: {e}")
+        await asyncio.sleep(interval_seconds)
+
+
+if __name__ == "__main__":
+    with shard_map_watch():
+        print(f"✅ Autorizaciones resueltas: {process_all_shards()}")
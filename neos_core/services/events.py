@@ -0,0 +1,114 @@
+# neos_core/services/events.py
+"""
+Broker de eventos en proceso para notificaciones push (Server-Sent Events).
+
+Los publicadores (código síncrono del threadpool o de tareas de fondo) llaman a
+publish(); cada suscriptor tiene una cola asyncio en el event loop donde se
+suscribió y recibe los eventos con call_soon_threadsafe. Las colas son
+acotadas: un cliente lento pierde eventos en lugar de frenar a los demás.
+
+Con varios workers, quien confirma el cambio publica en su proceso y además
+lo avisa por el bus de invalidación (NOTIFY en la misma transacción, ver
+services/invalidation.py); los demás workers lo reciben y lo publican a sus
+propios clientes. Si el listener de un worker está desconectado, sus
+clientes se pierden esos avisos (el outbox sigue teniendo los eventos).
+"""
+import asyncio
+import json
+import logging
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from neos_core.services.invalidation import invalidation_bus
+
+log = logging.getLogger(__name__)
+
+# Espacios de nombres de los avisos entre workers
+LOW_STOCK_NAMESPACE = "low_stock"
+OUTBOX_NAMESPACE = "outbox"
+
+# Eventos pendientes por suscriptor antes de empezar a descartar
+SUBSCRIBER_QUEUE_SIZE = 100
+
+
+class EventBroker:
+    """Pub/sub por tenant"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self._subscribers: Dict[int, List[Tuple[asyncio.AbstractEventLoop, asyncio.Queue]]] = {}
+
+    def subscribe(self, tenant_id: int) -> asyncio.Queue:
+        """Debe llamarse desde el event loop que va a consumir la cola"""
+        queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        with self._lock:
+            self._subscribers.setdefault(tenant_id, []).append((asyncio.get_running_loop(), queue))
+        return queue
+
+    def unsubscribe(self, tenant_id: int, queue: asyncio.Queue):
+        with self._lock:
+            subscribers = self._subscribers.get(tenant_id, [])
+            self._subscribers[tenant_id] = [(loop, q) for loop, q in subscribers if q is not queue]
+            if not self._subscribers[tenant_id]:
+                del self._subscribers[tenant_id]
+
+    def subscriber_count(self, tenant_id: int) -> int:
+        with self._lock:
+            return len(self._subscribers.get(tenant_id, []))
+
+    def publish(self, tenant_id: int, event: dict):
+        """Entrega el evento a los suscriptores del tenant (seguro desde cualquier hilo)"""
+        with self._lock:
+            subscribers = list(self._subscribers.get(tenant_id, []))
+
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(self._offer, queue, event)
+            except RuntimeError:
+                # El loop del suscriptor ya cerró
+                self.unsubscribe(tenant_id, queue)
+
+    def _offer(self, queue: asyncio.Queue, event: dict):
+        try:
+            queue.put_nowait(event)
+        except asyncio.QueueFull:
+            log.warning(f"{self.name}: suscriptor lento, evento descartado")
+
+
+# Transiciones de stock bajo (ver database/models/product_model.py)
+low_stock_broker = EventBroker("low_stock")
+# Avisos de eventos del outbox publicados (ver services/outbox.py)
+outbox_broker = EventBroker("outbox")
+
+
+# ===== AVISOS ENTRE WORKERS =====
+
+def _notify(db: Session, namespace: str, tenant_id: int, event: dict):
+    invalidation_bus.notify(db, namespace, json.dumps({"tenant_id": tenant_id, "event": event}, separators=(",", ":")))
+
+
+def notify_low_stock(db: Session, tenant_id: int, event: dict):
+    """Avisa una transición de stock bajo a los demás workers (sale con el commit de `db`)"""
+    _notify(db, LOW_STOCK_NAMESPACE, tenant_id, event)
+
+
+def notify_outbox(db: Session, tenant_id: int, sequence: int):
+    """Avisa a los demás workers que el outbox del tenant avanzó hasta `sequence`"""
+    _notify(db, OUTBOX_NAMESPACE, tenant_id, {"sequence": sequence})
+
+
+def _relay_to(broker: EventBroker):
+    def handler(key: Optional[str]):
+        # key None = reconexión del listener (vaciar cachés); no hay evento que reenviar
+        if key is None:
+            return
+        message = json.loads(key)
+        broker.publish(message["tenant_id"], message["event"])
+    return handler
+
+
+invalidation_bus.subscribe(LOW_STOCK_NAMESPACE, _relay_to(low_stock_broker))
+invalidation_bus.subscribe(OUTBOX_NAMESPACE, _relay_to(outbox_broker))
@@ -0,0 +1,227 @@
+# neos_core/services/invalidation.py
+"""
+Invalidación de cachés en memoria entre workers y hosts.
+
+Cada caché del proceso se suscribe a un espacio de nombres con
+invalidation_bus.subscribe(namespace, handler); el handler recibe la clave
+a desalojar (o None = todo). Quien modifica algo cacheado llama a
+invalidation_bus.notify(db, namespace, key) ANTES del commit:
+
+- PostgreSQL: se emite pg_notify en la misma transacción, así el aviso sale
+  solo si el commit se confirma. Cada worker tiene un hilo por shard con
+  LISTEN en INVALIDATION_CHANNEL que desaloja sus entradas locales.
+- Otras bases (desarrollo, tests): canal en proceso (LocalChannel) que
+  entrega al confirmar la sesión.
+
+El proceso que confirma no recibe su propio aviso: actualiza su caché como
+siempre (p. ej. pricing_index.refresh_price_list).
+
+Si un listener pierde la conexión, los avisos de ese lapso se pierden:
+mientras tanto las cachés usan max_age() (un TTL corto,
+INVALIDATION_FALLBACK_TTL_SECONDS) y al reconectar se vacían completas.
+"""
+import json
+import logging
+import os
+import select
+import socket
+import threading
+import uuid
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+
+from neos_core.database import config
+from neos_core.services import metrics
+
+log = logging.getLogger(__name__)
+
+# Con el canal en silencio, cada cuánto se verifica que la conexión siga viva
+LISTEN_POLL_SECONDS = 10
+RECONNECT_BACKOFF_SECONDS = 1
+RECONNECT_BACKOFF_MAX_SECONDS = 30
+
+_PENDING_KEY = "pending_invalidations"
+
+Handler = Callable[[Optional[str]], None]
+
+
+class LocalChannel:
+    """Canal en proceso: entrega los avisos al confirmar la sesión (tests, bases sin NOTIFY)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buses: List["InvalidationBus"] = []
+
+    def attach(self, bus: "InvalidationBus"):
+        with self._lock:
+            self._buses.append(bus)
+
+    def publish(self, db: Session, payload: str):
+        # Como con pg_notify, el aviso queda atado a una transacción abierta
+        db.connection()
+        db.info.setdefault(_PENDING_KEY, []).append((self, payload))
+
+    def deliver(self, payload: str):
+        with self._lock:
+            buses = list(self._buses)
+        for bus in buses:
+            bus.receive(payload)
+
+
+@event.listens_for(Session, "after_commit")
+def _deliver_pending(session: Session):
+    for channel, payload in session.info.pop(_PENDING_KEY, []):
+        channel.deliver(payload)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending(session: Session):
+    session.info.pop(_PENDING_KEY, None)
+
+
+class PostgresListener(threading.Thread):
+    """Hilo con LISTEN en un engine; reconecta con backoff si se corta"""
+
+    def __init__(self, bus: "InvalidationBus", engine, name: str):
+        super().__init__(name=f"invalidation-{name}", daemon=True)
+        self.bus = bus
+        self.engine = engine
+        self.connected = False
+        self._stopping = threading.Event()
+
+    def stop(self):
+        self._stopping.set()
+
+    def run(self):
+        backoff = RECONNECT_BACKOFF_SECONDS
+        while not self._stopping.is_set():
+            try:
+                self._listen()
+                backoff = RECONNECT_BACKOFF_SECONDS
+            except Exception as e:
+                log.warning(f"{self.name}: conexión perdida, reintento en {backoff}s: {e}")
+            self.connected = False
+            self._stopping.wait(backoff)
+            backoff = min(backoff * 2, RECONNECT_BACKOFF_MAX_SECONDS)
+
+    def _listen(self):
+        # Conexión propia fuera del pool: queda tomada mientras el worker viva
+        connection = self.engine.raw_connection()
+        connection.detach()
+        dbapi = connection.dbapi_connection
+        try:
+            dbapi.autocommit = True
+            with dbapi.cursor() as cursor:
+                cursor.execute(f'LISTEN "{self.bus.channel}"')
+            self.connected = True
+            # Lo que se notificó mientras no escuchábamos se perdió
+            self.bus.evict_all()
+            while not self._stopping.is_set():
+                if select.select([dbapi], [], [], LISTEN_POLL_SECONDS) == ([], [], []):
+                    with dbapi.cursor() as cursor:
+                        cursor.execute("SELECT 1")
+                    continue
+                dbapi.poll()
+                while dbapi.notifies:
+                    self.bus.receive(dbapi.notifies.pop(0).payload)
+        finally:
+            connection.close()
+
+
+class InvalidationBus:
+    """Suscripciones de las cachés del proceso y envío/recepción de avisos"""
+
+    def __init__(self, local_channel: Optional[LocalChannel] = None, channel: Optional[str] = None):
+        self.origin = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.local_channel = local_channel or LocalChannel()
+        self.local_channel.attach(self)
+        self._channel = channel
+        self._lock = threading.Lock()
+        self._handlers: Dict[str, List[Handler]] = {}
+        self._listeners: List[PostgresListener] = []
+
+    @property
+    def channel(self) -> str:
+        return self._channel or config.INVALIDATION_CHANNEL
+
+    def subscribe(self, namespace: str, handler: Handler):
+        with self._lock:
+            self._handlers.setdefault(namespace, []).append(handler)
+
+    def notify(self, db: Session, namespace: str, key=None):
+        """Avisa a los demás workers que `key` cambió; sale con el commit de `db`"""
+        payload = json.dumps(
+            {"origin": self.origin, "namespace": namespace, "key": None if key is None else str(key)},
+            separators=(",", ":")
+        )
+        if db.get_bind().dialect.name == "postgresql":
+            db.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": self.channel, "payload": payload})
+        else:
+            self.local_channel.publish(db, payload)
+
+    def receive(self, payload: str):
+        try:
+            message = json.loads(payload)
+        except ValueError:
+            log.warning(f"Aviso de invalidación ilegible: {payload!r}")
+            return
+        if message.get("origin") == self.origin:
+            return
+        self._evict(message.get("namespace"), message.get("key"))
+
+    def _evict(self, namespace: str, key: Optional[str]):
+        with self._lock:
+            handlers = list(self._handlers.get(namespace, []))
+        for handler in handlers:
+            try:
+                handler(key)
+            except Exception as e:
+                log.error(f"Error invalidando '{namespace}' ({key}): {e}")
+        metrics.CACHE_INVALIDATIONS.inc(namespace=namespace)
+
+    def evict_all(self):
+        with self._lock:
+            namespaces = list(self._handlers)
+        for namespace in namespaces:
+            self._evict(namespace, None)
+
+    # ===== LISTENERS =====
+
+    @property
+    def connected(self) -> bool:
+        """True si hay listeners y todos están escuchando"""
+        return bool(self._listeners) and all(listener.connected for listener in self._listeners)
+
+    def max_age(self, ttl_seconds: float) -> float:
+        """TTL a usar por una caché: el propio si llegan los avisos, uno corto si no"""
+        if self.connected:
+            return ttl_seconds
+        return min(ttl_seconds, config.INVALIDATION_FALLBACK_TTL_SECONDS)
+
+    def start(self, engines: Dict[str, object]):
+        """Un listener por engine PostgreSQL (nombre de shard -> engine)"""
+        for name, engine in engines.items():
+            if engine.dialect.name != "postgresql":
+                continue
+            listener = PostgresListener(self, engine, name)
+            listener.start()
+            self._listeners.append(listener)
+
+    def stop(self, timeout: float = 5):
+        listeners, self._listeners = self._listeners, []
+        for listener in listeners:
+            listener.stop()
+        for listener in listeners:
+            listener.join(timeout)
+
+
+# Bus del proceso
+invalidation_bus = InvalidationBus()
+
+INVALIDATION_LISTENER_CONNECTED = metrics.REGISTRY.gauge(
+    "neos_invalidation_listener_connected",
+    "1 si los listeners de invalidación están escuchando en todos los shards",
+    callback=lambda: [((), 1 if invalidation_bus.connected else 0)],
+)
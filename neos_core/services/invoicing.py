@@ -0,0 +1,278 @@
+# neos_core/services/invoicing.py
+"""
+Numeración de comprobantes por punto de venta con reserva de bloques.
+
+Cada venta necesita un número correlativo de su punto de venta. Incrementar
+un contador por venta serializaría todas las ventas de la caja en esa fila
+hasta el commit. En cambio, cada worker reserva un bloque de
+INVOICE_BLOCK_SIZE números en una transacción propia y corta
+(invoice_sequences.next_number += tamaño) y los entrega desde memoria.
+
+- Si la venta falla después de tomar su número y ningún otro se entregó
+  después, el número lo usa la próxima venta del worker.
+- Un bloque vale hasta `leased_until` (INVOICE_BLOCK_LEASE_SECONDS): pasado
+  ese momento el worker lo abandona y reserva otro, así la reconciliación
+  puede revisar sus números sin riesgo de duplicarlos.
+- Los números que nunca llegan a una venta (worker caído con un bloque
+  `open`, venta fallida con números posteriores ya entregados) no se
+  vuelven a entregar: la numeración no puede retroceder. reconcile_blocks()
+  revisa los bloques `open` vencidos y los `closed`, y registra cada hueco
+  como un bloque `void` (números anulados, para el libro fiscal).
+
+Reconciliación por línea de comandos (por cron, en todos los shards):
+    python -m neos_core.services.invoicing
+"""
+import os
+import socket
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from neos_core.database import config
+from neos_core.database.models import InvoiceNumberBlock, InvoiceSequence, Sale
+from neos_core.database.sharding import shard_map_watch, shard_router
+
+STATUS_OPEN = "open"
+STATUS_CLOSED = "closed"
+STATUS_RECONCILED = "reconciled"
+STATUS_VOID = "void"
+# Versiones anteriores reutilizaban los huecos como bloques `free`
+STATUS_FREE = "free"
+
+INVOICE_NUMBER_DIGITS = 8
+# Margen sobre leased_until antes de reconciliar (desfasaje de relojes entre hosts)
+RECLAIM_GRACE = timedelta(minutes=5)
+
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"[:100]
+
+
+def format_invoice_number(number: int) -> str:
+    return f"{number:0{INVOICE_NUMBER_DIGITS}d}"
+
+
+# ===== ASIGNACIÓN =====
+
+@dataclass(slots=True)
+class _Block:
+    id: int
+    start_number: int
+    next_number: int
+    end_number: int
+    leased_until: datetime
+
+    def exhausted(self) -> bool:
+        return self.next_number >= self.end_number
+
+
+class _PosState:
+    __slots__ = ("lock", "block")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.block: Optional[_Block] = None
+
+
+class InvoiceNumberAllocator:
+    """Entrega números por (tenant, punto de venta) desde bloques reservados"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._states: Dict[Tuple[int, int], _PosState] = {}
+
+    def _state(self, tenant_id: int, point_of_sale_id: int) -> _PosState:
+        key = (tenant_id, point_of_sale_id)
+        with self._lock:
+            state = self._states.get(key)
+            if state is None:
+                state = self._states[key] = _PosState()
+            return state
+
+    def next_number(self, db: Session, tenant_id: int, point_of_sale_id: int) -> int:
+        state = self._state(tenant_id, point_of_sale_id)
+        with state.lock:
+            now = datetime.utcnow()
+            block = state.block
+            if block is None or block.exhausted() or now >= block.leased_until:
+                block = state.block = reserve_block(db, tenant_id, point_of_sale_id, previous=block, now=now)
+            number = block.next_number
+            block.next_number += 1
+            return number
+
+    def release(self, tenant_id: int, point_of_sale_id: int, number: int):
+        """
+        Devuelve un número que no llegó a usarse (la venta falló). Solo se
+        reutiliza si es el último entregado: la numeración no retrocede, así
+        que cualquier otro queda como hueco y la reconciliación lo anula.
+        """
+        state = self._state(tenant_id, point_of_sale_id)
+        with state.lock:
+            block = state.block
+            if block is not None and number == block.next_number - 1:
+                block.next_number = number
+
+    def reset(self):
+        """Olvida los bloques en memoria (quedan para la reconciliación)"""
+        with self._lock:
+            self._states.clear()
+
+
+def reserve_block(
+        db: Session,
+        tenant_id: int,
+        point_of_sale_id: int,
+        previous: Optional[_Block] = None,
+        now: Optional[datetime] = None
+) -> _Block:
+    """
+    Reserva un bloque para el worker en una sesión aparte sobre la misma
+    conexión/engine de `db`: el contador queda bloqueado solo durante esta
+    transacción corta, no durante la venta. Siempre toma números nuevos.
+    """
+    now = now or datetime.utcnow()
+    leased_until = now + timedelta(seconds=config.INVOICE_BLOCK_LEASE_SECONDS)
+
+    with Session(bind=db.get_bind()) as block_db:
+        if previous is not None and previous.exhausted():
+            # leased_until = ahora: la reconciliación lo revisa pasado RECLAIM_GRACE
+            block_db.query(InvoiceNumberBlock).filter_by(id=previous.id).update(
+                {"status": STATUS_CLOSED, "leased_until": now}, synchronize_session=False
+            )
+
+        sequence = _lock_sequence(block_db, tenant_id, point_of_sale_id)
+        row = InvoiceNumberBlock(
+            tenant_id=tenant_id,
+            point_of_sale_id=point_of_sale_id,
+            start_number=sequence.next_number,
+            end_number=sequence.next_number + config.INVOICE_BLOCK_SIZE,
+            status=STATUS_OPEN,
+            owner=WORKER_ID,
+            leased_until=leased_until,
+        )
+        sequence.next_number = row.end_number
+        block_db.add(row)
+        block_db.flush()
+        block = _Block(row.id, row.start_number, row.start_number, row.end_number, leased_until)
+        block_db.commit()
+    return block
+
+
+def _lock_sequence(db: Session, tenant_id: int, point_of_sale_id: int) -> InvoiceSequence:
+    sequence = (
+        db.query(InvoiceSequence)
+        .filter_by(point_of_sale_id=point_of_sale_id)
+        .with_for_update()
+        .first()
+    )
+    if sequence is not None:
+        return sequence
+
+    # Primer bloque del punto de venta: otro worker puede estar creándolo a la vez
+    try:
+        with db.begin_nested():
+            db.add(InvoiceSequence(point_of_sale_id=point_of_sale_id, tenant_id=tenant_id, next_number=1))
+    except IntegrityError:
+        pass
+    return (
+        db.query(InvoiceSequence)
+        .filter_by(point_of_sale_id=point_of_sale_id)
+        .with_for_update()
+        .one()
+    )
+
+
+invoice_numbers = InvoiceNumberAllocator()
+
+
+# ===== RECONCILIACIÓN =====
+
+def _ranges(numbers: List[int]) -> List[Tuple[int, int]]:
+    """[3, 4, 5, 9] -> [(3, 6), (9, 10)]"""
+    ranges = []
+    for number in numbers:
+        if ranges and ranges[-1][1] == number:
+            ranges[-1] = (ranges[-1][0], number + 1)
+        else:
+            ranges.append((number, number + 1))
+    return ranges
+
+
+def _voided_numbers(db: Session, block: InvoiceNumberBlock) -> set:
+    """Números del bloque ya registrados como anulados (reconciliación repetida)"""
+    voided = set()
+    for start, end in db.query(InvoiceNumberBlock.start_number, InvoiceNumberBlock.end_number).filter(
+        InvoiceNumberBlock.point_of_sale_id == block.point_of_sale_id,
+        InvoiceNumberBlock.status == STATUS_VOID,
+        InvoiceNumberBlock.start_number < block.end_number,
+        InvoiceNumberBlock.end_number > block.start_number,
+    ):
+        voided.update(range(start, end))
+    return voided
+
+
+def reconcile_blocks(db: Session, now: Optional[datetime] = None) -> int:
+    """
+    Revisa los bloques que ningún worker usa (`open` con el lease vencido y
+    `closed`, pasado RECLAIM_GRACE para que terminen las ventas en curso),
+    registra los números sin venta como bloques `void` y los marca
+    `reconciled`. Devuelve cuántos números se anularon.
+    """
+    now = now or datetime.utcnow()
+
+    # Huecos que versiones anteriores dejaban para reutilizar: se anulan
+    db.query(InvoiceNumberBlock).filter(InvoiceNumberBlock.status == STATUS_FREE).update(
+        {InvoiceNumberBlock.status: STATUS_VOID}, synchronize_session=False
+    )
+
+    stale = (
+        db.query(InvoiceNumberBlock)
+        .filter(
+            InvoiceNumberBlock.status.in_((STATUS_OPEN, STATUS_CLOSED)),
+            InvoiceNumberBlock.leased_until < now - RECLAIM_GRACE
+        )
+        .order_by(InvoiceNumberBlock.id)
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+
+    voided = 0
+    for block in stale:
+        used = {
+            int(number) for (number,) in
+            db.query(Sale.invoice_number).filter(
+                Sale.point_of_sale_id == block.point_of_sale_id,
+                Sale.invoice_number >= format_invoice_number(block.start_number),
+                Sale.invoice_number <= format_invoice_number(block.end_number - 1),
+            )
+        }
+        used |= _voided_numbers(db, block)
+        unused = [n for n in range(block.start_number, block.end_number) if n not in used]
+        for start, end in _ranges(unused):
+            db.add(InvoiceNumberBlock(
+                tenant_id=block.tenant_id,
+                point_of_sale_id=block.point_of_sale_id,
+                start_number=start,
+                end_number=end,
+                status=STATUS_VOID,
+            ))
+        voided += len(unused)
+        block.status = STATUS_RECONCILED
+
+    db.commit()
+    return voided
+
+
+def reconcile_all_shards() -> int:
+    total = 0
+    for shard_name in shard_router.shard_names:
+        with shard_router.sessionmaker_for(shard_name)() as db:
+            total += reconcile_blocks(db)
+    return total
+
+
+if __name__ == "__main__":
+    with shard_map_watch():
+        print(f"✅ Números de comprobante anulados: {reconcile_all_shards()}")
@@ -0,0 +1,390 @@
+# neos_core/services/jobs.py
+"""
+Tareas pesadas en segundo plano: importaciones, exportaciones, reportes.
+
+El request solo valida los parámetros e inserta una fila en `jobs`
+(crud/job_crud.py); responde enseguida con el id y el cliente consulta el
+estado en /jobs/{id}. Los workers:
+
+1. Toman la próxima tarea vencida con FOR UPDATE SKIP LOCKED (varios
+   workers, en procesos o máquinas distintas, nunca toman la misma) y la
+   marcan `running` con un plazo de JOBS_LEASE_SECONDS; si el worker se cae,
+   al vencer el plazo otro la retoma.
+2. Ejecutan el handler del tipo dentro de un savepoint: si falla, su trabajo
+   se descarta entero y la tarea se reintenta con backoff hasta
+   JOBS_MAX_ATTEMPTS. El resultado y el estado `succeeded` se confirman en
+   la misma transacción que el trabajo.
+3. Publican el progreso con JobContext.progress() en una sesión aparte (se
+   ve mientras la tarea corre), que además extiende el plazo y corta la
+   tarea si se la canceló.
+
+Un handler es una función (db, ctx, params) -> dict registrada con
+@job_handler; no debe hacer commit.
+
+Corre dentro de la API (JOBS_API_WORKERS, ver main.py) o en procesos
+dedicados por línea de comandos:
+    python -m neos_core.services.jobs --processes 4
+"""
+import argparse
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import socket
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type
+
+from pydantic import BaseModel, ValidationError
+from sqlalchemy.orm import Session
+
+from neos_core.database import config
+from neos_core.database.models import Job
+from neos_core.database.sharding import shard_map_watch, shard_router
+from neos_core.schemas.job_schema import ProductImportParams, SalesExportParams
+
+log = logging.getLogger(__name__)
+
+STATUS_QUEUED = "queued"
+STATUS_RUNNING = "running"
+STATUS_SUCCEEDED = "succeeded"
+STATUS_FAILED = "failed"
+STATUS_CANCELLED = "cancelled"
+
+FINISHED = (STATUS_SUCCEEDED, STATUS_FAILED, STATUS_CANCELLED)
+
+
+class JobCancelled(Exception):
+    """La tarea se canceló mientras corría: su trabajo se descarta"""
+
+
+# ===== REGISTRO DE TIPOS =====
+
+@dataclass(frozen=True)
+class JobHandler:
+    kind: str
+    run: Callable[[Session, "JobContext", Any], dict]
+    params_model: Optional[Type[BaseModel]] = None
+    roles: Optional[Tuple[str, ...]] = None  # None: cualquier usuario del tenant
+
+
+_handlers: Dict[str, JobHandler] = {}
+
+
+def register_handler(
+        kind: str,
+        run: Callable,
+        params_model: Optional[Type[BaseModel]] = None,
+        roles: Optional[Tuple[str, ...]] = None
+):
+    _handlers[kind] = JobHandler(kind, run, params_model, tuple(roles) if roles else None)
+
+
+def unregister_handler(kind: str):
+    _handlers.pop(kind, None)
+
+
+def get_handler(kind: str) -> Optional[JobHandler]:
+    return _handlers.get(kind)
+
+
+def job_handler(kind: str, params_model: Optional[Type[BaseModel]] = None, roles: Optional[Tuple[str, ...]] = None):
+    """Decorador: registra la función como handler del tipo `kind`"""
+    def decorator(run):
+        register_handler(kind, run, params_model, roles)
+        return run
+    return decorator
+
+
+def parse_params(handler: JobHandler, params: dict):
+    """Parámetros validados con el modelo del tipo (ValidationError si no corresponden)"""
+    if handler.params_model is None:
+        return params
+    return handler.params_model.model_validate(params)
+
+
+# ===== EJECUCIÓN =====
+
+class JobContext:
+    """Lo que un handler ve de su tarea: ids y reporte de progreso"""
+
+    def __init__(self, control: Session, job_id: int, tenant_id: int, user_id: Optional[int]):
+        self._control = control
+        self.job_id = job_id
+        self.tenant_id = tenant_id
+        self.user_id = user_id
+        self._after_commit: List[Callable[[], None]] = []
+
+    def after_commit(self, callback: Callable[[], None]):
+        """Ejecuta `callback` cuando el trabajo de la tarea quedó confirmado (p. ej. auditoría)"""
+        self._after_commit.append(callback)
+
+    def progress(self, current: int, total: Optional[int] = None, message: Optional[str] = None):
+        """
+        Publica el avance y extiende el plazo de la tarea. Llamarlo entre
+        lotes, al menos una vez cada JOBS_LEASE_SECONDS.
+        Lanza JobCancelled si la tarea se canceló.
+        """
+        job = self._control.get(Job, self.job_id, populate_existing=True)
+        if job is None or job.status == STATUS_CANCELLED:
+            self._control.rollback()
+            raise JobCancelled()
+        now = datetime.utcnow()
+        job.progress_current = current
+        if total is not None:
+            job.progress_total = total
+        if message is not None:
+            job.progress_message = message[:200]
+        job.heartbeat_at = now
+        job.run_after = now + timedelta(seconds=config.JOBS_LEASE_SECONDS)
+        self._control.commit()
+
+
+@dataclass(slots=True)
+class _Claimed:
+    id: int
+    tenant_id: int
+    user_id: Optional[int]
+    kind: str
+    params: dict
+    attempts: int
+
+
+def backoff(attempts: int) -> timedelta:
+    return timedelta(seconds=config.JOBS_BACKOFF_SECONDS * 2 ** (attempts - 1))
+
+
+def _claim(db: Session, worker_id: str, now: datetime) -> Optional[_Claimed]:
+    while True:
+        job = (
+            db.query(Job)
+            .filter(Job.status.in_((STATUS_QUEUED, STATUS_RUNNING)), Job.run_after <= now)
+            .order_by(Job.run_after, Job.id)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+            .first()
+        )
+        if job is None:
+            db.commit()
+            return None
+        if job.status != STATUS_RUNNING:
+            break
+
+        log.warning(f"Tarea {job.id}: el worker {job.locked_by} no respondió")
+        if job.attempts < config.JOBS_MAX_ATTEMPTS:
+            break
+        # Una tarea que tira abajo al worker en cada intento no se retoma para siempre
+        job.status = STATUS_FAILED
+        job.error = "El worker se detuvo sin terminar la tarea"
+        job.finished_at = now
+        job.locked_by = None
+        db.commit()
+
+    job.status = STATUS_RUNNING
+    job.attempts += 1
+    job.locked_by = worker_id
+    job.started_at = now
+    job.heartbeat_at = now
+    job.run_after = now + timedelta(seconds=config.JOBS_LEASE_SECONDS)
+    claimed = _Claimed(job.id, job.tenant_id, job.user_id, job.kind, job.params, job.attempts)
+    db.commit()
+    return claimed
+
+
+def _finish(
+        db: Session,
+        job_id: int,
+        now: datetime,
+        result: Optional[dict] = None,
+        error: Optional[str] = None,
+        retryable: bool = True
+):
+    """Cierra la tarea en la transacción en curso (sin commit). retryable=False: falla sin reintentos"""
+    job = db.query(Job).filter(Job.id == job_id).with_for_update().populate_existing().one()
+    if job.status == STATUS_CANCELLED:
+        return
+    if error is None:
+        job.status = STATUS_SUCCEEDED
+        job.result = result
+        job.error = None
+        job.finished_at = now
+    elif retryable and job.attempts < config.JOBS_MAX_ATTEMPTS:
+        job.status = STATUS_QUEUED
+        job.error = error
+        job.run_after = now + backoff(job.attempts)
+    else:
+        job.status = STATUS_FAILED
+        job.error = error
+        job.finished_at = now
+    job.locked_by = None
+
+
+def run_next(db: Session, worker_id: Optional[str] = None, now: Optional[datetime] = None) -> Optional[int]:
+    """Ejecuta la próxima tarea vencida. Devuelve su id, o None si no había ninguna"""
+    worker_id = worker_id or default_worker_id()
+    claimed = _claim(db, worker_id, now or datetime.utcnow())
+    if claimed is None:
+        return None
+
+    handler = get_handler(claimed.kind)
+    if handler is None:
+        # Reintentar no lo arregla: la tarea falla de inmediato
+        log.error(f"Tarea {claimed.id}: tipo de tarea desconocido {claimed.kind!r}")
+        _finish(db, claimed.id, datetime.utcnow(), error=f"Tipo de tarea desconocido: {claimed.kind!r}", retryable=False)
+        db.commit()
+        return claimed.id
+
+    control = Session(bind=db.get_bind())
+    ctx = JobContext(control, claimed.id, claimed.tenant_id, claimed.user_id)
+    started = time.perf_counter()
+    committed = False
+    try:
+        with db.begin_nested():
+            result = handler.run(db, ctx, parse_params(handler, claimed.params))
+            current = db.query(Job.status).filter(Job.id == claimed.id).scalar()
+            if current == STATUS_CANCELLED:
+                raise JobCancelled()
+        committed = True
+        _finish(db, claimed.id, datetime.utcnow(), result=result or {})
+        log.info(f"Tarea {claimed.id} ({claimed.kind}) terminada en {time.perf_counter() - started:.1f}s")
+    except JobCancelled:
+        log.info(f"Tarea {claimed.id} ({claimed.kind}) cancelada")
+    except Exception as e:
+        log.warning(f"Tarea {claimed.id} ({claimed.kind}) falló (intento {claimed.attempts}): {e}")
+        _finish(db, claimed.id, datetime.utcnow(), error=str(e) or type(e).__name__)
+    finally:
+        control.close()
+    db.commit()
+    if committed:
+        for callback in ctx._after_commit:
+            callback()
+    return claimed.id
+
+
+def default_worker_id(slot: int = 0) -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{slot}"
+
+
+def run_pending_all_shards(worker_id: Optional[str] = None, max_jobs: Optional[int] = None) -> int:
+    """Ejecuta tareas vencidas de todos los shards hasta vaciarlas (o max_jobs)"""
+    done = 0
+    for shard_name in shard_router.shard_names:
+        with shard_router.sessionmaker_for(shard_name)() as db:
+            while max_jobs is None or done < max_jobs:
+                if run_next(db, worker_id) is None:
+                    break
+                done += 1
+    return done
+
+
+async def job_worker_loop(slot: int = 0, interval_seconds: int = None):
+    """Tarea de fondo: un worker de la API (corre las tareas en un hilo aparte)"""
+    interval_seconds = interval_seconds or config.JOBS_POLL_INTERVAL_SECONDS
+    worker_id = default_worker_id(slot)
+    while True:
+        try:
+            await asyncio.to_thread(run_pending_all_shards, worker_id)
+        except Exception as e:
+            log.error(f"Error ejecutando tareas en segundo plano: {e}")
+        await asyncio.sleep(interval_seconds)
+
+
+def _worker_process(slot: int, once: bool):
+    """Proceso worker dedicado (línea de comandos)"""
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    worker_id = default_worker_id(slot)
+    # Cada proceso sigue el mapa de shards: move_tenant lo espera antes de copiar
+    with shard_map_watch():
+        while True:
+            try:
+                done = run_pending_all_shards(worker_id)
+            except Exception as e:
+                log.error(f"Error ejecutando tareas en segundo plano: {e}")
+                done = 0
+            if once:
+                return
+            if not done:
+                time.sleep(config.JOBS_POLL_INTERVAL_SECONDS)
+
+
+# ===== TIPOS DE TAREA =====
+
+EXPORT_PROGRESS_EVERY = 500
+IMPORT_CHUNK_SIZE = 500
+
+
+def output_path(relative: str) -> str:
+    """Ruta absoluta de un archivo generado por una tarea"""
+    return os.path.join(config.JOBS_OUTPUT_DIR, relative)
+
+
+@job_handler("sales_export", params_model=SalesExportParams)
+def export_sales(db: Session, ctx: JobContext, params: SalesExportParams) -> dict:
+    """Ventas del tenant (calientes y archivadas) en un archivo NDJSON"""
+    from neos_core.crud import sales_crud
+    from neos_core.services import archive
+
+    relative = os.path.join(str(ctx.tenant_id), f"sales-export-{ctx.job_id}.ndjson")
+    path = output_path(relative)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    rows = 0
+    with open(path, "w", encoding="utf-8") as f:
+        for sale in sales_crud.iter_sales_for_export(db, ctx.tenant_id, params.date_from, params.date_to):
+            f.write(json.dumps(archive.sale_to_record(sale)) + "\n")
+            rows += 1
+            if rows % EXPORT_PROGRESS_EVERY == 0:
+                ctx.progress(rows, message="Exportando ventas")
+    ctx.progress(rows, total=rows, message="Exportación terminada")
+    return {"file": relative, "rows": rows}
+
+
+@job_handler("product_import", params_model=ProductImportParams, roles=("inventory", "admin", "superadmin"))
+def import_products(db: Session, ctx: JobContext, params: ProductImportParams) -> dict:
+    """Alta masiva de productos; las filas inválidas se informan sin frenar al resto"""
+    from neos_core.crud import product_crud
+    from neos_core.schemas.product_schema import ProductBase
+    from neos_core.services import audit
+
+    total = len(params.products)
+    created = updated = skipped = 0
+    errors = []
+    changes = []
+    for start in range(0, total, IMPORT_CHUNK_SIZE):
+        valid = []
+        for index, row in enumerate(params.products[start:start + IMPORT_CHUNK_SIZE], start=start):
+            try:
+                valid.append(ProductBase.model_validate(row))
+            except ValidationError as e:
+                errors.append({"row": index, "sku": row.get("sku"), "error": e.errors()[0]["msg"]})
+        if valid:
+            c, u, s = product_crud.import_products(db, ctx.tenant_id, valid, params.update_existing, changes)
+            created, updated, skipped = created + c, updated + u, skipped + s
+        ctx.progress(min(start + IMPORT_CHUNK_SIZE, total), total=total, message="Importando productos")
+
+    def record_audit():
+        for product_id, product_changes in changes:
+            audit.audit_log.record(ctx.tenant_id, audit.PRODUCT_UPDATED, "product", product_id, product_changes, ctx.user_id)
+
+    ctx.after_commit(record_audit)
+    return {"created": created, "updated": updated, "skipped": skipped, "errors": errors}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Workers de tareas en segundo plano")
+    parser.add_argument("--processes", type=int, default=1, help="Procesos worker")
+    parser.add_argument("--once", action="store_true", help="Vaciar la cola y terminar")
+    args = parser.parse_args()
+
+    if args.processes == 1:
+        _worker_process(0, args.once)
+    else:
+        # spawn: cada proceso abre sus propias conexiones (nada heredado del padre)
+        context = multiprocessing.get_context("spawn")
+        processes = [context.Process(target=_worker_process, args=(slot, args.once)) for slot in range(args.processes)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
@@ -0,0 +1,560 @@
+# neos_core/services/metrics.py
+"""
+Métricas en proceso con formato de exposición de texto de Prometheus.
+
+Registro minimalista (Counter, Gauge, Histogram) sin dependencias externas.
+Cada operación toma un único lock y actualiza listas pre-asignadas, por lo que
+el costo por request es de unos pocos microsegundos.
+
+Varios workers (neos_core/server.py): cada proceso tiene su propio registro y
+el balanceo reparte los scrapes de /metrics entre ellos. Con
+METRICS_MULTIPROC_DIR cada worker deja una foto de su registro en
+`<dir>/metrics_<pid>_<inicio>.json` cada METRICS_SNAPSHOT_SECONDS (y al
+servir /metrics), y /metrics suma las fotos de todos:
+- contadores e histogramas: se suman todas, también las de workers ya
+  reciclados, para que los totales no retrocedan;
+- gauges: solo las fotos recientes (workers vivos); se suman, o con
+  multiprocess_mode="all" se exporta uno por worker con el label `worker`.
+El launcher crea un directorio temporal si no se configura y lo vacía al
+arrancar. Sin directorio (un solo proceso, tests) se exporta el registro local.
+"""
+import asyncio
+import glob
+import json
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from neos_core.database import config
+
+log = logging.getLogger(__name__)
+
+# Buckets por defecto (segundos): cubren desde 5 ms hasta 10 s
+DEFAULT_LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 10.0
+)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    """Escapa un valor de label según el formato de exposición"""
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    """Base común: nombre, ayuda, labels y lock"""
+    type_name = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, object]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name}: se esperaban los labels {self.labelnames}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def header(self) -> List[str]:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type_name}",
+        ]
+
+    def samples(self) -> List[str]:
+        return self._format(self._items())
+
+    def snapshot(self) -> list:
+        """Valores actuales serializables a JSON: [[label_values, valor], ...]"""
+        return [[list(key), value] for key, value in self._items()]
+
+    def merge(self, merged: dict, snapshot: list, worker: str, live: bool):
+        """Acumula en `merged` la foto de un worker (contadores: se suman)"""
+        for key, value in snapshot:
+            key = tuple(key)
+            merged[key] = merged.get(key, 0) + value
+
+    def _items(self) -> list:
+        with self._lock:
+            return list(self._values.items())
+
+    def merged_labelnames(self) -> Tuple[str, ...]:
+        """Labels de los valores combinados por merge()"""
+        return self.labelnames
+
+    def _format(self, items, labelnames: Optional[Sequence[str]] = None) -> List[str]:
+        labelnames = labelnames or self.labelnames
+        return [
+            f"{self.name}{_format_labels(labelnames, key)} {_format_value(value)}"
+            for key, value in items
+        ]
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+
+class Counter(_Metric):
+    """Contador monótono creciente"""
+    type_name = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        if amount < 0:
+            raise ValueError("Un contador solo puede incrementarse")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def get(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+
+class Gauge(_Metric):
+    """
+    Valor que puede subir o bajar.
+    Si se pasa `callback`, el valor se lee en cada scrape (útil para el pool de DB).
+    El callback devuelve un iterable de (label_values, valor).
+    `multiprocess_mode`: cómo se combinan los workers vivos ("sum" o "all").
+    """
+    type_name = "gauge"
+
+    def __init__(
+            self,
+            name: str,
+            documentation: str,
+            labelnames: Sequence[str] = (),
+            callback: Optional[Callable[[], Iterable[Tuple[LabelValues, float]]]] = None,
+            multiprocess_mode: str = "sum"
+    ):
+        super().__init__(name, documentation, labelnames)
+        if multiprocess_mode not in ("sum", "all"):
+            raise ValueError(f"{name}: multiprocess_mode inválido: {multiprocess_mode}")
+        self._values: Dict[LabelValues, float] = {}
+        self._callback = callback
+        self.multiprocess_mode = multiprocess_mode
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def get(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def _items(self) -> list:
+        if self._callback is None:
+            return super()._items()
+        try:
+            return [(tuple(str(v) for v in key), value) for key, value in self._callback()]
+        except Exception:
+            # Un callback roto no debe tumbar el endpoint de métricas
+            return []
+
+    def merge(self, merged: dict, snapshot: list, worker: str, live: bool):
+        # El valor de un worker que ya no existe no describe el estado actual
+        if not live:
+            return
+        if self.multiprocess_mode == "all":
+            for key, value in snapshot:
+                merged[tuple(key) + (worker,)] = value
+        else:
+            super().merge(merged, snapshot, worker, live)
+
+    def merged_labelnames(self) -> Tuple[str, ...]:
+        if self.multiprocess_mode == "all":
+            return self.labelnames + ("worker",)
+        return self.labelnames
+
+
+class Histogram(_Metric):
+    """
+    Histograma con buckets fijos.
+    Guarda contadores por bucket (no acumulados) y los acumula al exportar.
+    """
+    type_name = "histogram"
+
+    def __init__(
+            self,
+            name: str,
+            documentation: str,
+            labelnames: Sequence[str] = (),
+            buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # label_values -> [conteos por bucket (+Inf al final), suma]
+        self._values: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = ([0] * (len(self.buckets) + 1), [0.0])
+                self._values[key] = entry
+            entry[0][index] += 1
+            entry[1][0] += value
+
+    def get_count(self, **labels) -> int:
+        entry = self._values.get(self._key(labels))
+        return sum(entry[0]) if entry else 0
+
+    def _items(self) -> list:
+        with self._lock:
+            return [(key, (list(counts), total[0])) for key, (counts, total) in self._values.items()]
+
+    def snapshot(self) -> list:
+        return [[list(key), counts, total] for key, (counts, total) in self._items()]
+
+    def merge(self, merged: dict, snapshot: list, worker: str, live: bool):
+        for key, counts, total in snapshot:
+            key = tuple(key)
+            entry = merged.get(key)
+            if entry is None:
+                merged[key] = (list(counts), total)
+            else:
+                merged[key] = ([a + b for a, b in zip(entry[0], counts)], entry[1] + total)
+
+    def _format(self, items, labelnames: Optional[Sequence[str]] = None) -> List[str]:
+        labelnames = labelnames or self.labelnames
+        lines = []
+        bounds = self.buckets + (float("inf"),)
+        for key, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(bounds, counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(
+                    f"{self.name}_bucket{_format_labels(labelnames, key, le)} {cumulative}"
+                )
+            labels = _format_labels(labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """Registro de métricas del proceso"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Métrica duplicada: {metric.name}")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def unregister(self, name: str):
+        with self._lock:
+            self._metrics.pop(name, None)
+
+    def get(self, name: str) -> Optional[_Metric]:
+        return self._metrics.get(name)
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(
+            self,
+            name: str,
+            documentation: str,
+            labelnames: Sequence[str] = (),
+            callback=None,
+            multiprocess_mode: str = "sum"
+    ) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames, callback, multiprocess_mode))
+
+    def histogram(
+            self,
+            name: str,
+            documentation: str,
+            labelnames: Sequence[str] = (),
+            buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS
+    ) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def _all(self) -> List[_Metric]:
+        with self._lock:
+            return list(self._metrics.values())
+
+    def snapshot(self) -> Dict[str, list]:
+        return {metric.name: metric.snapshot() for metric in self._all()}
+
+    def write_snapshot(self, directory: str):
+        """Deja la foto del registro de este proceso en el directorio compartido"""
+        path = os.path.join(directory, _SNAPSHOT_FILE)
+        tmp = f"{path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.snapshot(), f, separators=(",", ":"))
+        # Reemplazo atómico: quien lee nunca ve una foto a medio escribir
+        os.replace(tmp, path)
+
+    def _merge_snapshots(self, directory: str) -> Dict[str, dict]:
+        stale_after = 3 * config.METRICS_SNAPSHOT_SECONDS
+        now = time.time()
+        metrics = {metric.name: metric for metric in self._all()}
+        merged: Dict[str, dict] = {name: {} for name in metrics}
+
+        for path in glob.glob(os.path.join(directory, "metrics_*.json")):
+            try:
+                live = now - os.path.getmtime(path) <= stale_after
+                with open(path) as f:
+                    snapshot = json.load(f)
+            except (OSError, ValueError):
+                continue
+            # metrics_<pid>_<inicio>.json
+            worker = os.path.basename(path).split("_")[1]
+            for name, samples in snapshot.items():
+                if name in metrics:
+                    metrics[name].merge(merged[name], samples, worker, live)
+        return merged
+
+    def render(self, directory: Optional[str] = None) -> str:
+        """
+        Genera el cuerpo en formato de exposición de texto (version 0.0.4).
+        Con directorio compartido (METRICS_MULTIPROC_DIR) suma todos los workers.
+        """
+        directory = directory if directory is not None else config.METRICS_MULTIPROC_DIR
+        merged = None
+        if directory:
+            self.write_snapshot(directory)
+            merged = self._merge_snapshots(directory)
+
+        lines: List[str] = []
+        for metric in self._all():
+            lines.extend(metric.header())
+            if merged is None:
+                lines.extend(metric.samples())
+            else:
+                lines.extend(metric._format(sorted(merged[metric.name].items()), metric.merged_labelnames()))
+        return "\n".join(lines) + "\n"
+
+
+CONTENT_TYPE_LATEST = "text/plain; version=0.0.4; charset=utf-8"
+
+# Foto de este proceso en METRICS_MULTIPROC_DIR (el inicio distingue pids reutilizados)
+_SNAPSHOT_FILE = f"metrics_{os.getpid()}_{int(time.time() * 1000)}.json"
+
+# Registro global del proceso
+REGISTRY = MetricsRegistry()
+
+
+# ===== MÉTRICAS DE LA APLICACIÓN =====
+
+HTTP_REQUEST_DURATION = REGISTRY.histogram(
+    "neos_http_request_duration_seconds",
+    "Latencia de requests HTTP por ruta (template) y método",
+    ("method", "route", "status"),
+)
+
+HTTP_REQUESTS_IN_PROGRESS = REGISTRY.gauge(
+    "neos_http_requests_in_progress",
+    "Requests HTTP en curso",
+)
+
+SALES_CREATED = REGISTRY.counter(
+    "neos_sales_created_total",
+    "Ventas creadas por tenant",
+    ("tenant_id",),
+)
+
+CACHE_REQUESTS = REGISTRY.counter(
+    "neos_cache_requests_total",
+    "Consultas a caches en proceso por resultado (hit/miss)",
+    ("cache", "result"),
+)
+
+CACHE_INVALIDATIONS = REGISTRY.counter(
+    "neos_cache_invalidations_total",
+    "Avisos de invalidación recibidos de otros workers por espacio de nombres",
+    ("namespace",),
+)
+
+
+AUDIT_RECORDS = REGISTRY.counter(
+    "neos_audit_records_total",
+    "Registros de auditoría escritos por destino (db/fallback)",
+    ("destination",),
+)
+
+AUDIT_FLUSH_DURATION = REGISTRY.histogram(
+    "neos_audit_flush_duration_seconds",
+    "Duración de cada lote de auditoría escrito en la base",
+)
+
+AUDIT_FLUSH_FAILURES = REGISTRY.counter(
+    "neos_audit_flush_failures_total",
+    "Lotes de auditoría que no pudieron escribirse en la base (quedaron en el respaldo)",
+)
+
+
+def _cache_hit_ratios():
+    """Calcula hit ratio por cache a partir de CACHE_REQUESTS"""
+    totals: Dict[str, List[float]] = {}
+    with CACHE_REQUESTS._lock:
+        items = list(CACHE_REQUESTS._values.items())
+    for (cache, result), value in items:
+        hits_total = totals.setdefault(cache, [0.0, 0.0])
+        if result == "hit":
+            hits_total[0] += value
+        hits_total[1] += value
+    return [((cache,), hits / total) for cache, (hits, total) in totals.items() if total]
+
+
+CACHE_HIT_RATIO = REGISTRY.gauge(
+    "neos_cache_hit_ratio",
+    "Proporción de hits sobre el total de consultas por cache",
+    ("cache",),
+    callback=_cache_hit_ratios,
+    # Una proporción no se suma entre workers
+    multiprocess_mode="all",
+)
+
+
+def record_cache_access(cache: str, hit: bool):
+    """Registra un acceso a cache (usar desde cualquier cache en proceso)"""
+    CACHE_REQUESTS.inc(cache=cache, result="hit" if hit else "miss")
+
+
+# Engines cuyo pool se expone en /metrics (nombre -> engine)
+_POOL_ENGINES: Dict[str, object] = {}
+
+
+def _pool_reader(attr: str):
+    def _read():
+        values = []
+        for name, engine in list(_POOL_ENGINES.items()):
+            method = getattr(engine.pool, attr, None)
+            if callable(method):
+                values.append(((name,), method()))
+        return values
+    return _read
+
+
+DB_POOL_CHECKED_OUT = REGISTRY.gauge(
+    "neos_db_pool_checked_out",
+    "Conexiones del pool en uso",
+    ("engine",),
+    callback=_pool_reader("checkedout"),
+)
+
+DB_POOL_OVERFLOW = REGISTRY.gauge(
+    "neos_db_pool_overflow",
+    "Conexiones abiertas por encima de pool_size",
+    ("engine",),
+    callback=_pool_reader("overflow"),
+)
+
+DB_POOL_SIZE = REGISTRY.gauge(
+    "neos_db_pool_size",
+    "Tamaño configurado del pool",
+    ("engine",),
+    callback=_pool_reader("size"),
+)
+
+
+def register_pool_metrics(engine, name: str = "primary"):
+    """
+    Expone el estado del pool de conexiones del engine.
+    Los valores se leen en cada scrape; no hay costo en el camino de la request.
+    """
+    _POOL_ENGINES[name] = engine
+
+
+async def metrics_snapshot_loop(interval_seconds: int = None):
+    """
+    Tarea de fondo: deja la foto del registro en METRICS_MULTIPROC_DIR cada
+    METRICS_SNAPSHOT_SECONDS, para que /metrics de cualquier worker la sume.
+    Al cancelarse (apagado o reciclado) escribe la última.
+    """
+    directory = config.METRICS_MULTIPROC_DIR
+    if not directory:
+        return
+    interval_seconds = interval_seconds or config.METRICS_SNAPSHOT_SECONDS
+    os.makedirs(directory, exist_ok=True)
+    try:
+        while True:
+            try:
+                await asyncio.to_thread(REGISTRY.write_snapshot, directory)
+            except Exception as e:
+                log.error(f"Error escribiendo la foto de métricas: {e}")
+            await asyncio.sleep(interval_seconds)
+    finally:
+        try:
+            REGISTRY.write_snapshot(directory)
+        except Exception as e:
+            log.error(f"Error escribiendo la foto de métricas: {e}")
+
+
+class MetricsMiddleware:
+    """
+    Middleware ASGI que mide latencia por template de ruta y requests en curso.
+    Se usa el template (/api/v1/sales/{sale_id}) y no la URL real para
+    mantener acotada la cardinalidad de labels.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status_code[0] = message["status"]
+            await send(message)
+
+        HTTP_REQUESTS_IN_PROGRESS.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            HTTP_REQUESTS_IN_PROGRESS.dec()
+            route = scope.get("route")
+            HTTP_REQUEST_DURATION.observe(
+                elapsed,
+                method=scope.get("method", ""),
+                route=getattr(route, "path", "unmatched"),
+                status=status_code[0],
+            )
@@ -0,0 +1,102 @@
+# neos_core/services/money.py
+"""
+Aritmética monetaria de punto fijo con enteros.
+
+Escalas (coinciden con las columnas Numeric del modelo):
+- importes:    centavos                  (Numeric(10, 2)  -> x 10^2)
+- cantidades:  diezmilésimas de unidad   (Numeric(10, 4)  -> x 10^4)
+- tasas:       centésimas de porcentaje  (Numeric(5, 2) % -> x 10^2, 21.00% = 2100)
+
+Las operaciones trabajan con int de Python (precisión arbitraria, sin
+contexto de Decimal) y redondean una sola vez, de forma explícita, con los
+mismos modos que el módulo decimal (ROUND_HALF_UP, ROUND_HALF_EVEN, ...).
+Los resultados son idénticos a cuantizar con Decimal (ver test_money.py).
+"""
+from decimal import (
+    Decimal, ROUND_CEILING, ROUND_DOWN, ROUND_FLOOR, ROUND_HALF_DOWN, ROUND_HALF_EVEN, ROUND_HALF_UP, ROUND_UP
+)
+
+CENTS_SCALE = 100
+QTY_SCALE = 10_000
+RATE_SCALE = 100
+# Un porcentaje en centésimas: base * tasa / (100 * 100)
+PERCENT_SCALE = 100 * RATE_SCALE
+
+DEFAULT_ROUNDING = ROUND_HALF_UP
+ROUNDING_MODES = (
+    ROUND_HALF_UP, ROUND_HALF_EVEN, ROUND_HALF_DOWN, ROUND_UP, ROUND_DOWN, ROUND_CEILING, ROUND_FLOOR
+)
+
+_CENT = Decimal("0.01")
+
+
+def div_round(numerator: int, denominator: int, rounding: str = DEFAULT_ROUNDING) -> int:
+    """División entera con redondeo explícito (denominator > 0)"""
+    quotient, remainder = divmod(numerator, denominator)  # remainder >= 0 (floor)
+    if remainder == 0 or rounding == ROUND_FLOOR:
+        return quotient
+    if rounding == ROUND_CEILING:
+        return quotient + 1
+
+    negative = numerator < 0
+    if rounding == ROUND_DOWN:  # hacia cero
+        return quotient + 1 if negative else quotient
+    if rounding == ROUND_UP:  # lejos del cero
+        return quotient if negative else quotient + 1
+
+    twice = 2 * remainder
+    if twice > denominator:
+        return quotient + 1
+    if twice < denominator:
+        return quotient
+
+    # Empate exacto
+    if rounding == ROUND_HALF_UP:
+        return quotient if negative else quotient + 1
+    if rounding == ROUND_HALF_DOWN:
+        return quotient + 1 if negative else quotient
+    if rounding == ROUND_HALF_EVEN:
+        return quotient + (quotient & 1)
+    raise ValueError(f"Modo de redondeo no soportado: {rounding}")
+
+
+def _to_scaled(value, scale: int, rounding: str) -> int:
+    if isinstance(value, int):
+        return value * scale
+    if not isinstance(value, Decimal):
+        value = Decimal(str(value))
+    scaled = value * scale
+    integral = int(scaled)
+    if scaled == integral:
+        return integral
+    return int(scaled.to_integral_value(rounding=rounding))
+
+
+def to_cents(value, rounding: str = DEFAULT_ROUNDING) -> int:
+    """Decimal -> centavos (redondea si trae más de 2 decimales)"""
+    return _to_scaled(value, CENTS_SCALE, rounding)
+
+
+def to_qty(value, rounding: str = DEFAULT_ROUNDING) -> int:
+    """Decimal -> cantidad escalada x 10^4"""
+    return _to_scaled(value, QTY_SCALE, rounding)
+
+
+def to_rate(value, rounding: str = DEFAULT_ROUNDING) -> int:
+    """Porcentaje Decimal -> centésimas de porcentaje (21.00 -> 2100)"""
+    return _to_scaled(value, RATE_SCALE, rounding)
+
+
+def from_cents(cents: int) -> Decimal:
+    """Centavos -> Decimal con exactamente 2 decimales (0 -> Decimal('0.00'))"""
+    return Decimal(cents) * _CENT
+
+
+def line_amount(qty: int, unit_price_cents: int, rounding: str = DEFAULT_ROUNDING) -> int:
+    """cantidad (x 10^4) * precio (centavos) -> importe en centavos"""
+    return div_round(qty * unit_price_cents, QTY_SCALE, rounding)
+
+
+def percent_of(base_cents: int, rate: int, rounding: str = DEFAULT_ROUNDING) -> int:
+    """base (centavos) * tasa (centésimas de %) -> centavos"""
+    return div_round(base_cents * rate, PERCENT_SCALE, rounding)
@@ -0,0 +1,302 @@
+# neos_core/services/outbox.py
+"""
+Outbox transaccional y relay de eventos de negocio.
+
+Los cambios que interesan a sistemas externos (ERP, fidelización) escriben
+un OutboxEvent con record() en la misma transacción que el cambio: si la
+venta se confirma, el evento existe; si se revierte, tampoco queda evento.
+Las transiciones de stock bajo se registran solas (database/models/product_model.py).
+
+El relay toma los eventos pendientes de cada tenant en orden de id, les
+asigna el siguiente `sequence` del tenant (OutboxCursor, bloqueado con
+SKIP LOCKED: un solo relay por tenant a la vez, varios tenants en paralelo)
+y los entrega al sink configurado. Si el sink falla no se marca nada y el
+lote se reintenta igual en la próxima pasada (entrega al menos una vez; los
+consumidores deduplican por tenant + sequence).
+
+Sinks (OUTBOX_SINK): "none" (solo el stream NDJSON de /events), "file",
+"webhook" o "queue" (cola en proceso, reemplazo local de un broker).
+
+Corre en segundo plano dentro de la API (ver main.py) o por línea de comandos:
+    python -m neos_core.services.outbox
+"""
+import asyncio
+import json
+import logging
+import os
+import queue
+from datetime import datetime
+from decimal import Decimal
+from typing import Iterable, List, Optional
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from neos_core.database import config
+from neos_core.database.models import OutboxCursor, OutboxEvent
+from neos_core.database.sharding import shard_map_watch, shard_router
+from neos_core.services.events import notify_outbox, outbox_broker
+
+log = logging.getLogger(__name__)
+
+SALE_CREATED = "sale.created"
+SALE_CANCELLED = "sale.cancelled"
+PRODUCT_CREATED = "product.created"
+PRODUCT_UPDATED = "product.updated"
+PRODUCT_DELETED = "product.deleted"
+STOCK_LOW = "stock.low"
+STOCK_RESTORED = "stock.restored"
+
+_SALE_FIELDS = (
+    "id", "invoice_number", "status", "point_of_sale_id", "client_id", "user_id", "currency_id",
+    "payment_method", "subtotal", "discount_amount", "tax_amount", "total", "created_at",
+)
+_SALE_ITEM_FIELDS = (
+    "product_id", "variant_id", "quantity", "unit_price", "discount_amount", "tax_amount", "total",
+)
+_PRODUCT_FIELDS = ("id", "sku", "name", "price", "stock", "tax_rate", "is_active")
+
+
+# ===== PAYLOADS =====
+
+def _encode(value):
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def _fields(source, names) -> dict:
+    if isinstance(source, dict):
+        return {name: _encode(source.get(name)) for name in names}
+    return {name: _encode(getattr(source, name)) for name in names}
+
+
+def sale_payload(sale, items: Iterable) -> dict:
+    """`items`: SaleDetail o los dicts que create_sale inserta"""
+    payload = _fields(sale, _SALE_FIELDS)
+    payload["items"] = [_fields(item, _SALE_ITEM_FIELDS) for item in items]
+    return payload
+
+
+def product_payload(product) -> dict:
+    return _fields(product, _PRODUCT_FIELDS)
+
+
+def record(db: Session, tenant_id: int, event_type: str, entity_id: int, payload: dict):
+    """Agrega el evento a la transacción en curso (sin commit)"""
+    db.add(OutboxEvent(tenant_id=tenant_id, event_type=event_type, entity_id=entity_id, payload=payload))
+
+
+def event_to_record(event: OutboxEvent, sequence: Optional[int] = None) -> dict:
+    """Forma pública del evento (sink y stream NDJSON)"""
+    return {
+        "sequence": sequence if sequence is not None else event.sequence,
+        "id": event.id,
+        "tenant_id": event.tenant_id,
+        "type": event.event_type,
+        "entity_id": event.entity_id,
+        "occurred_at": _encode(event.created_at),
+        "payload": event.payload,
+    }
+
+
+# ===== SINKS =====
+
+class OutboxSink:
+    """Destino de los eventos publicados. publish() debe fallar con excepción si no entregó"""
+
+    def publish(self, events: List[dict]):
+        raise NotImplementedError
+
+
+class NullSink(OutboxSink):
+    """Sin destino externo: los consumidores leen el stream de /events"""
+
+    def publish(self, events: List[dict]):
+        pass
+
+
+class FileSink(OutboxSink):
+    """Agrega los eventos como NDJSON a un archivo (durable antes de confirmar)"""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def publish(self, events: List[dict]):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write("".join(json.dumps(e, separators=(",", ":")) + "\n" for e in events))
+            f.flush()
+            os.fsync(f.fileno())
+
+
+class WebhookSink(OutboxSink):
+    """POST del lote en NDJSON a una URL; cualquier respuesta no 2xx es un fallo"""
+
+    def __init__(self, url: str, timeout: float = 10.0):
+        import httpx  # dependencia opcional, solo para este sink
+        self.url = url
+        self._client = httpx.Client(timeout=timeout)
+
+    def publish(self, events: List[dict]):
+        body = "".join(json.dumps(e, separators=(",", ":")) + "\n" for e in events)
+        response = self._client.post(self.url, content=body, headers={"Content-Type": "application/x-ndjson"})
+        response.raise_for_status()
+
+
+class QueueSink(OutboxSink):
+    """Cola en proceso: reemplazo local de un broker de mensajes (desarrollo y tests)"""
+
+    def __init__(self, maxsize: int = 0):
+        self.queue: "queue.Queue[dict]" = queue.Queue(maxsize=maxsize)
+
+    def publish(self, events: List[dict]):
+        for event in events:
+            self.queue.put_nowait(event)
+
+    def drain(self) -> List[dict]:
+        events = []
+        while True:
+            try:
+                events.append(self.queue.get_nowait())
+            except queue.Empty:
+                return events
+
+
+def build_sink(kind: Optional[str] = None) -> OutboxSink:
+    kind = (kind or config.OUTBOX_SINK).lower()
+    if kind == "file":
+        return FileSink(config.OUTBOX_FILE_PATH)
+    if kind == "webhook":
+        if not config.OUTBOX_WEBHOOK_URL:
+            raise ValueError("OUTBOX_SINK=webhook requiere OUTBOX_WEBHOOK_URL")
+        return WebhookSink(config.OUTBOX_WEBHOOK_URL)
+    if kind == "queue":
+        return QueueSink()
+    if kind == "none":
+        return NullSink()
+    raise ValueError(f"OUTBOX_SINK desconocido: {kind}")
+
+
+# ===== RELAY =====
+
+def _lock_cursor(db: Session, tenant_id: int) -> Optional[OutboxCursor]:
+    """Cursor del tenant bloqueado, o None si otro relay lo está publicando"""
+    cursor = (
+        db.query(OutboxCursor)
+        .filter_by(tenant_id=tenant_id)
+        .with_for_update(skip_locked=True)
+        .first()
+    )
+    if cursor is not None:
+        return cursor
+    if db.query(OutboxCursor.tenant_id).filter_by(tenant_id=tenant_id).first() is not None:
+        return None
+
+    try:
+        with db.begin_nested():
+            db.add(OutboxCursor(tenant_id=tenant_id, last_sequence=0))
+    except IntegrityError:
+        return None
+    return db.query(OutboxCursor).filter_by(tenant_id=tenant_id).with_for_update().one()
+
+
+def relay_tenant(db: Session, tenant_id: int, sink: OutboxSink, batch_size: Optional[int] = None) -> int:
+    """Publica un lote de eventos pendientes del tenant. Devuelve cuántos publicó"""
+    batch_size = batch_size or config.OUTBOX_BATCH_SIZE
+    cursor = _lock_cursor(db, tenant_id)
+    if cursor is None:
+        db.commit()
+        return 0
+
+    events = (
+        db.query(OutboxEvent)
+        .filter(OutboxEvent.tenant_id == tenant_id, OutboxEvent.sequence.is_(None))
+        .order_by(OutboxEvent.id)
+        .limit(batch_size)
+        .all()
+    )
+    if not events:
+        db.commit()
+        return 0
+
+    first = cursor.last_sequence + 1
+    records = [event_to_record(event, first + i) for i, event in enumerate(events)]
+    try:
+        sink.publish(records)
+    except Exception as e:
+        # Nada se marcó: el mismo lote (mismos sequence) se reintenta en la próxima pasada
+        log.warning(f"Outbox: no se pudo publicar el lote del tenant {tenant_id}: {e}")
+        db.commit()
+        return 0
+
+    now = datetime.utcnow()
+    for event, data in zip(events, records):
+        event.sequence = data["sequence"]
+        event.published_at = now
+    cursor.last_sequence = records[-1]["sequence"]
+    # Despierta a los streams que siguen al tenant en los demás workers (con el commit)
+    notify_outbox(db, tenant_id, cursor.last_sequence)
+    db.commit()
+
+    # ... y en este proceso
+    outbox_broker.publish(tenant_id, {"sequence": records[-1]["sequence"]})
+    return len(records)
+
+
+def relay_pending(db: Session, sink: Optional[OutboxSink] = None, batch_size: Optional[int] = None) -> int:
+    """Publica los eventos pendientes de todos los tenants. Devuelve cuántos publicó"""
+    sink = sink or default_sink()
+    batch_size = batch_size or config.OUTBOX_BATCH_SIZE
+    tenant_ids = [
+        tenant_id for (tenant_id,) in
+        db.query(OutboxEvent.tenant_id).filter(OutboxEvent.sequence.is_(None)).distinct()
+    ]
+    db.commit()
+
+    total = 0
+    for tenant_id in tenant_ids:
+        while True:
+            published = relay_tenant(db, tenant_id, sink, batch_size)
+            total += published
+            if published < batch_size:
+                break
+    return total
+
+
+_default_sink: Optional[OutboxSink] = None
+
+
+def default_sink() -> OutboxSink:
+    global _default_sink
+    if _default_sink is None:
+        _default_sink = build_sink()
+    return _default_sink
+
+
+def relay_all_shards(sink: Optional[OutboxSink] = None) -> int:
+    total = 0
+    for shard_name in shard_router.shard_names:
+        with shard_router.sessionmaker_for(shard_name)() as db:
+            total += relay_pending(db, sink)
+    return total
+
+
+async def outbox_relay_loop(interval_seconds: int = None):
+    """Tarea de fondo: publica el outbox cada OUTBOX_RELAY_INTERVAL_SECONDS"""
+    interval_seconds = interval_seconds or config.OUTBOX_RELAY_INTERVAL_SECONDS
+    while True:
+        try:
+            await asyncio.to_thread(relay_all_shards)
+        except Exception as e:
+            log.error(f"Error publicando el outbox: {e}")
+        await asyncio.sleep(interval_seconds)
+
+
+if __name__ == "__main__":
+    with shard_map_watch():
+        print(f"✅ Eventos publicados: {relay_all_shards()}")
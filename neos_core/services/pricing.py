@@ -0,0 +1,419 @@
+# neos_core/services/pricing.py
+"""
+Motor de precios: listas de precios y promociones compiladas en memoria.
+
+Las reglas activas de cada tenant se compilan una vez en un índice
+(TenantRules) con:
+- listas de precios:  {(product_id, variant_id): precio} por lista
+- promociones por producto:  product_id -> reglas
+- promociones por categoría: (clave, valor) de Product.attributes -> reglas
+- combos: product_id de cada componente -> reglas
+
+Evaluar un carrito es una pasada por sus líneas buscando en esos diccionarios
+(sin consultas por regla). Cada línea recibe como máximo una promoción: las
+reglas se aplican en orden de prioridad y cada una toma las líneas que
+todavía nadie tomó.
+
+Cuando una regla cambia, crud/pricing_crud.py actualiza solo esa entrada del
+índice (refresh_price_list / refresh_promotion) y avisa por el bus de
+invalidación; los demás workers descartan el índice del tenant y lo recargan
+en la próxima cotización. PRICING_INDEX_TTL_SECONDS queda como red de
+seguridad (más corto si el listener del bus está caído).
+"""
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from neos_core.database import config
+from neos_core.database.models import PriceList, Promotion
+from neos_core.services import metrics, money
+from neos_core.services.invalidation import invalidation_bus
+
+KIND_PERCENTAGE = "percentage"
+KIND_NXM = "nxm"
+KIND_BUNDLE = "bundle"
+PROMOTION_KINDS = (KIND_PERCENTAGE, KIND_NXM, KIND_BUNDLE)
+
+ZERO = Decimal("0.00")
+
+# Espacio de nombres en el bus de invalidación (clave: tenant_id)
+INVALIDATION_NAMESPACE = "pricing"
+
+
+# ===== REGLAS COMPILADAS =====
+
+@dataclass(slots=True)
+class CompiledPriceList:
+    id: int
+    client_id: Optional[int]
+    point_of_sale_id: Optional[int]
+    priority: int
+    prices: Dict[Tuple[int, Optional[int]], Decimal]
+
+    def specificity(self) -> int:
+        return 2 * (self.client_id is not None) + (self.point_of_sale_id is not None)
+
+
+@dataclass(slots=True)
+class CompiledPromotion:
+    id: int
+    kind: str
+    priority: int
+    point_of_sale_id: Optional[int]
+    starts_at: Optional[datetime]
+    ends_at: Optional[datetime]
+    product_id: Optional[int] = None
+    attribute: Optional[Tuple[str, str]] = None
+    rate: int = 0  # centésimas de % (money.to_rate)
+    buy_quantity: int = 0
+    pay_quantity: int = 0
+    bundle: Dict[int, Decimal] = field(default_factory=dict)
+    bundle_price_cents: int = 0
+
+    def applies(self, now: datetime, point_of_sale_id: Optional[int]) -> bool:
+        if self.point_of_sale_id is not None and self.point_of_sale_id != point_of_sale_id:
+            return False
+        if self.starts_at is not None and now < self.starts_at:
+            return False
+        return self.ends_at is None or now < self.ends_at
+
+    def order_key(self):
+        return -self.priority, self.id
+
+
+def compile_price_list(price_list: PriceList) -> CompiledPriceList:
+    return CompiledPriceList(
+        id=price_list.id,
+        client_id=price_list.client_id,
+        point_of_sale_id=price_list.point_of_sale_id,
+        priority=price_list.priority,
+        prices={(item.product_id, item.variant_id): item.price for item in price_list.items},
+    )
+
+
+def compile_promotion(promotion: Promotion) -> CompiledPromotion:
+    compiled = CompiledPromotion(
+        id=promotion.id,
+        kind=promotion.kind,
+        priority=promotion.priority,
+        point_of_sale_id=promotion.point_of_sale_id,
+        starts_at=promotion.starts_at,
+        ends_at=promotion.ends_at,
+        product_id=promotion.product_id,
+    )
+    if promotion.attribute_key is not None:
+        compiled.attribute = (promotion.attribute_key, promotion.attribute_value)
+    if promotion.kind == KIND_PERCENTAGE:
+        compiled.rate = money.to_rate(promotion.percent)
+    elif promotion.kind == KIND_NXM:
+        compiled.buy_quantity = promotion.buy_quantity
+        compiled.pay_quantity = promotion.pay_quantity
+    elif promotion.kind == KIND_BUNDLE:
+        compiled.bundle = {int(c["product_id"]): Decimal(str(c["quantity"])) for c in promotion.bundle_items}
+        compiled.bundle_price_cents = money.to_cents(promotion.bundle_price)
+    return compiled
+
+
+# ===== EVALUACIÓN =====
+
+@dataclass(slots=True)
+class CartLine:
+    """Línea a cotizar: `base_price` es el precio sin lista (variante o producto)"""
+    product_id: int
+    variant_id: Optional[int]
+    quantity: Decimal
+    base_price: Decimal
+    attributes: Optional[dict] = None
+
+
+@dataclass(slots=True)
+class PricedLine:
+    unit_price: Decimal
+    discount: Decimal = ZERO
+    promotion_id: Optional[int] = None
+
+
+@dataclass
+class PricingResult:
+    lines: List[PricedLine]
+    price_list_id: Optional[int] = None
+    discount_amount: Decimal = ZERO
+
+
+class TenantRules:
+    """Índice compilado de las reglas activas de un tenant"""
+
+    def __init__(self):
+        self.loaded_at = time.monotonic()
+        self.price_lists: Dict[int, CompiledPriceList] = {}
+        self.promotions: Dict[int, CompiledPromotion] = {}
+        self.by_product: Dict[int, Dict[int, CompiledPromotion]] = {}
+        self.by_attribute: Dict[Tuple[str, str], Dict[int, CompiledPromotion]] = {}
+
+    # --- mantenimiento incremental ---
+    # Copia y reemplazo (no se mutan los diccionarios en uso): una evaluación
+    # en curso en otro hilo sigue viendo un índice consistente.
+
+    def set_price_list(self, compiled: Optional[CompiledPriceList], price_list_id: int):
+        price_lists = dict(self.price_lists)
+        price_lists.pop(price_list_id, None)
+        if compiled is not None:
+            price_lists[price_list_id] = compiled
+        self.price_lists = price_lists
+
+    def set_promotion(self, compiled: Optional[CompiledPromotion], promotion_id: int):
+        indexes = {"by_product": dict(self.by_product), "by_attribute": dict(self.by_attribute)}
+        promotions = dict(self.promotions)
+
+        previous = promotions.pop(promotion_id, None)
+        if previous is not None:
+            for name, key in self._keys(previous):
+                bucket = {k: v for k, v in indexes[name].get(key, {}).items() if k != promotion_id}
+                if bucket:
+                    indexes[name][key] = bucket
+                else:
+                    indexes[name].pop(key, None)
+        if compiled is not None:
+            for name, key in self._keys(compiled):
+                indexes[name][key] = {**indexes[name].get(key, {}), promotion_id: compiled}
+            promotions[promotion_id] = compiled
+
+        self.by_product = indexes["by_product"]
+        self.by_attribute = indexes["by_attribute"]
+        self.promotions = promotions
+
+    def index_promotion(self, compiled: CompiledPromotion):
+        """Agrega la promoción mutando los índices: solo para un índice que todavía no se publicó"""
+        for name, key in self._keys(compiled):
+            getattr(self, name).setdefault(key, {})[compiled.id] = compiled
+        self.promotions[compiled.id] = compiled
+
+    @staticmethod
+    def _keys(promotion: CompiledPromotion):
+        """(nombre del índice, clave) donde figura la promoción"""
+        if promotion.kind == KIND_BUNDLE:
+            return [("by_product", product_id) for product_id in promotion.bundle]
+        if promotion.product_id is not None:
+            return [("by_product", promotion.product_id)]
+        if promotion.attribute is not None:
+            return [("by_attribute", promotion.attribute)]
+        return []
+
+    # --- evaluación ---
+
+    def select_price_list(self, client_id: Optional[int], point_of_sale_id: Optional[int]):
+        best = None
+        for price_list in self.price_lists.values():
+            if price_list.client_id is not None and price_list.client_id != client_id:
+                continue
+            if price_list.point_of_sale_id is not None and price_list.point_of_sale_id != point_of_sale_id:
+                continue
+            key = (price_list.specificity(), price_list.priority, -price_list.id)
+            if best is None or key > best[0]:
+                best = (key, price_list)
+        return best[1] if best else None
+
+    def evaluate(
+            self,
+            lines: List[CartLine],
+            client_id: Optional[int] = None,
+            point_of_sale_id: Optional[int] = None,
+            now: Optional[datetime] = None
+    ) -> PricingResult:
+        now = now or datetime.utcnow()
+        price_list = self.select_price_list(client_id, point_of_sale_id)
+        prices = price_list.prices if price_list else {}
+
+        # Una pasada: precio de lista y promociones candidatas de cada línea
+        priced: List[PricedLine] = []
+        cents: List[int] = []
+        candidates: Dict[int, Tuple[CompiledPromotion, List[int]]] = {}
+        for position, line in enumerate(lines):
+            unit_price = prices.get((line.product_id, line.variant_id))
+            if unit_price is None:
+                unit_price = prices.get((line.product_id, None), line.base_price)
+            priced.append(PricedLine(unit_price=unit_price))
+            cents.append(money.to_cents(unit_price))
+
+            matches = dict(self.by_product.get(line.product_id, ()))
+            for key, value in (line.attributes or {}).items():
+                if isinstance(value, (str, int, float)):
+                    matches.update(self.by_attribute.get((key, str(value)), ()))
+            for promotion_id, promotion in matches.items():
+                if promotion.applies(now, point_of_sale_id):
+                    candidates.setdefault(promotion_id, (promotion, []))[1].append(position)
+
+        # Cada regla, por prioridad, toma las líneas que sigan libres
+        taken = set()
+        for promotion, positions in sorted(candidates.values(), key=lambda c: c[0].order_key()):
+            positions = [p for p in positions if p not in taken]
+            if not positions:
+                continue
+            discounts = _apply(promotion, positions, lines, cents)
+            for position, discount_cents in discounts.items():
+                taken.add(position)
+                priced[position].discount = money.from_cents(discount_cents)
+                priced[position].promotion_id = promotion.id
+
+        total = sum((line.discount for line in priced), ZERO)
+        return PricingResult(priced, price_list.id if price_list else None, total)
+
+
+def _line_cents(line: CartLine, unit_cents: int) -> int:
+    return money.line_amount(money.to_qty(line.quantity), unit_cents)
+
+
+def _apply(promotion: CompiledPromotion, positions: List[int], lines: List[CartLine], cents: List[int]) -> Dict[int, int]:
+    """Descuento en centavos por posición de línea ({} si la regla no aplica)"""
+    if promotion.kind == KIND_PERCENTAGE:
+        return {
+            p: money.percent_of(_line_cents(lines[p], cents[p]), promotion.rate)
+            for p in positions
+        }
+
+    if promotion.kind == KIND_NXM:
+        units = sum(int(lines[p].quantity) for p in positions)
+        free = units // promotion.buy_quantity * (promotion.buy_quantity - promotion.pay_quantity)
+        discounts = {}
+        # Las unidades gratis son las más baratas
+        for p in sorted(positions, key=lambda p: cents[p]):
+            if free <= 0:
+                break
+            units_here = min(free, int(lines[p].quantity))
+            if units_here:
+                discounts[p] = units_here * cents[p]
+                free -= units_here
+        return discounts
+
+    if promotion.kind == KIND_BUNDLE:
+        return _apply_bundle(promotion, positions, lines, cents)
+    return {}
+
+
+def _apply_bundle(promotion: CompiledPromotion, positions: List[int], lines: List[CartLine], cents: List[int]):
+    available: Dict[int, Decimal] = {}
+    for p in positions:
+        available[lines[p].product_id] = available.get(lines[p].product_id, 0) + lines[p].quantity
+    if set(available) != set(promotion.bundle):
+        return {}
+
+    sets = min(int(available[product_id] // quantity) for product_id, quantity in promotion.bundle.items())
+    if sets <= 0:
+        return {}
+
+    # Unidades que consume el combo, línea por línea, y su valor a precio normal
+    remaining = {product_id: quantity * sets for product_id, quantity in promotion.bundle.items()}
+    consumed: Dict[int, int] = {}
+    for p in positions:
+        product_id = lines[p].product_id
+        quantity = min(remaining[product_id], lines[p].quantity)
+        if quantity > 0:
+            remaining[product_id] -= quantity
+            consumed[p] = money.line_amount(money.to_qty(quantity), cents[p])
+
+    regular = sum(consumed.values())
+    discount = regular - promotion.bundle_price_cents * sets
+    if discount <= 0:
+        return {}
+
+    # Reparto proporcional al valor consumido; el resto de redondeo va a la última línea
+    discounts = {}
+    assigned = 0
+    last = list(consumed)[-1]
+    for p, value in consumed.items():
+        share = discount - assigned if p == last else money.div_round(discount * value, regular)
+        discounts[p] = share
+        assigned += share
+    return discounts
+
+
+# ===== CACHÉ POR TENANT =====
+
+def load_tenant_rules(db: Session, tenant_id: int) -> TenantRules:
+    # Índice nuevo, todavía sin publicar: se arma en el lugar (sin copias por regla)
+    rules = TenantRules()
+    price_lists = db.query(PriceList).filter_by(tenant_id=tenant_id, is_active=True).all()
+    rules.price_lists = {price_list.id: compile_price_list(price_list) for price_list in price_lists}
+    for promotion in db.query(Promotion).filter_by(tenant_id=tenant_id, is_active=True):
+        rules.index_promotion(compile_promotion(promotion))
+    return rules
+
+
+class PricingIndex:
+    """Índices compilados por tenant, con recarga por TTL y parches incrementales"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._rules: Dict[int, TenantRules] = {}
+
+    def get(self, db: Session, tenant_id: int) -> TenantRules:
+        with self._lock:
+            rules = self._rules.get(tenant_id)
+        hit = rules is not None and (
+            time.monotonic() - rules.loaded_at <= invalidation_bus.max_age(config.PRICING_INDEX_TTL_SECONDS)
+        )
+        metrics.record_cache_access("pricing_index", hit=hit)
+        if not hit:
+            rules = load_tenant_rules(db, tenant_id)
+            with self._lock:
+                self._rules[tenant_id] = rules
+        return rules
+
+    def refresh_price_list(self, db: Session, tenant_id: int, price_list_id: int):
+        """Recompila una lista (o la quita si ya no está activa)"""
+        with self._lock:
+            rules = self._rules.get(tenant_id)
+        if rules is None:
+            return
+        price_list = db.query(PriceList).filter_by(id=price_list_id, tenant_id=tenant_id).first()
+        compiled = compile_price_list(price_list) if price_list is not None and price_list.is_active else None
+        with self._lock:
+            rules.set_price_list(compiled, price_list_id)
+
+    def refresh_promotion(self, db: Session, tenant_id: int, promotion_id: int):
+        """Recompila una promoción (o la quita si ya no está activa)"""
+        with self._lock:
+            rules = self._rules.get(tenant_id)
+        if rules is None:
+            return
+        promotion = db.query(Promotion).filter_by(id=promotion_id, tenant_id=tenant_id).first()
+        compiled = compile_promotion(promotion) if promotion is not None and promotion.is_active else None
+        with self._lock:
+            rules.set_promotion(compiled, promotion_id)
+
+    def invalidate(self, tenant_id: Optional[int] = None):
+        with self._lock:
+            if tenant_id is None:
+                self._rules.clear()
+            else:
+                self._rules.pop(tenant_id, None)
+
+
+pricing_index = PricingIndex()
+
+
+def notify_change(db: Session, tenant_id: int):
+    """Avisa a los demás workers que cambiaron las reglas del tenant (sale con el commit)"""
+    invalidation_bus.notify(db, INVALIDATION_NAMESPACE, tenant_id)
+
+
+# Cambios confirmados por otros workers
+invalidation_bus.subscribe(
+    INVALIDATION_NAMESPACE,
+    lambda key: pricing_index.invalidate(None if key is None else int(key))
+)
+
+
+def price_cart(
+        db: Session,
+        tenant_id: int,
+        lines: Iterable[CartLine],
+        client_id: Optional[int] = None,
+        point_of_sale_id: Optional[int] = None
+) -> PricingResult:
+    return pricing_index.get(db, tenant_id).evaluate(list(lines), client_id, point_of_sale_id)
@@ -0,0 +1,45 @@
+# neos_core/services/reservations.py
+"""
+Barrido periódico de reservas de stock vencidas.
+
+El stock disponible ya ignora las reservas con expires_at vencido; el barrido
+solo las pasa a `expired` (por lotes) para que el índice de reservas activas
+se mantenga chico. Corre en segundo plano dentro de la API (ver main.py) o
+por línea de comandos:
+    python -m neos_core.services.reservations
+"""
+import asyncio
+import logging
+
+from neos_core.database import config
+from neos_core.database.sharding import shard_map_watch, shard_router
+from neos_core.crud.reservation_crud import expire_reservations
+
+log = logging.getLogger(__name__)
+
+
+def sweep_expired_reservations() -> int:
+    """Vence las reservas expiradas en todos los shards"""
+    total = 0
+    for shard_name in shard_router.shard_names:
+        with shard_router.sessionmaker_for(shard_name)() as db:
+            total += expire_reservations(db)
+    return total
+
+
+async def reservation_sweep_loop(interval_seconds: int = None):
+    """Tarea de fondo: vence reservas cada RESERVATION_SWEEP_INTERVAL_SECONDS"""
+    interval_seconds = interval_seconds or config.RESERVATION_SWEEP_INTERVAL_SECONDS
+    while True:
+        try:
+            expired = await asyncio.to_thread(sweep_expired_reservations)
+            if expired:
+                log.info(f"Reservas de stock vencidas: {expired}")
+        except Exception as e:
+            log.error(f"Error venciendo reservas de stock: {e}")
+        await asyncio.sleep(interval_seconds)
+
+
+if __name__ == "__main__":
+    with shard_map_watch():
+        print(f"✅ Reservas vencidas: {sweep_expired_reservations()}")
@@ -0,0 +1,153 @@
+# neos_core/services/shutdown.py
+"""
+Apagado ordenado de un worker de la API (deploys y reciclado de workers).
+
+Al recibir SIGTERM/SIGINT, install_signal_handlers() llama a drain.begin()
+antes que el handler de uvicorn: desde ese momento ninguna venta nueva
+empieza (503 con Retry-After, el cliente reintenta en otra instancia),
+/ready responde 503 y corre el plazo único de SERVER_GRACEFUL_TIMEOUT_SECONDS.
+uvicorn deja de aceptar conexiones y espera los requests en curso (hasta
+ese mismo plazo, ver neos_core/server.py); después corre el shutdown del
+lifespan, que llama a graceful_shutdown():
+
+1. Cancela las tareas de fondo.
+2. Espera las transacciones de venta que sigan en curso (las de requests a
+   los que uvicorn ya dejó de esperar siguen corriendo en el threadpool),
+   solo lo que quede del plazo contado desde la señal: el apagado completo
+   no pasa de SERVER_GRACEFUL_TIMEOUT_SECONDS más el cierre final.
+3. Deja de escuchar avisos de invalidación, escribe la auditoría que quedó
+   en memoria y cierra los pools de conexiones de todos los engines.
+
+uvicorn cierra el socket apenas llega la señal, así que el balanceador no
+alcanza a ver /ready en 503 antes: en Kubernetes conviene un preStop de unos
+segundos (p. ej. `sleep 5`) para que saque la instancia antes del SIGTERM.
+
+Las funciones que abren transacciones de venta se marcan con @drain.tracked.
+"""
+import asyncio
+import functools
+import logging
+import signal
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterable
+
+from fastapi import HTTPException, status
+
+from neos_core.database import config
+from neos_core.services import metrics
+from neos_core.services.audit import audit_log
+from neos_core.services.invalidation import invalidation_bus
+
+log = logging.getLogger(__name__)
+
+
+class Drain:
+    """Transacciones críticas en curso y bandera de apagado del proceso"""
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._in_flight = 0
+        self.draining = False
+        self.deadline = None  # time.monotonic() en que vence el plazo de apagado
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    @contextmanager
+    def transaction(self):
+        """Marca una transacción en curso; rechaza las nuevas si el proceso se está apagando"""
+        with self._condition:
+            if self.draining:
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="El servidor se está reiniciando, reintentar",
+                    headers={"Retry-After": "1"}
+                )
+            self._in_flight += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._in_flight -= 1
+                self._condition.notify_all()
+
+    def tracked(self, func):
+        """Decorador: la función entera cuenta como transacción en curso"""
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with self.transaction():
+                return func(*args, **kwargs)
+        return wrapper
+
+    def begin(self, timeout: float = None):
+        """Empieza el apagado; el plazo se cuenta desde la primera llamada"""
+        timeout = config.SERVER_GRACEFUL_TIMEOUT_SECONDS if timeout is None else timeout
+        with self._condition:
+            self.draining = True
+            if self.deadline is None:
+                self.deadline = time.monotonic() + timeout
+
+    def remaining(self) -> float:
+        """Segundos que quedan del plazo de apagado"""
+        return max(self.deadline - time.monotonic(), 0.0) if self.deadline is not None else 0.0
+
+    def wait_idle(self, timeout: float) -> bool:
+        """Espera a que terminen las transacciones en curso. False si venció el plazo"""
+        with self._condition:
+            return self._condition.wait_for(lambda: self._in_flight == 0, timeout)
+
+    def reset(self):
+        with self._condition:
+            self.draining = False
+            self.deadline = None
+
+
+# Estado del proceso
+drain = Drain()
+
+SALE_TRANSACTIONS_IN_FLIGHT = metrics.REGISTRY.gauge(
+    "neos_sale_transactions_in_flight",
+    "Transacciones de venta en curso en el proceso",
+    callback=lambda: [((), drain.in_flight)],
+)
+
+
+def install_signal_handlers(timeout: float = None):
+    """
+    Encadena drain.begin() delante de los handlers de SIGTERM/SIGINT que
+    instaló uvicorn. Llamar desde el startup del lifespan (hilo principal).
+    """
+    if threading.current_thread() is not threading.main_thread():
+        return
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        previous = signal.getsignal(signum)
+        if not callable(previous):
+            continue
+
+        def handler(sig, frame, previous=previous):
+            drain.begin(timeout)
+            previous(sig, frame)
+
+        signal.signal(signum, handler)
+
+
+async def graceful_shutdown(background_tasks: Iterable[asyncio.Task], timeout: float = None):
+    """Secuencia de apagado del lifespan (ver docstring del módulo)"""
+    # Sin señal (apagado por el lifespan solamente) el plazo empieza acá
+    drain.begin(timeout)
+
+    background_tasks = list(background_tasks)
+    for task in background_tasks:
+        task.cancel()
+    await asyncio.gather(*background_tasks, return_exceptions=True)
+
+    if not await asyncio.to_thread(drain.wait_idle, drain.remaining()):
+        log.warning(f"Apagado: {drain.in_flight} transacciones de venta siguen en curso al vencer el plazo")
+
+    await asyncio.to_thread(invalidation_bus.stop)
+    # Lo que quedó de auditoría en memoria (si la base no responde, va al respaldo)
+    await asyncio.to_thread(audit_log.flush_all)
+    config.dispose_engines()
@@ -0,0 +1,497 @@
+# neos_core/services/webhooks.py
+"""
+Webhooks por tenant: entrega de eventos del outbox a URLs de los clientes.
+
+El request que origina el evento (venta, cancelación, stock bajo) solo
+escribe su OutboxEvent; todo lo demás ocurre en este worker:
+
+1. Reparto: lee los eventos ya publicados por el relay (sequence > cursor
+   del tenant) y crea una WebhookDelivery por cada endpoint activo suscrito
+   al tipo. El cursor y las entregas se escriben en la misma transacción.
+2. Envío: toma las entregas vencidas (FOR UPDATE SKIP LOCKED, varios workers
+   pueden correr a la vez), las agrupa por endpoint en lotes de batch_size
+   eventos y hace un POST por lote con un httpx.AsyncClient compartido
+   (conexiones reutilizadas). Como mucho max_concurrency lotes en vuelo por
+   endpoint entre todos los workers (la toma cuenta los `delivering` de los
+   demás con la fila del endpoint bloqueada) y WEBHOOK_MAX_CONCURRENCY POSTs
+   por worker: un cliente lento no frena a los demás.
+3. Resultado: 2xx confirma el lote; cualquier otra respuesta o error se
+   reintenta con backoff exponencial y, agotados WEBHOOK_MAX_ATTEMPTS, la
+   entrega queda `dead` (reenviable desde la API).
+
+Cada POST lleva {"events": [...]} con la misma forma que /events/stream y
+la firma `X-Neos-Signature: sha256=<hex>` = HMAC-SHA256(secret,
+"<X-Neos-Timestamp>.<body>"). Entrega al menos una vez y sin orden
+garantizado entre lotes: los receptores deduplican por tenant + sequence.
+
+Corre en segundo plano dentro de la API (ver main.py) o por línea de comandos:
+    python -m neos_core.services.webhooks
+"""
+import asyncio
+import hashlib
+import hmac
+import json
+import logging
+import random
+import secrets
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import func, insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from neos_core.database import config
+from neos_core.database.models import (
+    OutboxCursor, OutboxEvent, WebhookCursor, WebhookDelivery, WebhookEndpoint
+)
+from neos_core.database.sharding import shard_map_watch, shard_router
+from neos_core.services import outbox
+
+log = logging.getLogger(__name__)
+
+STATUS_PENDING = "pending"
+STATUS_DELIVERING = "delivering"
+STATUS_DELIVERED = "delivered"
+STATUS_DEAD = "dead"
+
+# Tipos de evento a los que puede suscribirse un webhook
+EVENT_TYPES = (
+    outbox.SALE_CREATED,
+    outbox.SALE_CANCELLED,
+    outbox.STOCK_LOW,
+    outbox.STOCK_RESTORED,
+    outbox.PRODUCT_CREATED,
+    outbox.PRODUCT_UPDATED,
+    outbox.PRODUCT_DELETED,
+)
+
+SIGNATURE_HEADER = "X-Neos-Signature"
+TIMESTAMP_HEADER = "X-Neos-Timestamp"
+# Plazo de una entrega tomada por un worker antes de que otro la retome
+CLAIM_TIMEOUT = timedelta(minutes=2)
+
+
+def generate_secret() -> str:
+    return secrets.token_hex(32)
+
+
+def sign(secret: str, timestamp: str, body: bytes) -> str:
+    digest = hmac.new(secret.encode(), timestamp.encode() + b"." + body, hashlib.sha256).hexdigest()
+    return f"sha256={digest}"
+
+
+def current_sequence(db: Session, tenant_id: int) -> int:
+    """Último sequence publicado del tenant: un endpoint nuevo arranca desde acá"""
+    last = db.query(OutboxCursor.last_sequence).filter_by(tenant_id=tenant_id).scalar()
+    return last or 0
+
+
+def backoff(attempts: int) -> timedelta:
+    """Espera exponencial con jitter: base * 2^(intentos-1), tope BACKOFF_MAX"""
+    delay = min(
+        config.WEBHOOK_BACKOFF_SECONDS * 2 ** (attempts - 1),
+        config.WEBHOOK_BACKOFF_MAX_SECONDS
+    )
+    return timedelta(seconds=delay * random.uniform(0.5, 1.0))
+
+
+# ===== REPARTO =====
+
+def _lock_cursor(db: Session, tenant_id: int) -> Optional[WebhookCursor]:
+    """Cursor del tenant bloqueado, o None si otro worker lo está repartiendo"""
+    cursor = (
+        db.query(WebhookCursor)
+        .filter_by(tenant_id=tenant_id)
+        .with_for_update(skip_locked=True)
+        .first()
+    )
+    if cursor is not None:
+        return cursor
+    if db.query(WebhookCursor.tenant_id).filter_by(tenant_id=tenant_id).first() is not None:
+        return None
+
+    # Primer reparto del tenant: desde el endpoint más antiguo, no desde el inicio del outbox
+    start = db.query(func.min(WebhookEndpoint.start_sequence)).filter(
+        WebhookEndpoint.tenant_id == tenant_id, WebhookEndpoint.is_active.is_(True)
+    ).scalar() or 0
+    try:
+        with db.begin_nested():
+            db.add(WebhookCursor(tenant_id=tenant_id, last_sequence=start))
+    except IntegrityError:
+        return None
+    return db.query(WebhookCursor).filter_by(tenant_id=tenant_id).with_for_update().one()
+
+
+def fan_out_tenant(db: Session, tenant_id: int, limit: Optional[int] = None) -> Tuple[int, int]:
+    """
+    Reparte un lote de eventos publicados del tenant.
+    Devuelve (eventos leídos, entregas creadas).
+    """
+    limit = limit or config.OUTBOX_BATCH_SIZE
+    cursor = _lock_cursor(db, tenant_id)
+    if cursor is None:
+        db.commit()
+        return 0, 0
+
+    events = (
+        db.query(OutboxEvent.id, OutboxEvent.event_type, OutboxEvent.sequence)
+        .filter(
+            OutboxEvent.tenant_id == tenant_id,
+            OutboxEvent.sequence.isnot(None),
+            OutboxEvent.sequence > cursor.last_sequence
+        )
+        .order_by(OutboxEvent.sequence)
+        .limit(limit)
+        .all()
+    )
+    if not events:
+        db.commit()
+        return 0, 0
+
+    endpoints = (
+        db.query(WebhookEndpoint.id, WebhookEndpoint.event_types, WebhookEndpoint.start_sequence)
+        .filter_by(tenant_id=tenant_id, is_active=True)
+        .all()
+    )
+    now = datetime.utcnow()
+    rows = [
+        {
+            "tenant_id": tenant_id,
+            "endpoint_id": endpoint.id,
+            "event_id": event.id,
+            "event_type": event.event_type,
+            "sequence": event.sequence,
+            "status": STATUS_PENDING,
+            "attempts": 0,
+            "next_attempt_at": now,
+        }
+        for event in events
+        for endpoint in endpoints
+        if event.event_type in endpoint.event_types and event.sequence > endpoint.start_sequence
+    ]
+    if rows:
+        db.execute(insert(WebhookDelivery), rows)
+    cursor.last_sequence = events[-1].sequence
+    db.commit()
+    return len(events), len(rows)
+
+
+def fan_out(db: Session, limit: Optional[int] = None) -> int:
+    """Reparte los eventos nuevos de los tenants con webhooks activos. Devuelve las entregas creadas"""
+    limit = limit or config.OUTBOX_BATCH_SIZE
+    tenant_ids = [
+        tenant_id for (tenant_id,) in
+        db.query(WebhookEndpoint.tenant_id).filter_by(is_active=True).distinct()
+    ]
+    db.commit()
+
+    total = 0
+    for tenant_id in tenant_ids:
+        while True:
+            scanned, created = fan_out_tenant(db, tenant_id, limit)
+            total += created
+            if scanned < limit:
+                break
+    return total
+
+
+# ===== ENVÍO =====
+
+@dataclass(slots=True)
+class _Claimed:
+    id: int
+    endpoint_id: int
+    event_id: int
+
+
+@dataclass(slots=True)
+class _Batch:
+    endpoint_id: int
+    url: str
+    max_concurrency: int
+    body: bytes
+    headers: Dict[str, str]
+    delivery_ids: List[int]
+
+
+@dataclass(slots=True)
+class _Result:
+    ok: bool
+    status_code: Optional[int] = None
+    error: Optional[str] = None
+
+
+def _endpoint_limits(endpoint: WebhookEndpoint) -> Tuple[int, int]:
+    """(batch_size, max_concurrency) del endpoint, con los valores por defecto del worker"""
+    return (
+        endpoint.batch_size or config.WEBHOOK_BATCH_SIZE,
+        endpoint.max_concurrency or config.WEBHOOK_ENDPOINT_CONCURRENCY
+    )
+
+
+def _in_flight(db: Session, now: datetime) -> Dict[int, int]:
+    """Entregas tomadas por algún worker y todavía vigentes, por endpoint"""
+    return dict(
+        db.query(WebhookDelivery.endpoint_id, func.count())
+        .filter(
+            WebhookDelivery.status == STATUS_DELIVERING,
+            WebhookDelivery.next_attempt_at > now
+        )
+        .group_by(WebhookDelivery.endpoint_id)
+        .all()
+    )
+
+
+def _room(endpoint: WebhookEndpoint, in_flight: int) -> int:
+    """Entregas que se pueden tomar sin pasar de max_concurrency lotes en vuelo"""
+    size, concurrency = _endpoint_limits(endpoint)
+    batches = -(-in_flight // size)
+    return max(concurrency - batches, 0) * size
+
+
+def _claim(db: Session, now: datetime, limit: int) -> List[_Claimed]:
+    """
+    Toma entregas vencidas respetando max_concurrency por endpoint entre
+    todos los workers: los endpoints ya saturados no se consultan y, para el
+    resto, el cupo se recalcula con la fila del endpoint bloqueada, así dos
+    workers no toman a la vez el mismo cupo.
+    """
+    in_flight = _in_flight(db, now)
+    saturated = [
+        endpoint.id for endpoint in
+        db.query(WebhookEndpoint).filter(WebhookEndpoint.id.in_(list(in_flight)))
+        if _room(endpoint, in_flight[endpoint.id]) == 0
+    ] if in_flight else []
+
+    query = db.query(WebhookDelivery).filter(
+        WebhookDelivery.status.in_((STATUS_PENDING, STATUS_DELIVERING)),
+        WebhookDelivery.next_attempt_at <= now
+    )
+    if saturated:
+        query = query.filter(WebhookDelivery.endpoint_id.notin_(saturated))
+    rows = (
+        query
+        .order_by(WebhookDelivery.next_attempt_at, WebhookDelivery.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+    if not rows:
+        db.commit()
+        return []
+
+    endpoints = (
+        db.query(WebhookEndpoint)
+        .filter(WebhookEndpoint.id.in_({row.endpoint_id for row in rows}))
+        .order_by(WebhookEndpoint.id)
+        .with_for_update()
+        .all()
+    )
+    in_flight = _in_flight(db, now)
+    # Sin cupo para endpoints borrados o desactivados: no hay POST, quedan dead
+    room = {
+        endpoint.id: _room(endpoint, in_flight.get(endpoint.id, 0))
+        for endpoint in endpoints if endpoint.is_active
+    }
+
+    claimed = []
+    for row in rows:
+        if row.endpoint_id in room:
+            if room[row.endpoint_id] <= 0:
+                continue
+            room[row.endpoint_id] -= 1
+        row.status = STATUS_DELIVERING
+        row.next_attempt_at = now + CLAIM_TIMEOUT
+        claimed.append(_Claimed(row.id, row.endpoint_id, row.event_id))
+    db.commit()
+    return claimed
+
+
+def _build_batches(db: Session, claimed: List[_Claimed]) -> Tuple[List[_Batch], Dict[int, str]]:
+    """Lotes por endpoint, en orden de sequence. Devuelve (lotes, entregas imposibles con su error)"""
+    endpoints = {e.id: e for e in db.query(WebhookEndpoint).filter(
+        WebhookEndpoint.id.in_({c.endpoint_id for c in claimed})
+    )}
+    events = {e.id: e for e in db.query(OutboxEvent).filter(
+        OutboxEvent.id.in_({c.event_id for c in claimed})
+    )}
+
+    by_endpoint: Dict[int, List[_Claimed]] = {}
+    unsendable: Dict[int, str] = {}
+    for claim in claimed:
+        endpoint = endpoints.get(claim.endpoint_id)
+        if endpoint is None or not endpoint.is_active:
+            unsendable[claim.id] = "Webhook desactivado"
+        elif claim.event_id not in events:
+            unsendable[claim.id] = "Evento inexistente"
+        else:
+            by_endpoint.setdefault(claim.endpoint_id, []).append(claim)
+
+    batches = []
+    for endpoint_id, claims in by_endpoint.items():
+        endpoint = endpoints[endpoint_id]
+        claims.sort(key=lambda c: events[c.event_id].sequence)
+        size, concurrency = _endpoint_limits(endpoint)
+        for start in range(0, len(claims), size):
+            chunk = claims[start:start + size]
+            body = json.dumps(
+                {"events": [outbox.event_to_record(events[c.event_id]) for c in chunk]},
+                separators=(",", ":")
+            ).encode()
+            timestamp = str(int(time.time()))
+            batches.append(_Batch(
+                endpoint_id=endpoint_id,
+                url=endpoint.url,
+                max_concurrency=concurrency,
+                body=body,
+                headers={
+                    "Content-Type": "application/json",
+                    TIMESTAMP_HEADER: timestamp,
+                    SIGNATURE_HEADER: sign(endpoint.secret, timestamp, body),
+                },
+                delivery_ids=[c.id for c in chunk],
+            ))
+    return batches, unsendable
+
+
+async def _send(client, batches: List[_Batch], max_concurrency: Optional[int] = None) -> List[_Result]:
+    """Un POST por lote; límites de concurrencia por endpoint y global"""
+    overall = asyncio.Semaphore(max_concurrency or config.WEBHOOK_MAX_CONCURRENCY)
+    per_endpoint = {b.endpoint_id: asyncio.Semaphore(b.max_concurrency) for b in batches}
+
+    async def send_one(batch: _Batch) -> _Result:
+        # Primero el cupo del endpoint: uno lento no acapara los cupos globales
+        async with per_endpoint[batch.endpoint_id], overall:
+            try:
+                response = await client.post(batch.url, content=batch.body, headers=batch.headers)
+            except Exception as e:
+                return _Result(False, error=str(e) or type(e).__name__)
+        if 200 <= response.status_code < 300:
+            return _Result(True, status_code=response.status_code)
+        return _Result(False, status_code=response.status_code, error=f"HTTP {response.status_code}")
+
+    return list(await asyncio.gather(*(send_one(batch) for batch in batches)))
+
+
+def _retry_or_dead(delivery: WebhookDelivery, error: str, now: datetime):
+    delivery.last_error = error
+    if delivery.attempts >= config.WEBHOOK_MAX_ATTEMPTS:
+        delivery.status = STATUS_DEAD
+    else:
+        delivery.status = STATUS_PENDING
+        delivery.next_attempt_at = now + backoff(delivery.attempts)
+
+
+def _record_results(
+        db: Session,
+        batches: List[_Batch],
+        results: List[_Result],
+        unsendable: Dict[int, str],
+        now: datetime
+) -> int:
+    """Resultados de toda la tanda en una transacción. Devuelve cuántas entregas se confirmaron"""
+    ids = [i for batch in batches for i in batch.delivery_ids] + list(unsendable)
+    deliveries = {d.id: d for d in db.query(WebhookDelivery).filter(
+        WebhookDelivery.id.in_(ids)
+    ).with_for_update()}
+
+    delivered = 0
+    for batch, result in zip(batches, results):
+        if not result.ok:
+            log.warning(f"Webhook {batch.endpoint_id}: lote de {len(batch.delivery_ids)} no entregado: {result.error}")
+        for delivery_id in batch.delivery_ids:
+            delivery = deliveries[delivery_id]
+            delivery.attempts += 1
+            delivery.last_status_code = result.status_code
+            if result.ok:
+                delivery.status = STATUS_DELIVERED
+                delivery.delivered_at = now
+                delivery.last_error = None
+                delivered += 1
+            else:
+                _retry_or_dead(delivery, result.error, now)
+
+    for delivery_id, error in unsendable.items():
+        deliveries[delivery_id].status = STATUS_DEAD
+        deliveries[delivery_id].last_error = error
+
+    db.commit()
+    return delivered
+
+
+def _prepare(db: Session, now: datetime, limit: int) -> Tuple[List[_Batch], Dict[int, str]]:
+    claimed = _claim(db, now, limit)
+    if not claimed:
+        return [], {}
+    batches, unsendable = _build_batches(db, claimed)
+    # Los POST se hacen sin transacción abierta
+    db.commit()
+    return batches, unsendable
+
+
+async def deliver_pending(db: Session, client, now: Optional[datetime] = None, limit: Optional[int] = None) -> int:
+    """
+    Envía una tanda de entregas vencidas con `client` (httpx.AsyncClient).
+    Devuelve cuántas entregas se confirmaron.
+    """
+    now = now or datetime.utcnow()
+    batches, unsendable = await asyncio.to_thread(_prepare, db, now, limit or config.WEBHOOK_CLAIM_SIZE)
+    if not batches and not unsendable:
+        return 0
+    results = await _send(client, batches)
+    return await asyncio.to_thread(_record_results, db, batches, results, unsendable, now)
+
+
+def build_client():
+    """Cliente HTTP compartido por todo el worker: pool de conexiones keep-alive"""
+    import httpx  # dependencia opcional, solo para el worker de webhooks
+    return httpx.AsyncClient(
+        timeout=config.WEBHOOK_TIMEOUT_SECONDS,
+        limits=httpx.Limits(
+            max_connections=config.WEBHOOK_MAX_CONCURRENCY,
+            max_keepalive_connections=config.WEBHOOK_MAX_CONCURRENCY
+        ),
+        headers={"User-Agent": "NeosCore-Webhooks/1.0"},
+    )
+
+
+async def process_all_shards(client) -> int:
+    total = 0
+    for shard_name in shard_router.shard_names:
+        with shard_router.sessionmaker_for(shard_name)() as db:
+            await asyncio.to_thread(fan_out, db)
+            while True:
+                # Cada tanda toma como mucho max_concurrency lotes por endpoint:
+                # se sigue mientras haya entregas confirmadas
+                delivered = await deliver_pending(db, client)
+                total += delivered
+                if not delivered:
+                    break
+    return total
+
+
+async def webhook_delivery_loop(interval_seconds: int = None):
+    """Tarea de fondo: reparte y envía webhooks cada WEBHOOK_INTERVAL_SECONDS"""
+    interval_seconds = interval_seconds or config.WEBHOOK_INTERVAL_SECONDS
+    async with build_client() as client:
+        while True:
+            try:
+                delivered = await process_all_shards(client)
+                if delivered:
+                    log.info(f"Webhooks entregados: {delivered}")
+            except Exception as e:
+                log.error(f"Error entregando webhooks: {e}")
+            await asyncio.sleep(interval_seconds)
+
+
+async def _main() -> int:
+    async with build_client() as client:
+        return await process_all_shards(client)
+
+
+if __name__ == "__main__":
+    with shard_map_watch():
+        print(f"✅ Webhooks entregados: {asyncio.run(_main())}")
@@ -1,10 +1,17 @@
+from decimal import Decimal
+
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from main import app
 from neos_core.database.config import get_db, Base
+from neos_core.database.routing import get_read_db
+from neos_core.database.partitioning import create_schema
 from neos_core.database import models
+from neos_core.services.audit import audit_log
+from neos_core.services.invoicing import invoice_numbers
+from neos_core.services.pricing import pricing_index
 from neos_core.security.auth_service import create_access_token
 # Importamos passlib para simular el hash, o usa tu función real si prefieres
 from passlib.context import CryptContext
@@ -18,7 +25,7 @@ TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engin
 
 @pytest.fixture(scope="session", autouse=True)
 def setup_database():
-    Base.metadata.create_all(bind=engine)
+    create_schema(engine)
     yield
     Base.metadata.drop_all(bind=engine)
 
@@ -29,10 +36,15 @@ def db():
     transaction = connection.begin()
     session = TestingSessionLocal(bind=connection)
     app.dependency_overrides[get_db] = lambda: session
+    app.dependency_overrides[get_read_db] = lambda: session
     yield session
     session.close()
     transaction.rollback()
     connection.close()
+    # El estado en memoria (precios, bloques de numeración, auditoría) no debe sobrevivir al rollback
+    pricing_index.invalidate()
+    invoice_numbers.reset()
+    audit_log.clear()
 
 
 @pytest.fixture
@@ -94,4 +106,29 @@ def admin_headers(seed_data):
 @pytest.fixture
 def seller_headers(seed_data):
     token = create_access_token(data={"sub": "vendedor@test.com", "role": "seller", "tenant_id": 1})
-    return {"Authorization": f"Bearer {token}"}
\ No newline at end of file
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+def shop(db, seed_data):
+    # Moneda, caja y un producto del tenant 1 para vender; cada módulo lo extiende
+    # redefiniendo `shop(shop, db)` con lo que necesite
+    currency = models.Currency(code="ARS", name="Peso", symbol="$")
+    pos = models.PointOfSale(tenant_id=1, name="Caja", code="0001")
+    product = models.Product(tenant_id=1, sku="CAF", name="Café", price=Decimal("10"), stock=Decimal("100"))
+    db.add_all([currency, pos, product])
+    db.commit()
+    return {"currency": currency.id, "pos": pos.id, "product": product.id}
+
+
+def make_sale(client, headers, shop, quantity="1", items=None, status_code=201, **extra):
+    """Crea una venta por la API (por defecto, `quantity` del producto de `shop`) y devuelve el JSON"""
+    res = client.post("/api/v1/sales/", headers=headers, json={
+        "point_of_sale_id": shop["pos"],
+        "currency_id": shop["currency"],
+        "payment_method": "CASH",
+        "items": items or [{"product_id": shop["product"], "quantity": quantity}],
+        **extra,
+    })
+    assert res.status_code == status_code, res.json()
+    return res.json()
@@ -0,0 +1,90 @@
+"""
+Tests del archivado de ventas antiguas con lectura transparente
+"""
+import json
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pytest
+
+from neos_core.crud import sales_crud
+from neos_core.database import config
+from neos_core.database.models import (
+    Sale, SaleDetail, ArchivedSale, Currency, PointOfSale, Product, Tenant
+)
+from neos_core.services import archive
+
+
+@pytest.fixture
+def old_sales(db, seed_data, tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "ARCHIVE_DIR", str(tmp_path / "archive"))
+
+    tenant = db.query(Tenant).filter(Tenant.id == 1).first()
+    tenant.sales_retention_days = 30
+
+    currency = Currency(code="CLP", name="Peso Chileno", symbol="$")
+    pos = PointOfSale(tenant_id=1, name="Caja", code="POS-A")
+    product = Product(tenant_id=1, sku="ARCH-1", name="Mate", price=Decimal("25"), stock=Decimal("100"))
+    db.add_all([currency, pos, product])
+    db.commit()
+
+    now = datetime.utcnow()
+    sales = []
+    for days_ago in (90, 60, 45, 5):
+        sale = Sale(
+            tenant_id=1, user_id=3, point_of_sale_id=pos.id, currency_id=currency.id,
+            payment_method="CASH", subtotal=Decimal("50"), tax_amount=Decimal("0"),
+            total=Decimal("50"), created_at=now - timedelta(days=days_ago)
+        )
+        db.add(sale)
+        db.flush()
+        db.add(SaleDetail(
+            sale_id=sale.id, product_id=product.id, quantity=Decimal("2"),
+            unit_price=Decimal("25"), subtotal=Decimal("50"), tax_amount=Decimal("0"), total=Decimal("50")
+        ))
+        sales.append(sale.id)
+    db.commit()
+    return now, sales
+
+
+def test_archival_moves_old_sales_in_batches(db, old_sales):
+    """✅ Solo se archivan las ventas fuera de la retención, por lotes"""
+    now, sale_ids = old_sales
+
+    results = archive.run_archival(db, now=now, batch_size=2)
+
+    assert results[1] == 3
+    assert db.query(Sale).filter(Sale.tenant_id == 1).count() == 1
+    assert db.query(SaleDetail).filter(SaleDetail.sale_id.in_(sale_ids[:3])).count() == 0
+    assert db.query(ArchivedSale).count() == 3
+
+
+def test_get_sale_falls_back_to_archive(db, old_sales):
+    """✅ get_sale_by_id encuentra ventas archivadas con sus items"""
+    now, sale_ids = old_sales
+    archive.run_archival(db, now=now)
+
+    sale = sales_crud.get_sale_by_id(db, sale_ids[0], tenant_id=1)
+    assert sale is not None
+    assert sale.is_archived
+    assert sale.total == Decimal("50.00")
+    assert len(sale.items) == 1
+    assert sale.items[0].quantity == Decimal("2")
+
+    # Aislamiento: otro tenant no ve la venta archivada
+    assert sales_crud.get_sale_by_id(db, sale_ids[0], tenant_id=2) is None
+
+
+def test_export_includes_archived_sales(client, db, old_sales, seller_headers):
+    """✅ La exportación NDJSON incluye ventas calientes y archivadas"""
+    now, sale_ids = old_sales
+    archive.run_archival(db, now=now)
+
+    res = client.get("/api/v1/sales/reports/export", headers=seller_headers)
+    assert res.status_code == 200
+    exported = [json.loads(line) for line in res.text.splitlines()]
+    assert sorted(r["id"] for r in exported) == sorted(sale_ids)
+
+    res = client.get(f"/api/v1/sales/{sale_ids[1]}", headers=seller_headers)
+    assert res.status_code == 200
+    assert res.json()["id"] == sale_ids[1]
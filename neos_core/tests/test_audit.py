@@ -0,0 +1,157 @@
+"""
+Tests de auditoría en diferido: cola en memoria, escritura en lotes, respaldo en disco y consulta
+"""
+import json
+import os
+import time
+from decimal import Decimal
+from pathlib import Path
+
+import pytest
+
+from neos_core.database import config
+from neos_core.database.models import AuditLog, Currency, PointOfSale, Product
+from neos_core.services import audit, metrics
+from neos_core.services.audit import audit_log
+
+
+@pytest.fixture(autouse=True)
+def fallback_path(tmp_path, monkeypatch):
+    """Respaldo de este proceso"""
+    monkeypatch.setattr(config, "AUDIT_FALLBACK_PATH", str(tmp_path / "audit" / "fallback.ndjson"))
+    return Path(audit_log.process_fallback_path)
+
+
+def _product(db, **kwargs):
+    product = Product(tenant_id=1, sku="CAF", name="Café", price=Decimal("10"), cost=Decimal("4"),
+                      stock=Decimal("100"), **kwargs)
+    db.add(product)
+    db.commit()
+    return product
+
+
+def test_product_update_is_buffered_until_flush(client, db, seed_data, admin_headers):
+    """✅ El cambio de precio se encola y recién aparece en la base al escribir la cola"""
+    product = _product(db)
+    res = client.put(f"/api/v1/products/{product.id}", headers=admin_headers,
+                     json={"price": "12.50", "name": "Café molido"})
+    assert res.status_code == 200
+
+    assert len(audit_log) == 1
+    assert db.query(AuditLog).count() == 0
+
+    written_before = metrics.AUDIT_RECORDS.get(destination="db")
+    assert audit_log.flush(db) == 1
+    assert len(audit_log) == 0
+    assert metrics.AUDIT_RECORDS.get(destination="db") == written_before + 1
+
+    entry = db.query(AuditLog).one()
+    assert (entry.action, entry.entity_type, entry.entity_id) == ("product.updated", "product", product.id)
+    assert entry.actor_user_id == 2
+    # Solo los campos auditados que cambiaron
+    assert entry.changes == {"price": ["10.00", "12.50"]}
+
+
+def test_flush_in_batches(db, seed_data, monkeypatch):
+    """✅ La cola se escribe en lotes de AUDIT_FLUSH_BATCH_SIZE"""
+    monkeypatch.setattr(config, "AUDIT_FLUSH_BATCH_SIZE", 2)
+    flushes_before = metrics.AUDIT_FLUSH_DURATION.get_count()
+    for entity_id in range(5):
+        audit_log.record(1, audit.USER_CREATED, "user", entity_id)
+
+    assert audit_log.flush(db) == 5
+    assert metrics.AUDIT_FLUSH_DURATION.get_count() == flushes_before + 3
+    assert db.query(AuditLog).count() == 5
+
+
+def test_failed_flush_goes_to_fallback_and_replays_once(db, seed_data, fallback_path, monkeypatch):
+    """✅ Con la base caída el lote va al respaldo; se reprocesa sin duplicar"""
+    audit_log.record(1, audit.SALE_CANCELLED, "sale", 7, {"status": ["completed", "cancelled"]}, 3)
+    audit_log.record(1, audit.USER_CREATED, "user", 8)
+
+    def db_down(db, records):
+        raise ConnectionError("base no disponible")
+
+    write_records = audit._write_records
+    failures_before = metrics.AUDIT_FLUSH_FAILURES.get()
+    monkeypatch.setattr(audit, "_write_records", db_down)
+    assert audit_log.flush(db) == 0
+    assert metrics.AUDIT_FLUSH_FAILURES.get() == failures_before + 1
+    assert len(fallback_path.read_text().splitlines()) == 2
+    monkeypatch.setattr(audit, "_write_records", write_records)
+
+    # El primer registro ya había llegado a la base antes de la caída
+    first = fallback_path.read_text().splitlines()[0]
+    write_records(db, [audit._to_row(json.loads(first))])
+
+    assert audit_log.flush_all(db) == 0
+    assert not fallback_path.exists()
+    rows = db.query(AuditLog).order_by(AuditLog.entity_id).all()
+    assert [(r.entity_type, r.entity_id) for r in rows] == [("sale", 7), ("user", 8)]
+    assert rows[0].actor_user_id == 3
+
+
+def test_full_buffer_spills_to_fallback(db, seed_data, fallback_path, monkeypatch):
+    """✅ Con la cola llena los registros van directo al respaldo"""
+    monkeypatch.setattr(config, "AUDIT_BUFFER_MAX", 1)
+    audit_log.record(1, audit.USER_CREATED, "user", 1)
+    audit_log.record(1, audit.USER_CREATED, "user", 2)
+    assert len(audit_log) == 1
+    assert len(fallback_path.read_text().splitlines()) == 1
+
+    audit_log.flush_all(db)
+    assert db.query(AuditLog).count() == 2
+
+
+def test_stale_fallback_of_other_process_is_replayed(db, seed_data, fallback_path):
+    """✅ El respaldo de un proceso que ya no existe lo reprocesa otro; el de uno activo, no"""
+    record = {"event_id": "e1", "tenant_id": 1, "actor_user_id": None, "action": audit.USER_CREATED,
+              "entity_type": "user", "entity_id": 1, "changes": None, "occurred_at": "2026-01-01T00:00:00"}
+    dead = fallback_path.parent / "fallback.ndjson.otro-host-1"
+    alive = fallback_path.parent / "fallback.ndjson.otro-host-2"
+    fallback_path.parent.mkdir(parents=True)
+    dead.write_text(json.dumps(record) + "\n")
+    alive.write_text(json.dumps({**record, "event_id": "e2", "entity_id": 2}) + "\n")
+    old = time.time() - 3600
+    os.utime(dead, (old, old))
+
+    assert audit_log.replay_fallback(db) == 1
+    assert not dead.exists() and alive.exists()
+    assert [r.entity_id for r in db.query(AuditLog)] == [1]
+    assert list(fallback_path.parent.glob("*.replaying")) == []
+
+
+def test_audit_endpoint(client, db, seed_data, admin_headers, seller_headers):
+    """✅ Cancelación de venta y stock por ubicación auditados; paginación con before_id"""
+    currency = Currency(code="ARS", name="Peso", symbol="$")
+    pos = PointOfSale(tenant_id=1, name="Caja", code="0001")
+    product = _product(db)
+    db.add_all([currency, pos])
+    db.commit()
+
+    sale = client.post("/api/v1/sales/", headers=seller_headers, json={
+        "point_of_sale_id": pos.id, "currency_id": currency.id, "payment_method": "CASH",
+        "items": [{"product_id": product.id, "quantity": "1"}],
+    }).json()
+    assert client.post(f"/api/v1/sales/{sale['id']}/cancel", headers=admin_headers).status_code == 200
+    res = client.put("/api/v1/stock/locations", headers=admin_headers, json={
+        "point_of_sale_id": pos.id, "product_id": product.id, "stock": "20",
+    })
+    assert res.status_code == 200
+    audit_log.record(2, audit.USER_CREATED, "user", 99)  # otro tenant
+    audit_log.flush(db)
+
+    page = client.get("/api/v1/audit/", headers=admin_headers, params={"limit": 1}).json()
+    assert [e["action"] for e in page] == ["location_stock.set"]
+    assert page[0]["changes"] == {"stock": ["0", "20"]}
+    page = client.get("/api/v1/audit/", headers=admin_headers,
+                      params={"limit": 10, "before_id": page[0]["id"]}).json()
+    assert [(e["action"], e["entity_id"]) for e in page] == [("sale.cancelled", sale["id"])]
+
+    res = client.get("/api/v1/audit/", headers=admin_headers, params={"entity_type": "sale"})
+    assert len(res.json()) == 1
+
+
+def test_audit_endpoint_forbidden_for_seller(client, seed_data, seller_headers):
+    """❌ Un vendedor no puede leer la auditoría"""
+    assert client.get("/api/v1/audit/", headers=seller_headers).status_code == 403
@@ -0,0 +1,139 @@
+"""
+Tests de la cola de facturación electrónica (CAE) con el proveedor falso
+"""
+from datetime import datetime, timedelta
+
+import pytest
+
+from neos_core.database import config
+from neos_core.database.models import InvoiceAuthorization, Sale, Tenant
+from neos_core.services import electronic_invoicing as einvoicing
+from neos_core.tests.conftest import make_sale
+
+
+@pytest.fixture
+def provider():
+    fake = einvoicing.FakeProvider(name="TESTPROV", max_batch_size=2)
+    einvoicing.register_provider(fake)
+    yield fake
+    einvoicing.unregister_provider("TESTPROV")
+
+
+@pytest.fixture
+def shop(shop, db, provider):
+    tenant = db.get(Tenant, 1)
+    tenant.electronic_invoicing_enabled = True
+    tenant.electronic_invoicing_provider = "testprov"
+    db.commit()
+    return shop
+
+
+def test_sale_enqueued_and_authorized(client, db, shop, provider, seller_headers):
+    """✅ La venta responde sin CAE y el worker lo completa después"""
+    sale = make_sale(client, seller_headers, shop)
+    assert sale["invoice_status"] == "pending"
+    assert sale["invoice_type"] == "B"
+    assert sale["cae"] is None
+
+    assert einvoicing.process_pending(db) == 1
+    request = provider.batches[0][0]
+    assert (request.point_of_sale_code, request.invoice_number) == ("0001", sale["invoice_number"])
+
+    res = client.get(f"/api/v1/sales/{sale['id']}", headers=seller_headers)
+    body = res.json()
+    assert body["invoice_status"] == "authorized"
+    assert len(body["cae"]) == 14
+    assert body["cae_expiration"] is not None
+
+
+def test_batches_per_provider(client, db, shop, provider, seller_headers):
+    """✅ Las autorizaciones se envían al proveedor en lotes de max_batch_size"""
+    for _ in range(5):
+        make_sale(client, seller_headers, shop)
+
+    assert einvoicing.process_pending(db) == 5
+    assert [len(batch) for batch in provider.batches] == [2, 2, 1]
+    assert db.query(Sale).filter_by(invoice_status="authorized").count() == 5
+
+
+def test_retry_with_backoff(client, db, shop, provider, seller_headers):
+    """✅ Un proveedor caído se reintenta después del backoff"""
+    sale = make_sale(client, seller_headers, shop)
+    provider.failures = 1
+
+    now = datetime.utcnow()
+    assert einvoicing.process_pending(db, now=now) == 0
+    authorization = db.query(InvoiceAuthorization).filter_by(sale_id=sale["id"]).one()
+    assert (authorization.status, authorization.attempts) == ("pending", 1)
+    assert authorization.next_attempt_at > now
+    assert "no disponible" in authorization.last_error
+
+    # Antes del backoff no se vuelve a intentar
+    assert einvoicing.process_pending(db, now=now) == 0
+    assert einvoicing.process_pending(db, now=now + timedelta(seconds=config.EINVOICING_BACKOFF_SECONDS)) == 1
+    assert db.get(Sale, sale["id"]).invoice_status == "authorized"
+
+
+def test_stale_processing_is_reclaimed(client, db, shop, seller_headers):
+    """✅ Una autorización tomada por un worker caído vuelve a procesarse"""
+    sale = make_sale(client, seller_headers, shop)
+    authorization = db.query(InvoiceAuthorization).filter_by(sale_id=sale["id"]).one()
+    authorization.status = "processing"
+    authorization.next_attempt_at = datetime.utcnow() + einvoicing.CLAIM_TIMEOUT
+    db.commit()
+
+    assert einvoicing.process_pending(db) == 0
+    later = datetime.utcnow() + einvoicing.CLAIM_TIMEOUT + timedelta(seconds=1)
+    assert einvoicing.process_pending(db, now=later) == 1
+
+
+def test_sale_with_cae_is_not_enqueued(client, db, shop, seller_headers):
+    """✅ Una venta con CAE informado no pasa por la cola"""
+    res = client.post("/api/v1/sales/", headers=seller_headers, json={
+        "point_of_sale_id": shop["pos"],
+        "currency_id": shop["currency"],
+        "payment_method": "CASH",
+        "invoice_type": "A",
+        "cae": "71234567890123",
+        "cae_expiration": (datetime.utcnow() + timedelta(days=10)).isoformat(),
+        "items": [{"product_id": shop["product"], "quantity": "1"}],
+    })
+    assert res.status_code == 201
+    assert res.json()["invoice_status"] == "authorized"
+    assert db.query(InvoiceAuthorization).count() == 0
+
+
+def test_rejected_and_failed(client, db, shop, provider, seller_headers, monkeypatch):
+    """❌ Rechazo del fisco y reintentos agotados"""
+    rejected = make_sale(client, seller_headers, shop)
+    provider.reject = lambda request: "Comprobante inválido" if request.sale_id == rejected["id"] else None
+    assert einvoicing.process_pending(db) == 1
+    authorization = db.query(InvoiceAuthorization).filter_by(sale_id=rejected["id"]).one()
+    assert (authorization.status, authorization.last_error) == ("rejected", "Comprobante inválido")
+    assert db.get(Sale, rejected["id"]).invoice_status == "rejected"
+
+    monkeypatch.setattr(config, "EINVOICING_MAX_ATTEMPTS", 2)
+    failed = make_sale(client, seller_headers, shop)
+    provider.failures = 5
+    now = datetime.utcnow()
+    assert einvoicing.process_pending(db, now=now) == 0
+    assert einvoicing.process_pending(db, now=now + timedelta(hours=1)) == 1
+    assert db.get(Sale, failed["id"]).invoice_status == "failed"
+
+
+def test_unconfigured_provider_stays_pending(client, db, shop, seller_headers):
+    """❌ Sin proveedor registrado la autorización queda pendiente con el error"""
+    einvoicing.unregister_provider("TESTPROV")
+    sale = make_sale(client, seller_headers, shop)
+
+    assert einvoicing.process_pending(db) == 0
+    authorization = db.query(InvoiceAuthorization).filter_by(sale_id=sale["id"]).one()
+    assert authorization.status == "pending"
+    assert "no configurado" in authorization.last_error
+
+
+def test_backoff_is_capped():
+    """✅ El backoff crece exponencialmente hasta el tope"""
+    assert einvoicing.backoff(1) <= timedelta(seconds=config.EINVOICING_BACKOFF_SECONDS)
+    assert einvoicing.backoff(30) <= timedelta(seconds=config.EINVOICING_BACKOFF_MAX_SECONDS)
+    assert einvoicing.backoff(3) >= timedelta(seconds=config.EINVOICING_BACKOFF_SECONDS * 2)
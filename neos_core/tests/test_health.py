@@ -0,0 +1,43 @@
+"""
+Tests de configuración del pool y endpoint de readiness
+"""
+import main
+from neos_core.database import config
+from neos_core.tests.conftest import engine as test_engine
+
+
+def test_build_engine_applies_pool_settings(monkeypatch):
+    """✅ El pool toma tamaño/overflow del entorno para Postgres"""
+    monkeypatch.setattr(config, "DB_POOL_SIZE", 7)
+    monkeypatch.setattr(config, "DB_MAX_OVERFLOW", 3)
+
+    pg_engine = config.build_engine("postgresql://u:p@localhost:5432/db")
+    status = config.get_pool_status(pg_engine)
+
+    assert status["size"] == 7
+    assert status["max_overflow"] == 3
+    assert status["capacity"] == 10
+    assert status["checked_out"] == 0
+    pg_engine.dispose()
+
+
+def test_ready_reports_pool(client, monkeypatch):
+    """✅ /ready responde con estado de la DB y del pool"""
+    monkeypatch.setattr(main, "engine", test_engine)
+
+    res = client.get("/ready")
+    assert res.status_code == 200
+    data = res.json()
+    assert data["database"] == "up"
+    assert "pool_class" in data["pool"]
+
+
+def test_ready_database_down(client, monkeypatch):
+    """❌ Sin base de datos, /ready devuelve 503"""
+    down_engine = config.build_engine("postgresql://u:p@127.0.0.1:1/db")
+    monkeypatch.setattr(main, "engine", down_engine)
+
+    res = client.get("/ready")
+    assert res.status_code == 503
+    assert res.json()["database"] == "down"
+    down_engine.dispose()
@@ -0,0 +1,102 @@
+"""
+Tests del bus de invalidación de cachés entre workers (canal en proceso y PostgreSQL)
+"""
+import os
+import time
+from decimal import Decimal
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from neos_core.database import config
+from neos_core.database.models import Product
+from neos_core.services import pricing
+from neos_core.services.invalidation import InvalidationBus, LocalChannel, invalidation_bus
+
+
+def _worker(channel):
+    """Bus de otro worker conectado al mismo canal, con los avisos que recibe"""
+    bus = InvalidationBus(local_channel=channel)
+    received = []
+    bus.subscribe("products", received.append)
+    return bus, received
+
+
+def test_notify_reaches_other_workers_on_commit(db, seed_data):
+    """✅ El aviso llega a los demás workers al confirmar; ni antes, ni al que lo emitió, ni tras rollback"""
+    channel = LocalChannel()
+    worker_a, received_a = _worker(channel)
+    worker_b, received_b = _worker(channel)
+
+    worker_a.notify(db, "products", 5)
+    assert received_b == []
+    db.commit()
+    assert received_b == ["5"]
+    assert received_a == []
+
+    worker_a.notify(db, "products")
+    db.rollback()
+    db.commit()
+    assert received_b == ["5"]
+
+
+def test_pricing_index_evicted_by_other_worker(client, db, seed_data, admin_headers):
+    """✅ Un cambio de precios de otro worker descarta el índice del tenant; uno propio lo actualiza en el lugar"""
+    product = Product(tenant_id=1, sku="CAF", name="Café", price=Decimal("100"))
+    db.add(product)
+    db.commit()
+
+    rules = pricing.pricing_index.get(db, 1)
+    res = client.post("/api/v1/pricing/price-lists", headers=admin_headers, json={
+        "name": "General", "items": [{"product_id": product.id, "price": "90"}],
+    })
+    assert res.status_code == 201
+    assert pricing.pricing_index.get(db, 1) is rules
+    assert list(rules.price_lists) == [res.json()["id"]]
+
+    other_worker = InvalidationBus(local_channel=invalidation_bus.local_channel)
+    other_worker.notify(db, pricing.INVALIDATION_NAMESPACE, 1)
+    db.commit()
+    assert pricing.pricing_index.get(db, 1) is not rules
+
+
+def test_max_age_falls_back_without_listener():
+    """✅ Sin listener conectado las cachés usan el TTL corto"""
+    bus = InvalidationBus(local_channel=LocalChannel())
+    assert bus.max_age(300) == config.INVALIDATION_FALLBACK_TTL_SECONDS
+
+    listener = SimpleNamespace(connected=True)
+    bus._listeners = [listener]
+    assert bus.max_age(300) == 300
+    listener.connected = False
+    assert bus.max_age(300) == config.INVALIDATION_FALLBACK_TTL_SECONDS
+
+
+@pytest.mark.skipif(not os.getenv("TEST_POSTGRES_URL"), reason="requiere TEST_POSTGRES_URL")
+def test_postgres_listen_notify():
+    """✅ Con PostgreSQL el aviso viaja por NOTIFY al listener del otro worker"""
+    engine = create_engine(os.environ["TEST_POSTGRES_URL"])
+    worker_a = InvalidationBus(local_channel=LocalChannel(), channel="neos_test_invalidation")
+    worker_b, received = _worker(LocalChannel())
+    worker_b._channel = "neos_test_invalidation"
+    worker_b.start({"default": engine})
+    try:
+        deadline = time.monotonic() + 5
+        while not worker_b.connected and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert worker_b.connected
+
+        with Session(engine) as session:
+            worker_a.notify(session, "products", 7)
+            session.rollback()
+            worker_a.notify(session, "products", 8)
+            session.commit()
+
+        while received != ["8"] and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert received == ["8"]
+    finally:
+        worker_b.stop()
+        engine.dispose()
@@ -0,0 +1,117 @@
+"""
+Tests de numeración de comprobantes por punto de venta (bloques y reconciliación)
+"""
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pytest
+
+from neos_core.database import config
+from neos_core.database.models import InvoiceNumberBlock, InvoiceSequence, PointOfSale, Sale
+from neos_core.services import invoicing
+from neos_core.tests.conftest import make_sale
+
+
+@pytest.fixture
+def shop(shop, db, monkeypatch):
+    monkeypatch.setattr(config, "INVOICE_BLOCK_SIZE", 3)
+    pos_2 = PointOfSale(tenant_id=1, name="Caja 2", code="0002")
+    db.add(pos_2)
+    db.commit()
+    return {**shop, "pos_1": shop["pos"], "pos_2": pos_2.id}
+
+
+def _sale(client, headers, shop, pos):
+    return make_sale(client, headers, {**shop, "pos": shop[pos]})["invoice_number"]
+
+
+def test_numbers_per_point_of_sale(client, db, shop, seller_headers):
+    """✅ Cada punto de venta numera por separado, reservando bloques"""
+    numbers = [_sale(client, seller_headers, shop, "pos_1") for _ in range(4)]
+    assert numbers == ["00000001", "00000002", "00000003", "00000004"]
+    assert _sale(client, seller_headers, shop, "pos_2") == "00000001"
+
+    # Dos bloques de 3 para la caja 1; el primero, entregado completo, queda cerrado
+    blocks = db.query(InvoiceNumberBlock).filter_by(point_of_sale_id=shop["pos_1"]) \
+        .order_by(InvoiceNumberBlock.start_number).all()
+    assert [(b.start_number, b.end_number, b.status) for b in blocks] == [(1, 4, "closed"), (4, 7, "open")]
+    assert db.get(InvoiceSequence, shop["pos_1"]).next_number == 7
+
+
+def test_released_number_is_reused(db, shop):
+    """✅ El número de una venta fallida lo toma la siguiente si fue el último entregado"""
+    allocator = invoicing.InvoiceNumberAllocator()
+    first = allocator.next_number(db, 1, shop["pos_1"])
+    allocator.release(1, shop["pos_1"], first)
+    assert allocator.next_number(db, 1, shop["pos_1"]) == first
+
+
+def test_released_number_out_of_order_is_not_reused(db, shop):
+    """❌ Un número devuelto con otros posteriores ya entregados no se reutiliza"""
+    allocator = invoicing.InvoiceNumberAllocator()
+    first = allocator.next_number(db, 1, shop["pos_1"])
+    second = allocator.next_number(db, 1, shop["pos_1"])
+    allocator.release(1, shop["pos_1"], first)
+    assert allocator.next_number(db, 1, shop["pos_1"]) == second + 1
+
+
+def test_expired_lease_takes_new_block(db, shop):
+    """✅ Un bloque con el lease vencido no se sigue usando"""
+    allocator = invoicing.InvoiceNumberAllocator()
+    assert allocator.next_number(db, 1, shop["pos_1"]) == 1
+
+    allocator._state(1, shop["pos_1"]).block.leased_until = datetime.utcnow() - timedelta(seconds=1)
+    assert allocator.next_number(db, 1, shop["pos_1"]) == 4
+
+
+def test_reconcile_after_crash(client, db, shop, seller_headers):
+    """✅ Los números sin usar de un worker caído quedan anulados, no se reutilizan"""
+    assert _sale(client, seller_headers, shop, "pos_1") == "00000001"
+    assert _sale(client, seller_headers, shop, "pos_1") == "00000002"
+
+    # El worker se cae con el número 3 sin usar y su lease vence
+    invoicing.invoice_numbers.reset()
+    block = db.query(InvoiceNumberBlock).filter_by(point_of_sale_id=shop["pos_1"]).one()
+    block.leased_until = datetime.utcnow() - timedelta(hours=1)
+    db.commit()
+
+    assert invoicing.reconcile_blocks(db) == 1
+    assert invoicing.reconcile_blocks(db) == 0
+    db.expire_all()
+    assert block.status == "reconciled"
+    voided = db.query(InvoiceNumberBlock).filter_by(status="void").one()
+    assert (voided.start_number, voided.end_number) == (3, 4)
+
+    # La numeración sigue hacia adelante
+    assert _sale(client, seller_headers, shop, "pos_1") == "00000004"
+    assert _sale(client, seller_headers, shop, "pos_1") == "00000005"
+
+
+def test_reconcile_closed_block_with_gap(db, shop):
+    """✅ Un bloque cerrado con un número devuelto fuera de orden también se reconcilia"""
+    allocator = invoicing.InvoiceNumberAllocator()
+    numbers = [allocator.next_number(db, 1, shop["pos_1"]) for _ in range(4)]
+    assert numbers == [1, 2, 3, 4]
+    # Las ventas 1 y 3 se guardaron, la 2 falló; el bloque 1-3 quedó cerrado
+    allocator.release(1, shop["pos_1"], 2)
+    db.add_all([
+        Sale(tenant_id=1, point_of_sale_id=shop["pos_1"], invoice_number=invoicing.format_invoice_number(n),
+             user_id=1, currency_id=shop["currency"], total=Decimal("10"), payment_method="CASH")
+        for n in (1, 3)
+    ])
+    db.commit()
+
+    # Pasada la gracia del bloque cerrado; el abierto (4-6) sigue con el lease vigente
+    later = datetime.utcnow() + invoicing.RECLAIM_GRACE + timedelta(seconds=1)
+    db.query(InvoiceNumberBlock).filter_by(status="open").update({"leased_until": later + timedelta(hours=1)})
+    db.commit()
+    assert invoicing.reconcile_blocks(db, now=later) == 1
+    voided = db.query(InvoiceNumberBlock).filter_by(status="void").one()
+    assert (voided.start_number, voided.end_number) == (2, 3)
+
+
+def test_reconcile_skips_live_blocks(client, db, shop, seller_headers):
+    """❌ No se reconcilian bloques con el lease vigente"""
+    _sale(client, seller_headers, shop, "pos_1")
+    assert invoicing.reconcile_blocks(db) == 0
+    assert db.query(InvoiceNumberBlock).filter_by(status="void").count() == 0
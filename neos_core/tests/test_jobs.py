@@ -0,0 +1,199 @@
+"""
+Tests de tareas en segundo plano: encolado, worker, progreso, reintentos y cancelación
+"""
+import json
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pytest
+
+from neos_core.database import config
+from neos_core.database.models import AuditLog, Currency, Job, PointOfSale, Product
+from neos_core.services import jobs
+from neos_core.services.audit import audit_log
+
+
+@pytest.fixture(autouse=True)
+def output_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "JOBS_OUTPUT_DIR", str(tmp_path))
+    return tmp_path
+
+
+@pytest.fixture
+def flaky_job():
+    """Tipo de tarea de prueba: escribe un producto y falla las primeras `failures` veces"""
+    state = {"failures": 1, "runs": 0}
+
+    def run(db, ctx, params):
+        state["runs"] += 1
+        db.add(Product(tenant_id=ctx.tenant_id, sku=f"TMP{state['runs']}", name="Temporal", price=Decimal("1")))
+        db.flush()
+        ctx.progress(1, total=1)
+        if state["failures"] > 0:
+            state["failures"] -= 1
+            raise RuntimeError("servicio externo caído")
+        return {"runs": state["runs"]}
+
+    jobs.register_handler("test_flaky", run)
+    yield state
+    jobs.unregister_handler("test_flaky")
+
+
+def _enqueue(client, headers, kind, **params):
+    res = client.post("/api/v1/jobs/", headers=headers, json={"kind": kind, "params": params})
+    assert res.status_code == 202, res.json()
+    return res.json()
+
+
+def test_sales_export_job(client, db, seed_data, admin_headers, seller_headers):
+    """✅ La exportación se encola, la corre un worker y el resultado se descarga"""
+    currency = Currency(code="ARS", name="Peso", symbol="$")
+    pos = PointOfSale(tenant_id=1, name="Caja", code="0001")
+    product = Product(tenant_id=1, sku="CAF", name="Café", price=Decimal("10"), stock=Decimal("100"))
+    db.add_all([currency, pos, product])
+    db.commit()
+    for _ in range(3):
+        res = client.post("/api/v1/sales/", headers=seller_headers, json={
+            "point_of_sale_id": pos.id, "currency_id": currency.id, "payment_method": "CASH",
+            "items": [{"product_id": product.id, "quantity": "1"}],
+        })
+        assert res.status_code == 201
+
+    job = _enqueue(client, seller_headers, "sales_export")
+    assert job["status"] == "queued"
+
+    assert jobs.run_next(db) == job["id"]
+    assert jobs.run_next(db) is None
+
+    body = client.get(f"/api/v1/jobs/{job['id']}", headers=seller_headers).json()
+    assert body["status"] == "succeeded"
+    assert (body["progress_current"], body["progress_total"]) == (3, 3)
+    assert body["result"]["rows"] == 3
+
+    res = client.get(f"/api/v1/jobs/{job['id']}/result", headers=seller_headers)
+    assert res.status_code == 200
+    assert len([json.loads(line) for line in res.text.splitlines()]) == 3
+
+    # El admin ve las tareas de todo el tenant
+    assert [j["id"] for j in client.get("/api/v1/jobs/", headers=admin_headers).json()] == [job["id"]]
+
+
+def test_product_import_job(client, db, seed_data, admin_headers):
+    """✅ La importación crea, omite existentes e informa filas inválidas"""
+    db.add(Product(tenant_id=1, sku="EXISTE", name="Existente", price=Decimal("1")))
+    db.commit()
+
+    job = _enqueue(client, admin_headers, "product_import", products=[
+        {"sku": "A1", "name": "Producto A", "price": "10"},
+        {"sku": "A2", "name": "Producto B", "price": "20", "stock": "5"},
+        {"sku": "EXISTE", "name": "Otro nombre", "price": "3"},
+        {"sku": "MAL", "name": "Sin precio"},
+    ])
+    jobs.run_next(db)
+
+    result = db.get(Job, job["id"]).result
+    assert (result["created"], result["skipped"]) == (2, 1)
+    assert [e["sku"] for e in result["errors"]] == ["MAL"]
+    assert db.query(Product).filter_by(tenant_id=1, sku="A2").one().stock == Decimal("5")
+    assert db.query(Product).filter_by(tenant_id=1, sku="EXISTE").one().name == "Existente"
+
+
+def test_product_import_update_is_audited(client, db, seed_data, admin_headers):
+    """✅ Actualizar existentes por importación audita precio y stock después del commit"""
+    product = Product(tenant_id=1, sku="EXISTE", name="Existente", price=Decimal("1"), stock=Decimal("2"))
+    db.add(product)
+    db.commit()
+
+    _enqueue(client, admin_headers, "product_import", update_existing=True, products=[
+        {"sku": "EXISTE", "name": "Existente", "price": "5", "stock": "2"},
+    ])
+    jobs.run_next(db)
+
+    assert audit_log.flush(db) == 1
+    entry = db.query(AuditLog).one()
+    assert (entry.action, entry.entity_id, entry.actor_user_id) == ("product.updated", product.id, 2)
+    assert entry.changes == {"price": ["1.00", "5"]}
+
+
+def test_failed_attempt_is_discarded_and_retried(client, db, seed_data, admin_headers, flaky_job):
+    """✅ Un intento fallido no deja trabajo a medias y se reintenta con backoff"""
+    job = _enqueue(client, admin_headers, "test_flaky")
+
+    now = datetime.utcnow()
+    jobs.run_next(db, now=now)
+    row = db.get(Job, job["id"])
+    assert (row.status, row.attempts, row.error) == ("queued", 1, "servicio externo caído")
+    assert row.run_after > now
+    assert db.query(Product).filter(Product.sku.like("TMP%")).count() == 0
+
+    # Antes del backoff no se vuelve a tomar
+    assert jobs.run_next(db, now=now) is None
+    assert jobs.run_next(db, now=now + timedelta(hours=1)) == job["id"]
+    row = db.get(Job, job["id"])
+    assert (row.status, row.result) == ("succeeded", {"runs": 2})
+    assert db.query(Product).filter(Product.sku.like("TMP%")).count() == 1
+
+
+def test_stale_running_job_is_reclaimed(client, db, seed_data, admin_headers, flaky_job, monkeypatch):
+    """✅ Una tarea de un worker caído se retoma al vencer el plazo, hasta agotar intentos"""
+    flaky_job["failures"] = 0
+    job = _enqueue(client, admin_headers, "test_flaky")
+    row = db.get(Job, job["id"])
+    row.status, row.attempts, row.locked_by = "running", 1, "otro-host:1:0"
+    row.run_after = datetime.utcnow() + timedelta(seconds=config.JOBS_LEASE_SECONDS)
+    db.commit()
+
+    assert jobs.run_next(db) is None
+    later = datetime.utcnow() + timedelta(seconds=config.JOBS_LEASE_SECONDS + 1)
+    assert jobs.run_next(db, now=later) == job["id"]
+    assert db.get(Job, job["id"]).status == "succeeded"
+
+    monkeypatch.setattr(config, "JOBS_MAX_ATTEMPTS", 1)
+    other = _enqueue(client, admin_headers, "test_flaky")
+    row = db.get(Job, other["id"])
+    row.status, row.attempts, row.run_after = "running", 1, datetime.utcnow()
+    db.commit()
+    assert jobs.run_next(db, now=later) is None
+    assert db.get(Job, other["id"]).status == "failed"
+
+
+def test_unknown_kind_fails_without_retry(client, db, seed_data, admin_headers, flaky_job):
+    """❌ Un tipo que este worker no conoce falla de inmediato, sin reintentos"""
+    job = _enqueue(client, admin_headers, "test_flaky")
+    jobs.unregister_handler("test_flaky")
+
+    assert jobs.run_next(db) == job["id"]
+    row = db.get(Job, job["id"])
+    assert (row.status, row.attempts) == ("failed", 1)
+    assert "desconocido" in row.error
+    assert row.finished_at is not None
+
+
+def test_cancel_job(client, db, seed_data, admin_headers, seller_headers, flaky_job):
+    """✅ Una tarea cancelada en cola no se ejecuta; la de otro usuario no es visible"""
+    job = _enqueue(client, admin_headers, "test_flaky")
+    res = client.post(f"/api/v1/jobs/{job['id']}/cancel", headers=admin_headers)
+    assert res.json()["status"] == "cancelled"
+    assert jobs.run_next(db) is None
+    assert flaky_job["runs"] == 0
+
+    assert client.get(f"/api/v1/jobs/{job['id']}", headers=seller_headers).status_code == 404
+    res = client.post(f"/api/v1/jobs/{job['id']}/cancel", headers=admin_headers)
+    assert res.status_code == 400
+
+
+def test_enqueue_validation(client, seed_data, admin_headers, seller_headers):
+    """❌ Tipo desconocido, parámetros inválidos y rol sin permiso"""
+    res = client.post("/api/v1/jobs/", headers=admin_headers, json={"kind": "borrar_todo"})
+    assert res.status_code == 400
+
+    res = client.post("/api/v1/jobs/", headers=admin_headers, json={
+        "kind": "sales_export",
+        "params": {"date_from": "2025-02-01T00:00:00", "date_to": "2025-01-01T00:00:00"},
+    })
+    assert res.status_code == 422
+
+    res = client.post("/api/v1/jobs/", headers=seller_headers, json={
+        "kind": "product_import", "params": {"products": [{"sku": "X", "name": "X", "price": "1"}]},
+    })
+    assert res.status_code == 403
@@ -0,0 +1,95 @@
+"""
+Tests de ventas con carritos grandes (bloqueo de stock por lotes e inserción en bloque)
+"""
+from decimal import Decimal
+
+import pytest
+
+from neos_core.database import config
+from neos_core.database.models import (
+    Currency, LocationStock, PointOfSale, Product, ProductVariant, SaleDetail
+)
+from neos_core.services import tax
+
+
+@pytest.fixture
+def wholesale(db, seed_data, monkeypatch):
+    monkeypatch.setattr(config, "LARGE_CART_MIN_LINES", 2)
+    currency = Currency(code="ARS", name="Peso", symbol="$")
+    pos = PointOfSale(tenant_id=1, name="Depósito", code="DEP-1")
+    flour = Product(tenant_id=1, sku="HAR-25", name="Harina 25kg", price=Decimal("12.35"),
+                    stock=Decimal("100"), tax_rate=Decimal("10.5"))
+    oil = Product(tenant_id=1, sku="ACE-5", name="Aceite 5L", price=Decimal("8.10"),
+                  stock=Decimal("50"), tax_rate=Decimal("21"))
+    shirt = Product(tenant_id=1, sku="REM-1", name="Remera", price=Decimal("20"), stock=Decimal("0"))
+    db.add_all([currency, pos, flour, oil, shirt])
+    db.flush()
+    variant = ProductVariant(tenant_id=1, product_id=shirt.id, sku="REM-1-M", name="M",
+                             price=Decimal("22"), stock=Decimal("5"))
+    db.add(variant)
+    db.commit()
+    return {
+        "currency": currency.id, "pos": pos.id, "flour": flour.id, "oil": oil.id,
+        "shirt": shirt.id, "variant": variant.id,
+    }
+
+
+def _sale(client, headers, refs, items):
+    return client.post("/api/v1/sales/", headers=headers, json={
+        "point_of_sale_id": refs["pos"],
+        "currency_id": refs["currency"],
+        "payment_method": "TRANSFER",
+        "items": items,
+    })
+
+
+def test_large_cart_matches_per_line_sale(client, db, wholesale, seller_headers):
+    """✅ El camino por lotes descuenta stock y totaliza igual que línea por línea"""
+    db.add(LocationStock(tenant_id=1, point_of_sale_id=wholesale["pos"], product_id=wholesale["oil"],
+                         stock=Decimal("20")))
+    db.commit()
+
+    res = _sale(client, seller_headers, wholesale, [
+        {"product_id": wholesale["flour"], "quantity": "3.333"},
+        {"product_id": wholesale["oil"], "quantity": "4"},
+        {"product_id": wholesale["shirt"], "variant_id": wholesale["variant"], "quantity": "2"},
+        {"product_id": wholesale["flour"], "quantity": "1"},
+    ])
+    assert res.status_code == 201, res.json()
+    sale = res.json()
+
+    expected = tax.compute_taxes([
+        (Decimal("3.333"), Decimal("12.35"), Decimal("10.5")),
+        (Decimal("4"), Decimal("8.10"), Decimal("21")),
+        (Decimal("2"), Decimal("22"), Decimal("0")),
+        (Decimal("1"), Decimal("12.35"), Decimal("10.5")),
+    ])
+    assert Decimal(sale["total"]) == expected.total
+    assert [Decimal(i["unit_price"]) for i in sale["items"]] == [line.unit_price for line in expected.lines]
+
+    db.expire_all()
+    assert db.get(Product, wholesale["flour"]).stock == Decimal("95.667")
+    assert db.get(Product, wholesale["oil"]).stock == Decimal("46")
+    assert db.get(ProductVariant, wholesale["variant"]).stock == Decimal("3")
+    assert db.query(LocationStock).one().stock == Decimal("16")
+    assert all(d.sale_created_at is not None for d in db.query(SaleDetail).filter_by(sale_id=sale["id"]))
+
+
+def test_large_cart_requires_variant(client, wholesale, seller_headers):
+    """❌ Un producto con variantes no se vende sin elegir una"""
+    res = _sale(client, seller_headers, wholesale, [
+        {"product_id": wholesale["flour"], "quantity": "1"},
+        {"product_id": wholesale["shirt"], "quantity": "1"},
+    ])
+    assert res.status_code == 400
+    assert "variante" in res.json()["detail"]
+
+
+def test_large_cart_checks_repeated_items_together(client, db, wholesale, seller_headers):
+    """❌ Un item repetido se valida por la cantidad total del carrito"""
+    res = _sale(client, seller_headers, wholesale, [
+        {"product_id": wholesale["oil"], "quantity": "30"},
+        {"product_id": wholesale["oil"], "quantity": "30"},
+    ])
+    assert res.status_code == 400
+    assert "Stock insuficiente" in res.json()["detail"]
@@ -0,0 +1,156 @@
+"""
+Tests de stock por punto de venta, transferencias y ventas por sucursal
+"""
+from decimal import Decimal
+
+import pytest
+
+from neos_core.database.models import Currency, LocationStock, PointOfSale, Product
+
+
+@pytest.fixture
+def branches(db, seed_data):
+    currency = Currency(code="ARS", name="Peso", symbol="$")
+    centro = PointOfSale(tenant_id=1, name="Centro", code="SUC-1")
+    norte = PointOfSale(tenant_id=1, name="Norte", code="SUC-2")
+    otra = PointOfSale(tenant_id=2, name="Ajena", code="SUC-X")
+    product = Product(tenant_id=1, sku="YER-1", name="Yerba", price=Decimal("10"), stock=Decimal("0"))
+    db.add_all([currency, centro, norte, otra, product])
+    db.commit()
+    return {
+        "currency": currency.id, "centro": centro.id, "norte": norte.id,
+        "otra": otra.id, "product": product.id,
+    }
+
+
+def _set_stock(client, headers, product_id, pos_id, stock, min_stock=None):
+    res = client.put("/api/v1/stock/locations", headers=headers, json={
+        "product_id": product_id, "point_of_sale_id": pos_id, "stock": stock, "min_stock": min_stock
+    })
+    assert res.status_code == 200, res.json()
+    return res.json()
+
+
+def test_set_location_stock_updates_total(client, db, branches, admin_headers):
+    """✅ El stock por ubicación ajusta el total del producto"""
+    _set_stock(client, admin_headers, branches["product"], branches["centro"], "10")
+    _set_stock(client, admin_headers, branches["product"], branches["norte"], "5")
+    _set_stock(client, admin_headers, branches["product"], branches["centro"], "8")
+
+    db.expire_all()
+    assert db.get(Product, branches["product"]).stock == Decimal("13")
+
+    res = client.get("/api/v1/stock/locations", params={"product_id": branches["product"]}, headers=admin_headers)
+    assert [Decimal(r["stock"]) for r in res.json()] == [Decimal("8"), Decimal("5")]
+
+
+def test_transfer_between_locations(client, db, branches, admin_headers):
+    """✅ La transferencia mueve stock entre sucursales sin cambiar el total"""
+    _set_stock(client, admin_headers, branches["product"], branches["centro"], "10")
+
+    res = client.post("/api/v1/stock/transfers", headers=admin_headers, json={
+        "product_id": branches["product"],
+        "from_point_of_sale_id": branches["centro"],
+        "to_point_of_sale_id": branches["norte"],
+        "quantity": "4",
+    })
+    assert res.status_code == 201, res.json()
+
+    db.expire_all()
+    stock = {
+        row.point_of_sale_id: row.stock
+        for row in db.query(LocationStock).filter_by(product_id=branches["product"])
+    }
+    assert stock == {branches["centro"]: Decimal("6"), branches["norte"]: Decimal("4")}
+    assert db.get(Product, branches["product"]).stock == Decimal("10")
+
+
+def test_transfer_insufficient_stock(client, branches, admin_headers):
+    """❌ No se puede transferir más de lo que hay en origen"""
+    _set_stock(client, admin_headers, branches["product"], branches["centro"], "1")
+
+    res = client.post("/api/v1/stock/transfers", headers=admin_headers, json={
+        "product_id": branches["product"],
+        "from_point_of_sale_id": branches["centro"],
+        "to_point_of_sale_id": branches["norte"],
+        "quantity": "2",
+    })
+    assert res.status_code == 400
+
+
+def test_transfer_to_other_tenant_pos(client, branches, admin_headers):
+    """❌ No se puede transferir a un punto de venta de otra empresa"""
+    _set_stock(client, admin_headers, branches["product"], branches["centro"], "5")
+
+    res = client.post("/api/v1/stock/transfers", headers=admin_headers, json={
+        "product_id": branches["product"],
+        "from_point_of_sale_id": branches["centro"],
+        "to_point_of_sale_id": branches["otra"],
+        "quantity": "1",
+    })
+    assert res.status_code == 400
+
+
+def test_sale_decrements_selling_location(client, db, branches, admin_headers, seller_headers):
+    """✅ La venta descuenta del POS que vende y deja la sucursal en stock bajo"""
+    _set_stock(client, admin_headers, branches["product"], branches["centro"], "5", min_stock="2")
+    _set_stock(client, admin_headers, branches["product"], branches["norte"], "5", min_stock="2")
+
+    res = client.post("/api/v1/sales/", headers=seller_headers, json={
+        "point_of_sale_id": branches["centro"],
+        "currency_id": branches["currency"],
+        "payment_method": "CASH",
+        "items": [{"product_id": branches["product"], "quantity": "3"}],
+    })
+    assert res.status_code == 201, res.json()
+
+    db.expire_all()
+    assert db.get(Product, branches["product"]).stock == Decimal("7")
+
+    res = client.get("/api/v1/stock/low-stock", headers=admin_headers)
+    low = res.json()
+    assert len(low) == 1
+    assert low[0]["point_of_sale_id"] == branches["centro"]
+    assert Decimal(low[0]["stock"]) == Decimal("2")
+
+
+def test_first_location_count_replaces_unassigned_stock(client, db, branches, admin_headers):
+    """✅ Con stock previo sin ubicación, el total pasa a ser la suma de las sucursales"""
+    product = db.get(Product, branches["product"])
+    product.stock = Decimal("100")
+    db.commit()
+
+    _set_stock(client, admin_headers, branches["product"], branches["centro"], "30")
+    db.expire_all()
+    assert db.get(Product, branches["product"]).stock == Decimal("30")
+
+    _set_stock(client, admin_headers, branches["product"], branches["norte"], "60")
+    db.expire_all()
+    assert db.get(Product, branches["product"]).stock == Decimal("90")
+
+
+def test_import_keeps_tracked_stock(db, branches, admin_headers, client):
+    """✅ La importación actualiza los demás campos pero no pisa el stock controlado por ubicación"""
+    from neos_core.crud import product_crud
+    from neos_core.schemas.product_schema import ProductBase
+
+    _set_stock(client, admin_headers, branches["product"], branches["centro"], "7")
+    product_crud.import_products(db, 1, [
+        ProductBase(sku="YER-1", name="Yerba", price=Decimal("12"), stock=Decimal("500"))
+    ], update_existing=True)
+    db.commit()
+
+    db.expire_all()
+    product = db.get(Product, branches["product"])
+    assert product.price == Decimal("12")
+    assert product.stock == Decimal("7")
+
+
+def test_direct_stock_edit_on_tracked_product(client, db, branches, admin_headers):
+    """❌ El stock de un producto controlado por ubicación no se edita desde el producto"""
+    _set_stock(client, admin_headers, branches["product"], branches["centro"], "5")
+
+    res = client.put(f"/api/v1/products/{branches['product']}", headers=admin_headers, json={"stock": "50"})
+    assert res.status_code == 400
+    db.expire_all()
+    assert db.get(Product, branches["product"]).stock == Decimal("5")
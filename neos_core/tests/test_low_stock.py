@@ -0,0 +1,168 @@
+"""
+Tests del flag de stock bajo y de las alertas push (SSE)
+"""
+import asyncio
+from decimal import Decimal
+
+from neos_core.api.v1.endpoints.product_routes import low_stock_event_stream
+from neos_core.crud import product_crud
+from neos_core.database.models import LocationStock, PointOfSale, Product, ProductVariant
+from neos_core.services import events
+from neos_core.services.events import EventBroker, low_stock_broker
+from neos_core.services.invalidation import InvalidationBus, invalidation_bus
+
+
+def test_low_stock_flag_maintained(client, db, seed_data, admin_headers):
+    """✅ El flag se actualiza al modificar stock y alimenta /utils/low-stock"""
+    product = Product(tenant_id=1, sku="LS-1", name="Aceite", price=Decimal("5"),
+                      stock=Decimal("10"), min_stock=Decimal("3"))
+    service = Product(tenant_id=1, sku="LS-SRV", name="Envío", price=Decimal("5"),
+                      stock=Decimal("0"), min_stock=Decimal("1"), is_service=True)
+    db.add_all([product, service])
+    db.commit()
+    assert product.is_low_stock is False
+    assert service.is_low_stock is False
+
+    res = client.put(f"/api/v1/products/{product.id}", json={"stock": "2"}, headers=admin_headers)
+    assert res.status_code == 200
+
+    res = client.get("/api/v1/products/utils/low-stock", headers=admin_headers)
+    assert [p["sku"] for p in res.json()] == ["LS-1"]
+
+    res = client.put(f"/api/v1/products/{product.id}", json={"stock": "8"}, headers=admin_headers)
+    res = client.get("/api/v1/products/utils/low-stock", headers=admin_headers)
+    assert res.json() == []
+
+
+def test_low_stock_transitions_published_after_commit(db, seed_data):
+    """✅ Solo se publican transiciones confirmadas (no en rollback)"""
+    async def scenario():
+        queue = low_stock_broker.subscribe(1)
+        try:
+            product = Product(tenant_id=1, sku="LS-2", name="Harina", price=Decimal("3"),
+                              stock=Decimal("5"), min_stock=Decimal("2"))
+            db.add(product)
+            db.commit()
+
+            savepoint = db.begin_nested()
+            product.stock = Decimal("1")
+            db.flush()
+            savepoint.rollback()
+            await asyncio.sleep(0)
+            assert queue.empty()
+
+            product.stock = Decimal("2")
+            db.commit()
+            event = await asyncio.wait_for(queue.get(), timeout=1)
+            assert event["event"] == "low_stock"
+            assert event["product_id"] == product.id
+            assert event["stock"] == "2"
+
+            product.stock = Decimal("20")
+            db.commit()
+            event = await asyncio.wait_for(queue.get(), timeout=1)
+            assert event["event"] == "stock_restored"
+        finally:
+            low_stock_broker.unsubscribe(1, queue)
+
+    asyncio.run(scenario())
+    assert low_stock_broker.subscriber_count(1) == 0
+
+
+def test_low_stock_event_stream_format():
+    """✅ El stream SSE envía snapshot, transiciones y heartbeats"""
+    class FakeRequest:
+        def __init__(self):
+            self.checks = 0
+
+        async def is_disconnected(self):
+            self.checks += 1
+            return self.checks > 2
+
+    async def scenario():
+        queue = low_stock_broker.subscribe(99)
+        queue.put_nowait({"event": "low_stock", "product_id": 7})
+        stream = low_stock_event_stream(FakeRequest(), 99, queue, [{"id": 1}], heartbeat_seconds=0.01)
+        return [chunk async for chunk in stream]
+
+    chunks = asyncio.run(scenario())
+    assert chunks[0] == 'event: snapshot\ndata: [{"id": 1}]\n\n'
+    assert chunks[1].startswith("event: low_stock\n")
+    assert chunks[2] == ": keep-alive\n\n"
+    assert low_stock_broker.subscriber_count(99) == 0
+
+
+def test_low_stock_stream_requires_manager_role(client, seller_headers):
+    """❌ Un vendedor no puede suscribirse a las alertas"""
+    res = client.get("/api/v1/products/utils/low-stock/stream", headers=seller_headers)
+    assert res.status_code == 403
+
+
+def test_low_stock_reaches_other_workers(db, seed_data):
+    """✅ Una transición confirmada en un worker llega a los clientes de los demás"""
+    other_broker = EventBroker("otro_worker")
+    other_worker = InvalidationBus(local_channel=invalidation_bus.local_channel)
+    other_worker.subscribe(events.LOW_STOCK_NAMESPACE, events._relay_to(other_broker))
+
+    async def scenario():
+        queue = other_broker.subscribe(1)
+        product = Product(tenant_id=1, sku="LS-W", name="Azúcar", price=Decimal("3"),
+                          stock=Decimal("1"), min_stock=Decimal("2"))
+        db.add(product)
+        db.commit()
+        event = await asyncio.wait_for(queue.get(), timeout=1)
+        assert event["event"] == "low_stock"
+        assert event["product_id"] == product.id
+
+    asyncio.run(scenario())
+
+
+def test_low_stock_snapshot_includes_variants_and_locations(db, seed_data):
+    """✅ El snapshot incluye variantes y sucursales bajo su mínimo, con la forma de los eventos"""
+    pos = PointOfSale(tenant_id=1, name="Centro", code="LS-POS")
+    remera = Product(tenant_id=1, sku="REM", name="Remera", price=Decimal("10"), stock=Decimal("50"))
+    yerba = Product(tenant_id=1, sku="YER", name="Yerba", price=Decimal("5"), stock=Decimal("40"))
+    db.add_all([pos, remera, yerba])
+    db.flush()
+    variant = ProductVariant(tenant_id=1, product_id=remera.id, sku="REM-S", price=Decimal("10"),
+                             stock=Decimal("1"), min_stock=Decimal("3"), attributes={"talle": "S"})
+    location = LocationStock(tenant_id=1, point_of_sale_id=pos.id, product_id=yerba.id,
+                             stock=Decimal("2"), min_stock=Decimal("5"))
+    db.add_all([variant, location])
+    db.commit()
+
+    alerts = product_crud.get_low_stock_alerts(db, 1)
+    assert {(a["sku"], a["variant_id"], a["point_of_sale_id"]) for a in alerts} == {
+        ("REM-S", variant.id, None), ("YER", None, pos.id)
+    }
+    assert all(a["event"] == "low_stock" for a in alerts)
+    assert [p.sku for p in product_crud.get_low_stock_products(db, 1)] == ["REM", "YER"]
+
+
+def test_location_crossing_min_stock_is_published(db, seed_data):
+    """✅ Una sucursal que cruza su mínimo publica low_stock y luego stock_restored"""
+    pos = PointOfSale(tenant_id=1, name="Norte", code="LS-POS2")
+    product = Product(tenant_id=1, sku="ACE", name="Aceite", price=Decimal("5"), stock=Decimal("10"))
+    db.add_all([pos, product])
+    db.flush()
+    location = LocationStock(tenant_id=1, point_of_sale_id=pos.id, product_id=product.id,
+                             stock=Decimal("10"), min_stock=Decimal("3"))
+    db.add(location)
+    db.commit()
+
+    async def scenario():
+        queue = low_stock_broker.subscribe(1)
+        try:
+            location.stock = Decimal("2")
+            db.commit()
+            event = await asyncio.wait_for(queue.get(), timeout=1)
+            assert (event["event"], event["point_of_sale_id"], event["sku"]) == ("low_stock", pos.id, "ACE")
+
+            location.min_stock = Decimal("1")
+            db.commit()
+            event = await asyncio.wait_for(queue.get(), timeout=1)
+            assert event["event"] == "stock_restored"
+        finally:
+            low_stock_broker.unsubscribe(1, queue)
+
+    asyncio.run(scenario())
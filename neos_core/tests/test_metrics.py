@@ -0,0 +1,97 @@
+"""
+Tests del endpoint /metrics y del registro de métricas en proceso
+"""
+import json
+import os
+import time
+
+from neos_core.services import metrics
+from neos_core.services.pricing import pricing_index
+
+
+def test_histogram_exposition_format():
+    """✅ Histograma acumula buckets y exporta _sum/_count"""
+    registry = metrics.MetricsRegistry()
+    hist = registry.histogram("test_latency_seconds", "Latencia de prueba", ("route",), buckets=(0.1, 1.0))
+
+    hist.observe(0.05, route="/a")
+    hist.observe(0.5, route="/a")
+    hist.observe(3, route="/a")
+
+    body = registry.render()
+    assert "# TYPE test_latency_seconds histogram" in body
+    assert 'test_latency_seconds_bucket{route="/a",le="0.1"} 1' in body
+    assert 'test_latency_seconds_bucket{route="/a",le="1"} 2' in body
+    assert 'test_latency_seconds_bucket{route="/a",le="+Inf"} 3' in body
+    assert 'test_latency_seconds_count{route="/a"} 3' in body
+
+
+def test_cache_hit_ratio():
+    """✅ El hit ratio se deriva de los contadores de cache"""
+    metrics.record_cache_access("test_cache", hit=True)
+    metrics.record_cache_access("test_cache", hit=True)
+    metrics.record_cache_access("test_cache", hit=False)
+
+    body = metrics.REGISTRY.render()
+    line = next(l for l in body.splitlines() if l.startswith('neos_cache_hit_ratio{cache="test_cache"}'))
+    assert abs(float(line.split()[-1]) - 2 / 3) < 1e-9
+
+
+def test_pricing_index_records_cache_access(db, seed_data):
+    """✅ El índice de precios cuenta un miss al cargar y hits al reutilizar"""
+    hits = metrics.CACHE_REQUESTS.get(cache="pricing_index", result="hit")
+    misses = metrics.CACHE_REQUESTS.get(cache="pricing_index", result="miss")
+    pricing_index.get(db, 1)
+    pricing_index.get(db, 1)
+    pricing_index.get(db, 1)
+    assert metrics.CACHE_REQUESTS.get(cache="pricing_index", result="miss") == misses + 1
+    assert metrics.CACHE_REQUESTS.get(cache="pricing_index", result="hit") == hits + 2
+
+
+def test_metrics_endpoint_uses_route_template(client, admin_headers):
+    """✅ /metrics expone latencia por template de ruta, no por URL concreta"""
+    client.get("/api/v1/products/12345", headers=admin_headers)
+
+    res = client.get("/metrics")
+    assert res.status_code == 200
+    assert res.headers["content-type"].startswith("text/plain")
+    assert 'route="/api/v1/products/{product_id}"' in res.text
+    assert "/api/v1/products/12345" not in res.text
+    assert "neos_http_requests_in_progress" in res.text
+    assert 'neos_db_pool_checked_out{engine="primary"}' in res.text
+
+
+def test_metrics_summed_across_workers(tmp_path):
+    """✅ Con directorio compartido se suman los workers; los gauges solo de los vivos"""
+    registry = metrics.MetricsRegistry()
+    requests = registry.counter("test_requests_total", "Requests", ("route",))
+    in_progress = registry.gauge("test_in_progress", "En curso")
+    ratio = registry.gauge("test_ratio", "Proporción", multiprocess_mode="all")
+    latency = registry.histogram("test_latency_seconds", "Latencia", buckets=(1.0,))
+    requests.inc(2, route="/a")
+    in_progress.set(1)
+    ratio.set(0.5)
+    latency.observe(0.5)
+
+    # Otro worker vivo y uno ya reciclado (foto vieja)
+    other = {
+        "test_requests_total": [[["/a"], 3]],
+        "test_in_progress": [[[], 4]],
+        "test_ratio": [[[], 0.25]],
+        "test_latency_seconds": [[[], [0, 2], 7.0]],
+    }
+    (tmp_path / "metrics_111_1.json").write_text(json.dumps(other))
+    dead = tmp_path / "metrics_222_1.json"
+    dead.write_text(json.dumps(other))
+    past = time.time() - 3600
+    os.utime(dead, (past, past))
+
+    body = registry.render(str(tmp_path))
+    assert 'test_requests_total{route="/a"} 8' in body
+    assert "test_in_progress 5" in body
+    assert 'test_ratio{worker="111"} 0.25' in body
+    assert f'test_ratio{{worker="{os.getpid()}"}} 0.5' in body
+    assert 'worker="222"' not in body
+    assert 'test_latency_seconds_bucket{le="1"} 1' in body
+    assert "test_latency_seconds_count 5" in body
+    assert "test_latency_seconds_sum 14.5" in body
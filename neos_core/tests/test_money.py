@@ -0,0 +1,68 @@
+"""
+Tests del núcleo monetario de punto fijo (equivalencia con Decimal)
+"""
+import random
+from decimal import Decimal
+
+import pytest
+
+from neos_core.services import money, tax
+
+CENT = Decimal("0.01")
+
+
+@pytest.mark.parametrize("rounding", money.ROUNDING_MODES)
+def test_div_round_matches_decimal(rounding):
+    """✅ div_round redondea igual que Decimal.quantize, también con negativos y empates"""
+    rng = random.Random(rounding)
+    cases = [(5, 10), (-5, 10), (15, 10), (-15, 10), (25, 10), (1, 3), (-2, 3), (0, 7)]
+    cases += [(rng.randint(-10 ** 9, 10 ** 9), rng.randint(1, 10 ** 5)) for _ in range(2000)]
+
+    for numerator, denominator in cases:
+        expected = (Decimal(numerator) / Decimal(denominator)).to_integral_value(rounding=rounding)
+        assert money.div_round(numerator, denominator, rounding) == int(expected), (numerator, denominator)
+
+
+@pytest.mark.parametrize("rounding", money.ROUNDING_MODES)
+def test_line_and_tax_amounts_match_decimal(rounding):
+    """✅ Importe de línea e impuesto en enteros == cálculo con Decimal"""
+    rng = random.Random(f"line-{rounding}")
+    for _ in range(2000):
+        quantity = Decimal(rng.randint(-50_000, 5_000_000)) / 10_000
+        unit_price = Decimal(rng.randint(0, 10_000_000)) / 100
+        rate = Decimal(rng.choice([0, 250, 1050, 2100, 2700, rng.randint(0, 10_000)])) / 100
+
+        subtotal = (quantity * unit_price).quantize(CENT, rounding)
+        tax_amount = (subtotal * rate / 100).quantize(CENT, rounding)
+
+        cents = money.line_amount(money.to_qty(quantity), money.to_cents(unit_price), rounding)
+        assert money.from_cents(cents) == subtotal
+        assert money.from_cents(money.percent_of(cents, money.to_rate(rate), rounding)) == tax_amount
+
+
+def test_conversions():
+    """✅ Conversión a enteros escalados y vuelta con 2 decimales"""
+    assert money.to_cents(Decimal("12.34")) == 1234
+    assert money.to_cents(3) == 300
+    assert money.to_cents(0.1 + 0.2) == 30
+    assert money.to_cents(Decimal("0.005")) == 1
+    assert money.to_cents(Decimal("0.005"), money.ROUND_HALF_EVEN) == 0
+    assert money.to_qty(Decimal("1.5")) == 15_000
+    assert money.to_rate(Decimal("10.5")) == 1050
+
+    assert str(money.from_cents(0)) == "0.00"
+    assert str(money.from_cents(-1050)) == "-10.50"
+
+
+def test_invoice_rounding_uses_kernel():
+    """✅ El modo invoice da lo mismo que redondear la base por alícuota con Decimal"""
+    rng = random.Random(7)
+    items = [
+        (Decimal(rng.randint(1, 999)) / 100, Decimal(rng.randint(1, 99_999)) / 100, Decimal("10.5"))
+        for _ in range(300)
+    ]
+    result = tax.compute_taxes(items, rounding=tax.ROUNDING_INVOICE)
+
+    base = sum((line.subtotal for line in result.lines), Decimal("0"))
+    assert result.groups[0].taxable_base == base
+    assert result.tax_amount == tax.round_money(base * Decimal("10.5") / 100)
@@ -0,0 +1,112 @@
+"""
+Tests del outbox transaccional: relay ordenado por tenant, sinks y stream NDJSON
+"""
+import json
+from decimal import Decimal
+
+import pytest
+
+from neos_core.database.models import OutboxEvent, Product
+from neos_core.services import outbox
+from neos_core.tests.conftest import make_sale
+
+
+@pytest.fixture
+def shop(shop, db):
+    other = Product(tenant_id=2, sku="TE", name="Té", price=Decimal("5"), stock=Decimal("10"))
+    db.add(other)
+    db.commit()
+    return {**shop, "other": other.id}
+
+
+def _stream(client, headers, **params):
+    res = client.get("/api/v1/events/stream", headers=headers, params=params)
+    assert res.status_code == 200
+    return [json.loads(line) for line in res.text.splitlines() if line]
+
+
+def test_events_written_with_changes_and_relayed_in_order(client, db, shop, admin_headers, seller_headers):
+    """✅ Venta, cancelación y producto generan eventos publicados en orden por tenant"""
+    sale = make_sale(client, seller_headers, shop, "2")
+    assert client.post(f"/api/v1/sales/{sale['id']}/cancel", headers=seller_headers).status_code == 200
+    res = client.put(f"/api/v1/products/{shop['product']}", headers=admin_headers, json={"price": "12"})
+    assert res.status_code == 200
+
+    # Todavía sin publicar: sin sequence
+    assert db.query(OutboxEvent).filter(OutboxEvent.sequence.isnot(None)).count() == 0
+
+    sink = outbox.QueueSink()
+    assert outbox.relay_pending(db, sink) == 3
+    events = sink.drain()
+    assert [(e["sequence"], e["type"]) for e in events] == [
+        (1, "sale.created"), (2, "sale.cancelled"), (3, "product.updated"),
+    ]
+    created = events[0]["payload"]
+    assert created["invoice_number"] == sale["invoice_number"]
+    assert created["items"][0]["quantity"] == "2"
+    assert events[1]["payload"]["status"] == "cancelled"
+    assert events[2]["payload"]["price"] == "12"
+
+    # Nada pendiente: una segunda pasada no republica
+    assert outbox.relay_pending(db, sink) == 0
+
+
+def test_sequences_are_per_tenant(db, shop):
+    """✅ Cada tenant tiene su propia numeración"""
+    outbox.record(db, 1, outbox.PRODUCT_UPDATED, shop["product"], {})
+    outbox.record(db, 2, outbox.PRODUCT_UPDATED, shop["other"], {})
+    outbox.record(db, 1, outbox.PRODUCT_DELETED, shop["product"], {})
+    db.commit()
+
+    sink = outbox.QueueSink()
+    assert outbox.relay_pending(db, sink, batch_size=1) == 3
+    assert sorted((e["tenant_id"], e["sequence"]) for e in sink.drain()) == [(1, 1), (1, 2), (2, 1)]
+
+
+def test_failed_sink_retries_same_batch(db, shop):
+    """✅ Si el sink falla no se marca nada y se reintenta con los mismos sequence"""
+    class BrokenSink(outbox.OutboxSink):
+        def publish(self, events):
+            raise ConnectionError("ERP caído")
+
+    outbox.record(db, 1, outbox.PRODUCT_UPDATED, shop["product"], {"price": "11"})
+    db.commit()
+
+    assert outbox.relay_pending(db, BrokenSink()) == 0
+    assert db.query(OutboxEvent).one().sequence is None
+
+    sink = outbox.QueueSink()
+    assert outbox.relay_pending(db, sink) == 1
+    assert [e["sequence"] for e in sink.drain()] == [1]
+
+
+def test_file_sink_writes_ndjson(db, shop, tmp_path):
+    """✅ El sink de archivo agrega una línea JSON por evento"""
+    path = tmp_path / "outbox" / "events.ndjson"
+    outbox.record(db, 1, outbox.PRODUCT_UPDATED, shop["product"], {"price": "11"})
+    db.commit()
+
+    assert outbox.relay_pending(db, outbox.FileSink(str(path))) == 1
+    lines = path.read_text().splitlines()
+    assert [json.loads(line)["type"] for line in lines] == ["product.updated"]
+
+
+def test_ndjson_stream_resumes_from_offset(client, db, shop, admin_headers, seller_headers):
+    """✅ El stream devuelve solo eventos publicados, desde el offset pedido"""
+    first = make_sale(client, seller_headers, shop)
+    second = make_sale(client, seller_headers, shop)
+    outbox.relay_pending(db, outbox.NullSink())
+    outbox.record(db, 1, outbox.PRODUCT_UPDATED, shop["product"], {})
+    db.commit()
+
+    events = _stream(client, admin_headers)
+    assert [(e["sequence"], e["entity_id"]) for e in events] == [(1, first["id"]), (2, second["id"])]
+
+    assert [e["sequence"] for e in _stream(client, admin_headers, after=1)] == [2]
+    assert _stream(client, admin_headers, after=2) == []
+
+
+def test_stream_requires_admin(client, shop, seller_headers):
+    """❌ Un vendedor no puede leer los eventos del tenant"""
+    res = client.get("/api/v1/events/stream", headers=seller_headers)
+    assert res.status_code == 403
@@ -0,0 +1,77 @@
+"""
+Tests del particionado mensual de ventas y de las consultas por rango de fechas
+"""
+from datetime import date, datetime
+from decimal import Decimal
+
+from neos_core.crud import sales_crud
+from neos_core.database import config, partitioning
+from neos_core.database.models import Sale, SaleDetail, Currency, PointOfSale, Product
+from neos_core.schemas.sales_schema import SaleFilters
+
+
+def test_month_helpers():
+    """✅ Cálculo de meses y nombres de partición"""
+    assert partitioning.add_months(date(2025, 11, 1), 3) == date(2026, 2, 1)
+    assert partitioning.partition_name("sales", date(2026, 2, 1)) == "sales_y2026m02"
+    assert "FROM ('2025-12-01') TO ('2026-01-01')" in partitioning.partition_ddl("sales", date(2025, 12, 1))
+
+
+def test_partitioned_ddl_from_model():
+    """✅ El DDL particionado incluye la clave de partición en PK y FK"""
+    sales_ddl = partitioning.partitioned_table_ddl(Sale.__table__)
+    details_ddl = partitioning.partitioned_table_ddl(SaleDetail.__table__)
+
+    assert "PARTITION BY RANGE (created_at)" in sales_ddl[0]
+    assert "PRIMARY KEY (id, created_at)" in sales_ddl[0]
+    assert any("ix_sales_tenant_created_at" in stmt for stmt in sales_ddl)
+
+    assert "PARTITION BY RANGE (sale_created_at)" in details_ddl[0]
+    assert "sale_created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL" in details_ddl[0]
+    assert "FOREIGN KEY (sale_id, sale_created_at) REFERENCES sales (id, created_at)" in details_ddl[0]
+
+
+def test_create_schema_on_sqlite_is_plain(tmp_path):
+    """✅ En SQLite create_schema equivale a create_all y no crea particiones"""
+    engine = config.build_engine(f"sqlite:///{tmp_path / 'plain.db'}")
+    partitioning.create_schema(engine)
+    assert partitioning.ensure_partitions(engine) == []
+    engine.dispose()
+
+
+def test_date_range_filters_and_summary(db, seed_data):
+    """✅ get_sales y el reporte respetan el rango [date_from, date_to)"""
+    currency = Currency(code="UYU", name="Peso Uruguayo", symbol="$")
+    pos = PointOfSale(tenant_id=1, name="Caja", code="POS-P")
+    product = Product(tenant_id=1, sku="PART-1", name="Yerba", price=Decimal("10"), stock=Decimal("10"))
+    db.add_all([currency, pos, product])
+    db.commit()
+
+    for created_at, method in (
+            (datetime(2025, 1, 15), "CASH"),
+            (datetime(2025, 2, 10), "CASH"),
+            (datetime(2025, 2, 20), "CARD"),
+    ):
+        sale = Sale(
+            tenant_id=1, user_id=3, point_of_sale_id=pos.id, currency_id=currency.id,
+            payment_method=method, subtotal=Decimal("10"), tax_amount=Decimal("0"),
+            total=Decimal("10"), created_at=created_at
+        )
+        db.add(sale)
+        db.flush()
+        db.add(SaleDetail(
+            sale_id=sale.id, product_id=product.id, quantity=1, unit_price=10,
+            subtotal=10, tax_amount=0, total=10
+        ))
+    db.commit()
+
+    # La clave de partición del detalle se copia de la venta
+    assert db.query(SaleDetail).filter(SaleDetail.sale_created_at == datetime(2025, 1, 15)).count() == 1
+
+    feb = SaleFilters(date_from=datetime(2025, 2, 1), date_to=datetime(2025, 3, 1))
+    assert len(sales_crud.get_sales(db, 1, feb)) == 2
+
+    summary = sales_crud.get_sales_summary(db, 1, datetime(2025, 2, 1), datetime(2025, 3, 1))
+    assert summary["sales_count"] == 2
+    assert summary["total"] == Decimal("20")
+    assert [r["payment_method"] for r in summary["by_payment_method"]] == ["CARD", "CASH"]
@@ -0,0 +1,240 @@
+"""
+Tests de listas de precios y promociones (porcentaje, NxM, combos)
+"""
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pytest
+
+from neos_core.database.models import (
+    Client, PointOfSale, Product, Sale, TaxIdType, TaxResponsibility
+)
+from neos_core.services import pricing
+from neos_core.tests.conftest import make_sale
+
+D = Decimal
+
+
+@pytest.fixture
+def shop(shop, db):
+    tax_type = TaxIdType(name="CUIT")
+    tax_resp = TaxResponsibility(name="Responsable Inscripto")
+    other_pos = PointOfSale(tenant_id=1, name="Caja 2", code="0002")
+    db.add_all([tax_type, tax_resp, other_pos])
+    db.commit()
+
+    client = Client(
+        tenant_id=1, full_name="Mayorista", tax_id="20-22222222-2",
+        tax_id_type_id=tax_type.id, tax_responsibility_id=tax_resp.id
+    )
+    cafe = db.get(Product, shop["product"])
+    cafe.price = D("100")
+    cafe.attributes = {"categoria": "bebidas"}
+    te = Product(tenant_id=1, sku="TE", name="Té", price=D("50"), stock=D("100"),
+                 attributes={"categoria": "bebidas"})
+    medialuna = Product(tenant_id=1, sku="MED", name="Medialuna", price=D("30"), stock=D("100"),
+                        tax_rate=D("21"), attributes={"categoria": "panaderia"})
+    db.add_all([client, te, medialuna])
+    db.commit()
+    return {
+        **shop, "other_pos": other_pos.id, "client": client.id,
+        "cafe": cafe.id, "te": te.id, "medialuna": medialuna.id,
+    }
+
+
+def _post(client, headers, path, data):
+    res = client.post(f"/api/v1/pricing/{path}", headers=headers, json=data)
+    assert res.status_code == 201, res.json()
+    return res.json()
+
+
+def _items(*pairs):
+    return [{"product_id": product_id, "quantity": str(quantity)} for product_id, quantity in pairs]
+
+
+def _quote(client, headers, shop, items, **extra):
+    res = client.post("/api/v1/pricing/quote", headers=headers, json={
+        "point_of_sale_id": shop["pos"], "items": items, **extra
+    })
+    assert res.status_code == 200, res.json()
+    return res.json()
+
+
+def test_client_price_list_applied_to_sale(client, db, shop, admin_headers, seller_headers):
+    """✅ La venta usa la lista más específica para el cliente y el punto de venta"""
+    general = _post(client, admin_headers, "price-lists", {
+        "name": "General POS", "point_of_sale_id": shop["pos"],
+        "items": [{"product_id": shop["cafe"], "price": "95"}],
+    })
+    special = _post(client, admin_headers, "price-lists", {
+        "name": "Mayorista", "client_id": shop["client"],
+        "items": [{"product_id": shop["cafe"], "price": "80"}],
+    })
+
+    sale = make_sale(client, seller_headers, shop, items=_items((shop["cafe"], 2), (shop["te"], 1)),
+                 client_id=shop["client"])
+    assert sale["price_list_id"] == special["id"]
+    assert [D(i["unit_price"]) for i in sale["items"]] == [D("80"), D("50")]
+    assert D(sale["total"]) == D("210")
+
+    # Sin cliente aplica la lista del punto de venta
+    sale = make_sale(client, seller_headers, shop, items=_items((shop["cafe"], 1)))
+    assert sale["price_list_id"] == general["id"]
+    assert D(sale["items"][0]["unit_price"]) == D("95")
+
+    stored = db.get(Sale, sale["id"])
+    assert stored.price_list_id == general["id"]
+
+
+def test_percentage_promotion_by_category(client, shop, admin_headers, seller_headers):
+    """✅ Porcentaje sobre una categoría (atributo del producto) con impuesto sobre el neto"""
+    promo = _post(client, admin_headers, "promotions", {
+        "name": "Bebidas -10%", "kind": "percentage",
+        "attribute_key": "categoria", "attribute_value": "bebidas", "percent": "10",
+    })
+
+    sale = make_sale(client, seller_headers, shop, items=_items((shop["cafe"], 1), (shop["te"], 2), (shop["medialuna"], 1)))
+    discounts = [(D(i["discount_amount"]), i["promotion_id"]) for i in sale["items"]]
+    assert discounts == [(D("10"), promo["id"]), (D("10"), promo["id"]), (D("0"), None)]
+    assert D(sale["discount_amount"]) == D("20")
+    # 90 + 90 + 30 neto; IVA 21% solo de la medialuna
+    assert D(sale["subtotal"]) == D("210")
+    assert D(sale["tax_amount"]) == D("6.30")
+    assert D(sale["total"]) == D("216.30")
+
+
+def test_nxm_gives_cheapest_units(client, shop, admin_headers, seller_headers):
+    """✅ 3x2 por categoría: las unidades gratis son las más baratas"""
+    _post(client, admin_headers, "promotions", {
+        "name": "Bebidas 3x2", "kind": "nxm",
+        "attribute_key": "categoria", "attribute_value": "bebidas", "buy_quantity": 3, "pay_quantity": 2,
+    })
+
+    quote = _quote(client, seller_headers, shop, _items((shop["cafe"], 4), (shop["te"], 2)))
+    # 6 unidades -> 2 gratis, ambas de té
+    assert [D(line["discount_amount"]) for line in quote["lines"]] == [D("0"), D("100")]
+    assert D(quote["total"]) == D("400")
+
+    quote = _quote(client, seller_headers, shop, _items((shop["cafe"], 2)))
+    assert D(quote["discount_amount"]) == D("0")
+
+
+def test_bundle_promotion(client, shop, admin_headers, seller_headers):
+    """✅ Combo café + 2 medialunas por precio fijo, repartido entre las líneas"""
+    promo = _post(client, admin_headers, "promotions", {
+        "name": "Desayuno", "kind": "bundle", "bundle_price": "130",
+        "bundle_items": [
+            {"product_id": shop["cafe"], "quantity": "1"},
+            {"product_id": shop["medialuna"], "quantity": "2"},
+        ],
+    })
+
+    sale = make_sale(client, seller_headers, shop, items=_items((shop["cafe"], 2), (shop["medialuna"], 3)))
+    # Un combo (alcanza para 1 por las medialunas): 160 a precio normal -> 30 de descuento
+    assert D(sale["discount_amount"]) == D("30")
+    assert {i["promotion_id"] for i in sale["items"]} == {promo["id"]}
+    assert sum(D(i["discount_amount"]) for i in sale["items"]) == D("30")
+
+
+def test_priority_one_promotion_per_line(client, shop, admin_headers, seller_headers):
+    """✅ Una línea recibe solo la promoción de mayor prioridad"""
+    _post(client, admin_headers, "promotions", {
+        "name": "Bebidas -10%", "kind": "percentage", "priority": 1,
+        "attribute_key": "categoria", "attribute_value": "bebidas", "percent": "10",
+    })
+    cafe = _post(client, admin_headers, "promotions", {
+        "name": "Café -50%", "kind": "percentage", "priority": 5,
+        "product_id": shop["cafe"], "percent": "50",
+    })
+
+    quote = _quote(client, seller_headers, shop, _items((shop["cafe"], 1), (shop["te"], 1)))
+    assert quote["lines"][0]["promotion_id"] == cafe["id"]
+    assert D(quote["lines"][0]["discount_amount"]) == D("50")
+    assert D(quote["lines"][1]["discount_amount"]) == D("5")
+
+
+def test_promotion_scope_and_validity(client, shop, admin_headers, seller_headers):
+    """✅ Las promociones respetan punto de venta y vigencia"""
+    _post(client, admin_headers, "promotions", {
+        "name": "Solo caja 2", "kind": "percentage", "product_id": shop["cafe"],
+        "percent": "10", "point_of_sale_id": shop["other_pos"],
+    })
+    _post(client, admin_headers, "promotions", {
+        "name": "Vencida", "kind": "percentage", "product_id": shop["te"], "percent": "10",
+        "starts_at": (datetime.utcnow() - timedelta(days=2)).isoformat(),
+        "ends_at": (datetime.utcnow() - timedelta(days=1)).isoformat(),
+    })
+
+    quote = _quote(client, seller_headers, shop, _items((shop["cafe"], 1), (shop["te"], 1)))
+    assert D(quote["discount_amount"]) == D("0")
+
+    quote = _quote(client, seller_headers, {**shop, "pos": shop["other_pos"]}, _items((shop["cafe"], 1)))
+    assert D(quote["discount_amount"]) == D("10")
+
+
+def test_index_patched_on_changes(client, shop, admin_headers, seller_headers):
+    """✅ Los cambios de reglas se reflejan sin recargar todo el índice"""
+    promo = _post(client, admin_headers, "promotions", {
+        "name": "Té -20%", "kind": "percentage", "product_id": shop["te"], "percent": "20",
+    })
+    price_list = _post(client, admin_headers, "price-lists", {"name": "General"})
+
+    # Compila el índice del tenant
+    assert D(_quote(client, seller_headers, shop, _items((shop["te"], 1)))["total"]) == D("40")
+    rules = pricing.pricing_index._rules[1]
+
+    res = client.put(f"/api/v1/pricing/promotions/{promo['id']}", headers=admin_headers,
+                     json={"is_active": False})
+    assert res.status_code == 200
+    res = client.put(f"/api/v1/pricing/price-lists/{price_list['id']}", headers=admin_headers,
+                     json={"items": [{"product_id": shop["te"], "price": "45"}]})
+    assert res.status_code == 200
+    assert [i["price"] for i in res.json()["items"]] == ["45.00"]
+
+    quote = _quote(client, seller_headers, shop, _items((shop["te"], 1)))
+    assert pricing.pricing_index._rules[1] is rules
+    assert D(quote["total"]) == D("45")
+    assert quote["lines"][0]["promotion_id"] is None
+
+
+def test_invalid_promotions(client, shop, admin_headers, seller_headers):
+    """❌ Reglas inconsistentes, sin permisos o de otro tenant"""
+    res = client.post("/api/v1/pricing/promotions", headers=admin_headers, json={
+        "name": "3x3", "kind": "nxm", "product_id": shop["cafe"], "buy_quantity": 3, "pay_quantity": 3,
+    })
+    assert res.status_code == 422
+
+    res = client.post("/api/v1/pricing/promotions", headers=admin_headers, json={
+        "name": "Sin alcance", "kind": "percentage", "percent": "10",
+    })
+    assert res.status_code == 422
+
+    res = client.post("/api/v1/pricing/price-lists", headers=seller_headers, json={"name": "Vendedor"})
+    assert res.status_code == 403
+
+    res = client.post("/api/v1/pricing/promotions", headers=admin_headers, json={
+        "name": "Ajeno", "kind": "percentage", "product_id": 999999, "percent": "10",
+    })
+    assert res.status_code == 400
+
+
+def test_set_promotion_replaces_indexes_instead_of_mutating():
+    """✅ Un parche arma índices nuevos: quien leía los anteriores sigue viendo un estado consistente"""
+    rules = pricing.TenantRules()
+    first = pricing.CompiledPromotion(id=1, kind=pricing.KIND_PERCENTAGE, priority=0,
+                                      point_of_sale_id=None, starts_at=None, ends_at=None, product_id=10)
+    rules.set_promotion(first, 1)
+    by_product, by_attribute, promotions = rules.by_product, rules.by_attribute, rules.promotions
+
+    second = pricing.CompiledPromotion(id=2, kind=pricing.KIND_PERCENTAGE, priority=0,
+                                       point_of_sale_id=None, starts_at=None, ends_at=None,
+                                       attribute=("color", "Rojo"))
+    rules.set_promotion(second, 2)
+    rules.set_promotion(None, 1)
+
+    assert by_product == {10: {1: first}}
+    assert by_attribute == {}
+    assert promotions == {1: first}
+    assert rules.by_product == {}
+    assert rules.by_attribute == {("color", "Rojo"): {2: second}}
+    assert rules.promotions == {2: second}
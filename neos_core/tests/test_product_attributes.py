@@ -0,0 +1,59 @@
+"""
+Tests de filtrado de productos por atributos (JSONB en PostgreSQL, JSON en SQLite)
+"""
+from decimal import Decimal
+
+from neos_core.database.models import Product
+
+
+def _add_products(db):
+    db.add_all([
+        Product(tenant_id=1, sku="REM-R-M", name="Remera", price=Decimal("10"),
+                attributes={"color": "Rojo", "talle": "M"}),
+        Product(tenant_id=1, sku="REM-R-L", name="Remera", price=Decimal("10"),
+                attributes={"color": "Rojo", "talle": "L"}),
+        Product(tenant_id=1, sku="REM-A-M", name="Remera", price=Decimal("10"),
+                attributes={"color": "Azul", "talle": "M"}),
+        Product(tenant_id=1, sku="SIN-ATTR", name="Gorra", price=Decimal("8")),
+        Product(tenant_id=2, sku="REM-R-M", name="Remera", price=Decimal("10"),
+                attributes={"color": "Rojo", "talle": "M"}),
+    ])
+    db.commit()
+
+
+def test_filter_products_by_attributes(client, db, admin_headers):
+    """✅ Filtra por uno o varios atributos, solo dentro del tenant"""
+    _add_products(db)
+
+    res = client.get("/api/v1/products/", params={"attributes.color": "Rojo"}, headers=admin_headers)
+    assert res.status_code == 200
+    assert sorted(p["sku"] for p in res.json()) == ["REM-R-L", "REM-R-M"]
+
+    res = client.get(
+        "/api/v1/products/",
+        params={"attributes.color": "Rojo", "attributes.talle": "M"},
+        headers=admin_headers
+    )
+    assert [p["sku"] for p in res.json()] == ["REM-R-M"]
+
+    res = client.get("/api/v1/products/", params={"attributes.color": "Verde"}, headers=admin_headers)
+    assert res.json() == []
+
+
+def test_filter_products_by_attributes_superadmin(client, db, superadmin_headers):
+    """✅ SuperAdmin filtra por atributos en todos los tenants"""
+    _add_products(db)
+
+    res = client.get(
+        "/api/v1/products/",
+        params={"attributes.color": "Rojo", "attributes.talle": "M"},
+        headers=superadmin_headers
+    )
+    assert res.status_code == 200
+    assert len(res.json()) == 2
+
+
+def test_filter_products_invalid_attribute_key(client, db, admin_headers):
+    """❌ Clave de atributo inválida"""
+    res = client.get("/api/v1/products/", params={"attributes.co$lor": "Rojo"}, headers=admin_headers)
+    assert res.status_code == 400
@@ -0,0 +1,64 @@
+"""
+Tests de búsqueda de productos por texto (FTS5 en SQLite)
+"""
+from decimal import Decimal
+
+from sqlalchemy import text
+
+from neos_core.database.models import Product
+from neos_core.database.search import like_prefix
+
+
+def _add_products(db):
+    db.add_all([
+        Product(tenant_id=1, sku="REM-AZ-M", name="Remera Azul", description="Algodón peinado",
+                price=Decimal("10"), attributes={"color": "Azul", "talle": "M"}),
+        Product(tenant_id=1, sku="PAN-01", name="Pantalón Jean", description="Ideal con remera",
+                price=Decimal("30")),
+        Product(tenant_id=1, sku="REM-OLD", name="Remera Vieja", price=Decimal("5"), is_active=False),
+        Product(tenant_id=2, sku="REM-B", name="Remera Azul", price=Decimal("12")),
+    ])
+    db.commit()
+
+
+def test_search_partial_words_ranked(client, db, admin_headers):
+    """✅ Palabras parciales, orden por relevancia y solo activos del tenant"""
+    _add_products(db)
+
+    res = client.get("/api/v1/products/search", params={"q": "rem"}, headers=admin_headers)
+    assert res.status_code == 200
+    names = [p["name"] for p in res.json()]
+    # El nombre pesa más que la descripción
+    assert names == ["Remera Azul", "Pantalón Jean"]
+
+    res = client.get("/api/v1/products/search", params={"q": "rem azu"}, headers=admin_headers)
+    assert [p["sku"] for p in res.json()] == ["REM-AZ-M"]
+
+
+def test_search_by_sku_attributes_and_accents(client, db, admin_headers):
+    """✅ Busca en SKU y atributos, sin distinguir acentos"""
+    _add_products(db)
+
+    res = client.get("/api/v1/products/search", params={"q": "pan"}, headers=admin_headers)
+    assert [p["sku"] for p in res.json()] == ["PAN-01"]
+
+    res = client.get("/api/v1/products/search", params={"q": "algodon"}, headers=admin_headers)
+    assert [p["sku"] for p in res.json()] == ["REM-AZ-M"]
+
+    res = client.get("/api/v1/products/search", params={"q": "%%"}, headers=admin_headers)
+    assert res.json() == []
+
+
+def test_sku_prefix_escapes_like_wildcards(db):
+    """✅ El prefijo de SKU trata %, _ y \\ como caracteres literales"""
+    assert like_prefix("A_1%") == "A\\_1\\%%"
+
+    def matches(sku: str, prefix: str) -> bool:
+        return db.execute(
+            text("SELECT :sku LIKE :pattern ESCAPE '\\'"), {"sku": sku, "pattern": like_prefix(prefix)}
+        ).scalar() == 1
+
+    assert matches("A_1-ROJO", "A_1")
+    assert not matches("AX1-ROJO", "A_1")
+    assert not matches("REMERA", "%")
+    assert matches("50%OFF", "50%")
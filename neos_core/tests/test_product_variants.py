@@ -0,0 +1,101 @@
+"""
+Tests de variantes de producto (talle/color): barcode, ventas y catálogo
+"""
+from decimal import Decimal
+
+import pytest
+
+from neos_core.database.models import Currency, PointOfSale, Product, ProductVariant
+
+
+@pytest.fixture
+def remera(db, seed_data):
+    product = Product(tenant_id=1, sku="REM", name="Remera", price=Decimal("100"), stock=Decimal("0"))
+    db.add(product)
+    db.commit()
+    return product
+
+
+def _create_variant(client, headers, product_id, **data):
+    res = client.post(f"/api/v1/products/{product_id}/variants", json=data, headers=headers)
+    assert res.status_code == 201, res.json()
+    return res.json()
+
+
+def test_create_variants_and_barcode_lookup(client, remera, admin_headers):
+    """✅ Variantes con SKU/barcode propios; el escaneo devuelve padre + variante"""
+    red_m = _create_variant(client, admin_headers, remera.id,
+                            sku="REM-R-M", barcode="779001", stock="5",
+                            attributes={"color": "Rojo", "talle": "M"})
+    _create_variant(client, admin_headers, remera.id, sku="REM-R-L", barcode="779002", price="120", stock="3")
+
+    assert red_m["effective_price"] == "100.00"
+
+    res = client.get("/api/v1/products/barcode/779002", headers=admin_headers)
+    assert res.status_code == 200
+    body = res.json()
+    assert body["id"] == remera.id
+    assert body["variant"]["sku"] == "REM-R-L"
+    assert body["variant"]["effective_price"] == "120.00"
+
+    res = client.get(f"/api/v1/products/{remera.id}/variants", headers=admin_headers)
+    assert [v["sku"] for v in res.json()] == ["REM-R-M", "REM-R-L"]
+
+
+def test_create_variant_duplicate_sku(client, remera, admin_headers):
+    """❌ El SKU de la variante no puede repetir el de un producto o variante"""
+    res = client.post(f"/api/v1/products/{remera.id}/variants", json={"sku": "REM"}, headers=admin_headers)
+    assert res.status_code == 400
+
+
+@pytest.fixture
+def sale_refs(db, remera):
+    currency = Currency(code="ARS", name="Peso", symbol="$")
+    pos = PointOfSale(tenant_id=1, name="Caja", code="POS-V")
+    db.add_all([currency, pos])
+    db.commit()
+    return {"point_of_sale_id": pos.id, "currency_id": currency.id, "payment_method": "CASH"}
+
+
+def test_sale_uses_variant_stock_and_price(client, db, remera, sale_refs, admin_headers, seller_headers):
+    """✅ La venta descuenta stock de la variante y usa su precio"""
+    variant = _create_variant(client, admin_headers, remera.id, sku="REM-A-S", price="90", stock="4")
+
+    sale_data = {**sale_refs, "items": [{"product_id": remera.id, "variant_id": variant["id"], "quantity": "3"}]}
+    res = client.post("/api/v1/sales/", json=sale_data, headers=seller_headers)
+    assert res.status_code == 201, res.json()
+    assert res.json()["items"][0]["unit_price"] == "90.00"
+    assert res.json()["items"][0]["variant_id"] == variant["id"]
+
+    db.expire_all()
+    assert db.get(ProductVariant, variant["id"]).stock == Decimal("1")
+
+    # Sin stock suficiente en la variante
+    res = client.post("/api/v1/sales/", json=sale_data, headers=seller_headers)
+    assert res.status_code == 400
+
+
+def test_sale_requires_variant(client, remera, sale_refs, admin_headers, seller_headers):
+    """❌ Un producto con variantes no se puede vender sin indicar cuál"""
+    _create_variant(client, admin_headers, remera.id, sku="REM-A-M", stock="4")
+
+    sale_data = {**sale_refs, "items": [{"product_id": remera.id, "quantity": "1"}]}
+    res = client.post("/api/v1/sales/", json=sale_data, headers=seller_headers)
+    assert res.status_code == 400
+
+
+def test_catalog_aggregates_variant_stock(client, db, remera, admin_headers):
+    """✅ El catálogo agrega el stock de variantes activas por producto padre"""
+    _create_variant(client, admin_headers, remera.id, sku="REM-1", stock="5")
+    _create_variant(client, admin_headers, remera.id, sku="REM-2", stock="2.5")
+    _create_variant(client, admin_headers, remera.id, sku="REM-3", stock="10", is_active=False)
+    db.add(Product(tenant_id=1, sku="GOR", name="Gorra", price=Decimal("50"), stock=Decimal("7")))
+    db.commit()
+
+    res = client.get("/api/v1/products/catalog", headers=admin_headers)
+    assert res.status_code == 200
+    catalog = {item["sku"]: item for item in res.json()}
+    assert catalog["REM"]["variant_count"] == 2
+    assert Decimal(catalog["REM"]["total_stock"]) == Decimal("7.5")
+    assert catalog["GOR"]["variant_count"] == 0
+    assert Decimal(catalog["GOR"]["total_stock"]) == Decimal("7")
@@ -0,0 +1,96 @@
+"""
+Tests del enrutamiento de lecturas hacia la réplica
+Se usan dos bases SQLite como primario y réplica
+"""
+import time
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.orm import sessionmaker
+from starlette.requests import Request
+
+from neos_core.database import config, routing
+from neos_core.security.auth_service import create_access_token
+
+
+def _request(headers: dict) -> Request:
+    raw = [(k.lower().encode(), v.encode()) for k, v in headers.items()]
+    return Request({"type": "http", "headers": raw})
+
+
+@pytest.fixture
+def primary_and_replica(tmp_path, monkeypatch):
+    primary = config.build_engine(f"sqlite:///{tmp_path / 'primary.db'}")
+    replica = config.build_engine(f"sqlite:///{tmp_path / 'replica.db'}")
+    for eng, name in ((primary, "primary"), (replica, "replica")):
+        with eng.begin() as conn:
+            conn.execute(text("CREATE TABLE origin (name TEXT)"))
+            conn.execute(text("INSERT INTO origin VALUES (:n)"), {"n": name})
+
+    monkeypatch.setattr(config, "SessionLocal", sessionmaker(bind=primary))
+    monkeypatch.setattr(config, "ReplicaSessionLocal", sessionmaker(bind=replica))
+    monkeypatch.setattr(routing, "_last_write", {})
+    yield
+    primary.dispose()
+    replica.dispose()
+
+
+def _origin(headers: dict) -> str:
+    gen = routing.get_read_db(_request(headers))
+    db = next(gen)
+    try:
+        return db.execute(text("SELECT name FROM origin")).scalar()
+    finally:
+        gen.close()
+
+
+def test_reads_go_to_replica(primary_and_replica):
+    """✅ Sin escrituras recientes, las lecturas van a la réplica"""
+    token = create_access_token(data={"sub": "a@test.com", "tenant_id": 10})
+    assert _origin({"Authorization": f"Bearer {token}"}) == "replica"
+
+
+def test_read_after_write_uses_primary(primary_and_replica):
+    """✅ Tras escribir, el tenant lee del primario; otros tenants siguen en réplica"""
+    token_a = create_access_token(data={"sub": "a@test.com", "tenant_id": 10})
+    token_b = create_access_token(data={"sub": "b@test.com", "tenant_id": 20})
+
+    routing.mark_tenant_write(10)
+
+    assert _origin({"Authorization": f"Bearer {token_a}"}) == "primary"
+    assert _origin({"Authorization": f"Bearer {token_b}"}) == "replica"
+
+
+def test_strong_consistency_header(primary_and_replica):
+    """✅ El header X-Read-Consistency: strong fuerza el primario"""
+    assert _origin({routing.CONSISTENCY_HEADER: "strong"}) == "primary"
+
+
+def test_without_replica_falls_back_to_primary(primary_and_replica, monkeypatch):
+    """✅ Sin réplica configurada todo va al primario"""
+    monkeypatch.setattr(config, "ReplicaSessionLocal", None)
+    assert _origin({}) == "primary"
+
+
+def test_client_write_marker_pins_primary_on_any_worker(primary_and_replica):
+    """✅ La marca de escritura que reenvía el cliente fuerza el primario aunque este proceso no haya escrito"""
+    token = create_access_token(data={"sub": "a@test.com", "tenant_id": 10})
+    auth = {"Authorization": f"Bearer {token}"}
+    now = time.time()
+
+    assert _origin({**auth, routing.LAST_WRITE_HEADER: f"{now:.3f}"}) == "primary"
+    assert _origin({**auth, "Cookie": f"{routing.LAST_WRITE_COOKIE}={now:.3f}"}) == "primary"
+    stale = now - config.REPLICA_READ_AFTER_WRITE_SECONDS - 1
+    assert _origin({**auth, routing.LAST_WRITE_HEADER: f"{stale:.3f}"}) == "replica"
+    assert _origin({**auth, routing.LAST_WRITE_HEADER: "basura"}) == "replica"
+
+
+def test_write_response_carries_marker(client, db, seed_data, admin_headers):
+    """✅ La respuesta de una escritura devuelve la marca en cookie y header; una lectura no"""
+    res = client.post("/api/v1/products/", headers=admin_headers, json={"tenant_id": 1, "sku": "RW1", "name": "Café", "price": "10"})
+    assert res.status_code == 201
+    assert abs(float(res.headers[routing.LAST_WRITE_HEADER]) - time.time()) < 5
+    assert res.cookies.get(routing.LAST_WRITE_COOKIE) == res.headers[routing.LAST_WRITE_HEADER]
+
+    res = client.get("/api/v1/products/", headers=admin_headers)
+    assert routing.LAST_WRITE_HEADER not in res.headers
@@ -0,0 +1,100 @@
+"""
+Tests de reservas de stock para carritos (TTL, checkout y barrido de vencidas)
+"""
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pytest
+
+from neos_core.crud import reservation_crud
+from neos_core.database.models import Product, StockReservation
+from neos_core.tests.conftest import make_sale
+
+
+@pytest.fixture
+def shop(shop, db):
+    db.get(Product, shop["product"]).stock = Decimal("10")
+    db.commit()
+    return shop
+
+
+def _reserve(client, headers, shop, quantity, **extra):
+    return client.post("/api/v1/reservations/", headers=headers, json={
+        "point_of_sale_id": shop["pos"],
+        "items": [{"product_id": shop["product"], "quantity": quantity}],
+        **extra,
+    })
+
+
+def test_reservation_holds_stock_against_sales(client, shop, seller_headers):
+    """✅ Lo reservado no está disponible para otras ventas ni reservas"""
+    res = _reserve(client, seller_headers, shop, "7", ttl_seconds=300)
+    assert res.status_code == 201, res.json()
+    assert res.json()["status"] == "active"
+
+    # Quedan 3 disponibles
+    assert make_sale(client, seller_headers, shop, "3")
+    assert _reserve(client, seller_headers, shop, "1").status_code == 400
+
+
+def test_sale_blocked_by_reservation(client, shop, seller_headers):
+    """❌ Una venta directa no puede tomar stock reservado"""
+    assert _reserve(client, seller_headers, shop, "8").status_code == 201
+    make_sale(client, seller_headers, shop, "5", status_code=400)
+
+
+def test_checkout_converts_reservation(client, db, shop, seller_headers):
+    """✅ El checkout crea la venta con los items reservados y cierra la reserva"""
+    reservation = _reserve(client, seller_headers, shop, "10").json()
+
+    res = client.post(f"/api/v1/reservations/{reservation['id']}/checkout", headers=seller_headers, json={
+        "currency_id": shop["currency"], "payment_method": "CARD"
+    })
+    assert res.status_code == 201, res.json()
+    sale = res.json()
+    assert Decimal(sale["items"][0]["quantity"]) == Decimal("10")
+
+    db.expire_all()
+    assert db.get(Product, shop["product"]).stock == Decimal("0")
+    stored = db.get(StockReservation, reservation["id"])
+    assert stored.status == "converted"
+    assert stored.sale_id == sale["id"]
+    assert [item.status for item in stored.items] == ["converted"]
+
+    # No se puede confirmar dos veces
+    res = client.post(f"/api/v1/reservations/{reservation['id']}/checkout", headers=seller_headers, json={
+        "currency_id": shop["currency"], "payment_method": "CARD"
+    })
+    assert res.status_code == 409
+
+
+def test_expired_reservations_release_stock(client, db, shop, seller_headers):
+    """✅ Una reserva vencida deja de contar y el barrido la marca como expired"""
+    reservation = _reserve(client, seller_headers, shop, "10").json()
+
+    stored = db.get(StockReservation, reservation["id"])
+    stored.expires_at = datetime.utcnow() - timedelta(seconds=1)
+    for item in stored.items:
+        item.expires_at = stored.expires_at
+    db.commit()
+
+    assert reservation_crud.expire_reservations(db, batch_size=1) == 1
+    db.expire_all()
+    stored = db.get(StockReservation, reservation["id"])
+    assert stored.status == "expired"
+    assert [item.status for item in stored.items] == ["expired"]
+
+    make_sale(client, seller_headers, shop, "10")
+
+
+def test_released_reservation_items_stop_counting(client, db, shop, seller_headers):
+    """✅ Al liberar la reserva sus items dejan de estar activos y el stock vuelve a estar disponible"""
+    reservation = _reserve(client, seller_headers, shop, "10").json()
+    res = client.delete(f"/api/v1/reservations/{reservation['id']}", headers=seller_headers)
+    assert res.status_code == 200, res.json()
+
+    db.expire_all()
+    stored = db.get(StockReservation, reservation["id"])
+    assert [item.status for item in stored.items] == ["released"]
+    assert [item.expires_at for item in stored.items] == [stored.expires_at]
+    make_sale(client, seller_headers, shop, "10")
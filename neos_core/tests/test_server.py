@@ -0,0 +1,79 @@
+"""
+Tests del arranque de producción: opciones de uvicorn y pools tras un fork
+"""
+import os
+
+import pytest
+from sqlalchemy import text
+
+from neos_core import server
+from neos_core.database import config
+
+
+def test_server_options_prefer_uvloop_and_httptools(monkeypatch):
+    """✅ uvloop y httptools si están instalados; si no, asyncio y h11"""
+    monkeypatch.setattr(server, "_available", lambda module: True)
+    options = server.server_options(workers=4)
+    assert (options["workers"], options["loop"], options["http"]) == (4, "uvloop", "httptools")
+
+    monkeypatch.setattr(server, "_available", lambda module: False)
+    options = server.server_options(workers=4)
+    assert (options["loop"], options["http"]) == ("asyncio", "h11")
+
+
+def test_server_options_defaults(monkeypatch):
+    """✅ Un worker por núcleo con WEB_CONCURRENCY=0; max_requests=0 desactiva el reciclado"""
+    monkeypatch.setattr(config, "WEB_CONCURRENCY", 0)
+    monkeypatch.setattr(config, "SERVER_MAX_REQUESTS", 500)
+    options = server.server_options()
+    assert options["workers"] == (os.cpu_count() or 1)
+    assert options["limit_max_requests"] == 500
+    assert "reload" not in options
+
+    assert server.server_options(max_requests=0)["limit_max_requests"] is None
+    monkeypatch.setattr(config, "WEB_CONCURRENCY", 3)
+    assert server.server_options()["workers"] == 3
+
+
+def test_max_requests_jitter_per_worker():
+    """✅ Cada worker recicla en un punto distinto dentro del jitter; sin límite no hay reciclado"""
+    limits = {server.jittered_limit(1000, 100) for _ in range(50)}
+    assert all(1000 <= limit <= 1100 for limit in limits)
+    assert len(limits) > 1
+
+    assert server.jittered_limit(None, 100) is None
+    assert server.jittered_limit(1000, 0) == 1000
+
+
+def test_metrics_dir_prepared_for_workers(tmp_path, monkeypatch):
+    """✅ Con varios workers se comparte un directorio de métricas, vaciado al arrancar"""
+    monkeypatch.delenv("METRICS_MULTIPROC_DIR", raising=False)
+    monkeypatch.setattr(config, "METRICS_MULTIPROC_DIR", "")
+    assert server.prepare_metrics_dir(1) is None
+
+    (tmp_path / "metrics_1_1.json").write_text("{}")
+    monkeypatch.setattr(config, "METRICS_MULTIPROC_DIR", str(tmp_path))
+    assert server.prepare_metrics_dir(4) == str(tmp_path)
+    assert os.listdir(tmp_path) == []
+    assert os.environ["METRICS_MULTIPROC_DIR"] == str(tmp_path)
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="requiere fork")
+def test_forked_child_gets_fresh_pool(tmp_path):
+    """✅ El hijo de un fork descarta el pool heredado y abre sus conexiones"""
+    engine = config.build_engine(f"sqlite:///{tmp_path / 'fork.db'}")
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+    parent_pool = engine.pool
+
+    pid = os.fork()
+    if pid == 0:
+        ok = engine.pool is not parent_pool
+        with engine.connect() as conn:
+            ok = ok and conn.execute(text("SELECT 1")).scalar() == 1
+        os._exit(0 if ok else 1)
+
+    _, status = os.waitpid(pid, 0)
+    assert os.WEXITSTATUS(status) == 0
+    assert engine.pool is parent_pool
+    engine.dispose()
@@ -0,0 +1,215 @@
+"""
+Tests del router de shards y de la herramienta de movimiento de tenants
+Se usan dos bases SQLite como shards
+"""
+import json
+import os
+import time
+from decimal import Decimal
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.orm import sessionmaker
+
+from neos_core.database import config, sharding
+from neos_core.database.models import (
+    Tenant, User, Role, Currency, PointOfSale, Product, Sale, SaleDetail
+)
+
+
+@pytest.fixture
+def two_shards(tmp_path, monkeypatch):
+    default_engine = config.build_engine(f"sqlite:///{tmp_path / 'default.db'}")
+    shard_engine = config.build_engine(f"sqlite:///{tmp_path / 'shard_b.db'}")
+    for eng in (default_engine, shard_engine):
+        config.Base.metadata.create_all(bind=eng)
+
+    monkeypatch.setattr(config, "SessionLocal", sessionmaker(bind=default_engine))
+    router = sharding.ShardRouter(map_file=str(tmp_path / "shard_map.json"))
+    router.add_shard("shard_b", shard_engine)
+
+    db = config.SessionLocal()
+    db.add_all([
+        Role(id=1, name="admin"),
+        Currency(id=1, code="ARS", name="Peso Argentino", symbol="$"),
+        Tenant(id=1, name="Chico"),
+        Tenant(id=2, name="Grande"),
+    ])
+    db.flush()
+    db.add_all([
+        User(id=1, email="a@chico.com", hashed_password="x", tenant_id=1, role_id=1),
+        User(id=2, email="a@grande.com", hashed_password="x", tenant_id=2, role_id=1),
+        PointOfSale(id=1, tenant_id=2, name="Caja", code="POS-1"),
+        Product(id=1, tenant_id=2, sku="P1", name="Remera", price=Decimal("10"), stock=Decimal("5")),
+    ])
+    db.flush()
+    sale = Sale(id=1, tenant_id=2, user_id=2, point_of_sale_id=1, currency_id=1, payment_method="CASH")
+    db.add(sale)
+    db.flush()
+    db.add(SaleDetail(sale_id=1, product_id=1, quantity=1, unit_price=10, subtotal=10, tax_amount=0, total=10))
+    db.commit()
+    db.close()
+
+    yield router, tmp_path
+    default_engine.dispose()
+    shard_engine.dispose()
+
+
+def test_move_tenant_copies_rows_and_updates_map(two_shards):
+    """✅ Mover un tenant copia sus filas (incluidas tablas hijas) y actualiza el mapa"""
+    router, tmp_path = two_shards
+
+    copied = sharding.move_tenant(2, "shard_b", router=router, batch_size=1)
+
+    assert copied["sales"] == 1
+    assert copied["sale_details"] == 1
+    assert copied["users"] == 1
+    assert router.shard_for_tenant(2) == "shard_b"
+    assert router.shard_for_tenant(1) == sharding.DEFAULT_SHARD
+    saved = json.loads((tmp_path / "shard_map.json").read_text())
+    assert saved["tenants"] == {"2": "shard_b"}
+    assert saved["moving"] == {}
+
+    shard_db = router.sessionmaker_for("shard_b")()
+    default_db = router.sessionmaker_for(sharding.DEFAULT_SHARD)()
+    try:
+        # Las tablas globales se replican en el destino
+        assert shard_db.query(Currency).filter_by(code="ARS").count() == 1
+        assert shard_db.query(SaleDetail).count() == 1
+        assert shard_db.query(User).filter_by(tenant_id=1).count() == 0
+
+        # El origen queda sin datos del tenant movido
+        assert default_db.query(Sale).count() == 0
+        assert default_db.query(Tenant).filter_by(id=2).count() == 0
+        assert default_db.query(User).filter_by(tenant_id=1).count() == 1
+    finally:
+        shard_db.close()
+        default_db.close()
+
+
+def test_find_user_across_shards(two_shards):
+    """✅ El login encuentra usuarios en cualquier shard"""
+    router, _ = two_shards
+    sharding.move_tenant(2, "shard_b", router=router)
+
+    user = router.find_user_by_email("a@grande.com")
+    assert user is not None
+    assert user.tenant_id == 2
+    assert router.find_user_by_email("nadie@test.com") is None
+
+
+def test_move_to_same_shard_fails(two_shards):
+    """❌ No se puede mover un tenant a su propio shard"""
+    router, _ = two_shards
+    with pytest.raises(ValueError):
+        sharding.move_tenant(1, sharding.DEFAULT_SHARD, router=router)
+
+
+def _ack(tmp_path, worker: str, version: int, age: float = 0):
+    acks = tmp_path / "shard_map.json.acks"
+    acks.mkdir(exist_ok=True)
+    path = acks / worker
+    path.write_text(str(version))
+    if age:
+        past = time.time() - age
+        os.utime(path, (past, past))
+
+
+def test_workers_reload_map_and_acknowledge(two_shards):
+    """✅ Otro worker relee el mapa cuando cambia y confirma la versión que usa"""
+    router, tmp_path = two_shards
+    worker = sharding.ShardRouter(map_file=str(tmp_path / "shard_map.json"))
+    worker.add_shard("shard_b", router.engine_for("shard_b"))
+
+    version = router.assign(1, "shard_b")
+    assert worker.shard_for_tenant(1) == sharding.DEFAULT_SHARD
+    assert worker.reload() is True
+    assert worker.reload() is False
+    assert worker.shard_for_tenant(1) == "shard_b"
+
+    worker.acknowledge()
+    assert (tmp_path / "shard_map.json.acks" / worker.worker_id()).read_text() == str(version)
+    worker.release()
+    assert not (tmp_path / "shard_map.json.acks" / worker.worker_id()).exists()
+
+
+def test_cli_process_watches_map_and_acknowledges(two_shards):
+    """✅ Un proceso de línea de comandos confirma la versión al arrancar, sigue los cambios y se borra al salir"""
+    router, tmp_path = two_shards
+    worker = sharding.ShardRouter(map_file=str(tmp_path / "shard_map.json"))
+    worker.add_shard("shard_b", router.engine_for("shard_b"))
+    ack = tmp_path / "shard_map.json.acks" / worker.worker_id()
+    first = router.assign(1, "shard_b")
+
+    with sharding.shard_map_watch(worker, interval_seconds=0.05):
+        assert ack.read_text() == str(first)
+        # mtime distinto aunque el sistema de archivos tenga resolución gruesa
+        time.sleep(0.01)
+        version = router.begin_move(2, "shard_b")
+        deadline = time.monotonic() + 2
+        while ack.read_text() != str(version) and time.monotonic() < deadline:
+            time.sleep(0.02)
+        assert ack.read_text() == str(version)
+        assert worker.is_moving(2)
+    assert not ack.exists()
+
+
+def test_moving_tenant_rejects_writes(two_shards, monkeypatch):
+    """❌ Mientras un tenant se mueve, sus escrituras se rechazan con 503; las de otros tenants siguen"""
+    router, _ = two_shards
+    monkeypatch.setattr(sharding, "shard_router", router)
+    router.begin_move(2, "shard_b")
+
+    db = router.sessionmaker_for_tenant(2)()
+    try:
+        db.add(Product(tenant_id=2, sku="P2", name="Gorra", price=Decimal("5")))
+        with pytest.raises(HTTPException) as exc:
+            db.flush()
+        assert exc.value.status_code == 503
+        assert exc.value.headers["Retry-After"]
+    finally:
+        db.close()
+
+    db = router.sessionmaker_for_tenant(1)()
+    try:
+        db.add(Product(tenant_id=1, sku="P2", name="Gorra", price=Decimal("5")))
+        db.commit()
+    finally:
+        db.close()
+
+    router.cancel_move(2)
+    assert not router.is_moving(2)
+
+
+def test_move_waits_for_lagging_worker(two_shards):
+    """❌ Si un worker vivo no confirma el bloqueo, no se copia nada y el tenant sigue en el origen"""
+    router, tmp_path = two_shards
+    _ack(tmp_path, "otro-host-123", version=0)
+
+    with pytest.raises(RuntimeError):
+        sharding.move_tenant(2, "shard_b", router=router, ack_timeout=0.3)
+
+    assert router.shard_for_tenant(2) == sharding.DEFAULT_SHARD
+    assert not router.is_moving(2)
+    shard_db = router.sessionmaker_for("shard_b")()
+    try:
+        assert shard_db.query(Sale).count() == 0
+    finally:
+        shard_db.close()
+
+
+def test_move_ignores_dead_worker_acks(two_shards):
+    """✅ Las constancias sin latido (workers que ya no existen) no frenan el movimiento"""
+    router, tmp_path = two_shards
+    _ack(tmp_path, "muerto-1", version=0, age=3600)
+
+    copied = sharding.move_tenant(2, "shard_b", router=router, ack_timeout=0.3)
+    assert copied["sales"] == 1
+    assert router.shard_for_tenant(2) == "shard_b"
+
+
+def test_purge_tenant_refuses_current_shard(two_shards):
+    """❌ No se borran las filas del shard donde el tenant vive"""
+    router, _ = two_shards
+    with pytest.raises(ValueError):
+        sharding.delete_tenant_rows(2, sharding.DEFAULT_SHARD, router=router)
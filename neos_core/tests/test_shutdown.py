@@ -0,0 +1,101 @@
+"""
+Tests del apagado ordenado: rechazo de ventas nuevas, espera de las que están en curso y cierre
+"""
+import asyncio
+import os
+import signal
+import threading
+import time
+
+import pytest
+
+from neos_core.database import config
+from neos_core.services import shutdown
+from neos_core.services.shutdown import drain
+
+
+@pytest.fixture(autouse=True)
+def reset_drain():
+    yield
+    drain.reset()
+
+
+def test_draining_rejects_new_sales(client, seed_data, seller_headers):
+    """❌ Con el proceso apagándose, una venta nueva recibe 503 y /ready deja de estar listo"""
+    drain.begin()
+    res = client.post("/api/v1/sales/", headers=seller_headers, json={
+        "point_of_sale_id": 1, "currency_id": 1, "payment_method": "CASH",
+        "items": [{"product_id": 1, "quantity": "1"}],
+    })
+    assert res.status_code == 503
+    assert res.headers["Retry-After"] == "1"
+    assert client.get("/ready").json()["status"] == "draining"
+
+
+def test_graceful_shutdown_waits_for_sales_then_flushes(monkeypatch):
+    """✅ El apagado espera la venta en curso y recién después escribe la auditoría y cierra los pools"""
+    steps = []
+    monkeypatch.setattr(shutdown.audit_log, "flush_all", lambda: steps.append("audit"))
+    monkeypatch.setattr(config, "dispose_engines", lambda: steps.append("dispose"))
+
+    started, release = threading.Event(), threading.Event()
+
+    @drain.tracked
+    def sale_transaction():
+        started.set()
+        release.wait(5)
+        steps.append("sale")
+
+    worker = threading.Thread(target=sale_transaction)
+    worker.start()
+    started.wait(5)
+
+    async def run():
+        background = asyncio.create_task(asyncio.sleep(3600))
+        threading.Timer(0.2, release.set).start()
+        await shutdown.graceful_shutdown([background], timeout=5)
+        return background
+
+    background = asyncio.run(run())
+    worker.join()
+    assert background.cancelled()
+    assert steps == ["sale", "audit", "dispose"]
+    assert drain.in_flight == 0
+
+
+def test_wait_idle_deadline():
+    """✅ Con una transacción colgada el apagado no espera más que el plazo"""
+    with drain.transaction():
+        assert drain.wait_idle(0.05) is False
+    assert drain.wait_idle(0.05) is True
+
+
+def test_deadline_counts_from_signal(monkeypatch):
+    """✅ Con una venta colgada, el apagado espera solo lo que queda del plazo contado desde la señal"""
+    monkeypatch.setattr(shutdown.audit_log, "flush_all", lambda: None)
+    monkeypatch.setattr(config, "dispose_engines", lambda: None)
+
+    with drain.transaction():
+        drain.begin(0.3)
+        time.sleep(0.2)
+        started = time.monotonic()
+        asyncio.run(shutdown.graceful_shutdown([], timeout=5))
+        elapsed = time.monotonic() - started
+    assert elapsed < 1
+
+
+@pytest.mark.skipif(not hasattr(signal, "SIGTERM"), reason="requiere señales POSIX")
+def test_signal_flips_readiness_before_uvicorn_handler(client):
+    """✅ El SIGTERM marca el apagado (y /ready en 503) antes de pasar al handler de uvicorn"""
+    received = []
+    previous = signal.signal(signal.SIGTERM, lambda sig, frame: received.append(drain.draining))
+    previous_int = signal.getsignal(signal.SIGINT)
+    try:
+        shutdown.install_signal_handlers()
+        os.kill(os.getpid(), signal.SIGTERM)
+        assert received == [True]
+        assert drain.deadline is not None
+        assert client.get("/ready").json()["status"] == "draining"
+    finally:
+        signal.signal(signal.SIGTERM, previous)
+        signal.signal(signal.SIGINT, previous_int)
@@ -0,0 +1,85 @@
+"""
+Tests del motor de impuestos (redondeo por línea y por alícuota)
+"""
+from decimal import Decimal
+
+import pytest
+
+from neos_core.database import config
+from neos_core.services.tax import compute_taxes, tax_breakdown
+
+D = Decimal
+
+
+def test_line_rounding_and_groups():
+    """✅ Subtotal e impuesto redondeados por línea y agrupados por tasa"""
+    result = compute_taxes([
+        (D("3"), D("0.35"), D("21")),      # 1.05 -> IVA 0.2205 -> 0.22
+        (D("3"), D("0.35"), D("21")),
+        (D("1.5"), D("10.00"), D("10.5")),  # 15.00 -> 1.575 -> 1.58
+        (D("2"), D("5.00"), D("0")),
+    ], rounding="line")
+
+    assert [line.tax_amount for line in result.lines] == [D("0.22"), D("0.22"), D("1.58"), D("0.00")]
+    assert [(g.tax_rate, g.taxable_base, g.tax_amount) for g in result.groups] == [
+        (D("0"), D("10.00"), D("0.00")),
+        (D("10.5"), D("15.00"), D("1.58")),
+        (D("21"), D("2.10"), D("0.44")),
+    ]
+    assert result.subtotal == D("27.10")
+    assert result.tax_amount == D("2.02")
+    assert result.total == D("29.12")
+
+
+def test_invoice_rounding_per_rate():
+    """✅ En modo invoice el impuesto se redondea una vez por alícuota"""
+    items = [(D("3"), D("0.35"), D("21"))] * 2
+
+    # 2.10 * 21% = 0.441 -> 0.44 (por línea también 0.22 + 0.22 = 0.44)
+    assert compute_taxes(items, rounding="invoice").tax_amount == D("0.44")
+
+    # 10 líneas de 0.05 al 21%: por línea 0.01 c/u = 0.10; por alícuota 0.50 * 21% = 0.105 -> 0.11
+    items = [(D("1"), D("0.05"), D("21"))] * 10
+    assert compute_taxes(items, rounding="line").tax_amount == D("0.10")
+    assert compute_taxes(items, rounding="invoice").tax_amount == D("0.11")
+
+
+def test_breakdown_from_saved_details():
+    """✅ El desglose de una venta guardada coincide con el cálculo original"""
+    items = [(D("1"), D("0.05"), D("21"))] * 10 + [(D("2"), D("7.77"), D("10.5"))]
+    result = compute_taxes(items, rounding="invoice")
+
+    class Detail:
+        def __init__(self, line):
+            self.tax_rate, self.subtotal, self.tax_amount = line.tax_rate, line.subtotal, line.tax_amount
+
+    groups = tax_breakdown([Detail(line) for line in result.lines], rounding="invoice")
+    assert [(g.taxable_base, g.tax_amount) for g in groups] == [
+        (g.taxable_base, g.tax_amount) for g in result.groups
+    ]
+
+
+def test_breakdown_keeps_sale_rounding_mode(monkeypatch):
+    """✅ El desglose usa el modo guardado en la venta, no el configurado hoy"""
+    monkeypatch.setattr(config, "TAX_ROUNDING_MODE", "invoice")
+    result = compute_taxes([(D("1"), D("0.05"), D("21"))] * 10)
+    assert result.rounding == "invoice"
+    assert result.tax_amount == D("0.11")
+
+    class Detail:
+        def __init__(self, line):
+            self.tax_rate, self.subtotal, self.tax_amount = line.tax_rate, line.subtotal, line.tax_amount
+
+    details = [Detail(line) for line in result.lines]
+    monkeypatch.setattr(config, "TAX_ROUNDING_MODE", "line")
+    assert tax_breakdown(details, result.rounding)[0].tax_amount == D("0.11")
+
+    # Ventas sin modo guardado: suma de los impuestos de cada línea
+    monkeypatch.setattr(config, "TAX_ROUNDING_MODE", "invoice")
+    assert tax_breakdown(details, None)[0].tax_amount == D("0.10")
+
+
+def test_invalid_rounding_mode():
+    """❌ Modo de redondeo desconocido"""
+    with pytest.raises(ValueError):
+        compute_taxes([], rounding="banker")
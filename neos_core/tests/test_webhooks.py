@@ -0,0 +1,246 @@
+"""
+Tests de webhooks: reparto desde el outbox, envío en lotes contra un servidor
+HTTP local, reintentos y cola de entregas muertas
+"""
+import asyncio
+import hashlib
+import hmac
+import json
+import threading
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from neos_core.database import config
+from neos_core.database.models import Product, WebhookDelivery
+from neos_core.services import outbox, webhooks
+from neos_core.tests.conftest import make_sale
+
+
+class Receiver:
+    """Servidor HTTP local que hace de sistema del cliente"""
+
+    def __init__(self):
+        self.requests = []
+        self.status_code = 200
+        self.delay = 0.0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+        receiver = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers["Content-Length"]))
+                with receiver._lock:
+                    receiver.in_flight += 1
+                    receiver.max_in_flight = max(receiver.max_in_flight, receiver.in_flight)
+                time.sleep(receiver.delay)
+                with receiver._lock:
+                    receiver.in_flight -= 1
+                    receiver.requests.append((self.path, dict(self.headers), body))
+                self.send_response(receiver.status_code)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+
+    def events(self):
+        return [json.loads(body)["events"] for _, _, body in self.requests]
+
+
+@pytest.fixture
+def receiver():
+    receiver = Receiver()
+    thread = threading.Thread(target=receiver.server.serve_forever, daemon=True)
+    thread.start()
+    yield receiver
+    receiver.server.shutdown()
+    receiver.server.server_close()
+
+
+@pytest.fixture
+def shop(shop, db):
+    product = db.get(Product, shop["product"])
+    product.stock = Decimal("6")
+    product.min_stock = Decimal("5")
+    db.commit()
+    return shop
+
+
+def _register(client, headers, url, **fields):
+    res = client.post("/api/v1/webhooks/", headers=headers, json={"url": url, **fields})
+    assert res.status_code == 201, res.json()
+    return res.json()
+
+
+def _run_worker(db, now=None):
+    """Relay del outbox + reparto + una tanda de envíos, como el loop de fondo"""
+    outbox.relay_pending(db, outbox.NullSink())
+    webhooks.fan_out(db)
+
+    async def deliver():
+        async with webhooks.build_client() as client:
+            return await webhooks.deliver_pending(db, client, now=now)
+
+    return asyncio.run(deliver())
+
+
+def test_sale_events_delivered_in_signed_batches(client, db, shop, receiver, admin_headers, seller_headers):
+    """✅ Las ventas se entregan en lotes por endpoint, firmados, fuera del request"""
+    hook = _register(
+        client, admin_headers, f"{receiver.url}/hooks",
+        event_types=["sale.created", "sale.cancelled"], batch_size=2
+    )
+    first = make_sale(client, seller_headers, shop)
+    make_sale(client, seller_headers, shop)
+    assert client.post(f"/api/v1/sales/{first['id']}/cancel", headers=seller_headers).status_code == 200
+    # El request de la venta no hizo ninguna llamada HTTP
+    assert receiver.requests == []
+
+    assert _run_worker(db) == 3
+    assert [len(batch) for batch in receiver.events()] == [2, 1]
+    events = [e for batch in receiver.events() for e in batch]
+    assert [e["type"] for e in events] == ["sale.created", "sale.created", "sale.cancelled"]
+    assert events[0]["entity_id"] == first["id"]
+
+    path, headers, body = receiver.requests[0]
+    assert path == "/hooks"
+    expected = hmac.new(
+        hook["secret"].encode(), headers[webhooks.TIMESTAMP_HEADER].encode() + b"." + body, hashlib.sha256
+    ).hexdigest()
+    assert headers[webhooks.SIGNATURE_HEADER] == f"sha256={expected}"
+
+    # Nada pendiente: una segunda pasada no reenvía
+    assert _run_worker(db) == 0
+    assert len(receiver.requests) == 2
+
+
+def test_low_stock_and_subscription_filter(client, db, shop, receiver, admin_headers, seller_headers):
+    """✅ Cada endpoint recibe solo sus tipos; el stock bajo también se entrega"""
+    _register(client, admin_headers, f"{receiver.url}/stock", event_types=["stock.low"])
+    make_sale(client, seller_headers, shop, "2")
+
+    assert _run_worker(db) == 1
+    [[event]] = receiver.events()
+    assert event["type"] == "stock.low"
+    assert event["payload"]["product_id"] == shop["product"]
+    assert Decimal(event["payload"]["stock"]) == 4
+
+
+def test_only_events_after_registration(client, db, shop, receiver, admin_headers, seller_headers):
+    """✅ Un webhook nuevo no recibe el historial anterior a su alta"""
+    make_sale(client, seller_headers, shop)
+    outbox.relay_pending(db, outbox.NullSink())
+
+    _register(client, admin_headers, receiver.url, event_types=["sale.created"])
+    later = make_sale(client, seller_headers, shop)
+
+    assert _run_worker(db) == 1
+    assert [e["entity_id"] for e in receiver.events()[0]] == [later["id"]]
+
+
+def test_per_endpoint_concurrency_limit(client, db, shop, receiver, admin_headers):
+    """✅ Nunca hay más POSTs simultáneos a un endpoint que su max_concurrency"""
+    _register(
+        client, admin_headers, receiver.url,
+        event_types=["product.updated"], batch_size=1, max_concurrency=2
+    )
+    for _ in range(6):
+        outbox.record(db, 1, outbox.PRODUCT_UPDATED, shop["product"], {})
+    db.commit()
+    receiver.delay = 0.05
+
+    # Cada tanda toma como mucho max_concurrency lotes del endpoint
+    assert [_run_worker(db) for _ in range(4)] == [2, 2, 2, 0]
+    assert receiver.max_in_flight == 2
+
+
+def test_concurrency_limit_across_workers(client, db, shop, admin_headers):
+    """✅ Los lotes que otro worker tiene en vuelo cuentan contra max_concurrency"""
+    _register(
+        client, admin_headers, "https://erp.example.com/hook",
+        event_types=["product.updated"], batch_size=2, max_concurrency=2
+    )
+    for _ in range(6):
+        outbox.record(db, 1, outbox.PRODUCT_UPDATED, shop["product"], {})
+    db.commit()
+    outbox.relay_pending(db, outbox.NullSink())
+    webhooks.fan_out(db)
+
+    # Otro worker tomó un lote y sigue enviándolo
+    now = datetime.utcnow()
+    assert len(webhooks._claim(db, now, 1)) == 1
+    assert len(webhooks._claim(db, now, 10)) == 2
+    assert webhooks._claim(db, now, 10) == []
+
+    # Su plazo vence (worker caído): se pueden volver a tomar
+    later = now + webhooks.CLAIM_TIMEOUT + timedelta(seconds=1)
+    assert len(webhooks._claim(db, later, 10)) == 4
+
+
+def test_retry_backoff_and_dead_letter(client, db, shop, receiver, admin_headers, seller_headers, monkeypatch):
+    """✅ Un endpoint caído se reintenta con backoff, pasa a dead y se reenvía"""
+    hook = _register(client, admin_headers, receiver.url, event_types=["sale.created"])
+    make_sale(client, seller_headers, shop)
+    receiver.status_code = 503
+
+    # El reparto del worker programa la entrega para "ahora"
+    now = datetime.utcnow() + timedelta(seconds=1)
+    assert _run_worker(db, now=now) == 0
+    delivery = db.query(WebhookDelivery).one()
+    assert (delivery.status, delivery.attempts, delivery.last_status_code) == ("pending", 1, 503)
+    assert delivery.next_attempt_at > now
+
+    # Antes del backoff no se vuelve a intentar
+    assert _run_worker(db, now=now) == 0
+    assert len(receiver.requests) == 1
+
+    monkeypatch.setattr(config, "WEBHOOK_MAX_ATTEMPTS", 2)
+    assert _run_worker(db, now=now + timedelta(hours=2)) == 0
+    res = client.get(f"/api/v1/webhooks/{hook['id']}/deliveries", headers=admin_headers, params={"status": "dead"})
+    assert [(d["attempts"], d["last_error"]) for d in res.json()] == [(2, "HTTP 503")]
+
+    receiver.status_code = 204
+    res = client.post(f"/api/v1/webhooks/{hook['id']}/redeliver", headers=admin_headers)
+    assert res.json() == {"requeued": 1}
+    assert _run_worker(db) == 1
+    assert db.query(WebhookDelivery).one().status == "delivered"
+
+
+def test_deactivated_endpoint_gets_nothing(client, db, shop, receiver, admin_headers, seller_headers):
+    """✅ Un webhook desactivado no recibe eventos y el secreto no se vuelve a mostrar"""
+    hook = _register(client, admin_headers, receiver.url, event_types=["sale.created"])
+    res = client.put(f"/api/v1/webhooks/{hook['id']}", headers=admin_headers, json={"is_active": False})
+    assert res.status_code == 200
+    assert "secret" not in res.json()
+
+    make_sale(client, seller_headers, shop)
+    assert _run_worker(db) == 0
+    assert receiver.requests == []
+
+
+def test_webhook_validation_and_permissions(client, shop, admin_headers, seller_headers):
+    """❌ Tipos desconocidos, URL inválida y usuarios sin permiso"""
+    res = client.post("/api/v1/webhooks/", headers=admin_headers, json={
+        "url": "https://erp.example.com/hook", "event_types": ["sale.deleted"]
+    })
+    assert res.status_code == 422
+
+    res = client.post("/api/v1/webhooks/", headers=admin_headers, json={
+        "url": "not-a-url", "event_types": ["sale.created"]
+    })
+    assert res.status_code == 422
+
+    res = client.post("/api/v1/webhooks/", headers=seller_headers, json={
+        "url": "https://erp.example.com/hook", "event_types": ["sale.created"]
+    })
+    assert res.status_code == 403